@@ -21,6 +21,11 @@ function activate_venv() {
 }
 
 function is_docker_running() {
+    # a sharded network runs as one compose project per shard
+    if [[ -f ./docker/data/.env.shards ]]; then
+        python3 ./py/shards.py running
+        return
+    fi
     if [[ -n "$(docker compose -f ./docker/docker-compose.yml ps -q)" ]]; then
         return 0
     else
@@ -33,16 +38,54 @@ function start_network() {
         echo "[ERROR] Docker Compose file not found. Please ensure you have the correct path."
         exit 1
     fi
+    local snapshot=""
+    local wave_args=()
+    while [[ $# -gt 0 ]]; do
+        case "$1" in
+        --snapshot)
+            if [[ -z "${2:-}" ]]; then
+                echo "[ERROR] Missing snapshot name. Usage: $0 start --snapshot NAME"
+                exit 1
+            fi
+            snapshot="$2"
+            shift 2
+            ;;
+        *)
+            wave_args+=("$1")
+            shift
+            ;;
+        esac
+    done
     # check if a docker is already running
     if is_docker_running; then
         echo "[WARNING] Docker is already running. Stopping existing containers..."
         docker compose -f ./docker/docker-compose.yml down -v --remove-orphans
     fi
+    # datadirs mounted from the host (NODE_DATADIRS) are not removed with the containers
+    if [[ -n "$snapshot" ]]; then
+        python3 ./py/snapshot.py restore "$snapshot"
+    else
+        python3 ./py/snapshot.py clear
+    fi
     echo "Starting Bitcoin network..."
-    docker compose -f ./docker/docker-compose.yml up -d
+    # nodes are started in waves of START_WAVE_SIZE, each waiting for the previous one to be healthy
+    python3 ./py/staged_start.py ${wave_args[@]+"${wave_args[@]}"}
+}
+
+function update_network() {
+    if [[ ! -f ./docker/docker-compose.yml ]]; then
+        echo "[ERROR] Docker Compose file not found. Please ensure you have the correct path."
+        exit 1
+    fi
+    # compose only recreates the services whose configuration changed, the others keep their chain
+    docker compose -f ./docker/docker-compose.yml up -d --remove-orphans
 }
 
 function stop_network() {
+    if [[ -f ./docker/data/.env.shards ]]; then
+        echo "[ERROR] The network is sharded. Stop its shards with $0 shards down"
+        return 1
+    fi
     # check if a docker is running
     if ! is_docker_running; then
         echo "[ERROR] No Docker containers are running."
@@ -56,7 +99,7 @@ function stop_network() {
 function generate_config() {
     echo "Generating compose file..."
     if [[ -f ./py/generate_compose.py ]]; then
-        python3 ./py/generate_compose.py
+        python3 ./py/generate_compose.py "$@"
     else
         echo "[ERROR] Configuration generation script not found."
         exit 1
@@ -78,14 +121,120 @@ function draw_network() {
     fi
 }
 
+function run_sweep() {
+    if [[ -f ./py/sweep.py ]]; then
+        python3 ./py/sweep.py "$@"
+    else
+        echo "[ERROR] Sweep script not found."
+        exit 1
+    fi
+}
+
+function watch_network() {
+    if [[ -f ./py/watch_network.py ]]; then
+        python3 ./py/watch_network.py "$@"
+    else
+        echo "[ERROR] Topology recording script not found."
+        exit 1
+    fi
+}
+
+function export_network() {
+    if ! is_docker_running; then
+        echo "[ERROR] Docker is not running. Please start the network first."
+        exit 1
+    fi
+
+    if [[ -f ./py/export_network.py ]]; then
+        python3 ./py/export_network.py "$@"
+    else
+        echo "[ERROR] Network export script not found."
+        exit 1
+    fi
+}
+
+function run_dashboard() {
+    if ! is_docker_running; then
+        echo "[ERROR] Docker is not running. Please start the network first."
+        exit 1
+    fi
+
+    if [[ -f ./py/dashboard.py ]]; then
+        python3 ./py/dashboard.py "$@"
+    else
+        echo "[ERROR] Dashboard script not found."
+        exit 1
+    fi
+}
+
+function reconcile_network() {
+    if ! is_docker_running; then
+        echo "[ERROR] Docker is not running. Please start the network first."
+        exit 1
+    fi
+
+    if [[ -f ./py/reconcile_network.py ]]; then
+        python3 ./py/reconcile_network.py "$@"
+    else
+        echo "[ERROR] Network reconciliation script not found."
+        exit 1
+    fi
+}
+
+function rewire_network() {
+    if ! is_docker_running; then
+        echo "[ERROR] Docker is not running. Please start the network first."
+        exit 1
+    fi
+
+    if [[ -f ./py/rewire_network.py ]]; then
+        python3 ./py/rewire_network.py "$@"
+    else
+        echo "[ERROR] Network rewiring script not found."
+        exit 1
+    fi
+}
+
+function run_snapshot() {
+    if [[ "${1:-}" == "save" ]] && ! is_docker_running; then
+        echo "[ERROR] Docker is not running. Please start the network first."
+        exit 1
+    fi
+
+    if [[ -f ./py/snapshot.py ]]; then
+        python3 ./py/snapshot.py "$@"
+    else
+        echo "[ERROR] Snapshot script not found."
+        exit 1
+    fi
+}
+
+function run_shards() {
+    if [[ -f ./py/shards.py ]]; then
+        python3 ./py/shards.py "$@"
+    else
+        echo "[ERROR] Shards script not found."
+        exit 1
+    fi
+}
+
 function print_help() {
-    echo "Usage: $0 start|stop|renew|draw|scenario|draw [output_file]"
-    echo "  start: Start the Bitcoin network with the current configuration."
+    echo "Usage: $0 start|stop|renew|update|draw|scenario|snapshot|shards|sweep|watch|export|dashboard|reconcile|rewire|draw [output_file]"
+    echo "  start [--snapshot NAME] [--wave-size N]: Start the Bitcoin network with the current configuration (--snapshot: from a saved chain state, --wave-size: N nodes at a time)."
     echo "  stop: Stop the Bitcoin network."
-    echo "  renew: Generate a new Docker Compose file."
+    echo "  renew [--incremental] [--estimate]: Generate a new Docker Compose file (--incremental: keep the existing nodes as they are, --estimate: only print the host memory the nodes need)."
+    echo "  update: Apply the compose file to the running network, only recreating the services that changed."
     echo "  restart: Restart the Bitcoin network."
     echo "  scenario [args]: Use scenario features (see $0 scenario -h for details)."
     echo "  draw [output_file]: Draw the network topology and save it to output_file (default: img/bitcoin_network_map.png)."
+    echo "  export <output_file> [--format F]: Export the network topology as GraphML, JSON, DOT or CSV."
+    echo "  dashboard [--port P]: Serve a live view of the network topology and its metrics (default: http://127.0.0.1:8050)."
+    echo "  reconcile [--dry-run]: Repair the connections of the running network that differ from the generated topology."
+    echo "  rewire --file F | --max-peers N [--dry-run]: Apply a new topology to the running network, keeping the chain state."
+    echo "  snapshot save|restore|clear|list [NAME]: Save the chain state of the nodes, to start new networks from it (see $0 snapshot -h for details)."
+    echo "  shards up|down|ps|running [--host H]: Run the shards of a sharded network (NETWORK_SHARDS) on this host, and print the commands of the other hosts."
+    echo "  sweep <scenario> --param NAME=v1,v2 [...]: Run a scenario on a grid of parameters (see $0 sweep -h for details)."
+    echo "  watch record|show|metrics|traffic|traffic-report [args]: Record the network topology over time, or read a recording (see $0 watch -h for details)."
 }
 
 # ==== Main logic ====
@@ -95,7 +244,7 @@ activate_venv
 case "$ARG1" in
 "start")
     echo "[INFO ] Start Bitcoin network with current configuration"
-    start_network
+    start_network "${@:2}"
     ./script/bit-logs.sh
     ;;
 "stop")
@@ -104,8 +253,20 @@ case "$ARG1" in
     ;;
 "renew")
     echo "[INFO ] Generating new compose file"
-    generate_config
-    echo "[INFO ] You can now start the network with $0 start"
+    generate_config "${@:2}"
+    if [[ " ${*:2} " == *" --estimate "* ]]; then
+        :
+    elif [[ " ${*:2} " == *" --incremental "* ]]; then
+        echo "[INFO ] You can now apply the changes with $0 update"
+    elif [[ -f ./docker/data/.env.shards ]]; then
+        echo "[INFO ] You can now start the shards with $0 shards up"
+    else
+        echo "[INFO ] You can now start the network with $0 start"
+    fi
+    ;;
+"update")
+    echo "[INFO ] Applying compose file changes to the running network"
+    update_network
     ;;
 "draw")
     echo "[INFO ] Drawing network topology"
@@ -115,6 +276,22 @@ case "$ARG1" in
         draw_network "$2"
     fi
     ;;
+"export")
+    echo "[INFO ] Exporting network topology"
+    export_network "${@:2}"
+    ;;
+"dashboard")
+    echo "[INFO ] Starting network dashboard"
+    run_dashboard "${@:2}"
+    ;;
+"reconcile")
+    echo "[INFO ] Reconciling network topology"
+    reconcile_network "${@:2}"
+    ;;
+"rewire")
+    echo "[INFO ] Rewiring network topology"
+    rewire_network "${@:2}"
+    ;;
 "restart")
     echo "[INFO ] Restarting Bitcoin network..."
     docker compose -f ./docker/docker-compose.yml restart
@@ -123,6 +300,23 @@ case "$ARG1" in
     echo "[INFO ] Using scenario features"
     ./script/scenario.sh "${@:2}"
     ;;
+"snapshot")
+    run_snapshot "${@:2}"
+    ;;
+"shards")
+    run_shards "${@:2}"
+    ;;
+"sweep")
+    echo "[INFO ] Running parameter sweep"
+    run_sweep "${@:2}"
+    ;;
+"watch")
+    if ! is_docker_running && [[ "${2:-}" == "record" || "${2:-}" == "traffic" ]]; then
+        echo "[ERROR] Docker is not running. Please start the network first."
+        exit 1
+    fi
+    watch_network "${@:2}"
+    ;;
 "help")
     print_help
     ;;
@@ -0,0 +1,55 @@
+# this file measures the time taken to generate the topology and the node commands of large networks
+
+import argparse
+import time
+
+from generate_compose import TOPOLOGY_MODELS, compute_ports, generate_command, generate_names, generate_topology
+
+TEMPLATE = "docker/templates/docker-command.template"
+
+
+def bench(node_number: int, max_peers: int, seed: int = 0, model: str = "uniform") -> dict:
+    """Time the generation steps of write_compose for one network size (nothing is written).
+
+    Args:
+        node_number (int): Number of nodes.
+        max_peers (int): Maximum number of peers of each node.
+        seed (int, optional): Seed of the peer generation. Defaults to 0.
+        model (str, optional): Topology model. Defaults to "uniform".
+
+    Returns:
+        dict: Seconds spent generating the peers and the commands.
+    """
+    names = generate_names(node_number, "node")
+    ports = compute_ports(node_number, 18443, 18444, "node")
+
+    start = time.perf_counter()
+    peers = generate_topology(names, model, max_peers=max_peers, seed=seed)
+    peers_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name in names:
+        generate_command(TEMPLATE, "user", "password", max_peers, ports[name][0], ports[name][1], peers[name], ports)
+    commands_time = time.perf_counter() - start
+
+    return {"peers": peers_time, "commands": commands_time}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the generation of large networks")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[100, 1000, 5000, 10000],
+                        help="Network sizes (default: 100 1000 5000 10000)")
+    parser.add_argument("--max-peers", type=int, default=128, help="MAX_PEERS of the nodes (default: 128)")
+    parser.add_argument("--model", nargs="+", choices=[m for m in TOPOLOGY_MODELS if m != "file"], default=["uniform"],
+                        help="Topology models (default: uniform)")
+    args = parser.parse_args()
+
+    print(f"{'model':>16} {'nodes':>8} {'peers (s)':>10} {'commands (s)':>13}")
+    for model in args.model:
+        for node_number in args.nodes:
+            times = bench(node_number, args.max_peers, model=model)
+            print(f"{model:>16} {node_number:>8} {times['peers']:>10.3f} {times['commands']:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,50 @@ MAX_PEERS = int(os.getenv("MAX_PEERS", 0))
 NODE_BASE_RPC_PORT = int(os.getenv("NODE_BASE_RPC_PORT", 18443))
 NODE_BASE_P2P_PORT = int(os.getenv("NODE_BASE_P2P_PORT", 18444))
 
+# ==== topology ====
+# model of the peer generation (see generate_compose.TOPOLOGY_MODELS) and its parameters
+TOPOLOGY_MODEL = os.getenv("TOPOLOGY_MODEL", "uniform")
+TOPOLOGY_DEGREE = int(os.getenv("TOPOLOGY_DEGREE", 8))
+TOPOLOGY_REWIRE = float(os.getenv("TOPOLOGY_REWIRE", 0.1))
+TOPOLOGY_CLUSTERS = int(os.getenv("TOPOLOGY_CLUSTERS", 4))
+TOPOLOGY_FILE = os.getenv("TOPOLOGY_FILE") or None
+
+# connection slots of the nodes (empty inbound: MAX_PEERS - 11, as bitcoind)
+TOPOLOGY_MAX_OUTBOUND = int(os.getenv("TOPOLOGY_MAX_OUTBOUND", 8))
+TOPOLOGY_MAX_INBOUND = int(os.getenv("TOPOLOGY_MAX_INBOUND")) if os.getenv("TOPOLOGY_MAX_INBOUND") else None
+
+# seed of the peer generation (empty: a new topology each time)
+TOPOLOGY_SEED = int(os.getenv("TOPOLOGY_SEED")) if os.getenv("TOPOLOGY_SEED") else None
+
+# processes rendering the compose file (1: no parallel rendering)
+COMPOSE_WORKERS = int(os.getenv("COMPOSE_WORKERS", 1))
+
+# resource profiles of the nodes (see generate_compose.RESOURCE_PROFILES): "profile:ratio,..." and "node:profile,..."
+NODE_PROFILES = os.getenv("NODE_PROFILES", "")
+NODE_PROFILE_NODES = os.getenv("NODE_PROFILE_NODES", "")
+# host CPUs the nodes are pinned to, one per node in turn (e.g. 0-15, empty: no pinning)
+NODE_CPUSET = os.getenv("NODE_CPUSET") or None
+
+# latency matrix shaping the traffic between regions of nodes (see netem.py, empty: no shaping)
+NETEM_FILE = os.getenv("NETEM_FILE") or None
+# subnet of the network when the nodes get static IPs (traffic shaping)
+NETEM_SUBNET = os.getenv("NETEM_SUBNET", "172.28.0.0/16")
+# image of the sidecars applying the traffic shaping (needs tc)
+NETEM_IMAGE = os.getenv("NETEM_IMAGE", "nicolaka/netshoot:v0.13")
+
+# number of compose projects (each with its own bridge network) the network is split into (1: a single one)
+NETWORK_SHARDS = int(os.getenv("NETWORK_SHARDS", 1))
+# hosts of the shards, used in turn (e.g. 10.0.0.1,10.0.0.2, empty: all on this host)
+SHARD_HOSTS = [host.strip() for host in os.getenv("SHARD_HOSTS", "").split(",") if host.strip()]
+
+# interval of the RPC healthcheck of each node (docker duration)
+HEALTHCHECK_INTERVAL = os.getenv("HEALTHCHECK_INTERVAL", "5s")
+
+# nodes started at once by 'start', each wave waiting for the previous one to be healthy (0: all at once)
+START_WAVE_SIZE = int(os.getenv("START_WAVE_SIZE", 0))
+# seconds to wait for the nodes of a wave to be healthy
+START_WAVE_TIMEOUT = float(os.getenv("START_WAVE_TIMEOUT", 120))
+
 # ==== names ====
 NODE_BASE_NAME = os.getenv("NODE_BASE_NAME", "node")
 
@@ -27,8 +71,15 @@ RPC_PASSWORD = os.getenv("RPC_PASSWORD", "password")
 # ==== data ====
 LOGS_PATH = os.getenv("LOGS_PATH", "./logs")
 
+# host directory of the node datadirs, relative to ./docker (empty: docker volumes, wiped by start)
+NODE_DATADIRS = os.getenv("NODE_DATADIRS") or None
+# chain snapshots saved by 'snapshot save' and restored by 'start --snapshot'
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "./docker/snapshots")
+
 LOG_NET_ENABLED = os.getenv("LOG_NET_ENABLED", "true").lower() == "true"
 LOG_MEMPOOL_ENABLED = os.getenv("LOG_MEMPOOL_ENABLED", "true").lower() == "true"
 
 # ==== Scenarios ====
-SCENARIO_PATH = os.getenv("SCENARIO_PATH", "./scenarios")
\ No newline at end of file
+SCENARIO_PATH = os.getenv("SCENARIO_PATH", "./scenarios")
+SCENARIO_INDEX_ENABLED = os.getenv("SCENARIO_INDEX_ENABLED", "true").lower() == "true"
+ACTION_PLUGIN_PATH = os.getenv("ACTION_PLUGIN_PATH", "./plugins")
\ No newline at end of file
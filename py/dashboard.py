@@ -0,0 +1,43 @@
+# this file serves a live dashboard of the running network (see network_info/dashboard.py)
+
+import argparse
+import sys
+import threading
+
+from network_info.dashboard import TopologyFeed, run_crawler, serve_dashboard
+from registry import read_node_names
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a live view of the network topology and its metrics",
+        prog="bitcoin-on-local.sh dashboard",
+    )
+    parser.add_argument("--port", type=int, default=8050, help="Port to listen on (default: 8050)")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--interval", type=float, default=2, help="Seconds between two crawls (default: 2)")
+    args = parser.parse_args()
+
+    nodes = read_node_names()
+    if not nodes:
+        print("[ERROR] No nodes found. Please generate the network first.")
+        sys.exit(1)
+
+    feed = TopologyFeed()
+    stop = threading.Event()
+    crawler = threading.Thread(target=run_crawler, args=(feed, nodes, args.interval, stop), daemon=True)
+    crawler.start()
+
+    server = serve_dashboard(feed, args.host, args.port)
+    print(f"[INFO ] Dashboard of {len(nodes)} nodes on http://{args.host}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
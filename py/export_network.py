@@ -0,0 +1,34 @@
+# this file exports the topology of the running network (GraphML, JSON, DOT or CSV)
+
+import argparse
+import sys
+
+from network_info.export import WRITERS, export_topology, topology_edges
+from registry import read_node_names
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Crawl the running network and export its topology",
+        prog="bitcoin-on-local.sh export",
+    )
+    parser.add_argument("output", help="Output file (.graphml, .json, .dot, .gv or .csv)")
+    parser.add_argument("--format", choices=list(WRITERS), default=None,
+                        help="Output format (default: from the file extension)")
+    args = parser.parse_args()
+
+    nodes = read_node_names()
+    if not nodes:
+        print("[ERROR] No nodes found. Please generate the network first.")
+        sys.exit(1)
+
+    try:
+        export_topology(args.output, nodes, topology_edges(nodes), args.format)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
+    print(f"[DONE ] Network topology saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,24 @@
 # this file generates a docker-compose.yml file based on the provided configuration
 
+import argparse
+import math
+import multiprocessing
 import random
 import os
+import re
+import shutil
+import string
 
+from netem import NetemPlan, load_netem
+from registry import (
+    SHARDS_FILE,
+    read_compose_services,
+    read_compose_topology,
+    read_edge_list,
+    read_topology,
+    write_shards,
+    write_topology,
+)
 from config import (
     NODE_NUMBER,
     NODE_BASE_RPC_PORT,
@@ -12,7 +28,26 @@ from config import (
     RPC_USER,
     RPC_PASSWORD,
     LOG_NET_ENABLED,
-    LOG_MEMPOOL_ENABLED
+    LOG_MEMPOOL_ENABLED,
+    TOPOLOGY_SEED,
+    TOPOLOGY_MODEL,
+    TOPOLOGY_DEGREE,
+    TOPOLOGY_REWIRE,
+    TOPOLOGY_CLUSTERS,
+    TOPOLOGY_FILE,
+    TOPOLOGY_MAX_OUTBOUND,
+    TOPOLOGY_MAX_INBOUND,
+    COMPOSE_WORKERS,
+    NODE_DATADIRS,
+    HEALTHCHECK_INTERVAL,
+    NODE_PROFILES,
+    NODE_PROFILE_NODES,
+    NODE_CPUSET,
+    NETEM_FILE,
+    NETEM_SUBNET,
+    NETEM_IMAGE,
+    NETWORK_SHARDS,
+    SHARD_HOSTS,
 )
 
 # ==== functions ====
@@ -54,31 +89,531 @@ def compute_ports(number: int, base_rpc: int, base_p2p: int, base_name: str) ->
     
     return ports
 
-def generate_peers(names: list, max_peers: int) -> dict:
-    """Generate a list of peers for each node where each node has a random number of peers.
+# ==== topology models ====
+
+# bitcoind keeps 8 full-relay, 2 block-relay-only and 1 feeler outbound connections
+# out of -maxconnections: inbound connections only get the remaining slots
+RESERVED_OUTBOUND_SLOTS = 11
+# bitcoind opens at most 8 connections to -addnode peers at the same time
+MAX_ADDNODE_CONNECTIONS = 8
+
+TOPOLOGY_MODELS = {}
+
+
+def register_topology(name: str):
+    """Decorator registering a topology model. The function is called as func(names, rng, caps, params)
+    and adds its connections to caps (see DegreeCaps).
+
+    Example:
+        >>> @register_topology("line")
+        ... def line(names, rng, caps, params):
+        ...     for i in range(len(names) - 1):
+        ...         caps.add(i, i + 1)
+    """
+    def decorator(func):
+        TOPOLOGY_MODELS[name] = func
+        return func
+    return decorator
+
+
+class DegreeCaps:
+    """The generated connections, kept within the connection slots of each node.
+
+    Connections are between node indices. A pair of nodes gets at most one connection,
+    as bitcoind does not open a second one to a peer it is already connected to.
+    """
+
+    def __init__(self, names: list, max_outbound: int, max_inbound: int):
+        """
+        Args:
+            names (list): List of node names.
+            max_outbound (int): Maximum number of peers a node adds.
+            max_inbound (int): Maximum number of nodes adding the same peer.
+        """
+        self.names = names
+        self.max_outbound = max_outbound
+        self.max_inbound = max_inbound
+        self.outbound = [0] * len(names)
+        self.inbound = [0] * len(names)
+        self.peers = [[] for _ in names]
+        self.pairs = set()
+        self.dropped = 0  # connections refused because a node had no slot left
+        self.locked = set()  # nodes whose peers must not change
+
+    def keep(self, i: int, peers: list) -> None:
+        """Give node i the peers it already had, and lock them (the node adds no other peer)."""
+        for j in peers:
+            if i != j and (min(i, j), max(i, j)) not in self.pairs:
+                self.pairs.add((min(i, j), max(i, j)))
+                self.outbound[i] += 1
+                self.inbound[j] += 1
+                self.peers[i].append(j)
+        self.locked.add(i)
+
+    def add(self, i: int, j: int) -> bool:
+        """Make node i add node j, if both have a free slot.
+
+        Returns:
+            bool: Whether the connection was added.
+        """
+        if i == j or i in self.locked or (min(i, j), max(i, j)) in self.pairs:
+            return False
+        if self.outbound[i] >= self.max_outbound or self.inbound[j] >= self.max_inbound:
+            self.dropped += 1
+            return False
+        self.pairs.add((min(i, j), max(i, j)))
+        self.outbound[i] += 1
+        self.inbound[j] += 1
+        self.peers[i].append(j)
+        return True
+
+    def connect(self, i: int, j: int, rng) -> bool:
+        """Connect two nodes whichever adds the other (chosen at random, the other way if it has no slot).
+
+        Returns:
+            bool: Whether the connection was added.
+        """
+        if rng.random() < 0.5:
+            i, j = j, i
+        dropped = self.dropped
+        if self.add(i, j) or self.add(j, i):
+            self.dropped = dropped  # only the first direction was full
+            return True
+        self.dropped = min(self.dropped, dropped + 1)
+        return False
+
+    def result(self) -> dict:
+        """Get the peers of each node, as returned by generate_topology."""
+        return {name: [self.names[j] for j in peers] for name, peers in zip(self.names, self.peers)}
+
+
+def _other(rng, n: int, i: int) -> int:
+    """Draw a random node index other than i."""
+    j = rng.randrange(n - 1)
+    return j + 1 if j >= i else j
+
+
+@register_topology("uniform")
+def uniform_model(names, rng, caps, params):
+    """Each node adds between 1 and max_peers random peers, within max_outbound."""
+    n = len(names)
+    for i in range(n):
+        num_peers = rng.randint(1, min(params["max_peers"], caps.max_outbound, n - 1))
+        for j in rng.sample(range(n - 1), num_peers):
+            caps.add(i, j + 1 if j >= i else j)
+
+
+@register_topology("random_regular")
+def random_regular_model(names, rng, caps, params):
+    """Every node gets `degree` connections (pairing of connection stubs; self and repeated pairs are dropped)."""
+    stubs = [i for i in range(len(names)) for _ in range(params["degree"])]
+    rng.shuffle(stubs)
+    for k in range(0, len(stubs) - 1, 2):
+        caps.connect(stubs[k], stubs[k + 1], rng)
+
+
+@register_topology("erdos_renyi")
+def erdos_renyi_model(names, rng, caps, params):
+    """Every pair of nodes is connected with the same probability, giving `degree` connections per node on average.
+
+    Pairs are skipped geometrically (Batagelj & Brandes), so only the connections made are drawn.
+    """
+    n = len(names)
+    p = min(params["degree"] / (n - 1), 1.0)
+    if p <= 0:
+        return
+    if p >= 1:
+        for v in range(n):
+            for w in range(v):
+                caps.connect(v, w, rng)
+        return
+    log_q = math.log(1.0 - p)
+    v, w = 1, -1
+    while v < n:
+        w += 1 + int(math.log(1.0 - rng.random()) / log_q)
+        while w >= v and v < n:
+            w -= v
+            v += 1
+        if v < n:
+            caps.connect(v, w, rng)
+
+
+@register_topology("barabasi_albert")
+def barabasi_albert_model(names, rng, caps, params):
+    """Nodes join one by one and add `degree / 2` peers, chosen proportionally to their connections
+    (preferential attachment). Popular nodes stop being added once their inbound slots are full.
+    """
+    n = len(names)
+    m = max(1, min(params["degree"] // 2, n - 1))
+    # every node appears once per connection: drawing from it is drawing proportionally to the degree
+    repeated = []
+    targets = list(range(m))
+    for source in range(m, n):
+        for target in targets:
+            if caps.add(source, target):
+                repeated.extend((source, target))
+        chosen = set()
+        for _ in range(10 * m):
+            if len(chosen) == m:
+                break
+            chosen.add(rng.choice(repeated) if repeated else rng.randrange(source + 1))
+        targets = list(chosen)
+
+
+@register_topology("watts_strogatz")
+def watts_strogatz_model(names, rng, caps, params):
+    """Ring where each node is connected to its `degree` nearest nodes, each connection being
+    moved to a random node with probability `rewire` (small world).
+    """
+    n = len(names)
+    for i in range(n):
+        for step in range(1, params["degree"] // 2 + 1):
+            j = (i + step) % n
+            if rng.random() < params["rewire"]:
+                j = _other(rng, n, i)
+            caps.connect(i, j, rng)
+
+
+@register_topology("geographic")
+def geographic_model(names, rng, caps, params):
+    """Nodes are placed on a ring (like longitudes), grouped around `clusters` regions, and connected
+    to their `degree` nearest nodes. A `rewire` fraction of the connections go to random distant nodes.
+    """
+    n = len(names)
+    centers = [rng.random() for _ in range(max(1, params["clusters"]))]
+    spread = 0.1 / len(centers)
+    position = [(rng.choice(centers) + rng.gauss(0, spread)) % 1.0 for _ in range(n)]
+    order = sorted(range(n), key=position.__getitem__)
+
+    def distance(a, b):
+        d = abs(position[a] - position[b])
+        return min(d, 1.0 - d)
+
+    for rank, i in enumerate(order):
+        # merge the nodes on both sides of i, nearest first
+        left, right = 1, 1
+        for _ in range(min(params["degree"], n - 1)):
+            if rng.random() < params["rewire"]:
+                caps.connect(i, _other(rng, n, i), rng)
+                continue
+            a, b = order[(rank - left) % n], order[(rank + right) % n]
+            if distance(i, a) <= distance(i, b):
+                j, left = a, left + 1
+            else:
+                j, right = b, right + 1
+            caps.connect(i, j, rng)
+
+
+@register_topology("file")
+def file_model(names, rng, caps, params):
+    """Connections read from an edge-list file (one "node peer" or CSV "source,target" line each)."""
+    index = {name: i for i, name in enumerate(names)}
+    for source, target in read_edge_list(params["file"]):
+        if source not in index or target not in index:
+            raise ValueError(f"Unknown node in {params['file']}: {source if source not in index else target}")
+        caps.add(index[source], index[target])
+
+
+def generate_topology(
+        names: list,
+        model: str = "uniform",
+        max_peers: int = 128,
+        seed: int = None,
+        max_outbound: int = MAX_ADDNODE_CONNECTIONS,
+        max_inbound: int = None,
+        degree: int = 8,
+        rewire: float = 0.1,
+        clusters: int = 4,
+        file: str = None,
+        previous: dict = None,
+    ) -> dict:
+    """Generate the peers of each node with a topology model, within the connection slots of the nodes.
+
+    Every model takes about O(n * degree) time (O(n log n) for geographic), so networks of
+    thousands of nodes are generated in well under a second.
+
     Args:
         names (list): List of node names.
-        max_peers (int): Maximum number of peers each node can have.
+        model (str, optional): Name of a model of TOPOLOGY_MODELS. Defaults to "uniform".
+        max_peers (int, optional): -maxconnections of the nodes. Defaults to 128.
+        seed (int, optional): Seed of the random generator. Defaults to None.
+        max_outbound (int, optional): Maximum number of peers a node adds. Defaults to MAX_ADDNODE_CONNECTIONS.
+        max_inbound (int, optional): Maximum number of nodes adding the same peer. Defaults to None
+            (the inbound slots of bitcoind: max_peers - RESERVED_OUTBOUND_SLOTS).
+        degree (int, optional): Connections per node (average for erdos_renyi, barabasi_albert). Defaults to 8.
+        rewire (float, optional): Share of random connections (watts_strogatz, geographic). Defaults to 0.1.
+        clusters (int, optional): Number of regions (geographic). Defaults to 4.
+        file (str, optional): Edge-list file (file). Defaults to None.
+        previous (dict, optional): Peers of the nodes of a previous generation. These nodes keep their
+            peers (except removed nodes) and the model only adds peers to the new nodes. Defaults to None.
+
+    Raises:
+        ValueError: If the model is unknown, or the file refers to unknown nodes.
 
     Returns:
         dict: A dictionary where keys are node names and values are lists of peer names.
     """
-        
-    peers = {}
-        
+    if model not in TOPOLOGY_MODELS:
+        raise ValueError(f"Unknown topology model '{model}' (supported: {', '.join(TOPOLOGY_MODELS)})")
+    if model == "file" and not file:
+        raise ValueError("The file topology model needs a file")
+    if max_inbound is None:
+        max_inbound = max(max_peers - RESERVED_OUTBOUND_SLOTS, 0)
+        if max_inbound == 0:
+            print(f"[WARNING] MAX_PEERS={max_peers} leaves no inbound slot: nodes will refuse every connection")
+    
+    rng = random if seed is None else random.Random(seed)
+    caps = DegreeCaps(names, max_outbound, max_inbound)
+    index = {name: i for i, name in enumerate(names)}
+    for name, peers in (previous or {}).items():
+        if name in index:
+            caps.keep(index[name], [index[peer] for peer in peers if peer in index])
+    if len(names) > 1:
+        params = {"max_peers": max_peers, "degree": degree, "rewire": rewire, "clusters": clusters, "file": file}
+        TOPOLOGY_MODELS[model](names, rng, caps, params)
+    if caps.dropped:
+        print(f"[WARNING] {caps.dropped} connections dropped to respect the connection slots "
+              f"({max_outbound} outbound, {max_inbound} inbound)")
+    return caps.result()
+
+def topology_config() -> dict:
+    """Get the generate_topology arguments set in the config (TOPOLOGY_* keys)."""
+    return {
+        "model": TOPOLOGY_MODEL,
+        "degree": TOPOLOGY_DEGREE,
+        "rewire": TOPOLOGY_REWIRE,
+        "clusters": TOPOLOGY_CLUSTERS,
+        "file": TOPOLOGY_FILE,
+        "max_outbound": TOPOLOGY_MAX_OUTBOUND,
+        "max_inbound": TOPOLOGY_MAX_INBOUND,
+    }
+
+# ==== resource profiles ====
+
+# limits of the container (cpus, mem_limit) and bitcoind options of each profile (memory in MB)
+RESOURCE_PROFILES = {
+    "tiny": {"cpus": 0.1, "mem_limit": 96, "dbcache": 4, "maxmempool": 5, "par": 1, "rpcthreads": 1, "rpcworkqueue": 16},
+    "relay": {"cpus": 0.25, "mem_limit": 128, "dbcache": 8, "maxmempool": 10, "par": 1, "rpcthreads": 2, "rpcworkqueue": 32},
+    "miner": {"cpus": 1.0, "mem_limit": 384, "dbcache": 64, "maxmempool": 50, "par": 2, "rpcthreads": 4, "rpcworkqueue": 64},
+}
+PROFILE_OPTIONS = ("dbcache", "maxmempool", "par", "rpcthreads", "rpcworkqueue")
+
+# memory of an idle regtest bitcoind besides its caches, and of the container runtime (MB, measured roughly)
+BITCOIND_BASE_MEMORY = 40
+CONTAINER_OVERHEAD_MEMORY = 8
+# bitcoind defaults, for nodes without profile
+DEFAULT_DBCACHE = 450
+DEFAULT_MAXMEMPOOL = 300
+
+def parse_pairs(value: str) -> dict:
+    """Parse a "key:value,key:value" config value.
+
+    Args:
+        value (str): The config value (may be empty).
+
+    Raises:
+        ValueError: If an item is not "key:value".
+
+    Returns:
+        dict: {key: value} as strings, in order.
+    """
+    pairs = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        key, sep, val = item.partition(":")
+        if not sep or not key.strip() or not val.strip():
+            raise ValueError(f"Invalid item '{item.strip()}', expected 'key:value'")
+        pairs[key.strip()] = val.strip()
+    return pairs
+
+def assign_shares(names: list, shares: dict) -> dict:
+    """Split the nodes between groups, to consecutive nodes in the order of the groups.
+
+    Args:
+        names (list): List of node names.
+        shares (dict): Share of the nodes of each group (normalized, so {"a": 1, "b": 9} works too).
+
+    Returns:
+        dict: The group of each node (empty if there are no shares).
+    """
+    assigned = {}
+    total = sum(shares.values())
+    if total <= 0:
+        return assigned
+    # largest remainders, so that the counts add up to the number of nodes
+    exact = {group: len(names) * share / total for group, share in shares.items()}
+    counts = {group: math.floor(share) for group, share in exact.items()}
+    left = len(names) - sum(counts.values())
+    for group in sorted(exact, key=lambda g: counts[g] - exact[g])[:left]:
+        counts[group] += 1
+    it = iter(names)
+    for group, count in counts.items():
+        for _ in range(count):
+            assigned[next(it)] = group
+    return assigned
+
+def assign_profiles(names: list, ratios: dict = None, nodes: dict = None) -> dict:
+    """Assign a resource profile to each node.
+
+    Profiles are given to consecutive nodes, in the order of the ratios (e.g. with
+    {"miner": 0.1, "tiny": 0.9}, the first tenth of the nodes are miners), then the
+    nodes set explicitly get their own profile.
+
+    Args:
+        names (list): List of node names.
+        ratios (dict, optional): Share of the nodes of each profile. Shares are normalized,
+            so {"miner": 1, "tiny": 9} works too. Defaults to None.
+        nodes (dict, optional): Profile of some nodes, whatever the ratios. Defaults to None.
+
+    Raises:
+        ValueError: If a profile is unknown, or a ratio is negative.
+
+    Returns:
+        dict: The profile name of each node with a profile (nodes without profile are not limited).
+    """
+    ratios, nodes = ratios or {}, nodes or {}
+    for profile in (*ratios, *nodes.values()):
+        if profile not in RESOURCE_PROFILES:
+            raise ValueError(f"Unknown resource profile '{profile}' (supported: {', '.join(RESOURCE_PROFILES)})")
+    if any(ratio < 0 for ratio in ratios.values()):
+        raise ValueError("Profile ratios must be positive")
+    
+    assigned = assign_shares(names, ratios)
+    for name, profile in nodes.items():
+        if name in names:
+            assigned[name] = profile
+    return assigned
+
+def assign_regions(names: list, config) -> dict:
+    """Place each node in a region of a netem file.
+
+    Args:
+        names (list): List of node names.
+        config (NetemConfig): The netem file (see netem.load_netem).
+
+    Raises:
+        ValueError: If some nodes have no region.
+
+    Returns:
+        dict: The region of each node, in node order.
+    """
+    assigned = assign_shares(names, config.shares)
+    known = set(names)
+    for name, region in config.nodes.items():
+        if name in known:
+            assigned[name] = region
+    missing = [name for name in names if name not in assigned]
+    if missing:
+        raise ValueError(f"{len(missing)} nodes have no region (e.g. {missing[0]}): set [regions] shares")
+    return {name: assigned[name] for name in names}
+
+def profile_config() -> dict:
+    """Get the assign_profiles arguments set in the config (NODE_PROFILES and NODE_PROFILE_NODES)."""
+    return {
+        "ratios": {profile: float(ratio) for profile, ratio in parse_pairs(NODE_PROFILES).items()},
+        "nodes": parse_pairs(NODE_PROFILE_NODES),
+    }
+
+def parse_cpuset(value: str) -> list:
+    """Parse a list of CPUs ("0-3,8" -> ["0", "1", "2", "3", "8"]).
+
+    Raises:
+        ValueError: If the list is not valid.
+    """
+    cpus = []
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        first, _, last = item.partition("-")
+        if not first.isdigit() or (last and not last.isdigit()):
+            raise ValueError(f"Invalid CPU list '{value}', expected e.g. '0-3,8'")
+        cpus.extend(str(cpu) for cpu in range(int(first), int(last or first) + 1))
+    return cpus
+
+def estimate_memory(names: list, profiles: dict) -> dict:
+    """Estimate the host memory used by the nodes.
+
+    A node can use up to its caches (dbcache, maxmempool) on top of an idle bitcoind, but
+    no more than the memory limit of its container.
+
+    Args:
+        names (list): List of node names.
+        profiles (dict): Profile of each node, as returned by assign_profiles.
+
+    Returns:
+        dict: For each profile (None: no profile), the "nodes" count, the "expected" memory of one
+            node and the memory "limit" of one node (None: not limited), in MB.
+    """
+    estimate = {}
     for name in names:
-        # Get all other nodes (excluding the current node)
-        available_peers = [n for n in names if n != name]
-         
-        # Determine random number of peers (between 1 and max_peers, but not more than available peers)
-        num_peers = random.randint(1, min(max_peers, len(available_peers)))
-            
-        # Randomly select peers
-        selected_peers = random.sample(available_peers, num_peers)
-            
-        peers[name] = selected_peers
-        
-    return peers
+        profile = profiles.get(name)
+        if profile not in estimate:
+            if profile is None:
+                expected, limit = BITCOIND_BASE_MEMORY + DEFAULT_DBCACHE + DEFAULT_MAXMEMPOOL, None
+            else:
+                values = RESOURCE_PROFILES[profile]
+                limit = values["mem_limit"]
+                expected = min(BITCOIND_BASE_MEMORY + values["dbcache"] + values["maxmempool"], limit)
+            estimate[profile] = {"nodes": 0, "expected": expected + CONTAINER_OVERHEAD_MEMORY, "limit": limit}
+        estimate[profile]["nodes"] += 1
+    return estimate
+
+# ==== templates ====
+
+# datadir of bitcoind in the containers (see the image)
+CONTAINER_DATADIR = '/home/bitcoin/.bitcoin'
+# address of the host in the containers, to reach the nodes of other shards of the same host
+SHARD_GATEWAY = 'host.docker.internal'
+
+COMMAND_TEMPLATE = 'docker/templates/docker-command.template'
+SERVICE_TEMPLATE = 'docker/templates/docker-service.template'
+COMPOSE_TEMPLATE = 'docker/templates/docker-compose.template'
+
+class Template:
+    """A template parsed once: rendering only joins its parts with the given values."""
+    
+    def __init__(self, text: str):
+        """
+        Args:
+            text (str): Template text, with {FIELD} placeholders ({{ and }} for braces).
+        """
+        self.text = text
+        self.parts = [(literal, field) for literal, field, _, _ in string.Formatter().parse(text)]
+    
+    def __call__(self, **values) -> str:
+        """Render the template with the value of each of its fields."""
+        return "".join(
+            literal if field is None else f"{literal}{values[field]}"
+            for literal, field in self.parts
+        )
+
+_TEMPLATES = {}
+
+def load_template(template_path: str) -> Template:
+    """Load and parse a template once (again only if the file changes).
+
+    Args:
+        template_path (str): Path of the .template file.
+
+    Raises:
+        ValueError: If the file does not have a .template extension.
+
+    Returns:
+        Template: The parsed template.
+    """
+    # check the format of template file
+    if not template_path.endswith('.template'):
+        raise ValueError("Template file must have a .template extension.")
+    
+    key = (template_path, os.stat(template_path).st_mtime_ns)
+    template = _TEMPLATES.get(key)
+    if template is None:
+        with open(template_path, 'r') as file:
+            template = Template(file.read())
+        _TEMPLATES[key] = template
+    return template
 
 def generate_command(
         template_path,
@@ -89,46 +624,50 @@ def generate_command(
         p2p_port,
         peers,
         all_ports : dict,
+        options: dict = None,
+        addresses: dict = None,
     ):
     
-    add_command = ""
+    addresses = addresses or {}
+    lines = []
     for peer in peers:
         if peer in all_ports:
             _ , p2p_peer = all_ports[peer]
-            add_command += f"    - -addnode={peer}:{p2p_peer} \n"
-            #                 ^ the indentation is important for the docker-compose file
+            # peers of other shards are reached through the published port of their host
+            lines.append(f"    - -addnode={addresses.get(peer, peer)}:{p2p_peer} ")
+            #              ^ the indentation is important for the docker-compose file
     
     #optional logging commands
     if LOG_NET_ENABLED:
-        add_command += "    - -debug=net \n"
+        lines.append("    - -debug=net ")
     if LOG_MEMPOOL_ENABLED:
-        add_command += "    - -debug=mempool\n"
+        lines.append("    - -debug=mempool")
     
-    add_command = add_command.strip('\n')  # Remove trailing newline
+    # resource options (see RESOURCE_PROFILES)
+    for option, value in (options or {}).items():
+        lines.append(f"    - -{option}={value}")
     
-    # check the format of template file
-    if not template_path.endswith('.template'):
-        raise ValueError("Template file must have a .template extension.")
-    with open(template_path, 'r') as file:
-        command_template = file.read()
-        command = command_template.format(
-            RPCUSER = rpc_user,
-            RPCPASSWORD = rpc_password,
-            MAXCONNECTIONS = max_peers,
-            RPCPORT = rpc_port,
-            P2PPORT = p2p_port,
-            ADDNODE = add_command,
-        )
+    add_command = "\n".join(lines)
+    
+    command = load_template(template_path)(
+        RPCUSER = rpc_user,
+        RPCPASSWORD = rpc_password,
+        MAXCONNECTIONS = max_peers,
+        RPCPORT = rpc_port,
+        P2PPORT = p2p_port,
+        ADDNODE = add_command,
+    )
     
     return(command)
 
-def export_data(all_ports: dict, node_names: list, output_dir: str = 'data'):
-    """Export node names and RPC ports to environment files.
+def export_data(all_ports: dict, node_names: list, output_dir: str = 'data', peers: dict = None):
+    """Export node names, RPC ports and the intended connections to environment files.
 
     Args:
         all_ports (dict): A dictionary where keys are node names and values are tuples (rpc_port, p2p_port).
         node_names (list): List of node names.
         output_dir (str): Subdirectory of /docker to store the .env files. Defaults to 'data'.
+        peers (dict, optional): The peers of each node, as returned by generate_topology. Defaults to None (not exported).
     """
     
     # ensure the output directory exists
@@ -152,50 +691,519 @@ def export_data(all_ports: dict, node_names: list, output_dir: str = 'data'):
             file.write(f"{env_name}={rpc_port}\n")          
     print(f"RPC ports exported to {output_file_port}.")
     
-# ==== main logic ====
-if __name__ == "__main__":
+    # export intended connections :
+    if peers is not None:
+        edges = [(node_name, peer) for node_name in node_names for peer in peers.get(node_name, [])]
+        output_file_topology = write_topology(edges, data_dir=f"docker/{output_dir}")
+        print(f"Topology exported to {output_file_topology}.")
+    
+class ServiceRenderer:
+    """Renders the service of each node, with the templates loaded once."""
+    
+    def __init__(
+            self,
+            all_ports: dict,
+            max_peers: int,
+            network_name: str,
+            container_prefix: str,
+            rpc_user: str = RPC_USER,
+            rpc_password: str = RPC_PASSWORD,
+            datadirs: str = None,
+            healthcheck_interval: str = HEALTHCHECK_INTERVAL,
+            profiles: dict = None,
+            cpuset: list = None,
+            netem: NetemPlan = None,
+            netem_image: str = NETEM_IMAGE,
+            addresses: dict = None,
+            publish_p2p: set = None,
+        ):
+        """
+        Args:
+            all_ports (dict): A dictionary where keys are node names and values are tuples (rpc_port, p2p_port).
+            max_peers (int): Maximum number of peers each node can have.
+            network_name (str): Name of the docker bridge network.
+            container_prefix (str): Prefix added to every container name.
+            rpc_user (str, optional): RPC username. Defaults to RPC_USER.
+            rpc_password (str, optional): RPC password. Defaults to RPC_PASSWORD.
+            datadirs (str, optional): Host directory, relative to the compose file, holding the datadir of
+                each node (bind mounts). Defaults to None (docker volumes, removed with the containers).
+            healthcheck_interval (str, optional): Interval of the getblockchaininfo healthcheck. Defaults to
+                HEALTHCHECK_INTERVAL.
+            profiles (dict, optional): Resource profile of each node, as returned by assign_profiles.
+                Defaults to None (no limits).
+            cpuset (list, optional): CPUs the nodes are pinned to, one per node in turn. Defaults to None.
+            netem (NetemPlan, optional): Static IPs and traffic shaping of the nodes. Defaults to None.
+            netem_image (str, optional): Image of the traffic shaping sidecars (needs tc). Defaults to NETEM_IMAGE.
+            addresses (dict, optional): Address to add each peer of another shard with (see write_sharded).
+                Defaults to None (all peers on the same network).
+            publish_p2p (set, optional): Nodes whose P2P port is published on the host. Defaults to None (all).
+        """
+        self.all_ports = all_ports
+        self.max_peers = max_peers
+        self.network_name = network_name
+        self.container_prefix = container_prefix
+        self.rpc_user = rpc_user
+        self.rpc_password = rpc_password
+        self.datadirs = datadirs
+        self.healthcheck_interval = healthcheck_interval
+        self.profiles = profiles or {}
+        self.cpuset = cpuset or []
+        self.index = {name: i for i, name in enumerate(all_ports)}
+        self.netem = netem
+        self.netem_image = netem_image
+        self.addresses = addresses or {}
+        self.publish_p2p = publish_p2p
+        self.service_template = load_template(SERVICE_TEMPLATE)
+    
+    def __call__(self, item: tuple) -> str:
+        """Render the service of a (node name, peers) item."""
+        node_name, peers = item
+        rpc_port, p2p_port = self.all_ports[node_name]
+        profile = RESOURCE_PROFILES.get(self.profiles.get(node_name))
+        commands = generate_command(
+            template_path=COMMAND_TEMPLATE,
+            rpc_user=self.rpc_user,
+            rpc_password=self.rpc_password,
+            max_peers=self.max_peers,
+            rpc_port=rpc_port,
+            p2p_port=p2p_port,
+            peers=peers,
+            all_ports=self.all_ports,
+            options={option: profile[option] for option in PROFILE_OPTIONS} if profile else None,
+            addresses=self.addresses,
+        )
+        publish = self.publish_p2p is None or node_name in self.publish_p2p
+        service = self.service_template(
+            SERVICENAME = f'  {node_name}',
+            NODENAME = node_name,
+            CONTAINERNAME = f"{self.container_prefix}{node_name}",
+            RPCUSER = self.rpc_user,
+            RPCPASSWORD = self.rpc_password,
+            RPCPORT = rpc_port,
+            P2PPORT = p2p_port,
+            COMMANDS = commands,
+            NETWORK = self.network_name,
+            NETWORKS = self.networks(node_name),
+            P2PPUBLISH = f'\n    - "{p2p_port}:{p2p_port}"' if publish else "",
+            HEALTHINTERVAL = self.healthcheck_interval,
+        )
+        if profile:
+            service += f"\n    cpus: {profile['cpus']}\n    mem_limit: {profile['mem_limit']}m"
+        if self.cpuset:
+            service += f"\n    cpuset: \"{self.cpuset[self.index[node_name] % len(self.cpuset)]}\""
+        if self.datadirs:
+            service += f"\n    volumes:\n    - {self.datadirs.rstrip('/')}/{node_name}:{CONTAINER_DATADIR}"
+        if any(self.addresses.get(peer) == SHARD_GATEWAY for peer in peers):
+            service += f'\n    extra_hosts:\n    - "{SHARD_GATEWAY}:host-gateway"'
+        if self.netem:
+            service += "\n" + self.sidecar(node_name)
+        return service + "\n"
+    
+    def networks(self, node_name: str) -> str:
+        """Render the networks of a service (with its static IP when the traffic is shaped)."""
+        if not self.netem:
+            return f"    - {self.network_name}"
+        return f"      {self.network_name}:\n        ipv4_address: {self.netem.ip(node_name)}"
+    
+    def sidecar(self, node_name: str) -> str:
+        """Render the service shaping the traffic of a node: it runs tc in the network namespace of the node."""
+        script = self.netem.script(node_name).replace('"', '\\"')
+        return "\n".join([
+            f"  netem_{node_name}:",
+            f"    image: {self.netem_image}",
+            f"    container_name: {self.container_prefix}{node_name}_netem",
+            f'    network_mode: "service:{node_name}"',
+            "    cap_add:",
+            "    - NET_ADMIN",
+            "    depends_on:",
+            f"    - {node_name}",
+            '    restart: "no"',
+            "    command:",
+            "    - sh",
+            "    - -c",
+            f'    - "{script}"',
+        ])
+
+# renderer of the worker processes (set once per process by the pool initializer)
+_RENDERER = None
+
+def _init_worker(renderer: ServiceRenderer):
+    global _RENDERER
+    _RENDERER = renderer
+
+def _render(item: tuple) -> str:
+    return _RENDERER(item)
+
+def render_services(renderer: ServiceRenderer, items, workers: int = 1):
+    """Render services one at a time, in order, without keeping them.
+
+    Args:
+        renderer (ServiceRenderer): The renderer.
+        items (Iterable[tuple]): (node name, peers) of each node.
+        workers (int, optional): Number of processes rendering at once. Defaults to 1 (this process).
+
+    Yields:
+        str: The service of each node.
+    """
+    if workers <= 1:
+        yield from map(renderer, items)
+        return
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(renderer,)) as pool:
+        yield from pool.imap(_render, items, chunksize=256)
+
+def diff_services(old: dict, new: dict) -> dict:
+    """Compare the services of two compose files.
+
+    Args:
+        old (dict): {service name: text} of the previous compose file (see registry.read_compose_services).
+        new (dict): {service name: text} of the new compose file.
+
+    Returns:
+        dict: Names of the services "added", "removed", "changed" and "unchanged".
+    """
+    return {
+        "added": [name for name in new if name not in old],
+        "removed": [name for name in old if name not in new],
+        "changed": [name for name in new if name in old and new[name] != old[name]],
+        "unchanged": [name for name in new if name in old and new[name] == old[name]],
+    }
+
+def _write_services(
+        output_file: str,
+        renderer: ServiceRenderer,
+        node_names: list,
+        peers: dict,
+        conf_file: str,
+        workers: int = 1,
+        ipam: str = "",
+    ) -> None:
+    """Stream the services of some nodes into a compose file, between the head and the tail of its template."""
+    head, tail = (Template(part) for part in load_template(COMPOSE_TEMPLATE).text.split("{SERVICES}", 1))
+    values = {"NETWORK": renderer.network_name, "CONFFILE": conf_file, "IPAM": ipam}
+    items = ((node_name, peers[node_name]) for node_name in node_names)
+    
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    temporary_file = f"{output_file}.tmp"
+    try:
+        with open(temporary_file, 'w') as file:
+            file.write(head(**values))
+            for service in render_services(renderer, items, workers):
+                file.write(service)
+            file.write(tail(**values))
+    except BaseException:
+        os.remove(temporary_file)
+        raise
+    os.replace(temporary_file, output_file)  # never leave a half-written compose file
+    print(f"{output_file} file generated successfully.")
+
+def write_compose(
+        node_number: int,
+        max_peers: int,
+        base_rpc: int,
+        base_p2p: int,
+        base_name: str,
+        output_file: str = "docker/docker-compose.yml",
+        data_dir: str = "data",
+        network_name: str = "bitcoin-net",
+        container_prefix: str = "",
+        conf_file: str = "./bitcoin_conf.conf",
+        seed: int = None,
+        topology: dict = None,
+        workers: int = 1,
+        incremental: bool = False,
+        datadirs: str = None,
+        profiles: dict = None,
+        cpuset: str = None,
+        netem: str = None,
+        subnet: str = NETEM_SUBNET,
+    ) -> dict:
+    """Generate a complete docker-compose file and its data files.
+
+    Every argument that could collide between two networks running side by side
+    (ports, network name, container names, data files) can be set, so several
+    compose projects can be generated from the same templates.
+
+    Args:
+        node_number (int): Number of nodes in the network.
+        max_peers (int): Maximum number of peers each node can have.
+        base_rpc (int): Base RPC port.
+        base_p2p (int): Base P2P port.
+        base_name (str): Base name for the nodes.
+        output_file (str, optional): Path of the compose file. Defaults to "docker/docker-compose.yml".
+        data_dir (str, optional): Subdirectory of /docker for the .env files. Defaults to "data".
+        network_name (str, optional): Name of the docker bridge network. Defaults to "bitcoin-net".
+        container_prefix (str, optional): Prefix added to every container name. Defaults to "".
+        conf_file (str, optional): bitcoin.conf path, relative to the compose file. Defaults to "./bitcoin_conf.conf".
+        seed (int, optional): Seed of the peer generation, for reproducible topologies. Defaults to None.
+        topology (dict, optional): Arguments of generate_topology (model, degree, caps...). Defaults to None
+            (uniform model).
+        workers (int, optional): Number of processes rendering the services. Defaults to 1.
+        incremental (bool, optional): Keep the peers of the nodes of the existing compose file, so that
+            only added, removed or reconfigured services differ from it. Defaults to False.
+        datadirs (str, optional): Host directory, relative to the compose file, of the node datadirs
+            (see snapshot.py). Defaults to None (docker volumes).
+        profiles (dict, optional): Arguments of assign_profiles (ratios, nodes). Defaults to None (no limits).
+        cpuset (str, optional): CPUs to pin the nodes to, in turn (e.g. "0-15"). Defaults to None.
+        netem (str, optional): Netem file (latency matrix) shaping the traffic between regions (see netem.py).
+            Defaults to None (no shaping).
+        subnet (str, optional): Subnet of the network, for the static IPs of shaped nodes. Defaults to NETEM_SUBNET.
+
+    Raises:
+        ValueError: If the topology, the profiles or the netem file are not valid.
+
+    Returns:
+        dict: The peers of each node, as returned by generate_topology.
+    """
+    previous, old_services = None, {}
+    if incremental:
+        edges = read_topology(f"docker/{data_dir}") or read_compose_topology(output_file)
+        previous = {}
+        for source, target in edges:
+            previous.setdefault(source, []).append(target)
+        old_services = read_compose_services(output_file)
+        # nodes without peers do not appear in the topology
+        for name in old_services:
+            previous.setdefault(name, [])
+    
     # generate node names, ports and peers
-    node_names = generate_names(NODE_NUMBER, NODE_BASE_NAME)
-    all_ports = compute_ports(NODE_NUMBER, NODE_BASE_RPC_PORT, NODE_BASE_P2P_PORT, NODE_BASE_NAME)
-    peers = generate_peers(node_names, MAX_PEERS)
+    node_names = generate_names(node_number, base_name)
+    all_ports = compute_ports(node_number, base_rpc, base_p2p, base_name)
+    peers = generate_topology(node_names, max_peers=max_peers, seed=seed, previous=previous, **(topology or {}))
+    
+    # export rpc ports and intended connections to files
+    export_data(all_ports, node_names, output_dir=data_dir, peers=peers)
+    # the nodes all run here now (see write_sharded)
+    if os.path.exists(os.path.join("docker", data_dir, SHARDS_FILE)):
+        os.remove(os.path.join("docker", data_dir, SHARDS_FILE))
+
+    # static IPs and traffic shaping of the regions
+    plan, ipam = None, ""
+    if netem:
+        config = load_netem(netem)
+        plan = NetemPlan(config, assign_regions(node_names, config), subnet)
+        ipam = f"\n    ipam:\n      config:\n      - subnet: {subnet}"
+    
+    renderer = ServiceRenderer(
+        all_ports, max_peers, network_name, container_prefix, datadirs=datadirs,
+        profiles=assign_profiles(node_names, **(profiles or {})), cpuset=parse_cpuset(cpuset), netem=plan,
+    )
+    _write_services(output_file, renderer, node_names, peers, conf_file, workers, ipam)
     
-    services = ""
+    if incremental:
+        changes = diff_services(old_services, read_compose_services(output_file))
+        print(f"[INFO ] Services: {len(changes['added'])} added, {len(changes['removed'])} removed, "
+              f"{len(changes['changed'])} changed, {len(changes['unchanged'])} unchanged.")
     
-    # export rpc ports to a file
-    export_data(all_ports, node_names)
+    return peers
+    
+def split_shards(names: list, shards: int) -> list:
+    """Split the nodes into shards of consecutive nodes, of (almost) the same size.
 
-    # iterate on each nodes
-    for node_name in node_names:
-        
-        commands = generate_command(
-            template_path='docker/templates/docker-command.template',
-            rpc_user=RPC_USER,
-            rpc_password=RPC_PASSWORD,
-            max_peers=MAX_PEERS,
-            rpc_port=all_ports[node_name][0],
-            p2p_port=all_ports[node_name][1],
-            peers=peers[node_name],
-            all_ports=all_ports,
+    Args:
+        names (list): List of node names.
+        shards (int): Number of shards.
+
+    Raises:
+        ValueError: If there are fewer nodes than shards.
+
+    Returns:
+        list: The node names of each shard.
+    """
+    if shards < 1 or shards > max(len(names), 1):
+        raise ValueError(f"Cannot split {len(names)} nodes into {shards} shards")
+    size, extra = divmod(len(names), shards)
+    result, start = [], 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        result.append(names[start:end])
+        start = end
+    return result
+
+def write_sharded(
+        node_number: int,
+        max_peers: int,
+        base_rpc: int,
+        base_p2p: int,
+        base_name: str,
+        shards: int,
+        hosts: list = None,
+        output_dir: str = "shards",
+        data_dir: str = "data",
+        network_name: str = "bitcoin-net",
+        seed: int = None,
+        topology: dict = None,
+        workers: int = 1,
+        datadirs: str = None,
+        profiles: dict = None,
+        cpuset: str = None,
+    ) -> dict:
+    """Generate a network split into several compose projects (shards), each with its own bridge network.
+
+    A docker bridge only holds so many containers, and every node of one host needs its own
+    ports: large networks are split into shards, optionally on several hosts. Node names and
+    ports stay those of a single network (node_i keeps its ports wherever it runs), so the
+    registry and every tool work the same. Peers of the same shard are added by name, as
+    usual; peers of another shard through the published P2P port of their host
+    (host.docker.internal for another shard of the same host). Only these peers publish
+    their P2P port.
+
+    Args:
+        node_number (int): Number of nodes in the network.
+        max_peers (int): Maximum number of peers each node can have.
+        base_rpc (int): Base RPC port.
+        base_p2p (int): Base P2P port.
+        base_name (str): Base name for the nodes.
+        shards (int): Number of shards.
+        hosts (list, optional): Address of the host of each shard, reachable from the other hosts, used in
+            turn (several shards can share a host). Defaults to None (all shards on this host).
+        output_dir (str, optional): Subdirectory of /docker of the shards (one directory per shard, with its
+            compose file). Defaults to "shards".
+        data_dir (str, optional): Subdirectory of /docker of the registry of the whole network. Defaults to "data".
+        network_name (str, optional): Base name of the docker networks (suffixed with the shard number).
+            Defaults to "bitcoin-net".
+        seed (int, optional): Seed of the peer generation. Defaults to None.
+        topology (dict, optional): Arguments of generate_topology. Defaults to None.
+        workers (int, optional): Number of processes rendering the services. Defaults to 1.
+        datadirs (str, optional): Host directory, relative to the shard directory, of the node datadirs.
+            Defaults to None (docker volumes).
+        profiles (dict, optional): Arguments of assign_profiles (ratios, nodes). Defaults to None.
+        cpuset (str, optional): CPUs to pin the nodes to, in turn. Defaults to None.
+
+    Raises:
+        ValueError: If the network cannot be split, a shard of several hosts is on "localhost", or the
+            topology or profiles are not valid.
+
+    Returns:
+        dict: The peers of each node, as returned by generate_topology.
+    """
+    hosts = hosts or ["localhost"]
+    if len(set(hosts[:shards])) > 1 and "localhost" in hosts[:shards]:
+        raise ValueError("Shards on several hosts need the address of each host, not localhost")
+    node_names = generate_names(node_number, base_name)
+    all_ports = compute_ports(node_number, base_rpc, base_p2p, base_name)
+    groups = split_shards(node_names, shards)
+    peers = generate_topology(node_names, max_peers=max_peers, seed=seed, **(topology or {}))
+    
+    shard_of = {name: i for i, group in enumerate(groups) for name in group}
+    host_of = [hosts[i % len(hosts)] for i in range(len(groups))]
+    # peers reached from another shard need their P2P port on their host
+    crossing = [(name, peer) for name in node_names for peer in peers[name] if shard_of[peer] != shard_of[name]]
+    targets = {peer for _, peer in crossing}
+    
+    export_data(all_ports, node_names, output_dir=data_dir, peers=peers)
+    output_file_shards = write_shards(
+        {name: (f"shard_{shard_of[name] + 1}", host_of[shard_of[name]]) for name in node_names},
+        data_dir=f"docker/{data_dir}",
+    )
+    print(f"Shards exported to {output_file_shards}.")
+    
+    # shards left from a network of more shards
+    if os.path.isdir(f"docker/{output_dir}"):
+        for name in os.listdir(f"docker/{output_dir}"):
+            if re.fullmatch(r"shard_\d+", name) and int(name[len("shard_"):]) > len(groups):
+                shutil.rmtree(f"docker/{output_dir}/{name}")
+    
+    assigned = assign_profiles(node_names, **(profiles or {}))
+    for i, group in enumerate(groups):
+        addresses = {
+            peer: SHARD_GATEWAY if host_of[shard_of[peer]] == host_of[i] else host_of[shard_of[peer]]
+            for name in group for peer in peers[name] if shard_of[peer] != i
+        }
+        renderer = ServiceRenderer(
+            all_ports, max_peers, f"{network_name}-{i + 1}", "", datadirs=datadirs,
+            profiles=assigned, cpuset=parse_cpuset(cpuset), addresses=addresses, publish_p2p=targets,
         )
-        
-        with open("docker/templates/docker-service.template",'r') as file:
-            service_template = file.read()
-            service = service_template.format(
-                SERVICENAME = f'  {node_name}',
-                NODENAME = node_name,
-                RPCUSER = RPC_USER,
-                RPCPASSWORD = RPC_PASSWORD,
-                RPCPORT = all_ports[node_name][0],
-                P2PPORT = all_ports[node_name][1],
-                COMMANDS = commands,
-            )
-            
-        services += service + "\n"
+        output_file = f"docker/{output_dir}/shard_{i + 1}/docker-compose.yml"
+        _write_services(output_file, renderer, group, peers, "../../bitcoin_conf.conf", workers)
+    
+    print(f"[INFO ] {len(groups)} shards on {len(set(host_of))} host(s): {len(crossing)} connections between shards, "
+          f"{len(targets)} P2P ports published")
+    return peers
+
+# ==== main logic ====
+def print_estimate(node_number: int, profiles: dict, host_memory: float = None):
+    """Print the host memory expected for a network (see estimate_memory).
+
+    Args:
+        node_number (int): Number of nodes.
+        profiles (dict): Arguments of assign_profiles (ratios, nodes).
+        host_memory (float, optional): Memory of the host, in GB, to check the estimate against. Defaults to None.
+    """
+    names = generate_names(node_number, NODE_BASE_NAME)
+    estimate = estimate_memory(names, assign_profiles(names, **profiles))
     
-    with open("docker/templates/docker-compose.template", 'r') as file:
-        compose_template = file.read()
-        compose_content = compose_template.format(SERVICES=services)
+    print(f"{'profile':>10} {'nodes':>6} {'expected (MB)':>14} {'limit (MB)':>11}")
+    for profile, values in estimate.items():
+        limit = "-" if values["limit"] is None else values["limit"]
+        print(f"{profile or 'none':>10} {values['nodes']:>6} {values['expected']:>14} {limit:>11}")
+    expected = sum(v["nodes"] * v["expected"] for v in estimate.values()) / 1024
+    print(f"[INFO ] {node_number} nodes: about {expected:.1f} GB expected")
+    limits = None
+    if all(v["limit"] is not None for v in estimate.values()):
+        limits = sum(v["nodes"] * (v["limit"] + CONTAINER_OVERHEAD_MEMORY) for v in estimate.values()) / 1024
+        print(f"[INFO ] At most {limits:.1f} GB (memory limits of the containers)")
+    if host_memory is None:
+        return
+    if expected > host_memory:
+        print(f"[WARNING] The nodes are expected to need more than the {host_memory:g} GB of the host")
+    elif limits is None or limits > host_memory:
+        print(f"[WARNING] The nodes fit in the {host_memory:g} GB of the host, but their memory limits do not")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the docker-compose file of the network")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Keep the peers of the existing nodes: only added, removed or reconfigured services change")
+    parser.add_argument("--estimate", action="store_true",
+                        help="Only print the host memory expected for the network (resource profiles)")
+    parser.add_argument("--nodes", type=int, default=NODE_NUMBER,
+                        help=f"Number of nodes of the estimate (default: NODE_NUMBER, {NODE_NUMBER})")
+    parser.add_argument("--host-memory", type=float, help="Memory of the host in GB, to check the estimate against")
+    parser.add_argument("--shards", type=int, default=NETWORK_SHARDS,
+                        help=f"Compose projects the network is split into (default: NETWORK_SHARDS, {NETWORK_SHARDS})")
+    parser.add_argument("--hosts", default=",".join(SHARD_HOSTS),
+                        help="Hosts of the shards, used in turn, comma-separated (default: SHARD_HOSTS, this host)")
+    args = parser.parse_args()
     
-    with open("docker/docker-compose.yml", 'w') as file:
-        file.write(compose_content)
-    print("docker-compose.yml file generated successfully.")
\ No newline at end of file
+    if args.estimate:
+        print_estimate(args.nodes, profile_config(), args.host_memory)
+        raise SystemExit(0)
+    try:
+        if args.shards > 1:
+            if NETEM_FILE:
+                raise ValueError("Traffic shaping (NETEM_FILE) needs a single network: set NETWORK_SHARDS=1")
+            if args.incremental:
+                raise ValueError("--incremental only applies to a single network: set NETWORK_SHARDS=1")
+            write_sharded(
+                node_number=NODE_NUMBER,
+                max_peers=MAX_PEERS,
+                base_rpc=NODE_BASE_RPC_PORT,
+                base_p2p=NODE_BASE_P2P_PORT,
+                base_name=NODE_BASE_NAME,
+                shards=args.shards,
+                hosts=[host.strip() for host in args.hosts.split(",") if host.strip()],
+                seed=TOPOLOGY_SEED,
+                topology=topology_config(),
+                workers=COMPOSE_WORKERS,
+                datadirs=os.path.join("..", "..", NODE_DATADIRS) if NODE_DATADIRS else None,
+                profiles=profile_config(),
+                cpuset=NODE_CPUSET,
+            )
+        else:
+            write_compose(
+                node_number=NODE_NUMBER,
+                max_peers=MAX_PEERS,
+                base_rpc=NODE_BASE_RPC_PORT,
+                base_p2p=NODE_BASE_P2P_PORT,
+                base_name=NODE_BASE_NAME,
+                seed=TOPOLOGY_SEED,
+                topology=topology_config(),
+                workers=COMPOSE_WORKERS,
+                incremental=args.incremental,
+                datadirs=NODE_DATADIRS,
+                profiles=profile_config(),
+                cpuset=NODE_CPUSET,
+                netem=NETEM_FILE,
+            )
+    except (ValueError, OSError) as e:
+        print(f"[ERROR] {e}")
+        raise SystemExit(1)
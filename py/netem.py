@@ -0,0 +1,223 @@
+# this file builds the traffic shaping (tc netem) of the nodes from a latency matrix
+#
+# All containers share one bridge, with sub-millisecond latency. To get
+# realistic propagation times, nodes are placed in regions, and the traffic
+# leaving a node is delayed (and optionally jittered, dropped, rate limited)
+# depending on the region of its destination.
+#
+# The nodes of each region get their static IPs in their own block of the
+# network subnet, so one tc filter per region sends the packets to the right
+# netem queue, whatever the number of nodes.
+#
+# The netem file (TOML):
+#
+#   [regions]        # share of the nodes of each region, to consecutive nodes
+#   eu = 0.5
+#   us = 0.3
+#   asia = 0.2
+#
+#   [nodes]          # region of some nodes, whatever the shares
+#   node_1 = "us"
+#
+#   [latency]        # one-way delay in ms, a missing pair uses its reverse
+#   eu.eu = 5
+#   eu.us = 45
+#   eu.asia = 120
+#
+#   [jitter]         # ms, same shape as latency (optional)
+#   [loss]           # percent, same shape as latency (optional)
+#
+#   [rate]           # outgoing bandwidth of each node of a region (optional)
+#   asia = "20mbit"
+
+import ipaddress
+import math
+from typing import Dict, List, Tuple
+
+import tomli
+
+LINK_TABLES = ("latency", "jitter", "loss")
+DEFAULT_RATE = "10gbit"  # no bandwidth limit
+
+
+class NetemConfig:
+    """Regions and link properties read from a netem file."""
+
+    def __init__(
+            self,
+            shares: Dict[str, float],
+            nodes: Dict[str, str],
+            links: Dict[str, Dict[Tuple[str, str], float]],
+            rate: Dict[str, str],
+        ):
+        """
+        Args:
+            shares (Dict[str, float]): Share of the nodes of each region.
+            nodes (Dict[str, str]): Region of some nodes.
+            links (Dict[str, Dict[Tuple[str, str], float]]): Value of each (source, destination) region pair,
+                for "latency" (ms), "jitter" (ms) and "loss" (%).
+            rate (Dict[str, str]): Outgoing bandwidth of the nodes of each region (tc rate, e.g. "20mbit").
+        """
+        self.shares = shares
+        self.nodes = nodes
+        self.links = links
+        self.rate = rate
+        self.regions = list(dict.fromkeys([*shares, *nodes.values()]))
+
+    def link(self, source: str, destination: str) -> Dict[str, float]:
+        """Get the delay, jitter and loss of the traffic from a region to another.
+
+        Args:
+            source (str): Region of the sender.
+            destination (str): Region of the receiver.
+
+        Returns:
+            Dict[str, float]: "latency" and "jitter" in ms, "loss" in percent (0 if not set).
+        """
+        result = {}
+        for table in LINK_TABLES:
+            values = self.links.get(table, {})
+            result[table] = values.get((source, destination), values.get((destination, source), 0))
+        return result
+
+
+def load_netem(path: str) -> NetemConfig:
+    """Read a netem file.
+
+    Args:
+        path (str): Path of the TOML file.
+
+    Raises:
+        ValueError: If the file is not valid, or refers to unknown regions.
+
+    Returns:
+        NetemConfig: The regions and link properties.
+    """
+    with open(path, "rb") as f:
+        try:
+            data = tomli.load(f)
+        except tomli.TOMLDecodeError as e:
+            raise ValueError(f"Invalid netem file {path}: {e}")
+
+    shares = {region: float(share) for region, share in data.get("regions", {}).items()}
+    nodes = {node: str(region) for node, region in data.get("nodes", {}).items()}
+    if any(share < 0 for share in shares.values()):
+        raise ValueError(f"Region shares must be positive ({path})")
+    if not shares and not nodes:
+        raise ValueError(f"No regions in {path}")
+    known = set(shares) | set(nodes.values())
+
+    links = {}
+    for table in LINK_TABLES:
+        links[table] = {}
+        for source, row in data.get(table, {}).items():
+            if not isinstance(row, dict):
+                raise ValueError(f"[{table}] expects 'source.destination = value' entries ({path})")
+            for destination, value in row.items():
+                if source not in known or destination not in known:
+                    raise ValueError(f"Unknown region in [{table}] {source}.{destination} ({path})")
+                if not isinstance(value, (int, float)) or value < 0:
+                    raise ValueError(f"[{table}] {source}.{destination} must be a positive number ({path})")
+                links[table][(source, destination)] = float(value)
+
+    rate = {str(region): str(value) for region, value in data.get("rate", {}).items()}
+    unknown = set(rate) - known
+    if unknown:
+        raise ValueError(f"Unknown region in [rate]: {', '.join(sorted(unknown))} ({path})")
+    return NetemConfig(shares, nodes, links, rate)
+
+
+def allocate_blocks(counts: Dict[str, int], subnet: str) -> Dict[str, ipaddress.IPv4Network]:
+    """Give each region its own block of addresses in the network subnet.
+
+    The first block of the subnet is left to docker (gateway).
+
+    Args:
+        counts (Dict[str, int]): Number of nodes of each region.
+        subnet (str): Subnet of the network (e.g. "172.28.0.0/16").
+
+    Raises:
+        ValueError: If the regions do not fit in the subnet.
+
+    Returns:
+        Dict[str, ipaddress.IPv4Network]: The block of each region.
+    """
+    network = ipaddress.ip_network(subnet)
+    # blocks of the same size keep every block aligned
+    size = max(4, 2 ** math.ceil(math.log2(max(counts.values(), default=0) + 2)))
+    prefix = 32 - int(math.log2(size))
+    if prefix < network.prefixlen or (len(counts) + 1) * size > network.num_addresses:
+        raise ValueError(f"{sum(counts.values())} nodes in {len(counts)} regions do not fit in {subnet}")
+    blocks = network.subnets(new_prefix=prefix)
+    next(blocks)  # gateway
+    return {region: next(blocks) for region in counts}
+
+
+class NetemPlan:
+    """Static IP and traffic shaping commands of each node."""
+
+    def __init__(self, config: NetemConfig, regions: Dict[str, str], subnet: str, interface: str = "eth0"):
+        """
+        Args:
+            config (NetemConfig): Regions and link properties.
+            regions (Dict[str, str]): Region of each node, in node order.
+            subnet (str): Subnet of the network.
+            interface (str, optional): Interface of the containers. Defaults to "eth0".
+
+        Raises:
+            ValueError: If the nodes do not fit in the subnet.
+        """
+        self.config = config
+        self.regions = regions
+        self.subnet = subnet
+        self.interface = interface
+        counts = {region: 0 for region in config.regions}
+        for region in regions.values():
+            counts[region] = counts.get(region, 0) + 1
+        self.blocks = allocate_blocks(counts, subnet)
+        self.ips = {}
+        hosts = {region: block.hosts() for region, block in self.blocks.items()}
+        for node, region in regions.items():
+            self.ips[node] = str(next(hosts[region]))
+        self._scripts = {}
+
+    def ip(self, node: str) -> str:
+        return self.ips[node]
+
+    def commands(self, region: str) -> List[str]:
+        """Get the tc commands shaping the traffic of a node of a region.
+
+        Args:
+            region (str): Region of the node.
+
+        Returns:
+            List[str]: The tc commands, in order.
+        """
+        dev = self.interface
+        rate = self.config.rate.get(region, DEFAULT_RATE)
+        commands = [
+            f"tc qdisc replace dev {dev} root handle 1: htb default 2",
+            f"tc class add dev {dev} parent 1: classid 1:1 htb rate {rate}",
+            # traffic leaving the network (host, gateway) is only rate limited
+            f"tc class add dev {dev} parent 1:1 classid 1:2 htb rate {rate}",
+        ]
+        for i, (destination, block) in enumerate(self.blocks.items(), 10):
+            link = self.config.link(region, destination)
+            netem = f"delay {link['latency']:g}ms"
+            if link["jitter"]:
+                netem += f" {link['jitter']:g}ms distribution normal"
+            if link["loss"]:
+                netem += f" loss {link['loss']:g}%"
+            commands += [
+                f"tc class add dev {dev} parent 1:1 classid 1:{i} htb rate {rate}",
+                f"tc qdisc add dev {dev} parent 1:{i} handle {i}: netem {netem}",
+                f"tc filter add dev {dev} parent 1: protocol ip prio 1 u32 match ip dst {block} flowid 1:{i}",
+            ]
+        return commands
+
+    def script(self, node: str) -> str:
+        """Get the shell command shaping the traffic of a node (the same for every node of a region)."""
+        region = self.regions[node]
+        if region not in self._scripts:
+            self._scripts[region] = " && ".join(self.commands(region))
+        return self._scripts[region]
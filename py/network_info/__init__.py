@@ -1,6 +1,37 @@
 """this module provides functions to retrieve network information about peers.
+
+Submodules are imported when one of their functions is first used, so that
+crawling or exporting does not pay for importing the plotting stack.
 """
 
-from .get_info import get_peer_info
-from .parse import extract_connections
-from .graph import visualize_network, create_network_graph
\ No newline at end of file
+import importlib
+
+_EXPORTS = {
+    "get_peer_info": ".get_info",
+    "crawl_peer_info": ".get_info",
+    "CrawlResult": ".get_info",
+    "extract_connections": ".parse",
+    "parse_peers": ".peerinfo",
+    "PeerBatch": ".peerinfo",
+    "visualize_network": ".graph",
+    "create_network_graph": ".graph",
+    "export_topology": ".export",
+    "topology_edges": ".export",
+    "reconcile": ".reconcile",
+    "rewire": ".reconcile",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,345 @@
+# this file serves a live view of the network topology and its metrics
+#
+# A crawler thread keeps the latest topology in a TopologyFeed. Browsers get the
+# full state once, then only the changes (added/removed connections, new
+# metrics) as server-sent events, and draw the graph themselves.
+
+import functools
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .export import topology_edges
+from .get_info import crawl_peer_info
+
+Edge = Tuple[str, str, str]
+
+
+class TopologyFeed:
+    """Latest topology and the recent deltas leading to it, shared by the crawler and the clients."""
+
+    def __init__(self, history: int = 1000):
+        """
+        Args:
+            history (int, optional): Number of deltas kept for clients lagging behind. Defaults to 1000.
+        """
+        self.nodes = set()
+        self.edges: Dict[Tuple[str, str], str] = {}
+        self.metrics: Dict[str, Any] = {}
+        self.unreachable: Dict[str, str] = {}
+        self.version = 0
+        self._deltas = deque(maxlen=history)
+        self._condition = threading.Condition()
+
+    def update(
+            self,
+            nodes: Iterable[str],
+            edges: Iterable[Edge],
+            unreachable: Optional[Dict[str, str]] = None,
+            metrics: Optional[Dict[str, Any]] = None,
+        ) -> Optional[Dict[str, Any]]:
+        """Replace the topology and publish what changed.
+
+        Args:
+            nodes (Iterable[str]): Nodes of the network.
+            edges (Iterable[Edge]): (source, target, connection type) of each connection.
+            unreachable (Dict[str, str], optional): Nodes that did not answer the crawl. Defaults to None.
+            metrics (Dict[str, Any], optional): Metrics of the topology. Defaults to None (unchanged).
+
+        Returns:
+            Optional[Dict[str, Any]]: The published delta, None if nothing changed.
+        """
+        nodes = set(nodes)
+        edges = {(u, v): t for u, v, t in edges}
+        unreachable = dict(unreachable or {})
+
+        with self._condition:
+            delta = {
+                "nodes_added": sorted(nodes - self.nodes),
+                "nodes_removed": sorted(self.nodes - nodes),
+                "edges_added": [[u, v, t] for (u, v), t in edges.items() if self.edges.get((u, v)) != t],
+                "edges_removed": [[u, v] for (u, v) in self.edges if (u, v) not in edges],
+            }
+            if unreachable != self.unreachable:
+                delta["unreachable"] = unreachable
+            if metrics is not None and metrics != self.metrics:
+                delta["metrics"] = metrics
+            # an empty unreachable (every node answers again) or metrics is still a change
+            changed = any(delta[key] for key in ("nodes_added", "nodes_removed", "edges_added", "edges_removed"))
+            if not (changed or "unreachable" in delta or "metrics" in delta):
+                return None
+
+            self.version += 1
+            delta["version"] = self.version
+            delta["time"] = time.time()
+            self.nodes, self.edges, self.unreachable = nodes, edges, unreachable
+            if metrics is not None:
+                self.metrics = metrics
+            self._deltas.append(delta)
+            self._condition.notify_all()
+            return delta
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the whole current state."""
+        with self._condition:
+            return {
+                "version": self.version,
+                "nodes": sorted(self.nodes),
+                "edges": [[u, v, t] for (u, v), t in self.edges.items()],
+                "unreachable": self.unreachable,
+                "metrics": self.metrics,
+            }
+
+    def wait(self, version: int, timeout: float) -> Optional[List[Dict[str, Any]]]:
+        """Wait for deltas newer than a version.
+
+        Args:
+            version (int): Last version the client has.
+            timeout (float): Maximum seconds to wait.
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: The new deltas (empty on timeout), or None if some of
+                them are no longer kept and the client must start again from a snapshot.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.version > version, timeout)
+            if self.version <= version:
+                return []
+            if not self._deltas or self._deltas[0]["version"] > version + 1:
+                return None
+            return [d for d in self._deltas if d["version"] > version]
+
+
+def run_crawler(
+        feed: TopologyFeed,
+        nodes: List[str],
+        interval: float,
+        stop: threading.Event,
+        crawl: Optional[Callable] = None,
+    ) -> None:
+    """Crawl the network every `interval` seconds and publish changes to the feed, until stop is set.
+
+    Args:
+        feed (TopologyFeed): Feed to publish to.
+        nodes (List[str]): Names of the nodes to crawl.
+        interval (float): Seconds between two crawls.
+        stop (threading.Event): Set to stop crawling.
+        crawl (Callable, optional): Function crawling the nodes. Defaults to crawl_peer_info
+            (keeping only the fields needed to build the topology).
+    """
+    from .metrics import MetricsEngine
+    from .peerinfo import TOPOLOGY_FIELDS
+
+    crawl = crawl or functools.partial(crawl_peer_info, fields=TOPOLOGY_FIELDS)
+
+    engine = MetricsEngine()
+    while not stop.is_set():
+        try:
+            result = crawl(nodes)
+            edges = list(topology_edges(nodes, result))
+            metrics = engine.update(nodes, [(u, v) for u, v, _ in edges])
+            feed.update(nodes, edges, result.unreachable, metrics)
+        except Exception as e:
+            print(f"[ERROR] Crawl failed: {e}")
+        stop.wait(interval)
+
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    """Serve the page (/), the current state (/snapshot) and the stream of deltas (/events)."""
+
+    feed: TopologyFeed = None  # set by serve_dashboard
+    keepalive = 15.0
+
+    def log_message(self, format, *args):
+        pass  # keep the console for crawl errors
+
+    def _send(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _event(self, name: str, data: Dict[str, Any]) -> None:
+        self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+
+    def do_GET(self):
+        if self.path == "/":
+            self._send(200, "text/html; charset=utf-8", PAGE.encode())
+        elif self.path == "/snapshot":
+            self._send(200, "application/json", json.dumps(self.feed.snapshot()).encode())
+        elif self.path == "/events":
+            self._stream()
+        else:
+            self._send(404, "text/plain", b"Not found")
+
+    def _stream(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            snapshot = self.feed.snapshot()
+            self._event("snapshot", snapshot)
+            self.wfile.flush()
+            version = snapshot["version"]
+            while True:
+                deltas = self.feed.wait(version, self.keepalive)
+                if deltas is None:
+                    snapshot = self.feed.snapshot()
+                    self._event("snapshot", snapshot)
+                    version = snapshot["version"]
+                elif not deltas:
+                    self.wfile.write(b": keepalive\n\n")
+                for delta in deltas or ():
+                    self._event("delta", delta)
+                    version = delta["version"]
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the page was closed
+
+
+def serve_dashboard(feed: TopologyFeed, host: str = "127.0.0.1", port: int = 8050) -> ThreadingHTTPServer:
+    """Create the dashboard server (call serve_forever() on it, or run it in a thread).
+
+    Args:
+        feed (TopologyFeed): Feed to serve.
+        host (str, optional): Address to listen on. Defaults to "127.0.0.1".
+        port (int, optional): Port to listen on (0 for any free port). Defaults to 8050.
+
+    Returns:
+        ThreadingHTTPServer: The server.
+    """
+    handler = type("BoundDashboardHandler", (DashboardHandler,), {"feed": feed})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Bitcoin Network</title>
+<style>
+  body { margin: 0; font-family: sans-serif; display: flex; height: 100vh; }
+  canvas { flex: 1; }
+  aside { width: 280px; padding: 12px; overflow-y: auto; background: #f4f4f4; font-size: 13px; }
+  td { padding: 2px 6px; }
+  .unreachable { color: #b00; }
+</style>
+</head>
+<body>
+<canvas id="graph"></canvas>
+<aside>
+  <h3>Bitcoin Network</h3>
+  <div id="status">connecting...</div>
+  <table id="metrics"></table>
+  <div id="unreachable" class="unreachable"></div>
+</aside>
+<script>
+const canvas = document.getElementById("graph");
+const ctx = canvas.getContext("2d");
+const nodes = new Map();  // name -> {x, y, vx, vy}
+const edges = new Map();  // "source|target" -> {source, target, type}
+let version = 0;
+
+function addNode(name) {
+  if (!nodes.has(name)) nodes.set(name, {x: Math.random() - 0.5, y: Math.random() - 0.5, vx: 0, vy: 0});
+}
+function setEdge(source, target, type) {
+  addNode(source); addNode(target);
+  edges.set(source + "|" + target, {source, target, type});
+}
+function showMetrics(metrics, unreachable) {
+  const rows = [];
+  for (const [key, value] of Object.entries(metrics || {})) {
+    if (key === "degree_histogram") continue;
+    const text = typeof value === "object" ? Object.entries(value).map(([k, v]) => k + " " + (+v).toFixed(2)).join(", ")
+      : typeof value === "number" && !Number.isInteger(value) ? value.toFixed(3) : value;
+    rows.push("<tr><td>" + key + "</td><td>" + text + "</td></tr>");
+  }
+  document.getElementById("metrics").innerHTML = rows.join("");
+  const names = Object.keys(unreachable || {});
+  document.getElementById("unreachable").textContent = names.length ? "Unreachable: " + names.join(", ") : "";
+}
+let metrics = {}, unreachable = {};
+
+const events = new EventSource("/events");
+events.addEventListener("snapshot", (e) => {
+  const data = JSON.parse(e.data);
+  for (const name of [...nodes.keys()]) if (!data.nodes.includes(name)) nodes.delete(name);
+  data.nodes.forEach(addNode);
+  edges.clear();
+  data.edges.forEach(([s, t, type]) => setEdge(s, t, type));
+  metrics = data.metrics; unreachable = data.unreachable; version = data.version;
+  showMetrics(metrics, unreachable);
+});
+events.addEventListener("delta", (e) => {
+  const d = JSON.parse(e.data);
+  d.nodes_added.forEach(addNode);
+  d.edges_removed.forEach(([s, t]) => edges.delete(s + "|" + t));
+  d.edges_added.forEach(([s, t, type]) => setEdge(s, t, type));
+  d.nodes_removed.forEach((name) => nodes.delete(name));
+  if (d.metrics) metrics = d.metrics;
+  if (d.unreachable) unreachable = d.unreachable;
+  version = d.version;
+  showMetrics(metrics, unreachable);
+});
+events.onopen = () => { document.getElementById("status").textContent = "live"; };
+events.onerror = () => { document.getElementById("status").textContent = "disconnected, retrying..."; };
+
+function step() {
+  const list = [...nodes.values()];
+  const k = 1 / Math.sqrt(Math.max(list.length, 1));
+  for (const a of list) {
+    for (const b of list) {
+      if (a === b) continue;
+      const dx = a.x - b.x, dy = a.y - b.y, d2 = Math.max(dx * dx + dy * dy, 1e-6);
+      a.vx += dx * k * k / d2 * 0.01; a.vy += dy * k * k / d2 * 0.01;
+    }
+  }
+  for (const e of edges.values()) {
+    const a = nodes.get(e.source), b = nodes.get(e.target);
+    if (!a || !b) continue;
+    const dx = a.x - b.x, dy = a.y - b.y, d = Math.sqrt(dx * dx + dy * dy);
+    a.vx -= dx * d / k * 0.01; a.vy -= dy * d / k * 0.01;
+    b.vx += dx * d / k * 0.01; b.vy += dy * d / k * 0.01;
+  }
+  for (const n of list) {
+    n.x += Math.max(-0.02, Math.min(0.02, n.vx)); n.y += Math.max(-0.02, Math.min(0.02, n.vy));
+    n.vx *= 0.5; n.vy *= 0.5;
+  }
+}
+
+function draw() {
+  canvas.width = canvas.clientWidth; canvas.height = canvas.clientHeight;
+  const list = [...nodes.values()];
+  const xs = list.map((n) => n.x), ys = list.map((n) => n.y);
+  const minX = Math.min(...xs, 0), maxX = Math.max(...xs, 0), minY = Math.min(...ys, 0), maxY = Math.max(...ys, 0);
+  const scale = Math.min(canvas.width / (maxX - minX + 0.1), canvas.height / (maxY - minY + 0.1));
+  const px = (n) => [(n.x - minX + 0.05) * scale, (n.y - minY + 0.05) * scale];
+  ctx.lineWidth = 1;
+  for (const e of edges.values()) {
+    const a = nodes.get(e.source), b = nodes.get(e.target);
+    if (!a || !b) continue;
+    ctx.strokeStyle = e.type === "manual" ? "rgba(220,0,0,0.6)" : "rgba(0,0,220,0.3)";
+    ctx.beginPath(); ctx.moveTo(...px(a)); ctx.lineTo(...px(b)); ctx.stroke();
+  }
+  ctx.font = "10px sans-serif";
+  for (const [name, n] of nodes) {
+    const [x, y] = px(n);
+    ctx.fillStyle = name in unreachable ? "#f88" : "lightblue";
+    ctx.beginPath(); ctx.arc(x, y, 6, 0, 2 * Math.PI); ctx.fill();
+    ctx.fillStyle = "#000"; ctx.fillText(name, x + 8, y + 3);
+  }
+}
+
+(function loop() { step(); draw(); requestAnimationFrame(loop); })();
+</script>
+</body>
+</html>
+"""
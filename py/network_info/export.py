@@ -0,0 +1,127 @@
+# this file writes the crawled topology to files other tools can read
+#
+# Exporters stream nodes and edges straight to the file, one line at a time,
+# and do not need networkx or matplotlib.
+
+import csv
+import json
+import os
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from .get_info import crawl_peer_info
+from .parse import extract_connections, RESOLVER
+
+Edge = Tuple[str, str, str]  # (source, target, connection type)
+
+FORMATS = {
+    ".graphml": "graphml",
+    ".json": "json",
+    ".dot": "dot",
+    ".gv": "dot",
+    ".csv": "csv",
+}
+
+
+def topology_edges(nodes_list: List[str], crawl=None) -> Iterator[Edge]:
+    """Get the connections between the given nodes, as create_network_graph would add them.
+
+    Args:
+        nodes_list (List[str]): Names of the nodes.
+        crawl (CrawlResult, optional): Peer information already crawled. Defaults to None (crawl now).
+
+    Yields:
+        Edge: (source, target, connection type) for each connection reported by a node.
+    """
+    RESOLVER.invalidate()  # containers may have changed since the last crawl
+    if crawl is None:
+        crawl = crawl_peer_info(nodes_list)
+    known = set(nodes_list)
+    for node_name in nodes_list:
+        peers_info = crawl.peers.get(node_name)
+        if not peers_info:
+            continue
+        for peer_name, connection_type in extract_connections(peers_info, node_name):
+            if peer_name and peer_name in known:
+                yield node_name, peer_name, connection_type
+
+
+def write_csv(f: IO[str], nodes: Iterable[str], edges: Iterable[Edge]) -> None:
+    """Write the edge list as CSV (source,target,type). Nodes without edges are not written."""
+    writer = csv.writer(f)
+    writer.writerow(["source", "target", "type"])
+    writer.writerows(edges)
+
+
+def write_json(f: IO[str], nodes: Iterable[str], edges: Iterable[Edge]) -> None:
+    """Write {"nodes": [...], "edges": [{"source", "target", "type"}, ...]}."""
+    f.write('{"nodes": [')
+    for i, node in enumerate(nodes):
+        f.write((", " if i else "") + json.dumps(node))
+    f.write('], "edges": [')
+    for i, (source, target, connection_type) in enumerate(edges):
+        f.write((",\n" if i else "\n") + json.dumps({"source": source, "target": target, "type": connection_type}))
+    f.write("\n]}\n")
+
+
+def write_dot(f: IO[str], nodes: Iterable[str], edges: Iterable[Edge]) -> None:
+    """Write a Graphviz digraph, manual connections in red and the others in blue."""
+    f.write("digraph bitcoin_network {\n")
+    for node in nodes:
+        f.write(f"  {json.dumps(node)};\n")
+    for source, target, connection_type in edges:
+        color = "red" if connection_type == "manual" else "blue"
+        f.write(f"  {json.dumps(source)} -> {json.dumps(target)} "
+                f"[type={json.dumps(connection_type)}, color={color}];\n")
+    f.write("}\n")
+
+
+def write_graphml(f: IO[str], nodes: Iterable[str], edges: Iterable[Edge]) -> None:
+    """Write GraphML, with the connection type as the 'type' edge attribute."""
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+            '  <key id="type" for="edge" attr.name="type" attr.type="string"/>\n'
+            '  <graph id="bitcoin_network" edgedefault="directed">\n')
+    for node in nodes:
+        f.write(f"    <node id={quoteattr(node)}/>\n")
+    for source, target, connection_type in edges:
+        f.write(f"    <edge source={quoteattr(source)} target={quoteattr(target)}>"
+                f"<data key=\"type\">{escape(connection_type)}</data></edge>\n")
+    f.write("  </graph>\n</graphml>\n")
+
+
+WRITERS = {
+    "csv": write_csv,
+    "json": write_json,
+    "dot": write_dot,
+    "graphml": write_graphml,
+}
+
+
+def export_topology(path: str, nodes: Iterable[str], edges: Iterable[Edge], fmt: Optional[str] = None) -> None:
+    """Write the topology to a file.
+
+    Args:
+        path (str): Output file.
+        nodes (Iterable[str]): Node names.
+        edges (Iterable[Edge]): (source, target, connection type) of each connection, e.g. topology_edges(...).
+        fmt (str, optional): graphml, json, dot or csv. Defaults to None (from the extension of path).
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    if fmt is None:
+        fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format for {path} (supported: {', '.join(WRITERS)})")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary_file = f"{path}.tmp"
+    try:
+        with open(temporary_file, "w", newline="" if fmt == "csv" else None) as f:
+            WRITERS[fmt](f, nodes, edges)
+    except BaseException:
+        # the edges may come from a crawl that failed midway: never leave a truncated export
+        os.remove(temporary_file)
+        raise
+    os.replace(temporary_file, path)
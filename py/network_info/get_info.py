@@ -1,5 +1,7 @@
 import subprocess
 import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
 
 def get_peer_info(node_name : str):
     """Get peer information for a given node.
@@ -20,4 +22,71 @@ def get_peer_info(node_name : str):
         return json.loads(result.stdout)
     except Exception as e:
         print(f"Error for {node_name}: {e}")
-        return []
\ No newline at end of file
+        return []
+
+class CrawlResult:
+    """Peer information of every node reached by a crawl."""
+
+    def __init__(self):
+        self.peers = {}  # node -> getpeerinfo result
+        self.unreachable = {}  # node -> error message
+
+    def __repr__(self):
+        return f"CrawlResult({len(self.peers)} nodes, {len(self.unreachable)} unreachable)"
+
+
+def _default_rpc(pool_size: int):
+    from config import RPC_USER, RPC_PASSWORD, NODE_BASE_RPC_PORT
+    from registry import read_hosts
+    from scenario.rpc_caller import BitcoinRPC
+    return BitcoinRPC(RPC_USER, RPC_PASSWORD, NODE_BASE_RPC_PORT, pool_size=pool_size, hosts=read_hosts())
+
+
+def _fetch_peers(rpc, node: str, timeout: float, fields: Optional[Sequence[str]]):
+    peers = rpc.call(node, "getpeerinfo", timeout=timeout) or []
+    if fields is None:
+        return peers
+    from .peerinfo import parse_peers
+    return parse_peers(peers, fields)
+
+
+def crawl_peer_info(
+        nodes: List[str],
+        rpc=None,
+        timeout: float = 5.0,
+        max_workers: int = 256,
+        fields: Optional[Sequence[str]] = None,
+    ) -> CrawlResult:
+    """Get peer information of every node at once, over RPC.
+
+    All nodes are queried concurrently on pooled connections, so a crawl takes
+    about the time of the slowest node rather than the sum of all of them.
+
+    Args:
+        nodes (List[str]): Names of the nodes to crawl (e.g. ['node_1', 'node_2', ...]).
+        rpc (BitcoinRPC, optional): Client to use. Defaults to a client built from the config.
+        timeout (float, optional): Seconds to wait for each node. Defaults to 5.
+        max_workers (int, optional): Maximum number of concurrent requests. Defaults to 256.
+        fields (Sequence[str], optional): Only keep these getpeerinfo fields, peers being stored as
+            PeerInfo records (see peerinfo.py). Defaults to None (whole getpeerinfo dicts).
+
+    Returns:
+        CrawlResult: Peers of the nodes that answered, and the error of those that did not.
+    """
+    result = CrawlResult()
+    if not nodes:
+        return result
+
+    workers = max(1, min(len(nodes), max_workers))
+    if rpc is None:
+        rpc = _default_rpc(workers)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {node: pool.submit(_fetch_peers, rpc, node, timeout, fields) for node in nodes}
+        for node, future in futures.items():
+            try:
+                result.peers[node] = future.result() or []
+            except Exception as e:
+                result.unreachable[node] = str(e)
+
+    return result
@@ -1,50 +1,100 @@
 # this file is responsible for creating the network graph
+# (the plotting stack is only imported when drawing)
+
+import os
 
 import networkx as nx
-import matplotlib.pyplot as plt
-from .get_info import get_peer_info
-from .parse import extract_connections
+from .get_info import crawl_peer_info
+from .parse import extract_connections, RESOLVER
+
+# node positions of the last drawing, reused to keep the drawing stable
+LAYOUT_PATH = 'docker/data/.layout.json'
 
-def create_network_graph(nodes_list):
+def create_network_graph(nodes_list, crawl=None):
     """Create a NetworkX graph representing the Bitcoin network.
     
     Args:
         nodes_list (list): List of node names to analyze (e.g., ['node_1', 'node_2', ...])
+        crawl (CrawlResult, optional): Peer information already crawled. Defaults to None (crawl now).
         
     Returns:
         networkx.DiGraph: Directed graph representing the network connections
     """
     G = nx.DiGraph() 
     
+    # containers may have changed since the last crawl: index them again (once)
+    RESOLVER.invalidate()
+    
     # Adding nodes 
     for node in nodes_list:
         G.add_node(node)
     
-    # get peer information for each node
+    # get peer information of all nodes at once
+    print(f"Analysing connections of {len(nodes_list)} nodes...")
+    if crawl is None:
+        crawl = crawl_peer_info(nodes_list)
+    for node_name, error in crawl.unreachable.items():
+        print(f"[WARNING] {node_name} is unreachable: {error}")
+    
+    known = set(nodes_list)
     for node_name in nodes_list:
-        print(f"Analysing connections for {node_name}...")
-        
-        peers_info = get_peer_info(node_name)
+        peers_info = crawl.peers.get(node_name)
         
         if not peers_info:
             continue
             
-        connections = extract_connections(peers_info)
+        connections = extract_connections(peers_info, node_name)
         
         for peer_name, connection_type in connections:
-            if peer_name and peer_name in nodes_list: 
+            if peer_name and peer_name in known: 
                 G.add_edge(node_name, peer_name, 
                           type=connection_type,
                           color='red' if connection_type == 'manual' else 'blue')
     
     return G
 
-def visualize_network(img_path : str = 'img/bitcoin_network_map.png'):
+def merge_edges(G):
+    """Merge the two edges of each connection into one.
+
+    A connection appears twice in the crawled graph: as outbound ('manual') from the
+    node that opened it and as 'inbound' from the other side. Each connection is
+    drawn once, from the node that opened it when known. Two nodes that each opened
+    a connection to the other keep both.
+
+    Args:
+        G (networkx.DiGraph): Graph returned by create_network_graph.
+
+    Returns:
+        list: (source, target, connection_type) for each connection, source being the node that opened it.
+    """
+    merged = {}
+    for u, v, d in G.edges(data=True):
+        connection_type = d.get('type')
+        if connection_type == 'inbound':
+            # v opened the connection
+            u, v = v, u
+        # the side that opened the connection knows its type
+        if (u, v) not in merged or merged[(u, v)][2] == 'inbound':
+            merged[(u, v)] = (u, v, connection_type)
+    return list(merged.values())
+
+def visualize_network(img_path : str = 'img/bitcoin_network_map.png', layout_path : str = LAYOUT_PATH):
     """Visualize the Bitcoin network graph and save it as an image.
 
+    The format is taken from the extension of img_path: use .svg (or .pdf) for large
+    networks, the cost of vector output only depends on the number of edges.
+
     Args:
         img_path (str, optional): Path to save the img. Defaults to 'img/bitcoin_network_map.png'.
+        layout_path (str, optional): File keeping node positions between runs, None to always
+            compute a new layout. Defaults to LAYOUT_PATH.
     """
+    import numpy as np
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
+    from .layout import compute_layout, load_layout, save_layout
+
     nodes = []
     # create a list of nodes to analyze
     with open('docker/data/.env.node_names', 'r') as f:
@@ -53,44 +103,48 @@ def visualize_network(img_path : str = 'img/bitcoin_network_map.png'):
     
     # create the network graph
     G = create_network_graph(nodes)
-        
-    plt.figure(figsize=(12, 8))
     
-    # Layout du graphe
-    pos = nx.spring_layout(G, k=2, iterations=50)
+    # Layout du graphe: known nodes keep their position, only new ones are placed
+    previous = load_layout(layout_path) if layout_path else {}
+    pos = compute_layout(G, previous)
+    if layout_path:
+        save_layout(layout_path, {**previous, **pos})
     
-    manual_edges = [(u, v) for u, v, d in G.edges(data=True) if d.get('type') == 'manual']
-    inbound_edges = [(u, v) for u, v, d in G.edges(data=True) if d.get('type') == 'inbound']
+    n = max(G.number_of_nodes(), 1)
+    scale = max(1.0, (n / 50) ** 0.5)
+    fig, ax = plt.subplots(figsize=(12 * scale, 8 * scale))
     
-    nx.draw_networkx_edges(G, pos, edgelist=manual_edges, 
-                          edge_color='red', alpha=0.8, width=2.5,
-                          arrowsize=25, arrowstyle='->',
-                          connectionstyle='arc3,rad=0',
-                          node_size=1200,
-                          label='Outbound connections (manual)')
+    edges = merge_edges(G)
+    segments = [(pos[u], pos[v]) for u, v, _ in edges]
+    colors = ['red' if t == 'manual' else 'blue' for _, _, t in edges]
+    ax.add_collection(LineCollection(segments, colors=colors, linewidths=2 if n <= 200 else 0.5, alpha=0.8, zorder=1))
     
-    nx.draw_networkx_edges(G, pos, edgelist=inbound_edges, 
-                          edge_color='blue', alpha=0.8, width=2,
-                          arrowsize=25, arrowstyle='->',
-                            connectionstyle='arc3,rad=0',
-                            node_size=1200,
-                            label='Inbound connections')
-
-    nx.draw_networkx_nodes(G, pos, node_color='lightblue', 
-                          node_size=1200, alpha=0.9)
+    # one arrow head per connection, pointing to the node that accepted it
+    if edges:
+        start = np.array([pos[u] for u, _, _ in edges])
+        end = np.array([pos[v] for _, v, _ in edges])
+        ax.quiver(*(start + 0.7 * (end - start)).T, *(0.1 * (end - start)).T, color=colors,
+                  angles='xy', scale_units='xy', scale=1, width=0.002, headwidth=6, zorder=2)
     
-    nx.draw_networkx_labels(G, pos, font_size=10, font_weight='bold')
+    xy = np.array([pos[node] for node in G.nodes]).reshape(-1, 2)
+    ax.scatter(xy[:, 0], xy[:, 1], s=1200 if n <= 50 else max(20, 60000 / n), c='lightblue', alpha=0.9, zorder=3)
     
-    plt.title("Bitcoin Network Map", fontsize=16)
+    if n <= 200:
+        for node, (x, y) in pos.items():
+            ax.text(x, y, node, fontsize=10 if n <= 50 else 6, fontweight='bold', ha='center', va='center', zorder=4)
+    
+    ax.set_title("Bitcoin Network Map", fontsize=16)
 
-    from matplotlib.lines import Line2D
     legend_elements = [
         Line2D([0], [0], color='red', lw=2.5, label='Outbound connections (manual)'),
         Line2D([0], [0], color='blue', lw=2, label='Inbound connections')
     ]
-    plt.legend(handles=legend_elements, loc='upper right')
+    ax.legend(handles=legend_elements, loc='upper right')
     
-    plt.axis('off')
-    plt.tight_layout()
-    plt.savefig(img_path, dpi=300, bbox_inches='tight')
+    ax.autoscale()
+    ax.axis('off')
+    fig.tight_layout()
+    vector = os.path.splitext(img_path)[1].lower() in ('.svg', '.pdf', '.eps')
+    plt.savefig(img_path, dpi=None if vector else 300, bbox_inches='tight')
+    plt.close(fig)
     print(f"[DONE ] Network graph saved to {img_path}")
\ No newline at end of file
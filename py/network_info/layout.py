@@ -0,0 +1,224 @@
+# this file places the nodes of the network graph
+#
+# Positions are saved between runs and reused: nodes already placed keep their
+# position and only new nodes are placed around them, so the drawing stays
+# stable while the network changes.
+
+import json
+import math
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+Positions = Dict[str, Tuple[float, float]]
+
+# above this number of nodes, the grid layout is used instead of networkx's spring layout
+GRID_LAYOUT_THRESHOLD = 300
+
+
+def load_layout(path: str) -> Positions:
+    """Load saved node positions.
+
+    Args:
+        path (str): Path of the layout file.
+
+    Returns:
+        Positions: {node: (x, y)}, empty if the file is missing or invalid.
+    """
+    try:
+        with open(path, "r") as f:
+            return {node: (float(x), float(y)) for node, (x, y) in json.load(f).items()}
+    except (OSError, ValueError, TypeError):
+        return {}
+
+
+def save_layout(path: str, pos: Positions) -> None:
+    """Save node positions.
+
+    Args:
+        path (str): Path of the layout file.
+        pos (Positions): {node: (x, y)}
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({node: [float(x), float(y)] for node, (x, y) in pos.items()}, f)
+
+
+def _neighbour_pairs(cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Find every pair of distinct nodes lying in the same or adjacent grid cells.
+
+    Args:
+        cells (np.ndarray): (n, 2) cell coordinates of the nodes.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Node indices (i, j) of the pairs, both orders included.
+    """
+    cells = cells - cells.min(axis=0) + 1  # room for the -1 neighbours
+    width = int(cells[:, 1].max()) + 2
+    keys = cells[:, 0] * width + cells[:, 1]
+    order = np.argsort(keys, kind="stable")
+    cell_keys, start, count = np.unique(keys[order], return_index=True, return_counts=True)
+
+    pairs_i, pairs_j = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            # cells a having a neighbour b at (dx, dy)
+            target = cell_keys + dx * width + dy
+            b = np.searchsorted(cell_keys, target)
+            b[b == len(cell_keys)] = 0
+            a = np.flatnonzero(cell_keys[b] == target)
+            b = b[a]
+            # every member of a with every member of b
+            sizes = count[a] * count[b]
+            total = int(sizes.sum())
+            if total == 0:
+                continue
+            first = np.repeat(np.cumsum(sizes) - sizes, sizes)
+            r = np.arange(total) - first
+            cb = np.repeat(count[b], sizes)
+            pairs_i.append(order[np.repeat(start[a], sizes) + r // cb])
+            pairs_j.append(order[np.repeat(start[b], sizes) + r % cb])
+
+    i, j = np.concatenate(pairs_i), np.concatenate(pairs_j)
+    distinct = i != j
+    return i[distinct], j[distinct]
+
+
+def grid_layout(
+        G,
+        pos: Optional[Positions] = None,
+        fixed: Optional[set] = None,
+        iterations: int = 50,
+        seed: Optional[int] = None,
+    ) -> Positions:
+    """Force-directed layout (Fruchterman-Reingold) with grid-based repulsion.
+
+    Nodes only repel the nodes of their own and adjacent grid cells, sized to hold a
+    few nodes each, so an iteration costs about O(n + m) instead of O(n²).
+
+    Args:
+        G (networkx.Graph): The graph (edge direction is ignored).
+        pos (Positions, optional): Initial positions. Defaults to None (random).
+        fixed (set, optional): Nodes that keep their initial position. Defaults to None.
+        iterations (int, optional): Number of iterations. Defaults to 50.
+        seed (int, optional): Seed of the random initial positions. Defaults to None.
+
+    Returns:
+        Positions: {node: (x, y)}
+    """
+    nodes = list(G.nodes)
+    n = len(nodes)
+    if n == 0:
+        return {}
+    index = {node: i for i, node in enumerate(nodes)}
+    rng = np.random.default_rng(seed)
+
+    xy = rng.random((n, 2))
+    if pos:
+        for node, p in pos.items():
+            if node in index:
+                xy[index[node]] = p
+    movable = np.ones(n, dtype=bool)
+    for node in fixed or ():
+        if node in index:
+            movable[index[node]] = False
+
+    edges = np.array([(index[u], index[v]) for u, v in G.edges if u != v], dtype=np.int64).reshape(-1, 2)
+
+    extent = max(float(np.ptp(xy[:, 0])), float(np.ptp(xy[:, 1])), 1.0)
+    k = extent / math.sqrt(n)  # ideal edge length
+    temperature = extent / 10
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        displacement = np.zeros((n, 2))
+
+        # repulsion k²/d between nodes of neighbouring cells, cells being sized for a few nodes each
+        # even when the layout is denser than ideal
+        spread = max(float(np.ptp(xy[:, 0])), float(np.ptp(xy[:, 1])), 1e-9)
+        cell = 2 * min(k, spread / math.sqrt(n))
+        i, j = _neighbour_pairs(np.floor(xy / cell).astype(np.int64))
+        delta = xy[i] - xy[j]
+        distance2 = np.maximum((delta ** 2).sum(axis=1), 1e-9)
+        weight = np.where(distance2 <= cell * cell, k * k / distance2, 0.0)
+        displacement[:, 0] += np.bincount(i, delta[:, 0] * weight, minlength=n)
+        displacement[:, 1] += np.bincount(i, delta[:, 1] * weight, minlength=n)
+
+        # attraction d²/k along edges
+        if len(edges):
+            delta = xy[edges[:, 0]] - xy[edges[:, 1]]
+            distance = np.maximum(np.sqrt((delta ** 2).sum(axis=1)), 1e-9)
+            force = delta * (distance / k)[:, None]
+            for axis in (0, 1):
+                displacement[:, axis] += np.bincount(edges[:, 1], force[:, axis], minlength=n)
+                displacement[:, axis] -= np.bincount(edges[:, 0], force[:, axis], minlength=n)
+
+        length = np.maximum(np.sqrt((displacement ** 2).sum(axis=1)), 1e-9)
+        step = displacement * (np.minimum(length, temperature) / length)[:, None]
+        xy[movable] += step[movable]
+        temperature -= cooling
+
+    if not (~movable).any():
+        # same scale as networkx layouts: centered, within [-1, 1]
+        xy -= xy.mean(axis=0)
+        xy /= max(float(np.abs(xy).max()), 1e-9)
+    return {node: (float(x), float(y)) for node, (x, y) in zip(nodes, xy)}
+
+
+def _initial_position(G, node, pos: Positions, rng: np.random.Generator) -> Tuple[float, float]:
+    """Place a new node next to its already placed neighbours (anywhere if it has none)."""
+    import networkx as nx
+
+    placed = [pos[n] for n in set(nx.all_neighbors(G, node)) if n in pos]
+    if placed:
+        x, y = np.mean(placed, axis=0) + rng.normal(scale=0.05, size=2)
+        return float(x), float(y)
+    xy = np.array(list(pos.values()))
+    low, high = xy.min(axis=0), xy.max(axis=0)
+    x, y = low + rng.random(2) * np.maximum(high - low, 1e-3)
+    return float(x), float(y)
+
+
+def compute_layout(
+        G,
+        previous: Optional[Positions] = None,
+        iterations: int = 50,
+        seed: Optional[int] = None,
+    ) -> Positions:
+    """Place the nodes of a graph, keeping the positions of the nodes already placed.
+
+    Args:
+        G (networkx.Graph): The graph.
+        previous (Positions, optional): Positions of a previous layout. Defaults to None.
+        iterations (int, optional): Number of iterations of the force-directed layout. Defaults to 50.
+        seed (int, optional): Random seed. Defaults to None.
+
+    Returns:
+        Positions: {node: (x, y)} for every node of G.
+    """
+    import networkx as nx
+
+    known = {node: p for node, p in (previous or {}).items() if node in G}
+    if len(known) == G.number_of_nodes():
+        return known  # nothing new to place
+
+    rng = np.random.default_rng(seed)
+    large = G.number_of_nodes() > GRID_LAYOUT_THRESHOLD
+
+    if not known:
+        if large:
+            return grid_layout(G, iterations=iterations, seed=seed)
+        return {n: tuple(map(float, p)) for n, p in nx.spring_layout(G, k=2, iterations=iterations, seed=seed).items()}
+
+    # warm start: new nodes move, placed nodes stay where they were
+    pos = dict(known)
+    for node in G.nodes:
+        if node not in pos:
+            pos[node] = _initial_position(G, node, pos, rng)
+    if large:
+        return grid_layout(G, pos=pos, fixed=set(known), iterations=iterations, seed=seed)
+    xy = np.array(list(known.values()))
+    k = max(float(np.ptp(xy[:, 0])), float(np.ptp(xy[:, 1])), 1e-3) / math.sqrt(G.number_of_nodes())
+    result = nx.spring_layout(G, pos=pos, fixed=list(known), k=k, iterations=iterations, seed=seed)
+    return {n: tuple(map(float, p)) for n, p in result.items()}
@@ -0,0 +1,283 @@
+# this file computes statistics of the crawled network topology
+#
+# The topology is kept as adjacency sets (O(nodes + edges) memory), updated edge
+# by edge between snapshots. Path and component metrics run on a CSR copy of the
+# undirected graph with array operations: the breadth-first searches of 64
+# sources are run at once, each source being one bit of a uint64 per node.
+# Connections are directed (outbound/inbound); path, clustering and component
+# metrics use the undirected graph (two nodes are linked if either one reports
+# the other).
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+Edge = Tuple[str, str]
+
+SOURCES_PER_PASS = 64  # breadth-first searches run at once (bits of a uint64)
+
+
+def _summary(values: np.ndarray) -> Dict[str, float]:
+    if values.size == 0:
+        return {"min": 0, "max": 0, "mean": 0.0}
+    return {"min": int(values.min()), "max": int(values.max()), "mean": float(values.mean())}
+
+
+def _popcount(values: np.ndarray) -> int:
+    if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+        return int(np.bitwise_count(values).sum())
+    return int(np.unpackbits(values.view(np.uint8)).sum())
+
+
+class MetricsEngine:
+    """Compute metrics of successive snapshots of the network.
+
+    When only a few edges changed since the previous snapshot, degrees,
+    triangles and asymmetry are updated edge by edge, and path metrics are only
+    computed again if the undirected graph changed. Otherwise (or when the set of
+    nodes changed) the adjacency is rebuilt.
+    """
+
+    def __init__(self, rebuild_ratio: float = 0.1):
+        """
+        Args:
+            rebuild_ratio (float, optional): Rebuild the adjacency when more than this fraction
+                of the edges changed. Defaults to 0.1.
+        """
+        self.rebuild_ratio = rebuild_ratio
+        self.nodes: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.edges: Set[Edge] = set()
+        self.out: List[Set[int]] = []  # out[u]: nodes u reports a connection to
+        self.neighbours: List[Set[int]] = []  # undirected adjacency
+        self.in_degree = np.zeros(0, dtype=np.int64)
+        self.out_degree = np.zeros(0, dtype=np.int64)
+        self.degree = np.zeros(0, dtype=np.int64)  # undirected degree
+        self.triangles = np.zeros(0, dtype=np.int64)  # undirected triangles through each node
+        self.asymmetric = 0  # directed edges without the reverse edge
+        self._paths = None  # cached path metrics, None when the undirected graph changed
+        self.rebuilds = 0
+
+    # ==== updates ====
+
+    def update(self, nodes: Iterable[str], edges: Iterable[Edge]) -> Dict[str, Any]:
+        """Move to a new snapshot and compute its metrics.
+
+        Args:
+            nodes (Iterable[str]): Nodes of the snapshot.
+            edges (Iterable[Edge]): Directed edges (source, target) of the snapshot.
+
+        Returns:
+            Dict[str, Any]: The metrics record (see record).
+        """
+        edges = {(u, v) for u, v in edges if u != v}
+        nodes = set(nodes).union(*edges) if edges else set(nodes)
+
+        if nodes != set(self.index):
+            self._rebuild(nodes, edges)
+        else:
+            added = edges - self.edges
+            removed = self.edges - edges
+            if len(added) + len(removed) > self.rebuild_ratio * max(len(edges), len(self.edges), 1):
+                self._rebuild(nodes, edges)
+            else:
+                for u, v in removed:
+                    self._remove_edge(self.index[u], self.index[v])
+                for u, v in added:
+                    self._add_edge(self.index[u], self.index[v])
+                self.edges = edges
+        return self.record()
+
+    def update_graph(self, graph) -> Dict[str, Any]:
+        """Move to the snapshot of a graph returned by create_network_graph."""
+        return self.update(graph.nodes, graph.edges)
+
+    def _rebuild(self, nodes: Set[str], edges: Set[Edge]) -> None:
+        self.nodes = sorted(nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.edges = edges
+        n = len(self.nodes)
+
+        self.out = [set() for _ in range(n)]
+        self.neighbours = [set() for _ in range(n)]
+        for u, v in edges:
+            i, j = self.index[u], self.index[v]
+            self.out[i].add(j)
+            self.neighbours[i].add(j)
+            self.neighbours[j].add(i)
+
+        self.out_degree = np.array([len(targets) for targets in self.out], dtype=np.int64)
+        self.in_degree = np.zeros(n, dtype=np.int64)
+        for targets in self.out:
+            self.in_degree[list(targets)] += 1
+        self.degree = np.array([len(neighbours) for neighbours in self.neighbours], dtype=np.int64)
+        self.asymmetric = sum(1 for u, targets in enumerate(self.out) for v in targets if u not in self.out[v])
+
+        # each undirected edge adds its common neighbours to both ends: every triangle is seen twice
+        self.triangles = np.zeros(n, dtype=np.int64)
+        for u, neighbours in enumerate(self.neighbours):
+            for v in neighbours:
+                if v > u:
+                    common = len(neighbours & self.neighbours[v])
+                    self.triangles[u] += common
+                    self.triangles[v] += common
+        self.triangles //= 2
+        self._paths = None
+        self.rebuilds += 1
+
+    def _add_edge(self, u: int, v: int) -> None:
+        if v in self.out[u]:
+            return
+        self.out[u].add(v)
+        self.out_degree[u] += 1
+        self.in_degree[v] += 1
+        self.asymmetric += -1 if u in self.out[v] else 1
+
+        if v not in self.neighbours[u]:
+            common = list(self.neighbours[u] & self.neighbours[v])
+            self.triangles[u] += len(common)
+            self.triangles[v] += len(common)
+            self.triangles[common] += 1
+            self.neighbours[u].add(v)
+            self.neighbours[v].add(u)
+            self.degree[u] += 1
+            self.degree[v] += 1
+            self._paths = None
+
+    def _remove_edge(self, u: int, v: int) -> None:
+        if v not in self.out[u]:
+            return
+        self.out[u].discard(v)
+        self.out_degree[u] -= 1
+        self.in_degree[v] -= 1
+        self.asymmetric += 1 if u in self.out[v] else -1
+
+        if u not in self.out[v]:
+            self.neighbours[u].discard(v)
+            self.neighbours[v].discard(u)
+            self.degree[u] -= 1
+            self.degree[v] -= 1
+            common = list(self.neighbours[u] & self.neighbours[v])
+            self.triangles[u] -= len(common)
+            self.triangles[v] -= len(common)
+            self.triangles[common] -= 1
+            self._paths = None
+
+    # ==== metrics ====
+
+    def _csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Undirected adjacency in CSR form: the neighbours of u are indices[indptr[u]:indptr[u + 1]]."""
+        indptr = np.zeros(len(self.nodes) + 1, dtype=np.int64)
+        np.cumsum(self.degree, out=indptr[1:])
+        indices = np.fromiter(
+            (v for neighbours in self.neighbours for v in neighbours), dtype=np.int64, count=int(indptr[-1])
+        )
+        return indptr, indices
+
+    def _path_metrics(self) -> Dict[str, Any]:
+        """Distances and components, from a breadth-first search started from every node."""
+        if self._paths is not None:
+            return self._paths
+
+        n = len(self.nodes)
+        indptr, indices = self._csr()
+        linked = self.degree > 0
+        starts = indptr[:-1][linked]
+
+        def spread(values: np.ndarray, combine: np.ufunc, empty) -> np.ndarray:
+            # combine the values of the neighbours of every node
+            result = np.full(n, empty, dtype=values.dtype)
+            if indices.size:
+                result[linked] = combine.reduceat(values[indices], starts)
+            return result
+
+        diameter = pairs = distance_sum = 0
+        for first in range(0, n, SOURCES_PER_PASS):
+            sources = np.arange(first, min(first + SOURCES_PER_PASS, n))
+            # bit k of reached[v]: v is reached from the source first + k
+            reached = np.zeros(n, dtype=np.uint64)
+            reached[sources] = np.left_shift(np.uint64(1), (sources - first).astype(np.uint64))
+            frontier = reached
+            level = 0
+            while True:
+                level += 1
+                frontier = spread(frontier, np.bitwise_or, 0) & ~reached
+                count = _popcount(frontier)
+                if count == 0:
+                    break
+                reached |= frontier
+                diameter = max(diameter, level)
+                pairs += count
+                distance_sum += level * count
+
+        # every node is labelled by the first node of its component
+        labels = np.arange(n)
+        while True:
+            smallest = np.minimum(labels, spread(labels, np.minimum, n))
+            smallest = smallest[smallest]  # follow the labels of the labels
+            if np.array_equal(smallest, labels):
+                break
+            labels = smallest
+        sizes = np.unique(labels, return_counts=True)[1]
+        self._paths = {
+            "components": int(sizes.size),
+            "largest_component": int(sizes.max()) if sizes.size else 0,
+            "connected": sizes.size == 1,
+            "diameter": diameter,
+            "avg_shortest_path": distance_sum / pairs if pairs else 0.0,
+        }
+        return self._paths
+
+    def record(self) -> Dict[str, Any]:
+        """Metrics of the current snapshot.
+
+        Returns:
+            Dict[str, Any]: nodes, edges, density, in/out degree summaries, undirected degree
+                histogram, asymmetric edges (and their fraction), average clustering, number and
+                largest size of connected components, diameter and average shortest path (over
+                connected pairs).
+        """
+        n = len(self.nodes)
+        edges = len(self.edges)
+        possible = self.degree * (self.degree - 1)
+        clustering = np.divide(2 * self.triangles, possible, out=np.zeros(n), where=possible > 0)
+
+        return {
+            "nodes": n,
+            "edges": edges,
+            "density": edges / (n * (n - 1)) if n > 1 else 0.0,
+            "in_degree": _summary(self.in_degree),
+            "out_degree": _summary(self.out_degree),
+            "degree_histogram": np.bincount(self.degree).tolist() if n else [],
+            "asymmetric_edges": self.asymmetric,
+            "asymmetry": self.asymmetric / edges if edges else 0.0,
+            "avg_clustering": float(clustering.mean()) if n else 0.0,
+            **self._path_metrics(),
+        }
+
+
+def graph_metrics(graph) -> Dict[str, Any]:
+    """Compute the metrics of a graph returned by create_network_graph.
+
+    Args:
+        graph (networkx.DiGraph): The network.
+
+    Returns:
+        Dict[str, Any]: The metrics record (see MetricsEngine.record).
+    """
+    return MetricsEngine().update_graph(graph)
+
+
+def recording_metrics(reader, engine: Optional[MetricsEngine] = None) -> Iterator[Dict[str, Any]]:
+    """Compute the metrics of every snapshot of a topology recording, incrementally.
+
+    Args:
+        reader (TopologyReader): The recording.
+        engine (MetricsEngine, optional): Engine to use. Defaults to a new one.
+
+    Yields:
+        Dict[str, Any]: The metrics record of each snapshot, with its time.
+    """
+    engine = engine or MetricsEngine()
+    for time, state in reader:
+        yield {"time": time, **engine.update(state.nodes, state.edges)}
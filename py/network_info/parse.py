@@ -1,9 +1,182 @@
+# this file is responsible of parsing from infos
+import ipaddress
 import subprocess
 import json
+import time
+from typing import Dict, List, Optional
+
+# docker's default address pool for bridge networks, used when networks can't be inspected
+DOCKER_DEFAULT_POOL = ipaddress.ip_network("172.16.0.0/12")
+
+class ContainerResolver:
+    """Index of container names by IP address, for every docker bridge network.
+
+    The index is built with a single `docker network ls` + `docker network inspect`
+    instead of inspecting every container for every address. It is rebuilt when it
+    gets older than `max_age`, when `invalidate` is called, or when an address of a
+    known subnet is missing (a container was added or recreated), at most once every
+    `min_refresh` seconds.
+    """
+
+    def __init__(self, docker: str = "/bin/docker", max_age: float = 30.0, min_refresh: float = 2.0):
+        """
+        Args:
+            docker (str, optional): Docker executable. Defaults to "/bin/docker".
+            max_age (float, optional): Seconds after which the index is rebuilt. Defaults to 30.
+            min_refresh (float, optional): Minimum seconds between two rebuilds. Defaults to 2.
+        """
+        self.docker = docker
+        self.max_age = max_age
+        self.min_refresh = min_refresh
+        self._index: Optional[Dict[str, str]] = None
+        self._subnets: List[ipaddress.IPv4Network] = []
+        self._built_at = 0.0
+        self._shard_peers: Optional["ShardPeers"] = None
+
+    def invalidate(self) -> None:
+        """Force the index (and the shards of the registry) to be read again on next use."""
+        self._index = None
+        self._shard_peers = None
+
+    def _run(self, *args: str) -> str:
+        return subprocess.run([self.docker, *args], capture_output=True, text=True, check=True).stdout
+
+    def refresh(self) -> None:
+        """Rebuild the index from the docker networks."""
+        index, subnets = {}, []
+        try:
+            network_ids = self._run("network", "ls", "-q", "--filter", "driver=bridge").split()
+            networks = json.loads(self._run("network", "inspect", *network_ids)) if network_ids else []
+        except (OSError, subprocess.CalledProcessError, json.JSONDecodeError):
+            networks = []
+
+        for network in networks:
+            for config in (network.get("IPAM") or {}).get("Config") or []:
+                try:
+                    subnet = ipaddress.ip_network(config.get("Subnet", ""), strict=False)
+                except ValueError:
+                    continue
+                if subnet.version == 4:
+                    subnets.append(subnet)
+            for container in (network.get("Containers") or {}).values():
+                ip = container.get("IPv4Address", "").split("/")[0]
+                if ip:
+                    index[ip] = container.get("Name", "").lstrip("/")
+
+        self._index, self._subnets = index, subnets
+        self._built_at = time.monotonic()
+
+    def _ensure_index(self) -> Dict[str, str]:
+        if self._index is None or time.monotonic() - self._built_at > self.max_age:
+            self.refresh()
+        return self._index
+
+    def subnets(self) -> List[ipaddress.IPv4Network]:
+        """Subnets of the docker bridge networks (docker's default pool if unknown)."""
+        self._ensure_index()
+        return self._subnets or [DOCKER_DEFAULT_POOL]
+
+    def in_subnet(self, ip_address: str) -> bool:
+        """Tell whether an address belongs to a docker bridge network."""
+        try:
+            ip = ipaddress.ip_address(ip_address)
+        except ValueError:
+            return False
+        return any(ip in subnet for subnet in self.subnets())
+
+    def resolve(self, ip_address: str) -> Optional[str]:
+        """Find the name of the container having an address.
+
+        Args:
+            ip_address (str): The IP address to look up
+
+        Returns:
+            Optional[str]: Container name if found, None otherwise
+        """
+        name = self._ensure_index().get(ip_address)
+        if name is None and time.monotonic() - self._built_at > self.min_refresh:
+            # unknown address: containers may have changed since the index was built
+            self.refresh()
+            name = self._index.get(ip_address)
+        return name
+
+    def shard_peers(self) -> "ShardPeers":
+        """Peers of other shards, read from the node registry (no peers if the network is not sharded)."""
+        if self._shard_peers is None:
+            self._shard_peers = ShardPeers.from_registry()
+        return self._shard_peers
+
+
+class ShardPeers:
+    """Node names of the peers of other shards, which are not seen at container addresses.
+
+    A node connects to a node of another shard at host.docker.internal:<p2p port> (same
+    host) or <host>:<p2p port> (other host), so its outbound connections are resolved by
+    P2P port. The other side sees the connection coming from its bridge gateway (or the
+    remote host), from an ephemeral port: its inbound connections are resolved with the
+    intended topology, when a single node of another shard adds it.
+    """
+
+    def __init__(self, ports: Dict[int, str], adders: Dict[str, List[str]]):
+        """
+        Args:
+            ports (Dict[int, str]): {P2P port: node} of the sharded nodes.
+            adders (Dict[str, List[str]]): {node: the nodes of other shards adding it}.
+        """
+        self.ports = ports
+        self.adders = adders
+
+    @classmethod
+    def from_registry(cls, data_dir: Optional[str] = None, base_p2p: Optional[int] = None) -> "ShardPeers":
+        """Read the shards and the intended topology of the generated network.
+
+        Args:
+            data_dir (str, optional): Directory of the registry files. Defaults to registry.DATA_DIR.
+            base_p2p (int, optional): P2P port of the first node. Defaults to NODE_BASE_P2P_PORT.
+
+        Returns:
+            ShardPeers: The peers, none if the network is not sharded.
+        """
+        from registry import DATA_DIR, read_shards, read_topology
+        data_dir = DATA_DIR if data_dir is None else data_dir
+        shards = read_shards(data_dir)
+        if not shards:
+            return cls({}, {})
+        if base_p2p is None:
+            from config import NODE_BASE_P2P_PORT as base_p2p
+        # same ports as generate_compose.compute_ports
+        ports = {base_p2p + (int(node.split('_')[-1]) - 1) * 2: node for node in shards}
+        adders = {}
+        for source, target in read_topology(data_dir):
+            if source in shards and target in shards and shards[source][0] != shards[target][0]:
+                adders.setdefault(target, []).append(source)
+        return cls(ports, adders)
+
+    def resolve(self, peer_json: dict, node: Optional[str] = None) -> Optional[str]:
+        """Find the node of another shard behind a getpeerinfo entry.
+
+        Args:
+            peer_json (dict): One entry of getpeerinfo, whose address is not a container.
+            node (str, optional): Node reporting the entry, needed for inbound connections. Defaults to None.
+
+        Returns:
+            Optional[str]: The node name, None if unknown.
+        """
+        if peer_json.get('connection_type') == 'inbound':
+            adders = set(self.adders.get(node, ()))
+            return adders.pop() if len(adders) == 1 else None
+        try:
+            port = int(peer_json.get('addr', '').rsplit(':', 1)[1])
+        except (IndexError, ValueError):
+            return None
+        return self.ports.get(port)
+
+
+RESOLVER = ContainerResolver()
+
 
-# this file is responsible of parsing from infos
 def _docker_dns(ip_address):
-    """Find container name from IP address using docker inspect.
+    """Find container name from IP address.
     
     Args:
         ip_address (str): The IP address to look up
@@ -11,37 +184,40 @@ def _docker_dns(ip_address):
     Returns:
         str: Container name if found, None otherwise
     """
-    try:
-        # Get all container IDs
-        result = subprocess.run(['/bin/docker', 'ps', '-q'], 
-                                capture_output=True, text=True, check=True)
-        container_ids = result.stdout.strip().split('\n')
-            
-        for container_id in container_ids:
-            if not container_id:
-                continue
-                    
-            # Inspect each container
-            inspect_result = subprocess.run(['/bin/docker', 'inspect', container_id],
-                                             capture_output=True, text=True, check=True)
-            container_info = json.loads(inspect_result.stdout)[0]
-                
-            # Check networks for matching IP
-            networks = container_info.get('NetworkSettings', {}).get('Networks', {})
-            for _ , network_info in networks.items():
-                if network_info.get('IPAddress') == ip_address:
-                    return container_info.get('Name', '').lstrip('/')
-                        
-    except (subprocess.CalledProcessError, json.JSONDecodeError, KeyError):
-        pass
-            
-    return None
+    return RESOLVER.resolve(ip_address)
+
+def resolve_peer(peer_json, node=None):
+    """Find the name of the peer of a getpeerinfo entry.
+
+    Args:
+        peer_json (dict): One entry of getpeerinfo.
+        node (str, optional): Node reporting the entry, to resolve the inbound peers of other shards. Defaults to None.
 
-def extract_connections(peers_info):
+    Returns:
+        Tuple[bool, str]: (False, None) if the entry has no address, else (True, name) where name
+            is the container name for addresses of docker networks (None if unknown), the node
+            of another shard for the other addresses of a sharded network, the IP otherwise.
+    """
+    peer_addr = peer_json.get('addr', '').split(':')[0]  # peer IP
+    node_addr = peer_json.get("addrbind", '').split(':')[0]  # node IP
+    if not (peer_addr and node_addr):
+        return False, None
+    # resolve container name if needed
+    in_subnet = RESOLVER.in_subnet(peer_addr)
+    name = _docker_dns(peer_addr) if in_subnet else None
+    if name is None:
+        # not a container (bridge gateway, host.docker.internal, another host): maybe another shard
+        name = RESOLVER.shard_peers().resolve(peer_json, node)
+    if name is None and not in_subnet:
+        return True, peer_addr
+    return True, name
+
+def extract_connections(peers_info, node=None):
     """Extracts connections from peer information.
 
     Args:
         peers_info (json type String): JSON string containing peer information.
+        node (str, optional): Node the peer information is from. Defaults to None.
 
     Returns:
         List: A list of tuples containing peer IP and connection type.
@@ -54,16 +230,8 @@ def extract_connections(peers_info):
     connections = []
     
     for peer_json in peers_info:
-        peer_addr = peer_json.get('addr', '').split(':')[0]  # peer IP
-        connection_type = peer_json.get('connection_type', 'unknown')
-        node_addr = peer_json.get("addrbind", '').split(':')[0]  # node IP
-        
-        if peer_addr and node_addr:
-            # resolve container name if needed
-            if peer_addr.startswith('172.20.0.'):
-                peer_name = _docker_dns(peer_addr)
-            else:
-                peer_name = peer_addr
-            connections.append((peer_name,connection_type))
+        found, peer_name = resolve_peer(peer_json, node)
+        if found:
+            connections.append((peer_name, peer_json.get('connection_type', 'unknown')))
     
     return connections
\ No newline at end of file
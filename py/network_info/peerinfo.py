@@ -0,0 +1,188 @@
+# this file keeps only the useful part of getpeerinfo
+#
+# getpeerinfo returns about 40 fields per peer. Collectors crawling large
+# networks again and again only need a few of them: PeerInfo records hold a
+# chosen set of fields in __slots__ (no per-record dict), and PeerBatch stores a
+# whole crawl column by column (numpy arrays for numbers, codes for strings).
+
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# fields needed to build the topology
+TOPOLOGY_FIELDS = ("id", "addr", "addrbind", "connection_type")
+# fields needed to measure traffic per connection
+TRAFFIC_FIELDS = TOPOLOGY_FIELDS + ("pingtime", "minping", "bytessent_per_msg", "bytesrecv_per_msg")
+DEFAULT_FIELDS = TOPOLOGY_FIELDS + ("inbound", "bytessent", "bytesrecv", "pingtime", "minping")
+
+# types of the fields stored as numpy columns in a PeerBatch (the others are kept as objects)
+NUMERIC_FIELDS = {
+    "id": np.int64,
+    "bytessent": np.int64,
+    "bytesrecv": np.int64,
+    "conntime": np.int64,
+    "lastsend": np.int64,
+    "lastrecv": np.int64,
+    "startingheight": np.int64,
+    "synced_headers": np.int64,
+    "synced_blocks": np.int64,
+    "pingtime": np.float64,
+    "minping": np.float64,
+    "pingwait": np.float64,
+    "timeoffset": np.int64,
+    "inbound": np.bool_,
+}
+# string fields with few distinct values, stored once
+STRING_FIELDS = {"addr", "addrbind", "addrlocal", "network", "connection_type", "subver", "transport_protocol_type"}
+
+
+class PeerInfo:
+    """Base class of the slotted records created by peer_info_class. Behaves like a read-only dict."""
+
+    __slots__ = ()
+    fields: Tuple[str, ...] = ()
+
+    def __init__(self, peer_json: Dict[str, Any]):
+        for field in self.fields:
+            value = peer_json.get(field)
+            if field in STRING_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, field, value)
+
+    def get(self, field: str, default: Any = None) -> Any:
+        value = getattr(self, field, None) if field in self.fields else None
+        return default if value is None else value
+
+    def __getitem__(self, field: str) -> Any:
+        if field not in self.fields or getattr(self, field) is None:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.fields and getattr(self, field) is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.fields if getattr(self, field) is not None}
+
+    def __eq__(self, other):
+        return isinstance(other, PeerInfo) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"PeerInfo({self.to_dict()})"
+
+
+_CLASSES: Dict[Tuple[str, ...], type] = {}
+
+
+def peer_info_class(fields: Sequence[str] = DEFAULT_FIELDS) -> type:
+    """Get the record class holding the given getpeerinfo fields (classes are created once per field set).
+
+    Args:
+        fields (Sequence[str], optional): Fields to keep. Defaults to DEFAULT_FIELDS.
+
+    Returns:
+        type: A PeerInfo subclass.
+    """
+    fields = tuple(dict.fromkeys(fields))
+    cls = _CLASSES.get(fields)
+    if cls is None:
+        cls = type("PeerInfo", (PeerInfo,), {"__slots__": fields, "fields": fields})
+        _CLASSES[fields] = cls
+    return cls
+
+
+def parse_peers(peers_json: Iterable[Dict[str, Any]], fields: Sequence[str] = DEFAULT_FIELDS) -> List[PeerInfo]:
+    """Keep only some fields of a getpeerinfo result.
+
+    Args:
+        peers_json (Iterable[Dict[str, Any]]): getpeerinfo result.
+        fields (Sequence[str], optional): Fields to keep. Defaults to DEFAULT_FIELDS.
+
+    Returns:
+        List[PeerInfo]: One record per peer.
+    """
+    cls = peer_info_class(fields)
+    return [cls(peer) for peer in peers_json or ()]
+
+
+class PeerBatch:
+    """The peers of every node of a crawl, stored by column.
+
+    Rows of the same node are contiguous: the peers of nodes[i] are the rows
+    offsets[i] to offsets[i + 1].
+    """
+
+    def __init__(self, nodes: List[str], offsets: np.ndarray, columns: Dict[str, Any], categories: Dict[str, List[str]]):
+        self.nodes = nodes
+        self.offsets = offsets
+        self.fields = tuple(columns)
+        self._columns = columns
+        self._categories = categories  # for string fields: column holds codes into the categories
+
+    @classmethod
+    def from_crawl(cls, crawl, fields: Sequence[str] = DEFAULT_FIELDS, nodes: Optional[List[str]] = None) -> "PeerBatch":
+        """Build the batch of a crawl.
+
+        Args:
+            crawl (CrawlResult): The crawl (peers as dicts or PeerInfo records).
+            fields (Sequence[str], optional): Fields to keep. Defaults to DEFAULT_FIELDS.
+            nodes (List[str], optional): Order of the nodes. Defaults to the order of crawl.peers.
+
+        Returns:
+            PeerBatch: The batch.
+        """
+        nodes = list(crawl.peers) if nodes is None else list(nodes)
+        peers = [crawl.peers.get(node) or () for node in nodes]
+        offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(p) for p in peers])
+        rows = [peer for node_peers in peers for peer in node_peers]
+
+        columns, categories = {}, {}
+        for field in dict.fromkeys(fields):
+            values = [peer.get(field) for peer in rows]
+            if field in NUMERIC_FIELDS:
+                dtype = NUMERIC_FIELDS[field]
+                missing = np.nan if dtype is np.float64 else 0
+                columns[field] = np.array([missing if v is None else v for v in values], dtype=dtype)
+            elif field in STRING_FIELDS:
+                codes = {}
+                columns[field] = np.array([codes.setdefault(v, len(codes)) for v in values], dtype=np.uint32)
+                categories[field] = list(codes)
+            else:
+                columns[field] = values
+        return cls(nodes, offsets, columns, categories)
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def column(self, field: str):
+        """Get the values of a field for every row (numpy array for numbers, list for the others)."""
+        values = self._columns[field]
+        if field in self._categories:
+            return [self._categories[field][code] for code in values]
+        return values
+
+    def codes(self, field: str) -> Tuple[np.ndarray, List[str]]:
+        """Get a string field as (codes, categories), to work on it with array operations."""
+        return self._columns[field], self._categories[field]
+
+    def node_index(self) -> np.ndarray:
+        """Index (in nodes) of the node reporting each row."""
+        return np.repeat(np.arange(len(self.nodes)), np.diff(self.offsets))
+
+    def row(self, i: int) -> PeerInfo:
+        values = {}
+        for field in self.fields:
+            value = self._columns[field][i]
+            if field in self._categories:
+                value = self._categories[field][value]
+            elif isinstance(value, np.generic):
+                value = None if isinstance(value, np.floating) and np.isnan(value) else value.item()
+            values[field] = value
+        return peer_info_class(self.fields)(values)
+
+    def peers_of(self, node: str) -> List[PeerInfo]:
+        """Get the peers of a node as records."""
+        i = self.nodes.index(node)
+        return [self.row(r) for r in range(self.offsets[i], self.offsets[i + 1])]
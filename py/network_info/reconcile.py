@@ -0,0 +1,286 @@
+# this file repairs the running network so that it matches its intended topology
+#
+# generate_compose.py decides which node adds which peer (-addnode), but nothing
+# makes sure these connections stay up: nodes with full slots or restarted
+# containers silently lose some of them. The actual manual connections are
+# crawled, compared with the intended ones, and the difference is repaired with
+# one batch of addnode/disconnectnode RPCs per node, until both match.
+#
+# A node does not open a second connection to a peer it is already connected
+# to, so an intended connection A -> B is satisfied by a manual connection
+# opened either by A or by B.
+
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .get_info import _default_rpc, crawl_peer_info
+from .parse import RESOLVER, resolve_peer
+
+Edge = Tuple[str, str]  # (node, peer it adds)
+Plan = Dict[str, List[Tuple[str, list]]]  # node -> (method, params) of its calls
+
+
+def p2p_address(node: str, base_p2p: int) -> str:
+    """Get the address other nodes use to add a node (same ports as generate_compose.compute_ports).
+
+    Args:
+        node (str): The node name (e.g. 'node_2').
+        base_p2p (int): P2P port of the first node.
+
+    Returns:
+        str: "node:port"
+    """
+    return f"{node}:{base_p2p + (int(node.split('_')[-1]) - 1) * 2}"
+
+
+def manual_connections(nodes: Iterable[str], crawl) -> Dict[Edge, List[int]]:
+    """Get the manual connections of a crawl.
+
+    Args:
+        nodes (Iterable[str]): Names of the nodes of the network.
+        crawl (CrawlResult): The crawl (getpeerinfo of each node).
+
+    Returns:
+        Dict[Edge, List[int]]: The peer ids, on the node, of each (node, peer) manual connection.
+    """
+    nodes = list(nodes)
+    known = set(nodes)
+    connections: Dict[Edge, List[int]] = {}
+    for node in nodes:
+        for peer in crawl.peers.get(node) or ():
+            if peer.get("connection_type") != "manual":
+                continue
+            found, name = resolve_peer(peer, node)
+            if found and name in known:
+                connections.setdefault((node, name), []).append(peer.get("id"))
+    return connections
+
+
+def topology_diff(
+        intended: Iterable[Edge],
+        actual: Dict[Edge, List[int]],
+        exclude: Iterable[str] = (),
+    ) -> Tuple[List[Edge], Dict[Edge, List[int]]]:
+    """Compare the intended connections with the actual manual connections.
+
+    Args:
+        intended (Iterable[Edge]): Intended (node, peer) connections.
+        actual (Dict[Edge, List[int]]): Actual manual connections, as returned by manual_connections.
+        exclude (Iterable[str], optional): Nodes whose connections cannot be checked (unreachable). Defaults to ().
+
+    Returns:
+        Tuple[List[Edge], Dict[Edge, List[int]]]: The intended connections missing (one per pair of
+            nodes), and the manual connections that are not intended, with their peer ids.
+    """
+    exclude = set(exclude)
+    wanted = set()
+    missing = []
+    connected = {frozenset(edge) for edge in actual}
+    for source, target in intended:
+        pair = frozenset((source, target))
+        if source == target or pair in wanted or source in exclude or target in exclude:
+            continue
+        wanted.add(pair)
+        if pair not in connected:
+            missing.append((source, target))
+    extra = {
+        edge: ids for edge, ids in actual.items()
+        if frozenset(edge) not in wanted and not exclude.intersection(edge)
+    }
+    return missing, extra
+
+
+def repair_plan(missing: Iterable[Edge], extra: Dict[Edge, List[int]], address: Callable[[str], str]) -> Plan:
+    """Get the RPC calls repairing the differences, grouped by node.
+
+    Missing connections are opened once (addnode onetry), so the repair does not change
+    the nodes' own addnode lists. Extra connections are closed by peer id, and their
+    peer removed from the node's addnode list so that it is not connected again.
+
+    Args:
+        missing (Iterable[Edge]): Connections to open.
+        extra (Dict[Edge, List[int]]): Connections to close, with their peer ids.
+        address (Callable[[str], str]): Gives the P2P address of a node.
+
+    Returns:
+        Plan: {node: [(method, params), ...]}
+    """
+    plan: Plan = {}
+    for source, target in missing:
+        plan.setdefault(source, []).append(("addnode", [address(target), "onetry"]))
+    for (source, target), ids in extra.items():
+        calls = plan.setdefault(source, [])
+        calls.append(("addnode", [address(target), "remove"]))
+        calls.extend(("disconnectnode", ["", peer_id]) for peer_id in ids)
+    return plan
+
+
+def apply_plan(rpc, plan: Plan, timeout: float = 10.0, max_workers: int = 64) -> Dict[str, List[str]]:
+    """Send the calls of a plan, one batch request per node, to all nodes at once.
+
+    Args:
+        rpc (BitcoinRPC): Client to use.
+        plan (Plan): Calls of each node, as returned by repair_plan.
+        timeout (float, optional): Seconds to wait for each node. Defaults to 10.
+        max_workers (int, optional): Maximum number of concurrent requests. Defaults to 64.
+
+    Returns:
+        Dict[str, List[str]]: Errors of each node (only nodes with errors). Adding a peer already
+            in the addnode list, or removing one that was not, is not an error.
+    """
+    errors: Dict[str, List[str]] = {}
+    if not plan:
+        return errors
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(plan)))) as pool:
+        futures = {node: pool.submit(rpc.batch, node, calls, timeout=timeout) for node, calls in plan.items()}
+        for node, future in futures.items():
+            try:
+                results = future.result()
+            except Exception as e:
+                errors[node] = [str(e)]
+                continue
+            failed = [
+                f"{method} {params}: {result}"
+                for (method, params), result in zip(plan[node], results)
+                if isinstance(result, Exception) and not (method == "addnode" and params[1] in ("add", "remove"))
+            ]
+            if failed:
+                errors[node] = failed
+    return errors
+
+
+class ReconcileReport:
+    """Outcome of a reconciliation."""
+
+    def __init__(self):
+        self.rounds: List[Dict] = []  # missing, extra and errors of each round
+        self.missing: List[Edge] = []  # left after the last round
+        self.extra: Dict[Edge, List[int]] = {}
+        self.unreachable: Dict[str, str] = {}
+        self.converged = False
+        self.elapsed = 0.0  # seconds until convergence (or until giving up)
+
+
+def reconcile(
+        nodes: List[str],
+        intended: Iterable[Edge],
+        rpc=None,
+        crawl: Optional[Callable] = None,
+        base_p2p: int = 18444,
+        timeout: float = 60.0,
+        interval: float = 2.0,
+        dry_run: bool = False,
+    ) -> ReconcileReport:
+    """Repair the network until its manual connections match the intended ones.
+
+    Each round crawls the network, compares it with the intended topology and sends
+    the repairs, then waits `interval` seconds for the connections to be made.
+
+    Args:
+        nodes (List[str]): Names of the nodes.
+        intended (Iterable[Edge]): Intended (node, peer) connections, e.g. registry.read_topology().
+        rpc (BitcoinRPC, optional): Client to use. Defaults to a client built from the config.
+        crawl (Callable, optional): Function crawling the nodes. Defaults to crawl_peer_info with rpc.
+        base_p2p (int, optional): P2P port of the first node. Defaults to 18444.
+        timeout (float, optional): Seconds after which the reconciliation gives up. Defaults to 60.
+        interval (float, optional): Seconds between two rounds. Defaults to 2.
+        dry_run (bool, optional): Only compare, do not repair. Defaults to False.
+
+    Returns:
+        ReconcileReport: The rounds, and what is left to repair if it did not converge.
+    """
+    from .peerinfo import TOPOLOGY_FIELDS
+
+    if rpc is None and not dry_run:
+        rpc = _default_rpc(min(len(nodes), 256) or 1)
+    if crawl is None:
+        crawl = functools.partial(crawl_peer_info, rpc=rpc, fields=TOPOLOGY_FIELDS)
+    intended = list(intended)
+    address = functools.partial(p2p_address, base_p2p=base_p2p)
+
+    report = ReconcileReport()
+    RESOLVER.invalidate()  # containers may have changed since the last crawl
+    start = time.monotonic()
+    while True:
+        result = crawl(nodes)
+        report.unreachable = dict(result.unreachable)
+        report.missing, report.extra = topology_diff(intended, manual_connections(nodes, result), result.unreachable)
+        report.elapsed = time.monotonic() - start
+        if not report.missing and not report.extra:
+            report.converged = True
+            break
+        if dry_run or report.elapsed >= timeout:
+            break
+
+        errors = apply_plan(rpc, repair_plan(report.missing, report.extra, address))
+        report.rounds.append({"missing": len(report.missing), "extra": len(report.extra), "errors": errors})
+        time.sleep(max(0.0, min(interval, timeout - (time.monotonic() - start))))
+    return report
+
+
+def rewire_plan(old: Iterable[Edge], new: Iterable[Edge], address: Callable[[str], str]) -> Plan:
+    """Get the RPC calls changing the addnode lists of the nodes from one topology to another.
+
+    New peers are added to the list (so the node keeps connecting to them) and tried at
+    once; peers no longer wanted are removed from it.
+
+    Args:
+        old (Iterable[Edge]): Current (node, peer) connections.
+        new (Iterable[Edge]): Wanted (node, peer) connections.
+        address (Callable[[str], str]): Gives the P2P address of a node.
+
+    Returns:
+        Plan: {node: [(method, params), ...]}
+    """
+    old, new = dict.fromkeys(old), dict.fromkeys(new)
+    plan: Plan = {}
+    for source, target in new:
+        if (source, target) not in old and source != target:
+            plan.setdefault(source, []).extend([
+                ("addnode", [address(target), "add"]),
+                ("addnode", [address(target), "onetry"]),
+            ])
+    for source, target in old:
+        if (source, target) not in new:
+            plan.setdefault(source, []).append(("addnode", [address(target), "remove"]))
+    return plan
+
+
+def rewire(
+        nodes: List[str],
+        old: Iterable[Edge],
+        new: Iterable[Edge],
+        rpc=None,
+        crawl: Optional[Callable] = None,
+        base_p2p: int = 18444,
+        timeout: float = 60.0,
+        interval: float = 2.0,
+    ) -> Tuple[Dict[str, List[str]], ReconcileReport]:
+    """Apply a new topology to the running network, without restarting the nodes.
+
+    The addnode lists of the nodes are changed first, then the network is reconciled
+    with the new topology: connections no longer wanted are closed and the new ones
+    are checked.
+
+    Args:
+        nodes (List[str]): Names of the nodes.
+        old (Iterable[Edge]): Current (node, peer) connections, e.g. registry.read_topology().
+        new (Iterable[Edge]): Wanted (node, peer) connections.
+        rpc (BitcoinRPC, optional): Client to use. Defaults to a client built from the config.
+        crawl (Callable, optional): Function crawling the nodes. Defaults to crawl_peer_info with rpc.
+        base_p2p (int, optional): P2P port of the first node. Defaults to 18444.
+        timeout (float, optional): Seconds after which the reconciliation gives up. Defaults to 60.
+        interval (float, optional): Seconds between two reconciliation rounds. Defaults to 2.
+
+    Returns:
+        Tuple[Dict[str, List[str]], ReconcileReport]: Errors changing the addnode lists, and the
+            reconciliation with the new topology.
+    """
+    if rpc is None:
+        rpc = _default_rpc(min(len(nodes), 256) or 1)
+    new = list(new)
+    errors = apply_plan(rpc, rewire_plan(old, new, functools.partial(p2p_address, base_p2p=base_p2p)))
+    report = reconcile(nodes, new, rpc=rpc, crawl=crawl, base_p2p=base_p2p, timeout=timeout, interval=interval)
+    return errors, report
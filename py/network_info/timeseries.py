@@ -0,0 +1,320 @@
+# this file stores the topology of the network over time
+#
+# File format (little endian), an append-only sequence of records:
+#
+#   header   b"BTOPO\x01"
+#   record   kind (1 byte) + payload size (uint32) + payload
+#
+#   N  name      id (uint32) + utf-8 name           node name, written once before first use
+#   T  type      id (uint8) + utf-8 name            connection type, written once before first use
+#   K  keyframe  time (float64) + node count (uint32) + edge count (uint32)
+#                + node ids (uint32 each) + edges (source uint32, target uint32, type uint8)
+#   D  diff      time (float64) + 4 counts (uint32): added nodes, removed nodes, added edges, removed edges
+#                + added node ids + removed node ids + added edges (source, target, type) + removed edges (source, target)
+#
+# An edge whose connection type changed is written as added again. A keyframe
+# holds the whole state and is written every `keyframe_interval` records, so
+# the state at any time is rebuilt from the closest keyframe before it.
+
+import bisect
+import functools
+import os
+import struct
+import time as _time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+MAGIC = b"BTOPO\x01"
+
+_RECORD = struct.Struct("<cI")
+_NAME = struct.Struct("<I")
+_TYPE = struct.Struct("<B")
+_KEYFRAME = struct.Struct("<dII")
+_DIFF = struct.Struct("<dIIII")
+_ID = struct.Struct("<I")
+_EDGE = struct.Struct("<IIB")
+_PAIR = struct.Struct("<II")
+
+Edges = Dict[Tuple[str, str], str]
+
+
+class TopologyState:
+    """Nodes and edges (with their connection type) of the network at one time."""
+
+    def __init__(self, nodes: Iterable[str] = (), edges: Optional[Edges] = None):
+        self.nodes: Set[str] = set(nodes)
+        self.edges: Edges = dict(edges or {})
+
+    @classmethod
+    def from_graph(cls, graph) -> "TopologyState":
+        """Build a state from a graph returned by create_network_graph."""
+        return cls(graph.nodes, {(u, v): d.get("type", "unknown") for u, v, d in graph.edges(data=True)})
+
+    def to_graph(self):
+        """Build a networkx.DiGraph with the same attributes as create_network_graph."""
+        import networkx as nx
+
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self.nodes)
+        for (u, v), connection_type in self.edges.items():
+            graph.add_edge(u, v, type=connection_type, color='red' if connection_type == 'manual' else 'blue')
+        return graph
+
+    def __eq__(self, other):
+        return isinstance(other, TopologyState) and self.nodes == other.nodes and self.edges == other.edges
+
+    def __repr__(self):
+        return f"TopologyState({len(self.nodes)} nodes, {len(self.edges)} edges)"
+
+
+class TopologyWriter:
+    """Append topology snapshots to a time-series file, as diffs with periodic keyframes."""
+
+    def __init__(self, path: str, keyframe_interval: int = 100):
+        """Open (or create) a time-series file. Appending to an existing file resumes from its last state.
+
+        Args:
+            path (str): Path of the file.
+            keyframe_interval (int, optional): Number of records between two keyframes. Defaults to 100.
+        """
+        self.path = path
+        self.keyframe_interval = max(1, keyframe_interval)
+        self._names: Dict[str, int] = {}
+        self._types: Dict[str, int] = {}
+        self._state = None
+        self._since_keyframe = 0
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            reader = TopologyReader(path)
+            self._names = {name: i for i, name in enumerate(reader.names)}
+            self._types = {name: i for i, name in enumerate(reader.types)}
+            self._state = reader.state_at(reader.times[-1]) if reader.times else None
+            self._since_keyframe = self.keyframe_interval  # start the new session with a keyframe
+            self._file = open(path, "r+b")
+            self._file.truncate(reader.end)  # drop a record left incomplete by a crash
+            self._file.seek(reader.end)
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, "wb")
+            self._file.write(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _record(self, kind: bytes, payload: bytes) -> None:
+        self._file.write(_RECORD.pack(kind, len(payload)))
+        self._file.write(payload)
+
+    def _name_id(self, name: str) -> int:
+        if name not in self._names:
+            self._names[name] = len(self._names)
+            self._record(b"N", _NAME.pack(self._names[name]) + name.encode())
+        return self._names[name]
+
+    def _type_id(self, name: str) -> int:
+        if name not in self._types:
+            if len(self._types) > 255:
+                raise ValueError("Too many connection types (at most 256)")
+            self._types[name] = len(self._types)
+            self._record(b"T", _TYPE.pack(self._types[name]) + name.encode())
+        return self._types[name]
+
+    def _edge(self, edge: Tuple[str, str], connection_type: str) -> bytes:
+        return _EDGE.pack(self._name_id(edge[0]), self._name_id(edge[1]), self._type_id(connection_type))
+
+    def append(self, time: float, state: TopologyState) -> None:
+        """Record the state of the network at a time.
+
+        Args:
+            time (float): Time of the snapshot (e.g. time.time()), increasing between calls.
+            state (TopologyState): The network at this time.
+        """
+        if self._state is None or self._since_keyframe >= self.keyframe_interval:
+            nodes = b"".join(_ID.pack(self._name_id(n)) for n in sorted(state.nodes))
+            edges = b"".join(self._edge(e, t) for e, t in state.edges.items())
+            self._record(b"K", _KEYFRAME.pack(time, len(state.nodes), len(state.edges)) + nodes + edges)
+            self._since_keyframe = 0
+        else:
+            previous = self._state
+            added_nodes = sorted(state.nodes - previous.nodes)
+            removed_nodes = sorted(previous.nodes - state.nodes)
+            added_edges = [(e, t) for e, t in state.edges.items() if previous.edges.get(e) != t]
+            removed_edges = [e for e in previous.edges if e not in state.edges]
+            payload = [
+                _DIFF.pack(time, len(added_nodes), len(removed_nodes), len(added_edges), len(removed_edges)),
+                *(_ID.pack(self._name_id(n)) for n in added_nodes),
+                *(_ID.pack(self._names[n]) for n in removed_nodes),
+                *(self._edge(e, t) for e, t in added_edges),
+                *(_PAIR.pack(self._names[u], self._names[v]) for u, v in removed_edges),
+            ]
+            self._record(b"D", b"".join(payload))
+            self._since_keyframe += 1
+
+        self._file.flush()
+        self._state = TopologyState(state.nodes, state.edges)
+
+
+class TopologyReader:
+    """Read a time-series file written by TopologyWriter.
+
+    Opening the file only reads record headers (and the name tables) to index the
+    records; states are decoded on demand, starting from the closest keyframe.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Path of the file.
+
+        Raises:
+            ValueError: If the file is not a topology time-series.
+        """
+        self.path = path
+        self.names: List[str] = []
+        self.types: List[str] = []
+        self.times: List[float] = []  # time of every snapshot
+        self._offsets: List[int] = []  # offset of every snapshot record
+        self._keyframes: List[int] = []  # index (in times) of the keyframes
+        self.end = len(MAGIC)  # end of the last complete record
+        self._index()
+
+    def _index(self) -> None:
+        file_size = os.path.getsize(self.path)
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a topology time-series file")
+            while True:
+                offset = f.tell()
+                header = f.read(_RECORD.size)
+                if len(header) < _RECORD.size:
+                    break
+                kind, size = _RECORD.unpack(header)
+                if kind in (b"N", b"T"):
+                    payload = f.read(size)
+                    if len(payload) < size:
+                        break
+                    if kind == b"N":
+                        self.names.append(payload[_NAME.size:].decode())
+                    else:
+                        self.types.append(payload[_TYPE.size:].decode())
+                else:
+                    time_bytes = f.read(8)
+                    if len(time_bytes) < 8 or offset + _RECORD.size + size > file_size:
+                        break
+                    f.seek(offset + _RECORD.size + size)
+                    if kind == b"K":
+                        self._keyframes.append(len(self.times))
+                    self.times.append(struct.unpack("<d", time_bytes)[0])
+                    self._offsets.append(offset)
+                self.end = offset + _RECORD.size + size
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def _apply(self, state: TopologyState, kind: bytes, payload: bytes) -> None:
+        names, types = self.names, self.types
+        if kind == b"K":
+            _, node_count, edge_count = _KEYFRAME.unpack_from(payload)
+            pos = _KEYFRAME.size
+            state.nodes = {names[i] for (i,) in _ID.iter_unpack(payload[pos:pos + node_count * _ID.size])}
+            pos += node_count * _ID.size
+            state.edges = {
+                (names[u], names[v]): types[t]
+                for u, v, t in _EDGE.iter_unpack(payload[pos:pos + edge_count * _EDGE.size])
+            }
+            return
+
+        _, added_nodes, removed_nodes, added_edges, removed_edges = _DIFF.unpack_from(payload)
+        pos = _DIFF.size
+        state.nodes.update(names[i] for (i,) in _ID.iter_unpack(payload[pos:pos + added_nodes * _ID.size]))
+        pos += added_nodes * _ID.size
+        state.nodes.difference_update(names[i] for (i,) in _ID.iter_unpack(payload[pos:pos + removed_nodes * _ID.size]))
+        pos += removed_nodes * _ID.size
+        for u, v, t in _EDGE.iter_unpack(payload[pos:pos + added_edges * _EDGE.size]):
+            state.edges[(names[u], names[v])] = types[t]
+        pos += added_edges * _EDGE.size
+        for u, v in _PAIR.iter_unpack(payload[pos:pos + removed_edges * _PAIR.size]):
+            state.edges.pop((names[u], names[v]), None)
+
+    def _states(self, start: int, stop: int) -> Iterator[Tuple[float, TopologyState]]:
+        """Decode snapshots start..stop-1 (start must be a keyframe)."""
+        state = TopologyState()
+        with open(self.path, "rb") as f:
+            for i in range(start, stop):
+                f.seek(self._offsets[i])
+                kind, size = _RECORD.unpack(f.read(_RECORD.size))
+                self._apply(state, kind, f.read(size))
+                yield self.times[i], state
+
+    def state_at(self, time: float) -> Optional[TopologyState]:
+        """Get the state of the network at a time (the last snapshot taken at or before it).
+
+        Args:
+            time (float): The time.
+
+        Returns:
+            Optional[TopologyState]: The state, or None if time is before the first snapshot.
+        """
+        stop = bisect.bisect_right(self.times, time)
+        if stop == 0:
+            return None
+        k = bisect.bisect_right(self._keyframes, stop - 1) - 1
+        state = None
+        for _, state in self._states(self._keyframes[k], stop):
+            pass
+        return state
+
+    def graph_at(self, time: float):
+        """Get the network at a time as a networkx.DiGraph (None if time is before the first snapshot)."""
+        state = self.state_at(time)
+        return None if state is None else state.to_graph()
+
+    def __iter__(self) -> Iterator[Tuple[float, TopologyState]]:
+        """Iterate over every snapshot as (time, state). The state object is reused between iterations."""
+        if self.times:
+            yield from self._states(0, len(self.times))
+
+
+def collect(
+        nodes: List[str],
+        path: str,
+        interval: float,
+        count: Optional[int] = None,
+        keyframe_interval: int = 100,
+        crawl=None,
+    ) -> None:
+    """Crawl the network every `interval` seconds and append its topology to a time-series file.
+
+    Args:
+        nodes (List[str]): Names of the nodes to crawl.
+        path (str): Path of the time-series file.
+        interval (float): Seconds between two crawls.
+        count (int, optional): Number of snapshots to take. Defaults to None (until interrupted).
+        keyframe_interval (int, optional): Number of snapshots between two keyframes. Defaults to 100.
+        crawl (Callable, optional): Function crawling the nodes. Defaults to crawl_peer_info
+            (keeping only the fields needed to build the topology).
+    """
+    from .graph import create_network_graph
+    from .get_info import crawl_peer_info
+    from .peerinfo import TOPOLOGY_FIELDS
+
+    crawl = crawl or functools.partial(crawl_peer_info, fields=TOPOLOGY_FIELDS)
+    taken = 0
+    with TopologyWriter(path, keyframe_interval) as writer:
+        next_time = _time.monotonic()
+        while count is None or taken < count:
+            now = _time.time()
+            graph = create_network_graph(nodes, crawl(nodes))
+            writer.append(now, TopologyState.from_graph(graph))
+            taken += 1
+            print(f"[INFO ] Snapshot {taken}: {graph.number_of_edges()} connections")
+            if count is not None and taken >= count:
+                break
+
+            next_time += interval
+            _time.sleep(max(0.0, next_time - _time.monotonic()))
@@ -0,0 +1,341 @@
+# this file measures the traffic of each connection, per message type
+#
+# getpeerinfo reports, for every connection, the bytes sent and received per
+# message type since the connection opened, and its ping times. A crawl is
+# turned into a TrafficSample: sparse node x node x message type counters,
+# stored as sorted flat keys ((source * n + target) * types + type) so that
+# samples are compared with array operations even for thousands of nodes.
+#
+# Rate file format (little endian), append-only:
+#
+#   header   b"BTRAF\x01" + header size (uint32) + JSON {"nodes": [...], "message_types": [...]}
+#   record   time (float64) + interval (float64) + traffic count (uint32) + latency count (uint32)
+#            + traffic entries (source uint32, target uint32, type uint8, sent float32, recv float32) in bytes/s
+#            + latency entries (source uint32, target uint32, ping float32, minping float32) in seconds
+
+import functools
+import json
+import os
+import struct
+import time as _time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .parse import RESOLVER, resolve_peer
+
+# message types of bitcoind's per-message counters, the others are counted as "*other*"
+MESSAGE_TYPES = [
+    "addr", "addrv2", "block", "blocktxn", "cmpctblock", "feefilter", "filteradd", "filterclear",
+    "filterload", "getaddr", "getblocks", "getblocktxn", "getdata", "getheaders", "headers", "inv",
+    "mempool", "merkleblock", "notfound", "ping", "pong", "sendaddrv2", "sendcmpct", "sendheaders",
+    "sendtxrcncl", "tx", "verack", "version", "wtxidrelay", "*other*",
+]
+
+MAGIC = b"BTRAF\x01"
+_HEADER_SIZE = struct.Struct("<I")
+_RECORD = struct.Struct("<ddII")
+TRAFFIC_DTYPE = np.dtype([("source", "<u4"), ("target", "<u4"), ("type", "u1"), ("sent", "<f4"), ("recv", "<f4")])
+LATENCY_DTYPE = np.dtype([("source", "<u4"), ("target", "<u4"), ("ping", "<f4"), ("minping", "<f4")])
+
+
+class TrafficSample:
+    """Traffic counters (or rates) of every connection, at one time."""
+
+    def __init__(
+            self,
+            time: float,
+            nodes: List[str],
+            message_types: List[str],
+            keys: np.ndarray,
+            sent: np.ndarray,
+            recv: np.ndarray,
+            latency_keys: np.ndarray,
+            ping: np.ndarray,
+            minping: np.ndarray,
+            interval: Optional[float] = None,
+        ):
+        """
+        Args:
+            time (float): Time of the crawl.
+            nodes (List[str]): Node names (index of the source/target dimensions).
+            message_types (List[str]): Message types (index of the last dimension).
+            keys (np.ndarray): Sorted flat indices (source * n + target) * len(message_types) + type.
+            sent (np.ndarray): Bytes sent by source to target, for each key.
+            recv (np.ndarray): Bytes received by source from target, for each key.
+            latency_keys (np.ndarray): Sorted flat indices source * n + target of the ping times.
+            ping (np.ndarray): Last ping time (seconds), for each latency key.
+            minping (np.ndarray): Minimum ping time (seconds), for each latency key.
+            interval (float, optional): For rates, the seconds they are computed over. Defaults to None (counters).
+        """
+        self.time = time
+        self.nodes = nodes
+        self.message_types = message_types
+        self.keys = keys
+        self.sent = sent
+        self.recv = recv
+        self.latency_keys = latency_keys
+        self.ping = ping
+        self.minping = minping
+        self.interval = interval
+
+    @property
+    def shape(self):
+        return len(self.nodes), len(self.nodes), len(self.message_types)
+
+    def tensor(self, direction: str = "sent") -> np.ndarray:
+        """Get the node x node x message type tensor.
+
+        Args:
+            direction (str, optional): "sent" or "recv". Defaults to "sent".
+
+        Returns:
+            np.ndarray: tensor[source, target, type]
+        """
+        tensor = np.zeros(self.shape)
+        tensor.flat[self.keys] = self.sent if direction == "sent" else self.recv
+        return tensor
+
+    def latency_matrix(self, minimum: bool = False) -> np.ndarray:
+        """Get the node x node ping times (NaN where unknown).
+
+        Args:
+            minimum (bool, optional): Minimum ping instead of the last one. Defaults to False.
+        """
+        n = len(self.nodes)
+        matrix = np.full((n, n), np.nan)
+        matrix.flat[self.latency_keys] = self.minping if minimum else self.ping
+        return matrix
+
+    def per_type(self, direction: str = "sent") -> Dict[str, float]:
+        """Total over all connections, per message type."""
+        values = self.sent if direction == "sent" else self.recv
+        totals = np.bincount(self.keys % len(self.message_types), values, minlength=len(self.message_types))
+        return dict(zip(self.message_types, totals.tolist()))
+
+
+def traffic_sample(
+        nodes: List[str],
+        crawl,
+        time: float,
+        message_types: List[str] = MESSAGE_TYPES,
+    ) -> TrafficSample:
+    """Build the traffic counters of a crawl.
+
+    Args:
+        nodes (List[str]): Node names.
+        crawl (CrawlResult): The crawl (getpeerinfo of each node).
+        time (float): Time of the crawl.
+        message_types (List[str], optional): Message types to count. Defaults to MESSAGE_TYPES.
+
+    Returns:
+        TrafficSample: The counters, several connections between the same nodes being summed.
+    """
+    index = {node: i for i, node in enumerate(nodes)}
+    types = {message_type: i for i, message_type in enumerate(message_types)}
+    other = types.get("*other*", len(message_types) - 1)
+    n, m = len(nodes), len(message_types)
+
+    keys, sent, recv = [], [], []
+    latency_keys, ping, minping = [], [], []
+    for i, node in enumerate(nodes):
+        for peer in crawl.peers.get(node) or ():
+            _, name = resolve_peer(peer, node)
+            j = index.get(name)
+            if j is None:
+                continue
+            base = (i * n + j) * m
+            for message_type, count in peer.get("bytessent_per_msg", {}).items():
+                keys.append(base + types.get(message_type, other))
+                sent.append(count)
+                recv.append(0)
+            for message_type, count in peer.get("bytesrecv_per_msg", {}).items():
+                keys.append(base + types.get(message_type, other))
+                sent.append(0)
+                recv.append(count)
+            if "pingtime" in peer or "minping" in peer:
+                latency_keys.append(i * n + j)
+                ping.append(peer.get("pingtime", np.nan))
+                minping.append(peer.get("minping", np.nan))
+
+    keys, inverse = np.unique(np.array(keys, dtype=np.int64), return_inverse=True)
+    latency_keys, latency_first = np.unique(np.array(latency_keys, dtype=np.int64), return_index=True)
+    return TrafficSample(
+        time, nodes, message_types, keys,
+        np.bincount(inverse, sent, minlength=keys.size),
+        np.bincount(inverse, recv, minlength=keys.size),
+        latency_keys,
+        np.array(ping, dtype=np.float64)[latency_first],
+        np.array(minping, dtype=np.float64)[latency_first],
+    )
+
+
+def traffic_rates(previous: TrafficSample, current: TrafficSample) -> TrafficSample:
+    """Compute the bytes per second of each connection and message type between two samples.
+
+    A counter lower than before means the connection was opened again: its whole value is
+    then counted as traffic of the interval.
+
+    Args:
+        previous (TrafficSample): Counters of the previous crawl (same nodes and message types).
+        current (TrafficSample): Counters of the current crawl.
+
+    Returns:
+        TrafficSample: Rates over the interval, with the ping times of the current sample.
+    """
+    interval = current.time - previous.time
+    if interval <= 0:
+        raise ValueError("Samples must be in increasing time order")
+
+    position = np.searchsorted(previous.keys, current.keys)
+    position[position == previous.keys.size] = 0
+    known = previous.keys[position] == current.keys if previous.keys.size else np.zeros(current.keys.size, bool)
+
+    def rate(before, after):
+        delta = after - np.where(known, before[position] if before.size else 0, 0)
+        return np.where(delta < 0, after, delta) / interval
+
+    return TrafficSample(
+        current.time, current.nodes, current.message_types, current.keys,
+        rate(previous.sent, current.sent), rate(previous.recv, current.recv),
+        current.latency_keys, current.ping, current.minping, interval=interval,
+    )
+
+
+class TrafficWriter:
+    """Append traffic rates to a file (sparse entries only)."""
+
+    def __init__(self, path: str, nodes: List[str], message_types: List[str] = MESSAGE_TYPES):
+        """Create a rate file (an existing file is replaced).
+
+        Args:
+            path (str): Path of the file.
+            nodes (List[str]): Node names.
+            message_types (List[str], optional): Message types. Defaults to MESSAGE_TYPES.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.nodes = nodes
+        self.message_types = message_types
+        self._file = open(path, "wb")
+        header = json.dumps({"nodes": nodes, "message_types": message_types}).encode()
+        self._file.write(MAGIC + _HEADER_SIZE.pack(len(header)) + header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def append(self, rates: TrafficSample) -> None:
+        """Write the rates of one interval (entries where nothing was exchanged are skipped)."""
+        n, m = len(self.nodes), len(self.message_types)
+        active = (rates.sent != 0) | (rates.recv != 0)
+        keys = rates.keys[active]
+
+        traffic = np.empty(keys.size, dtype=TRAFFIC_DTYPE)
+        traffic["source"], rest = np.divmod(keys, n * m)
+        traffic["target"], traffic["type"] = np.divmod(rest, m)
+        traffic["sent"] = rates.sent[active]
+        traffic["recv"] = rates.recv[active]
+
+        latency = np.empty(rates.latency_keys.size, dtype=LATENCY_DTYPE)
+        latency["source"], latency["target"] = np.divmod(rates.latency_keys, n)
+        latency["ping"] = rates.ping
+        latency["minping"] = rates.minping
+
+        self._file.write(_RECORD.pack(rates.time, rates.interval or 0.0, traffic.size, latency.size))
+        self._file.write(traffic.tobytes())
+        self._file.write(latency.tobytes())
+        self._file.flush()
+
+
+class TrafficReader:
+    """Read a rate file written by TrafficWriter."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Path of the file.
+
+        Raises:
+            ValueError: If the file is not a traffic rate file.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a traffic rate file")
+            (size,) = _HEADER_SIZE.unpack(f.read(_HEADER_SIZE.size))
+            header = json.loads(f.read(size))
+            self._data_offset = f.tell()
+        self.nodes = header["nodes"]
+        self.message_types = header["message_types"]
+
+    def __iter__(self) -> Iterator[TrafficSample]:
+        n, m = len(self.nodes), len(self.message_types)
+        with open(self.path, "rb") as f:
+            f.seek(self._data_offset)
+            while True:
+                head = f.read(_RECORD.size)
+                if len(head) < _RECORD.size:
+                    return
+                time, interval, traffic_count, latency_count = _RECORD.unpack(head)
+                traffic_bytes = f.read(traffic_count * TRAFFIC_DTYPE.itemsize)
+                latency_bytes = f.read(latency_count * LATENCY_DTYPE.itemsize)
+                if (len(traffic_bytes) < traffic_count * TRAFFIC_DTYPE.itemsize
+                        or len(latency_bytes) < latency_count * LATENCY_DTYPE.itemsize):
+                    return  # incomplete last record
+                traffic = np.frombuffer(traffic_bytes, dtype=TRAFFIC_DTYPE)
+                latency = np.frombuffer(latency_bytes, dtype=LATENCY_DTYPE)
+                yield TrafficSample(
+                    time, self.nodes, self.message_types,
+                    (traffic["source"].astype(np.int64) * n + traffic["target"]) * m + traffic["type"],
+                    traffic["sent"].astype(np.float64), traffic["recv"].astype(np.float64),
+                    latency["source"].astype(np.int64) * n + latency["target"],
+                    latency["ping"].astype(np.float64), latency["minping"].astype(np.float64),
+                    interval=interval,
+                )
+
+
+def collect_traffic(
+        nodes: List[str],
+        path: str,
+        interval: float,
+        count: Optional[int] = None,
+        crawl=None,
+    ) -> None:
+    """Crawl the network every `interval` seconds and record the traffic rates of each interval.
+
+    Args:
+        nodes (List[str]): Names of the nodes to crawl.
+        path (str): Path of the rate file.
+        interval (float): Seconds between two crawls.
+        count (int, optional): Number of intervals to record. Defaults to None (until interrupted).
+        crawl (Callable, optional): Function crawling the nodes. Defaults to crawl_peer_info
+            (keeping only the fields needed to measure traffic).
+    """
+    from .get_info import crawl_peer_info
+    from .peerinfo import TRAFFIC_FIELDS
+
+    crawl = crawl or functools.partial(crawl_peer_info, fields=TRAFFIC_FIELDS)
+    previous = None
+    recorded = 0
+    with TrafficWriter(path, nodes) as writer:
+        next_time = _time.monotonic()
+        while count is None or recorded < count:
+            RESOLVER.invalidate()
+            now = _time.time()
+            sample = traffic_sample(nodes, crawl(nodes), now)
+            if previous is not None:
+                rates = traffic_rates(previous, sample)
+                writer.append(rates)
+                recorded += 1
+                print(f"[INFO ] Interval {recorded}: {rates.sent.sum() / 1000:.1f} kB/s sent")
+                if count is not None and recorded >= count:
+                    break
+            previous = sample
+
+            next_time += interval
+            _time.sleep(max(0.0, next_time - _time.monotonic()))
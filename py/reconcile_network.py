@@ -0,0 +1,67 @@
+# this file repairs the running network so that it matches the generated topology (see network_info/reconcile.py)
+
+import argparse
+import sys
+
+from config import NODE_BASE_P2P_PORT
+from network_info.reconcile import reconcile
+from registry import DATA_DIR, read_compose_topology, read_node_names, read_topology
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the running network with its intended topology and repair the differences",
+        prog="bitcoin-on-local.sh reconcile",
+    )
+    parser.add_argument("--data-dir", default=DATA_DIR,
+                        help=f"Directory of the node registry and topology files (default: {DATA_DIR})")
+    parser.add_argument("--compose", default="docker/docker-compose.yml",
+                        help="Compose file read when there is no topology file (default: docker/docker-compose.yml)")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds before giving up (default: 60)")
+    parser.add_argument("--interval", type=float, default=2, help="Seconds between two repair rounds (default: 2)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the differences")
+    args = parser.parse_args()
+
+    nodes = read_node_names(args.data_dir)
+    if not nodes:
+        print("[ERROR] No nodes found. Please generate the network first.")
+        sys.exit(1)
+    intended = read_topology(args.data_dir) or read_compose_topology(args.compose)
+    if not intended:
+        print("[ERROR] No intended topology found. Please generate the network first.")
+        sys.exit(1)
+
+    report = reconcile(
+        nodes,
+        intended,
+        base_p2p=NODE_BASE_P2P_PORT,
+        timeout=args.timeout,
+        interval=args.interval,
+        dry_run=args.dry_run,
+    )
+
+    for node, error in report.unreachable.items():
+        print(f"[WARNING] {node} is unreachable, its connections were not checked: {error}")
+    for i, round_ in enumerate(report.rounds, 1):
+        print(f"[INFO ] Round {i}: {round_['missing']} missing, {round_['extra']} extra connections repaired")
+        for node, errors in round_["errors"].items():
+            for error in errors:
+                print(f"[WARNING] {node}: {error}")
+
+    if report.converged:
+        print(f"[DONE ] Network matches its topology ({len(report.rounds)} repair rounds, {report.elapsed:.1f}s)")
+        return
+    for source, target in report.missing:
+        print(f"[INFO ] Missing: {source} -> {target}")
+    for source, target in report.extra:
+        print(f"[INFO ] Extra: {source} -> {target}")
+    if args.dry_run:
+        print(f"[DONE ] {len(report.missing)} missing and {len(report.extra)} extra connections")
+    else:
+        print(f"[ERROR] Network did not converge after {report.elapsed:.1f}s: "
+              f"{len(report.missing)} missing and {len(report.extra)} extra connections left")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# Read the node registry exported by generate_compose.py (docker/data/.env.*)
+
+import os
+import re
+from typing import Dict, Iterable, List, Tuple
+
+DATA_DIR = "docker/data"
+TOPOLOGY_FILE = ".env.topology"
+SHARDS_FILE = ".env.shards"
+
+_SERVICE = re.compile(r"^  (\S+):\s*$")
+_SECTION = re.compile(r"^\S")
+_ADDNODE = re.compile(r"-addnode=([^:\s]+)")
+
+
+def read_node_names(data_dir: str = DATA_DIR) -> List[str]:
+    """Read the names of the nodes of the generated network.
+
+    Args:
+        data_dir (str, optional): Directory of the registry files. Defaults to "docker/data".
+
+    Returns:
+        List[str]: Node names, empty if the network has not been generated.
+    """
+    path = os.path.join(data_dir, ".env.node_names")
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+
+
+def write_topology(edges: Iterable[Tuple[str, str]], data_dir: str = DATA_DIR) -> str:
+    """Write the intended connections of the network (one "source target" line per -addnode).
+
+    Args:
+        edges (Iterable[Tuple[str, str]]): (node, peer it adds) of each connection.
+        data_dir (str, optional): Directory of the registry files. Defaults to "docker/data".
+
+    Returns:
+        str: Path of the written file.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, TOPOLOGY_FILE)
+    with open(path, "w") as f:
+        f.write("# Intended connections (node peer)\n")
+        for source, target in edges:
+            f.write(f"{source} {target}\n")
+    return path
+
+
+def write_shards(shards: Dict[str, Tuple[str, str]], data_dir: str = DATA_DIR) -> str:
+    """Write the shard and host of each node of a sharded network (one "node shard host" line per node).
+
+    Args:
+        shards (Dict[str, Tuple[str, str]]): {node: (shard, host)}.
+        data_dir (str, optional): Directory of the registry files. Defaults to "docker/data".
+
+    Returns:
+        str: Path of the written file.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, SHARDS_FILE)
+    with open(path, "w") as f:
+        f.write("# Shard of each node (node shard host)\n")
+        for node, (shard, host) in shards.items():
+            f.write(f"{node} {shard} {host}\n")
+    return path
+
+
+def read_shards(data_dir: str = DATA_DIR) -> Dict[str, Tuple[str, str]]:
+    """Read the shard and host of each node written by write_shards.
+
+    Args:
+        data_dir (str, optional): Directory of the registry files. Defaults to "docker/data".
+
+    Returns:
+        Dict[str, Tuple[str, str]]: {node: (shard, host)}, empty if the network is not sharded.
+    """
+    path = os.path.join(data_dir, SHARDS_FILE)
+    if not os.path.exists(path):
+        return {}
+    shards = {}
+    with open(path, "r") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 3 and not fields[0].startswith("#"):
+                shards[fields[0]] = (fields[1], fields[2])
+    return shards
+
+
+def read_hosts(data_dir: str = DATA_DIR) -> Dict[str, str]:
+    """Read the host running each node (only the nodes of sharded networks not on this host).
+
+    Args:
+        data_dir (str, optional): Directory of the registry files. Defaults to "docker/data".
+
+    Returns:
+        Dict[str, str]: {node: host}, empty if every node runs on this host.
+    """
+    return {node: host for node, (_, host) in read_shards(data_dir).items() if host != "localhost"}
+
+
+def read_edge_list(path: str) -> List[Tuple[str, str]]:
+    """Read (node, peer) connections from a file, one per line.
+
+    Lines are "source target" (as written by write_topology) or "source,target[,type]"
+    (as written by `export` in CSV). Comments and the CSV header are skipped.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        List[Tuple[str, str]]: (node, peer it adds) of each connection.
+    """
+    edges = []
+    with open(path, "r") as f:
+        for line in f:
+            fields = line.replace(",", " ").split()
+            if len(fields) >= 2 and not fields[0].startswith("#") and fields[:2] != ["source", "target"]:
+                edges.append((fields[0], fields[1]))
+    return edges
+
+
+def read_topology(data_dir: str = DATA_DIR) -> List[Tuple[str, str]]:
+    """Read the intended connections written by write_topology.
+
+    Args:
+        data_dir (str, optional): Directory of the registry files. Defaults to "docker/data".
+
+    Returns:
+        List[Tuple[str, str]]: (node, peer it adds) of each connection, empty if the file is missing.
+    """
+    path = os.path.join(data_dir, TOPOLOGY_FILE)
+    if not os.path.exists(path):
+        return []
+    return read_edge_list(path)
+
+
+def read_compose_topology(compose_file: str = "docker/docker-compose.yml") -> List[Tuple[str, str]]:
+    """Read the intended connections from the -addnode options of a generated compose file.
+
+    Used for networks generated before the topology file existed.
+
+    Args:
+        compose_file (str, optional): Path of the compose file. Defaults to "docker/docker-compose.yml".
+
+    Returns:
+        List[Tuple[str, str]]: (node, peer it adds) of each connection, empty if the file is missing.
+    """
+    if not os.path.exists(compose_file):
+        return []
+    edges = []
+    service = None
+    with open(compose_file, "r") as f:
+        for line in f:
+            match = _SERVICE.match(line)
+            if match:
+                service = match.group(1)
+                continue
+            match = _ADDNODE.search(line)
+            if match and service is not None:
+                edges.append((service, match.group(1)))
+    return edges
+
+
+def read_compose_services(compose_file: str = "docker/docker-compose.yml") -> Dict[str, str]:
+    """Read the text of each service of a generated compose file.
+
+    Args:
+        compose_file (str, optional): Path of the compose file. Defaults to "docker/docker-compose.yml".
+
+    Returns:
+        Dict[str, str]: {service name: its lines}, empty if the file is missing.
+    """
+    if not os.path.exists(compose_file):
+        return {}
+    services: Dict[str, List[str]] = {}
+    current = None
+    in_services = False
+    with open(compose_file, "r") as f:
+        for line in f:
+            if _SECTION.match(line):
+                in_services = line.startswith("services:")
+                current = None
+                continue
+            if not in_services:
+                continue
+            match = _SERVICE.match(line)
+            if match:
+                current = services.setdefault(match.group(1), [])
+            if current is not None and line.strip():
+                current.append(line)
+    return {name: "".join(lines) for name, lines in services.items()}
@@ -0,0 +1,94 @@
+# this file applies a new topology to the running network, without restarting it (see network_info/reconcile.py)
+
+import argparse
+import sys
+
+from config import NODE_BASE_P2P_PORT, TOPOLOGY_SEED
+from generate_compose import TOPOLOGY_MODELS, generate_topology, topology_config
+from network_info.reconcile import rewire
+from registry import DATA_DIR, read_compose_topology, read_edge_list, read_node_names, read_topology, write_topology
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Change the connections of the running network, keeping the chain state",
+        prog="bitcoin-on-local.sh rewire",
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="New topology: one 'node peer' (or CSV 'source,target') line per connection")
+    source.add_argument("--max-peers", type=int, help="Generate a new topology for this MAX_PEERS, as 'renew' does")
+    parser.add_argument("--model", choices=list(TOPOLOGY_MODELS),
+                        help="Topology model of the generated topology (default: TOPOLOGY_MODEL of the config)")
+    parser.add_argument("--data-dir", default=DATA_DIR,
+                        help=f"Directory of the node registry and topology files (default: {DATA_DIR})")
+    parser.add_argument("--compose", default="docker/docker-compose.yml",
+                        help="Compose file read when there is no topology file (default: docker/docker-compose.yml)")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds before giving up (default: 60)")
+    parser.add_argument("--interval", type=float, default=2, help="Seconds between two repair rounds (default: 2)")
+    parser.add_argument("--dry-run", action="store_true", help="Only show the connections that would change")
+    args = parser.parse_args()
+
+    nodes = read_node_names(args.data_dir)
+    if not nodes:
+        print("[ERROR] No nodes found. Please generate the network first.")
+        sys.exit(1)
+    old = read_topology(args.data_dir) or read_compose_topology(args.compose)
+
+    if args.file:
+        try:
+            new = read_edge_list(args.file)
+        except OSError as e:
+            print(f"[ERROR] Cannot read {args.file}: {e}")
+            sys.exit(1)
+        unknown = sorted({node for edge in new for node in edge} - set(nodes))
+        if unknown:
+            print(f"[ERROR] Unknown nodes in {args.file}: {', '.join(unknown)}")
+            sys.exit(1)
+    else:
+        topology = topology_config()
+        if args.model:
+            topology["model"] = args.model
+        try:
+            peers = generate_topology(nodes, max_peers=args.max_peers, seed=TOPOLOGY_SEED, **topology)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+        new = [(node, peer) for node in nodes for peer in peers[node]]
+
+    added = set(new) - set(old)
+    removed = set(old) - set(new)
+    print(f"[INFO ] {len(added)} connections to add, {len(removed)} to remove")
+    if args.dry_run:
+        for source_node, target in sorted(added):
+            print(f"[INFO ] Add: {source_node} -> {target}")
+        for source_node, target in sorted(removed):
+            print(f"[INFO ] Remove: {source_node} -> {target}")
+        return
+
+    errors, report = rewire(
+        nodes,
+        old,
+        new,
+        base_p2p=NODE_BASE_P2P_PORT,
+        timeout=args.timeout,
+        interval=args.interval,
+    )
+    # the addnode lists now follow the new topology, whether or not every connection is up yet
+    write_topology(new, args.data_dir)
+
+    for node, node_errors in errors.items():
+        for error in node_errors:
+            print(f"[WARNING] {node}: {error}")
+    for node, error in report.unreachable.items():
+        print(f"[WARNING] {node} is unreachable, its connections were not checked: {error}")
+    if report.converged:
+        print(f"[DONE ] Network rewired in {report.elapsed:.1f}s")
+    else:
+        print(f"[ERROR] Network did not converge after {report.elapsed:.1f}s: "
+              f"{len(report.missing)} missing and {len(report.extra)} extra connections left "
+              "(run './bitcoin-on-local.sh reconcile' to retry)")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 from scenario import ScenarioRunner
+from scenario.actions import add_plugin_path
+from registry import read_hosts, read_node_names
 import argparse
 import sys
 from config import (
@@ -6,6 +8,8 @@ from config import (
     RPC_PASSWORD,
     NODE_BASE_RPC_PORT,
     SCENARIO_PATH,
+    SCENARIO_INDEX_ENABLED,
+    ACTION_PLUGIN_PATH,
 )
 
 class CustomArgumentParser(argparse.ArgumentParser):
@@ -16,22 +20,26 @@ class CustomArgumentParser(argparse.ArgumentParser):
 
 
 def main():
+    add_plugin_path(ACTION_PLUGIN_PATH)
     runner = ScenarioRunner(
         rpc_user=RPC_USER,
         rpc_password=RPC_PASSWORD,
         base_port=NODE_BASE_RPC_PORT,
         scenarios_dir=SCENARIO_PATH,
+        use_index=SCENARIO_INDEX_ENABLED,
+        nodes=read_node_names() or None,
+        hosts=read_hosts(),
     )
     
     # === args ===
     parser = CustomArgumentParser(description="Scenario Runner : run scenarios described in TOML files",
                                   prog='bitcoin-on-local.sh scenario',)   
     parser.add_argument('command',
-                        choices = ['list', 'run'],
-                        help='Command : list | run')
+                        choices = ['list', 'run', 'check'],
+                        help='Command : list | run | check')
     parser.add_argument('scenario',
                         nargs='?',
-                        help='Scenario name to run (only required for "run" command)')
+                        help='Scenario name to run or check (only required for "run" and "check" commands)')
     
     args = parser.parse_args()
     
@@ -44,6 +52,12 @@ def main():
             sys.exit(1)
         runner.load_scenario(args.scenario)
         runner.run_scenario()
+    elif args.command == 'check':
+        if not args.scenario:
+            print("[ERROR] Scenario name is required for 'check' command.")
+            sys.exit(1)
+        if not runner.check_scenario(args.scenario):
+            sys.exit(1)
     else:
         print(f"[ERROR] Unknown command: {args.command}")
         sys.exit(1)
@@ -1,12 +1,132 @@
+import functools
+import itertools
+import importlib.util
+from pathlib import Path
 from .rpc_caller import BitcoinRPC
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Callable, List
+
+
+class ActionSpec:
+    """Description of an action: the function running it, its arguments and how it can be scheduled."""
+    
+    __slots__ = ("name", "func", "schema", "batchable", "parallel_safe", "builtin")
+    
+    def __init__(
+            self,
+            name: str,
+            func: Callable,
+            schema: Optional[Dict[str, tuple]] = None,
+            batchable: bool = False,
+            parallel_safe: bool = False,
+            builtin: bool = False,
+        ):
+        """
+        Args:
+            name (str): Name of the action, as used in scenario steps.
+            func (Callable): ActionExecutor method (built-in) or function(rpc, node, params) (plugin).
+            schema (Dict[str, tuple], optional): Arguments as {arg: (type or tuple of types, required)}.
+                Defaults to None (arguments are not checked).
+            batchable (bool, optional): The action is a single RPC call that can be sent in a batch. Defaults to False.
+            parallel_safe (bool, optional): The action can run concurrently with other steps. Defaults to False.
+            builtin (bool, optional): func is an ActionExecutor method. Defaults to False.
+        """
+        self.name = name
+        self.func = func
+        self.schema = schema
+        self.batchable = batchable
+        self.parallel_safe = parallel_safe
+        self.builtin = builtin
+
+
+# actions registered by plugins, plugin directories, and those already imported
+_PLUGINS: Dict[str, ActionSpec] = {}
+_PLUGIN_PATHS: List[Path] = []
+_IMPORTED_PATHS: set = set()
+
+
+def register_action(
+        name: str,
+        schema: Optional[Dict[str, tuple]] = None,
+        batchable: bool = False,
+        parallel_safe: bool = False,
+    ) -> Callable:
+    """Decorator registering an external action. The function is called as func(rpc, node, params).
+
+    Example:
+        >>> @register_action("balance", schema={"minconf": (int, False)}, parallel_safe=True)
+        ... def balance(rpc, node, params):
+        ...     return rpc.call(node, "getbalance", ["*", params.get("minconf", 0)])
+    """
+    def decorator(func: Callable) -> Callable:
+        _PLUGINS[name] = ActionSpec(name, func, schema, batchable, parallel_safe)
+        return func
+    return decorator
+
+
+def add_plugin_path(path: str) -> None:
+    """Add a directory of action plugins (*.py files). They are only imported when first needed.
+
+    Args:
+        path (str): Directory holding the plugins.
+    """
+    path = Path(path)
+    if path not in _PLUGIN_PATHS:
+        _PLUGIN_PATHS.append(path)
+
+
+def plugin_files() -> List[Path]:
+    """List the plugin files of every plugin directory, without importing them."""
+    return [file for directory in _PLUGIN_PATHS if directory.is_dir() for file in sorted(directory.glob("*.py"))]
+
+
+def _discover_plugins() -> None:
+    """Import the plugin files of the directories added since the last call."""
+    for directory in list(_PLUGIN_PATHS):
+        if directory in _IMPORTED_PATHS:
+            continue
+        _IMPORTED_PATHS.add(directory)
+        if not directory.is_dir():
+            continue
+        for file in sorted(directory.glob("*.py")):
+            spec = importlib.util.spec_from_file_location(f"action_plugins.{file.stem}", file)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)  # plugins register themselves with register_action
+
+
+class _RecordingRPC:
+    """Stands for the RPC client while a batch is planned: records the calls of the actions instead of sending them."""
+    
+    def __init__(self):
+        self.calls: List[tuple] = []  # (method, params, wallet)
+    
+    def call(self, node: str, method: str, params: list = None, wallet: str = None, timeout: float = 10) -> None:
+        self.calls.append((method, params or [], wallet))
+
+
+def _builtin(
+        name: str,
+        schema: Optional[Dict[str, tuple]] = None,
+        batchable: bool = False,
+        parallel_safe: bool = False,
+    ) -> Callable:
+    """Decorator declaring an ActionExecutor method as a built-in action."""
+    def decorator(method: Callable) -> Callable:
+        method.action_spec = ActionSpec(name, method, schema, batchable, parallel_safe, builtin=True)
+        return method
+    return decorator
+
 
 class ActionExecutor:
     """ActionExecutor class to handle actions on Bitcoin nodes.
     This class provides a method to execute various actions on Bitcoin nodes using RPC calls.
     It uses the BitcoinRPC class to make the actual RPC calls to the nodes.
+    
+    Actions are resolved through a dispatch table built once: built-in actions are bound
+    when the executor is created, plugin actions (see register_action) the first time they are used.
     """
     
+    BUILTIN_ACTIONS: Dict[str, ActionSpec] = {}  # filled after the class definition
+    
     def __init__(self, rpc: BitcoinRPC):
         """Initialize the ActionExecutor with a BitcoinRPC instance.
 
@@ -14,6 +134,9 @@ class ActionExecutor:
             rpc (BitcoinRPC): An instance of the BitcoinRPC class to handle RPC calls.
         """
         self.rpc = rpc
+        self._dispatch = {
+            name: getattr(self, spec.func.__name__) for name, spec in self.BUILTIN_ACTIONS.items()
+        }
         
     def execute(self, action: str, node: str, params: Dict[str, Any] = None) -> Any:
         """Execute an action on a specified Bitcoin node.
@@ -26,17 +149,109 @@ class ActionExecutor:
         Returns:
             Any: The result of the RPC call.
         """
-        
+        func = self._dispatch.get(action)
+        if func is None:
+            func = self.bind(action)
+        return func(node, params)
+    
+    def bind(self, action: str) -> Callable[[str, Dict[str, Any]], Any]:
+        """Resolve an action to a callable taking (node, params).
+
+        Args:
+            action (str): Name of the action.
+
+        Raises:
+            ValueError: If the action is not supported.
+
+        Returns:
+            Callable[[str, Dict[str, Any]], Any]: The bound action.
+        """
+        func = self._dispatch.get(action)
+        if func is None:
+            spec = self.spec(action)
+            func = functools.partial(spec.func, self.rpc)
+            self._dispatch[action] = func
+        return func
+    
+    def execute_batch(self, node: str, steps: List[tuple]) -> List[Any]:
+        """Execute batchable actions on a node in a single request (JSON-RPC batch).
+
+        Each action is run once against a recording client to get its RPC call, then all
+        the calls are sent at once (one request per wallet when consecutive calls go to
+        different wallets).
+
+        Args:
+            node (str): The node identifier (e.g., 'node_1').
+            steps (List[tuple]): (action, params) of each step.
+
+        Raises:
+            ValueError: If an action is not batchable, or does not make a single RPC call.
+
+        Returns:
+            List[Any]: The result of each step, in order. A call that failed is given as a
+                BitcoinRPCError instead of being raised (see BitcoinRPC.batch).
+        """
+        recorder = _RecordingRPC()
+        planner = ActionExecutor(recorder)
+        for action, params in steps:
+            if not self.spec(action).batchable:
+                raise ValueError(f"Action '{action}' cannot be sent in a batch.")
+            count = len(recorder.calls)
+            planner.execute(action, node, params)
+            if len(recorder.calls) != count + 1:
+                raise ValueError(f"Action '{action}' is declared batchable but does not make a single RPC call.")
+        # some actions ignore the wallet of their step: one request per run of calls to the same wallet
+        results = []
+        for wallet, calls in itertools.groupby(recorder.calls, key=lambda call: call[2]):
+            results.extend(self.rpc.batch(node, [(method, params) for method, params, _ in calls], wallet=wallet))
+        return results
     
-        # this is a dispatcher method that calls the appropriate RPC method
-        methode = f"_action_{action}"
-        if hasattr(self, methode):
-            return getattr(self, methode)(node, params)
-        else:
+    @classmethod
+    def spec(cls, action: str) -> ActionSpec:
+        """Get the description of an action.
+
+        Raises:
+            ValueError: If the action is not supported.
+        """
+        spec = cls.BUILTIN_ACTIONS.get(action)
+        if spec is None:
+            _discover_plugins()
+            spec = _PLUGINS.get(action)
+        if spec is None:
             raise ValueError(f"Action '{action}' is not supported.")
+        return spec
+    
+    @classmethod
+    def actions(cls, discover: bool = True) -> Dict[str, ActionSpec]:
+        """Get every supported action, built-in and plugins.
+
+        Args:
+            discover (bool, optional): Import the plugins not imported yet. Defaults to True
+                (False: only the built-in actions and the plugins already imported).
+        """
+        if discover:
+            _discover_plugins()
+        return {**_PLUGINS, **cls.BUILTIN_ACTIONS}
+    
+    @classmethod
+    def action_schemas(cls) -> Dict[str, Optional[Dict[str, tuple]]]:
+        """Get the supported actions and the schema of their arguments.
+
+        Returns:
+            Dict[str, Optional[Dict[str, tuple]]]: {action: {arg: (types, required)}}, None if the action has no schema.
+        """
+        return {name: spec.schema for name, spec in cls.actions().items()}
+    
+    def _call(self, node: str, method: str, args: list, params: Dict[str, Any]) -> Any:
+        """Make the RPC call of an action, on the wallet of the step (params['wallet']) if any."""
+        wallet = params.get('wallet')
+        if wallet is None:
+            return self.rpc.call(node, method, args)
+        return self.rpc.call(node, method, args, wallet=wallet)
     
     # ===== Action Methods =====
     
+    @_builtin("cmd", schema={"cmd": (str, True)}, batchable=True, parallel_safe=True)
     def _action_cmd(self, node: str, params: Dict[str, Any] = None) -> Any:
         """Execute a raw command on the specified node."""
         if params is None:
@@ -44,8 +259,9 @@ class ActionExecutor:
         command = params.get('cmd', '')
         call = command.split(' ')[0]
         args = command.split(' ')[1:] if len(command.split(' ')) > 1 else []
-        return self.rpc.call(node, call, args)
+        return self._call(node, call, args, params)
     
+    @_builtin("create_wallet", schema={"wallet_name": (str, False)}, batchable=True, parallel_safe=True)
     def _action_create_wallet(self, node: str, params: Dict[str, Any] = None) -> Any:
         """Create a new wallet on the specified node."""
         if params is None:
@@ -53,14 +269,26 @@ class ActionExecutor:
         wallet_name = params.get('wallet_name', 'default_wallet')
         return self.rpc.call(node, 'createwallet', [wallet_name])
     
+    @_builtin(
+        "create_address",
+        schema={"label": (str, False), "address_type": (str, False)},
+        batchable=True,
+        parallel_safe=True,
+    )
     def _action_create_address(self, node: str, params: Dict[str, Any] = None) -> Any:
         """Create a new address on the specified node."""
         if params is None:
             params = {}
         label = params.get('label', '')
         address_type = params.get('address_type', 'bech32')
-        return self.rpc.call(node, 'getnewaddress', [label, address_type])
+        return self._call(node, 'getnewaddress', [label, address_type], params)
 
+    @_builtin(
+        "send_to",
+        schema={"to": (str, True), "amount": ((int, float, str), True)},
+        batchable=True,
+        parallel_safe=True,
+    )
     def _action_send_to(self, node: str, params: Dict[str, Any] = None) -> Any:
         """Send Bitcoin to a specified address on the node."""
         if params is None:
@@ -68,12 +296,24 @@ class ActionExecutor:
             
         address = params.get('to', '')
         amount = params.get('amount', 0.0)
-        return self.rpc.call(node, 'sendtoaddress', [address, amount])
+        return self._call(node, 'sendtoaddress', [address, amount], params)
     
+    @_builtin(
+        "mine",
+        schema={"amount": ((int, str), False), "address": (str, True)},
+        batchable=True,
+        parallel_safe=True,
+    )
     def _action_mine(self, node: str, params: Dict[str, Any] = None) -> Any:
         """Mine a block on the specified node."""
         if params is None:
             params = {}
         num_blocks = params.get('amount', 1)
         address = params.get('address', None) #required
-        return self.rpc.call(node, 'generatetoaddress', [num_blocks, address])
\ No newline at end of file
+        return self.rpc.call(node, 'generatetoaddress', [num_blocks, address])
+
+
+ActionExecutor.BUILTIN_ACTIONS = {
+    method.action_spec.name: method.action_spec
+    for method in vars(ActionExecutor).values() if hasattr(method, "action_spec")
+}
@@ -0,0 +1,178 @@
+import datetime
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# TOML dates and times, the only values of a parsed scenario that JSON has no type for
+_TOML_TYPES = {"datetime": datetime.datetime, "date": datetime.date, "time": datetime.time}
+
+
+def _encode_toml_value(value: Any) -> Dict[str, str]:
+    """Encode a TOML date or time as {"$toml": type, "value": ISO 8601 string}."""
+    for name, cls in _TOML_TYPES.items():
+        if isinstance(value, cls):
+            return {"$toml": name, "value": value.isoformat()}
+    raise TypeError(f"{type(value).__name__} is not a TOML value")
+
+
+def _decode_toml_value(obj: Dict[str, Any]) -> Any:
+    """Decode the dates and times encoded by _encode_toml_value."""
+    if obj.keys() == {"$toml", "value"} and obj["$toml"] in _TOML_TYPES:
+        return _TOML_TYPES[obj["$toml"]].fromisoformat(obj["value"])
+    return obj
+
+
+class ScenarioIndex:
+    """On-disk cache of parsed scenarios.
+
+    The index (`index.json`) holds, for every scenario file, its mtime, size and
+    hash along with the metadata shown by `scenario list`. The parsed and
+    validated scenario itself (the plan) is stored as JSON in a separate file named
+    after the hash, so listing never has to load the plans. Plans are data only:
+    loading them never runs code, whatever is in the cache directory.
+
+    An entry is reused as long as the file mtime and size are unchanged. If they
+    changed but the content hash did not (e.g. after a `touch` or a checkout),
+    the entry is refreshed without parsing the file again.
+    """
+
+    VERSION = 2
+
+    def __init__(self, cache_dir: Path, context: str = ""):
+        """Initialize the index stored in cache_dir.
+
+        Args:
+            cache_dir (Path): Directory holding the index and the cached plans.
+            context (str, optional): What validation depends on besides the file (known actions,
+                nodes...). The whole index is discarded when it changes. Defaults to "".
+        """
+        self.cache_dir = Path(cache_dir)
+        self.context = context
+        self.index_path = self.cache_dir / "index.json"
+        self.plans_dir = self.cache_dir / "plans"
+        self._entries = None
+        self._dirty = False
+
+    @property
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.index_path, "r") as f:
+                    index = json.load(f)
+                if index.get("version") == self.VERSION and index.get("context") == self.context:
+                    self._entries = index.get("entries", {})
+            except (OSError, ValueError):
+                pass  # missing or corrupted index: start from scratch
+        return self._entries
+
+    @staticmethod
+    def _hash(raw: bytes) -> str:
+        return hashlib.sha256(raw).hexdigest()
+
+    def lookup(self, path: Path, stat: os.stat_result = None) -> Optional[Dict[str, Any]]:
+        """Get the up-to-date entry of a scenario file.
+
+        Args:
+            path (Path): Path of the scenario file.
+            stat (os.stat_result, optional): Result of path.stat() if already known.
+
+        Returns:
+            Optional[Dict[str, Any]]: The entry, or None if the file changed since it was indexed.
+        """
+        entry = self.entries.get(str(path))
+        if entry is None:
+            return None
+
+        stat = stat or path.stat()
+        if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return entry
+
+        # the file was touched: only trust the entry if the content is the same
+        if entry["size"] == stat.st_size and entry["sha256"] == self._hash(path.read_bytes()):
+            entry["mtime_ns"] = stat.st_mtime_ns
+            self._dirty = True
+            return entry
+        return None
+
+    def store(
+            self,
+            path: Path,
+            raw: bytes,
+            metadata: Dict[str, Any],
+            plan: Optional[Dict[str, Any]],
+            stat: os.stat_result = None,
+        ) -> Dict[str, Any]:
+        """Add or replace the entry of a scenario file.
+
+        Args:
+            path (Path): Path of the scenario file.
+            raw (bytes): Content the entry was built from.
+            metadata (Dict[str, Any]): Metadata shown when listing scenarios (must be JSON serializable).
+            plan (Optional[Dict[str, Any]]): Parsed and validated scenario, None if invalid.
+            stat (os.stat_result, optional): Result of path.stat() if already known.
+
+        Returns:
+            Dict[str, Any]: The new entry.
+        """
+        stat = stat or path.stat()
+        digest = self._hash(raw)
+
+        if plan is not None:
+            self.plans_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.plans_dir / f"{digest}.json", "w") as f:
+                json.dump(plan, f, default=_encode_toml_value)
+
+        entry = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": digest,
+            "metadata": metadata,
+            "valid": plan is not None,
+        }
+        self.entries[str(path)] = entry
+        self._dirty = True
+        return entry
+
+    def load_plan(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Load the cached plan of an entry.
+
+        Returns:
+            Optional[Dict[str, Any]]: The plan, or None if it is not cached.
+        """
+        try:
+            with open(self.plans_dir / f"{entry['sha256']}.json", "r") as f:
+                return json.load(f, object_hook=_decode_toml_value)
+        except (OSError, ValueError):
+            return None
+
+    def prune(self, paths: List[Path]) -> None:
+        """Forget scenario files that no longer exist, and their cached plans.
+
+        Args:
+            paths (List[Path]): Scenario files that still exist.
+        """
+        keep = {str(p) for p in paths}
+        for key in [k for k in self.entries if k not in keep]:
+            del self.entries[key]
+            self._dirty = True
+
+        if self.plans_dir.exists():
+            hashes = {e["sha256"] for e in self.entries.values()}
+            for plan in self.plans_dir.iterdir():
+                # plans of other versions of the index too
+                if plan.suffix != ".json" or plan.stem not in hashes:
+                    plan.unlink(missing_ok=True)
+
+    def save(self) -> None:
+        """Write the index to disk if it changed."""
+        if not self._dirty:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"version": self.VERSION, "context": self.context, "entries": self.entries}, f)
+        os.replace(tmp_path, self.index_path)  # atomic: readers never see a partial index
+        self._dirty = False
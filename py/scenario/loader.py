@@ -1,18 +1,61 @@
 import tomli
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Iterable
+
+from .actions import ActionExecutor, ActionSpec, plugin_files
+from .index import ScenarioIndex
+from .validator import ScenarioValidator
+
+# cache directory of the scenario index, inside the scenarios directory
+INDEX_DIR = ".scenario_cache"
 
 class ScenarioLoader:
     """A class to load and validate scenarios from TOML files.
     """
     
-    def __init__(self, scenarios_dir : str = "./scenarios"):
+    def __init__(
+            self,
+            scenarios_dir : str = "./scenarios",
+            use_index: bool = False,
+            nodes: Optional[Iterable[str]] = None,
+        ):
         """Initialize the ScenarioLoader with the directory containing scenario files.
 
         Args:
             scenarios_dir (str, optional): path to the scenario dir. Defaults to "./scenarios".
+            use_index (bool, optional): cache parsed scenarios on disk (see ScenarioIndex). Defaults to False.
+            nodes (Iterable[str], optional): known node names, to check the nodes used by steps. Defaults to None.
         """
         self.scenarios_dir = Path(scenarios_dir)
+        self.nodes = list(nodes) if nodes else None
+        # plugins are only imported once a scenario uses an action that is not a built-in one
+        self.validator = self._build_validator(ActionExecutor.actions(discover=False))
+        # cached validation results depend on the known actions (plugin files included) and nodes
+        plugins = [(str(path), path.stat().st_mtime_ns) for path in plugin_files()]
+        context = "|".join(map(str, (
+            sorted(self.validator.actions), sorted(self.validator.parallel_safe), sorted(self.validator.nodes or []),
+            plugins,
+        )))
+        self.index = ScenarioIndex(self.scenarios_dir / INDEX_DIR, context) if use_index else None
+
+    def _build_validator(self, actions: Dict[str, ActionSpec]) -> ScenarioValidator:
+        return ScenarioValidator(
+            actions={name: spec.schema for name, spec in actions.items()},
+            nodes=self.nodes,
+            parallel_safe=[name for name, spec in actions.items() if spec.parallel_safe],
+        )
+
+    def _validator_for(self, data: Dict[str, Any]) -> ScenarioValidator:
+        """Get the validator of a scenario, importing the plugins if it uses an unknown action."""
+        steps = data.get("steps")
+        if not isinstance(steps, dict):
+            return self.validator
+        used = {step.get("action") for step in steps.values() if isinstance(step, dict)}
+        if any(isinstance(action, str) and action not in self.validator.actions for action in used):
+            actions = ActionExecutor.actions()
+            if len(actions) != len(self.validator.actions):
+                self.validator = self._build_validator(actions)
+        return self.validator
 
     def list_scenarios(self) -> List[str]:
         """List available scenarios"""
@@ -20,42 +63,122 @@ class ScenarioLoader:
             return []
         return [f.stem for f in self.scenarios_dir.glob("*.toml")]
     
+    def describe_scenarios(self) -> List[Dict[str, Any]]:
+        """List available scenarios with their metadata.
+
+        With the index enabled, only new or modified files are parsed.
+
+        Returns:
+            List[Dict[str, Any]]: Metadata of each scenario (see _metadata), sorted by name.
+        """
+        if not self.scenarios_dir.exists():
+            return []
+        
+        paths = sorted(self.scenarios_dir.glob("*.toml"))
+        if self.index is None:
+            return [self._metadata(path.stem, *self._parse(path)) for path in paths]
+        
+        described = [self._indexed_entry(path)["metadata"] for path in paths]
+        self.index.prune(paths)
+        self.index.save()
+        return described
+    
+    @staticmethod
+    def _metadata(name: str, data: Dict[str, Any], valid: bool) -> Dict[str, Any]:
+        """Build the (JSON serializable) metadata of a parsed scenario."""
+        info = data.get("scenario", {}) if isinstance(data.get("scenario"), dict) else {}
+        steps = data.get("steps", {})
+        return {
+            "name": name,
+            "title": str(info.get("name", "")),
+            "description": str(info.get("description", "")),
+            "author": str(info.get("author", "")),
+            "date": str(info.get("date", "")),
+            "steps": len(steps) if isinstance(steps, dict) else 0,
+            "valid": valid,
+        }
+    
+    def _parse(self, path: Path, raw: bytes = None) -> tuple:
+        """Parse and validate a scenario file.
+
+        Returns:
+            tuple: (parsed data, True if valid)
+        """
+        try:
+            data = tomli.loads((raw if raw is not None else path.read_bytes()).decode())
+        except (tomli.TOMLDecodeError, UnicodeDecodeError) as e:
+            print(f"[Scenario] Invalid TOML in {path.name}: {e}")
+            return {}, False
+        return data, self._validator(data, self._validator_for(data))
+    
+    def _index_file(self, path: Path, stat=None) -> tuple:
+        """Parse a scenario file and store it in the index.
+
+        Returns:
+            tuple: (index entry, validated scenario or None if invalid)
+        """
+        raw = path.read_bytes()
+        data, valid = self._parse(path, raw)
+        plan = data if valid else None
+        entry = self.index.store(path, raw, self._metadata(path.stem, data, valid), plan, stat)
+        return entry, plan
+    
+    def _indexed_entry(self, path: Path) -> Dict[str, Any]:
+        """Get the index entry of a scenario file, parsing it only if it changed."""
+        stat = path.stat()
+        entry = self.index.lookup(path, stat)
+        if entry is None:
+            entry, _ = self._index_file(path, stat)
+        return entry
+    
+    def _load_indexed(self, scenario_path: Path) -> Optional[Dict[str, Any]]:
+        """Load a scenario through the index, skipping parsing and validation if unchanged.
+
+        Returns:
+            Optional[Dict[str, Any]]: The validated scenario, or None if it is invalid.
+        """
+        entry = self.index.lookup(scenario_path)
+        plan = self.index.load_plan(entry) if entry is not None and entry["valid"] else None
+        if plan is None:
+            # new, modified or invalid scenario (parse again to report the errors)
+            _, plan = self._index_file(scenario_path)
+        self.index.save()
+        return plan
+    
     @staticmethod
-    def _validator(data: Dict[str, Any]) -> bool:
-        """Validate the scenario data structure.
+    def _validator(data: Dict[str, Any], validator: Optional[ScenarioValidator] = None) -> bool:
+        """Validate the scenario data structure, printing every problem found.
 
         Args:
             data (Dict[str, Any]): The scenario data to validate.
+            validator (ScenarioValidator, optional): Validator to use. Defaults to a validator
+                checking the structure only (actions and nodes are not checked).
 
         Returns:
             bool: True if valid, False otherwise.
         """
-        
-        # validate required keys
-        required_keys = ["scenario","config", "steps"]
-        for key in required_keys:
-            if key not in data:
-                print(f"[Scenario] Missing required key: {key}")
-                return False
-        
-        # validate config
-        required__keys_config = ["default_node","default_wait","timeout"]
-        for key in required__keys_config:
-            if key not in data["config"]:
-                print(f"[Scenario] Missing required config key: {key}")
-                return False
-        
-        # validate steps
-        required_keys_steps = ["name", "action"]
-        for step in data["steps"]:
-            for key in required_keys_steps:
-                if key not in data["steps"][step]:
-                    print(f"[Scenario] Missing required step key: {key}")
-                    return False
-        
-        return True
-        
-        
+        errors = (validator or ScenarioValidator()).validate(data)
+        for error in errors:
+            print(f"[Scenario] {error}")
+        return not errors
+    
+    def check_scenario(self, scenario_name: str) -> List[str]:
+        """Validate a scenario without loading it for a run.
+
+        Args:
+            scenario_name (str): Name of the scenario to check (without .toml extension).
+
+        Returns:
+            List[str]: Every problem found, empty if the scenario is valid.
+        """
+        scenario_path = self.scenarios_dir / f"{scenario_name}.toml"
+        if not scenario_path.exists():
+            raise FileNotFoundError(f"Scenario '{scenario_name}' not found in {self.scenarios_dir}")
+        try:
+            data = tomli.loads(scenario_path.read_bytes().decode())
+        except (tomli.TOMLDecodeError, UnicodeDecodeError) as e:
+            return [f"Invalid TOML: {e}"]
+        return self._validator_for(data).validate(data)
     
     def load_scenario(self, scenario_name: str) -> Dict[str, Any]:
         """Load a scenario from a TOML file.
@@ -72,11 +195,16 @@ class ScenarioLoader:
         if not scenario_path.exists():
             raise FileNotFoundError(f"Scenario '{scenario_name}' not found in {self.scenarios_dir}")
         
-        with open (scenario_path, "rb") as f:
-            scenario_data = tomli.load(f)
-        
-        if not self._validator(scenario_data):
-            raise ValueError(f"Invalid scenario data in {scenario_name}.toml")
+        if self.index is not None:
+            scenario_data = self._load_indexed(scenario_path)
+            if scenario_data is None:
+                raise ValueError(f"Invalid scenario data in {scenario_name}.toml")
+        else:
+            with open (scenario_path, "rb") as f:
+                scenario_data = tomli.load(f)
+            
+            if not self._validator(scenario_data, self._validator_for(scenario_data)):
+                raise ValueError(f"Invalid scenario data in {scenario_name}.toml")
         
         print(f"[Scenario] Loaded scenario: {scenario_name}")
         return scenario_data
\ No newline at end of file
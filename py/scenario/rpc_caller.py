@@ -1,6 +1,8 @@
 import requests
 import json
-from typing import Any
+from typing import Any, List, Sequence, Tuple
+from urllib.parse import quote
+from requests.adapters import HTTPAdapter
 
 class BitcoinRPCError(Exception):
     """Custom exception for Bitcoin RPC errors."""
@@ -12,8 +14,18 @@ class RPCUnexpectedResponseError(Exception):
 
 class BitcoinRPC:
     """A class to handle RPC calls to Bitcoin nodes.
+    
+    Connections are kept alive in a pool shared by all nodes, so the client can be
+    used from several threads at once.
     """
-    def __init__(self, rpc_user: str, rpc_password: str, base_port: int = 18443):
+    def __init__(
+            self,
+            rpc_user: str,
+            rpc_password: str,
+            base_port: int = 18443,
+            pool_size: int = 64,
+            hosts: dict = None,
+        ):
         """Initialize the BitcoinRPC class with RPC user, password, and base port.
         
         All inputs should match the configuration of the Bitcoin nodes.
@@ -22,20 +34,52 @@ class BitcoinRPC:
             rpc_user (str): RPC username
             rpc_password (str): RPC password
             base_port (int, optional): base port. Defaults to 18443.
+            pool_size (int, optional): number of nodes, and of connections per node, kept alive. Defaults to 64.
+            hosts (dict, optional): host of the nodes not running on this host (sharded networks, see
+                registry.read_hosts). Defaults to None (all on localhost).
         """
         self.rpc_user = rpc_user
         self.rpc_password = rpc_password
         self.base_port = base_port
+        self.hosts = hosts or {}
         
-    def call(self, node: str, method: str, params: list = None) -> Any:
-        """Make RPC call to Bitcoin node"""
-        if params is None:
-            params = []
-            
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        
+    def url(self, node: str, wallet: str = None) -> str:
+        """Get the RPC endpoint of a node, or of one of its wallets.
+
+        Args:
+            node (str): The node name (e.g. 'node_1').
+            wallet (str, optional): Wallet name. Defaults to None (node endpoint).
+
+        Returns:
+            str: The endpoint URL.
+        """
         # Extract node number and calculate port
         node_num = int(node.split('_')[-1])
         port = self.base_port + (node_num - 1) * 2
-        url = f"http://localhost:{port}"
+        url = f"http://{self.hosts.get(node, 'localhost')}:{port}"
+        if wallet is not None:
+            url += f"/wallet/{quote(wallet, safe='')}"
+        return url
+    
+    def call(self, node: str, method: str, params: list = None, wallet: str = None, timeout: float = 10) -> Any:
+        """Make RPC call to Bitcoin node
+        
+        Args:
+            node (str): The node name (e.g. 'node_1').
+            method (str): RPC method.
+            params (list, optional): RPC parameters. Defaults to None.
+            wallet (str, optional): Send the call to this wallet of the node (required for
+                wallet RPCs when the node has several wallets loaded). Defaults to None.
+            timeout (float, optional): Seconds to wait for the node. Defaults to 10.
+        """
+        if params is None:
+            params = []
+            
+        url = self.url(node, wallet)
         
         payload = {
             "jsonrpc": "2.0",
@@ -45,12 +89,12 @@ class BitcoinRPC:
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 url, 
                 data=json.dumps(payload), 
                 headers={'content-type': 'application/json'},
                 auth=(self.rpc_user, self.rpc_password),
-                timeout=10
+                timeout=timeout
             )
             result = response.json()
             
@@ -72,3 +116,66 @@ class BitcoinRPC:
         except Exception as e:
             raise RPCUnexpectedResponseError(f"Unexpected response from {node}: {str(e)}") from e
 
+
+    def batch(
+            self,
+            node: str,
+            calls: Sequence[Tuple[str, list]],
+            timeout: float = 10,
+            wallet: str = None,
+        ) -> List[Any]:
+        """Send several RPC calls to a node in one request (JSON-RPC batch).
+        
+        Args:
+            node (str): The node name (e.g. 'node_1').
+            calls (Sequence[Tuple[str, list]]): (method, params) of each call.
+            timeout (float, optional): Seconds to wait for the node. Defaults to 10.
+            wallet (str, optional): Send the calls to this wallet of the node. Defaults to None.
+
+        Returns:
+            List[Any]: The result of each call, in order. A call that failed is given
+                as a BitcoinRPCError instead of being raised, so the others are kept.
+        """
+        if not calls:
+            return []
+        
+        payload = [
+            {"jsonrpc": "2.0", "method": method, "params": params or [], "id": i}
+            for i, (method, params) in enumerate(calls)
+        ]
+        
+        try:
+            response = self.session.post(
+                self.url(node, wallet),
+                data=json.dumps(payload),
+                headers={'content-type': 'application/json'},
+                auth=(self.rpc_user, self.rpc_password),
+                timeout=timeout
+            )
+            replies = response.json()
+            if not isinstance(replies, list):
+                # bitcoind answers a single error object when the whole batch is rejected
+                error = (replies or {}).get('error') or {}
+                raise BitcoinRPCError(f"RPC error on {node}: {error.get('message', replies)}")
+            
+            results = [BitcoinRPCError(f"RPC error on {node}: no reply")] * len(calls)
+            for reply in replies:
+                i = reply.get('id')
+                if not isinstance(i, int) or not 0 <= i < len(calls):
+                    continue
+                if reply.get('error') is not None:
+                    results[i] = BitcoinRPCError(f"RPC error on {node}: {reply['error']['message']}")
+                else:
+                    results[i] = reply.get('result')
+            return results
+            
+        except BitcoinRPCError:
+            raise
+        except requests.ConnectionError as e:
+            raise requests.ConnectionError(f"Connection failed to {node}") from e
+        except requests.Timeout as e:
+            raise requests.Timeout(f"Timeout for {node}") from e
+        except json.JSONDecodeError as e:
+            raise json.JSONDecodeError(f"Invalid JSON response from {node}","unknown",0) from e
+        except Exception as e:
+            raise RPCUnexpectedResponseError(f"Unexpected response from {node}: {str(e)}") from e
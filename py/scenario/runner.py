@@ -1,8 +1,10 @@
 import time
+from concurrent.futures import ThreadPoolExecutor
 from .loader import ScenarioLoader
 from .rpc_caller import BitcoinRPC
 from .actions import ActionExecutor
-from typing import Dict, Any
+from .validator import VARIABLE_PATTERN
+from typing import Dict, Any, Iterable, List, Optional
 
 
 # Error classes for ScenarioRunner
@@ -28,11 +30,14 @@ class ScenarioRunner:
         rpc_password: str,
         scenarios_dir: str = "./scenarios",
         base_port: int = 18443,
+        use_index: bool = False,
+        nodes: Optional[Iterable[str]] = None,
+        hosts: Optional[Dict[str, str]] = None,
     ):
-        self.loader = ScenarioLoader(scenarios_dir)
+        self.loader = ScenarioLoader(scenarios_dir, use_index=use_index, nodes=nodes)
         self.variables = {}  # Store scenario variables
 
-        rpc = BitcoinRPC(rpc_user, rpc_password, base_port)
+        rpc = BitcoinRPC(rpc_user, rpc_password, base_port, hosts=hosts)
         self.executor = ActionExecutor(rpc)
 
         self.scenario = None  # Will hold the loaded scenario
@@ -48,6 +53,10 @@ class ScenarioRunner:
         self.scenario = self.loader.load_scenario(scenario_name)
         self.config = self.scenario["config"]  # so we dont have to load it again
 
+        # resolve every action now (plugins included), not in the middle of the run
+        for step in self.scenario.get("steps", {}).values():
+            self.executor.bind(step["action"])
+
         # print infos :
         print("==========================================")
         print(f"Name: {self.scenario['scenario']['name']} \n")
@@ -57,10 +66,36 @@ class ScenarioRunner:
         print("==========================================")
 
     def list_scenarios(self):
-        """List available scenarios"""
+        """List available scenarios with their name, author and number of steps"""
         print("Available scenarios:")
-        scenarios = self.loader.list_scenarios()
-        print("\n".join(scenarios) if scenarios else "No scenarios found.")
+        scenarios = self.loader.describe_scenarios()
+        if not scenarios:
+            print("No scenarios found.")
+            return
+
+        width = max(len(s["name"]) for s in scenarios)
+        lines = []
+        for s in scenarios:
+            line = f"{s['name'].ljust(width)}  {s['title']} ({s['author'] or 'unknown'}, {s['steps']} steps)"
+            if not s["valid"]:
+                line += " [invalid]"
+            lines.append(line)
+        print("\n".join(lines))
+
+    def check_scenario(self, scenario_name: str) -> bool:
+        """Validate a scenario and print every problem found, without contacting any node.
+
+        Args:
+            scenario_name (str): Name of the scenario to check (without .toml extension).
+
+        Returns:
+            bool: True if the scenario is valid.
+        """
+        errors = self.loader.check_scenario(scenario_name)
+        for error in errors:
+            print(f"[Scenario] {error}")
+        print(f"[Scenario] {scenario_name}: {len(errors) or 'no'} problem{'s' if len(errors) != 1 else ''} found")
+        return not errors
 
     def _substitute_variables(self, params: Any) -> Any:
         """Replace ${var} with actual values"""
@@ -76,18 +111,29 @@ class ScenarioRunner:
 
     # ==== runners ====
 
-    def _run_step(self, step: Dict[str, Any]) -> None:
+    def _prepare_step(self, step: Dict[str, Any]) -> tuple:
+        """Get the node and the (substituted) arguments of a step, and announce it."""
         # exctract actions details
         # → the scenario is valid so we can assume that the step has the required keys
-        action_name = step["name"]
-        action = step["action"]
         node = step.get("node", self.config["default_node"])
         args = self._substitute_variables(step.get("args", {}))
+        if "wallet" in step:
+            # actions route their RPC calls to this wallet of the node
+            args = {**args, "wallet": step["wallet"]}
+
+        where = node if "wallet" not in step else f"{node}, wallet: {step['wallet']}"
+        print(f"Running step: {step['name']} (on node: {where})")
+        return node, args
 
-        # execute the action
-        print(f"Running step: {action_name} (on node: {node})")
-        result = self.executor.execute(action, node, args)
+    def _run_step(self, step: Dict[str, Any]) -> None:
+        node, args = self._prepare_step(step)
+        result = self.executor.execute(step["action"], node, args)
+        self._finish_step(step, args, result)
 
+        # time and wait
+        time.sleep(step.get("wait_after", self.config["default_wait"]))
+
+    def _finish_step(self, step: Dict[str, Any], args: Dict[str, Any], result: Any) -> None:
         # == deal with options ==
         if step.get("print", False):
             print(f"Result: \n → {result} \n")
@@ -97,11 +143,87 @@ class ScenarioRunner:
             self.variables[var_name] = result
             print(f"Stored result in variable: {var_name} = {result}")
 
-        # time and wait
-        time.sleep(step.get("wait_after", self.config["default_wait"]))
+    def _batch_key(self, step: Dict[str, Any]) -> Optional[tuple]:
+        """Get the (node, wallet) of a step, None if its action is not batchable."""
+        if step.get("parallel", False) is True:
+            return None
+        try:
+            batchable = self.executor.spec(step["action"]).batchable
+        except ValueError:
+            return None
+        if batchable is not True:
+            return None
+        return step.get("node", self.config["default_node"]), step.get("wallet")
+
+    def _batches(self, groups: List[List[str]]) -> List[List[str]]:
+        """Merge consecutive sequential steps that can be sent to a node in one batch request.
+
+        Steps are merged when their actions are batchable and they go to the same node and
+        wallet. A batch ends after a step that waits, and before a step using a variable
+        stored in the batch.
+        """
+        steps = self.scenario["steps"]
+        batches = []
+        key, stored = None, set()  # batch that the next step can join, variables it stores
+        for group in groups:
+            step = steps[group[0]]
+            step_key = self._batch_key(step) if len(group) == 1 else None
+            used = set(VARIABLE_PATTERN.findall(str(step.get("args", {}))))
+            if step_key is not None and step_key == key and not used & stored:
+                batches[-1].append(group[0])
+            else:
+                batches.append(list(group))
+                stored = set()
+            if step_key is None or step.get("wait_after", self.config["default_wait"]):
+                key = None
+            else:
+                key = step_key
+                if step.get("args", {}).get("store_result"):
+                    stored.add(step["args"]["store_result"])
+        return batches
+
+    def _run_batch(self, step_names: List[str]) -> None:
+        """Run consecutive steps on the same node in a single batch request.
+
+        The steps are sent at once: when one fails, the next steps of the batch have been sent too.
+        """
+        steps = [self.scenario["steps"][name] for name in step_names]
+        prepared = [self._prepare_step(step) for step in steps]
+        calls = [(step["action"], args) for step, (_, args) in zip(steps, prepared)]
+        results = self.executor.execute_batch(prepared[0][0], calls)
+        for name, step, (_, args), result in zip(step_names, steps, prepared, results):
+            if isinstance(result, Exception):
+                print(f"[ERROR] An error occurred while running step '{name}': {result}")
+                raise result
+            self._finish_step(step, args, result)
+        time.sleep(steps[-1].get("wait_after", self.config["default_wait"]))
+
+    def _step_groups(self) -> List[List[str]]:
+        """Group consecutive steps with `parallel = true`, other steps are alone in their group."""
+        groups = []
+        previous_parallel = False
+        for step_name, step in self.scenario["steps"].items():
+            parallel = step.get("parallel", False) is True
+            if parallel and previous_parallel:
+                groups[-1].append(step_name)
+            else:
+                groups.append([step_name])
+            previous_parallel = parallel
+        return groups
+
+    def _run_named_step(self, step_name: str) -> None:
+        try:
+            self._run_step(self.scenario["steps"][step_name])
+        except Exception as e:
+            print(f"[ERROR] An error occurred while running step '{step_name}': {e}")
+            raise e
 
     def run_scenario(self) -> None:
-        """Run the loaded scenario step by step"""
+        """Run the loaded scenario step by step.
+
+        Consecutive steps with `parallel = true` are run at the same time. Consecutive
+        batchable steps on the same node, without wait between them, are sent in one request.
+        """
         if self.scenario is None:
             raise ScenarioNotLoadedError()
 
@@ -110,16 +232,22 @@ class ScenarioRunner:
         # timeout sleep:
         time.sleep(self.config.get("timeout"))
 
-        for i, ststep_name in enumerate(self.scenario["steps"]):
-            print(f"\n[SCENARIO] Step {i + 1}/{len(self.scenario['steps'])}")
-            step = self.scenario["steps"][ststep_name]
-
-            try:
-                self._run_step(step)
-            except Exception as e:
-                print(
-                    f"[ERROR] An error occurred while running step '{ststep_name}': {e}"
-                )
-                raise e
+        total = len(self.scenario["steps"])
+        done = 0
+        for group in self._batches(self._step_groups()):
+            if len(group) == 1:
+                print(f"\n[SCENARIO] Step {done + 1}/{total}")
+                self._run_named_step(group[0])
+            elif self.scenario["steps"][group[0]].get("parallel", False) is not True:
+                print(f"\n[SCENARIO] Steps {done + 1}-{done + len(group)}/{total} (in one batch)")
+                self._run_batch(group)
+            else:
+                print(f"\n[SCENARIO] Steps {done + 1}-{done + len(group)}/{total} (in parallel)")
+                with ThreadPoolExecutor(max_workers=len(group)) as pool:
+                    futures = [pool.submit(self._run_named_step, name) for name in group]
+                # every step of the group has finished: report the first failure
+                for future in futures:
+                    future.result()
+            done += len(group)
 
         print("[SCENARIO] Scenario execution completed.")
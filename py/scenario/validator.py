@@ -0,0 +1,215 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# matches ${VAR} references in step arguments
+VARIABLE_PATTERN = re.compile(r"\$\{([^}]*)\}")
+
+# arguments accepted by every action
+COMMON_ARGS = {"store_result": (str, False)}
+
+NUMBER = (int, float)
+
+
+def _type_name(types: Tuple[type, ...]) -> str:
+    return " or ".join(t.__name__ for t in types)
+
+
+def _is_instance(value: Any, types: Tuple[type, ...]) -> bool:
+    # bool is a subclass of int, but `amount = true` is never what the author meant
+    if isinstance(value, bool) and bool not in types:
+        return False
+    return isinstance(value, types)
+
+
+class ScenarioValidator:
+    """Validate a whole scenario in a single pass and report every problem at once.
+
+    The schema (required keys, field types, arguments of each action) is compiled
+    once when the validator is created, then each step is checked in one linear
+    pass: required keys, known action, argument names and types, `${VAR}`
+    references to variables not stored by a previous step, and node names.
+    """
+
+    REQUIRED_KEYS = ("scenario", "config", "steps")
+    CONFIG_FIELDS = {"default_node": str, "default_wait": NUMBER, "timeout": NUMBER}
+    REQUIRED_STEP_KEYS = ("name", "action")
+    STEP_FIELDS = {
+        "name": str,
+        "action": str,
+        "node": str,
+        "args": dict,
+        "wait_after": NUMBER,
+        "print": bool,
+        "parallel": bool,
+        "wallet": str,
+    }
+
+    def __init__(
+            self,
+            actions: Optional[Dict[str, Optional[Dict[str, Tuple[Any, bool]]]]] = None,
+            nodes: Optional[Iterable[str]] = None,
+            parallel_safe: Optional[Iterable[str]] = None,
+        ):
+        """Compile the schema.
+
+        Args:
+            actions (Dict[str, Dict[str, Tuple[Any, bool]]], optional): Known actions and their
+                arguments as {arg: (type or tuple of types, required)}. An action mapped to None
+                accepts any argument. Defaults to None (action names are not checked).
+            nodes (Iterable[str], optional): Known node names. Defaults to None (not checked).
+            parallel_safe (Iterable[str], optional): Actions that can be used in parallel steps.
+                Defaults to None (not checked).
+        """
+        self.nodes = frozenset(nodes) if nodes else None
+        self.parallel_safe = frozenset(parallel_safe) if parallel_safe is not None else None
+        self.config_fields = {k: self._types(t) for k, t in self.CONFIG_FIELDS.items()}
+        self.step_fields = {k: self._types(t) for k, t in self.STEP_FIELDS.items()}
+
+        # {action: ({arg: types}, required args)} ; None when the action has no schema
+        self.actions = None
+        if actions is not None:
+            self.actions = {}
+            for name, schema in actions.items():
+                if schema is None:
+                    self.actions[name] = None
+                    continue
+                schema = {**COMMON_ARGS, **schema}
+                self.actions[name] = (
+                    {arg: self._types(types) for arg, (types, _) in schema.items()},
+                    tuple(arg for arg, (_, required) in schema.items() if required),
+                )
+
+    @staticmethod
+    def _types(types: Any) -> Tuple[type, ...]:
+        return types if isinstance(types, tuple) else (types,)
+
+    def validate(self, data: Dict[str, Any]) -> List[str]:
+        """Validate a parsed scenario.
+
+        Args:
+            data (Dict[str, Any]): The scenario data to validate.
+
+        Returns:
+            List[str]: Every problem found, empty if the scenario is valid.
+        """
+        errors = []
+
+        for key in self.REQUIRED_KEYS:
+            if key not in data:
+                errors.append(f"Missing required key: {key}")
+
+        config = data.get("config", {})
+        if not isinstance(config, dict):
+            errors.append("config must be a table")
+            config = {}
+        elif "config" in data:
+            for key, types in self.config_fields.items():
+                if key not in config:
+                    errors.append(f"Missing required config key: {key}")
+                elif not _is_instance(config[key], types):
+                    errors.append(f"config.{key} must be {_type_name(types)}")
+        default_node = config.get("default_node")
+        if isinstance(default_node, str):
+            self._check_node(default_node, "config.default_node", errors)
+
+        steps = data.get("steps", {})
+        if not isinstance(steps, dict):
+            errors.append("steps must be a table")
+            steps = {}
+
+        defined = set()  # variables stored by the steps already checked
+        group = set()  # variables stored by the current group of parallel steps
+        for step_id, step in steps.items():
+            where = f"steps.{step_id}"
+            if not isinstance(step, dict):
+                errors.append(f"{where} must be a table")
+                continue
+            if not step.get("parallel", False):
+                # a parallel group ends: its results are available to the next steps
+                defined |= group
+                group = set()
+                self._check_step(step, where, defined, defined, errors)
+            else:
+                self._check_step(step, where, defined, group, errors)
+
+        return errors
+
+    def _check_node(self, node: str, where: str, errors: List[str]) -> None:
+        if self.nodes is not None and node not in self.nodes:
+            errors.append(f"{where}: unknown node '{node}'")
+
+    def _check_step(
+            self,
+            step: Dict[str, Any],
+            where: str,
+            defined: set,
+            stored: set,
+            errors: List[str],
+        ) -> None:
+        """Check one step. Variables it stores are added to `stored`."""
+        for key in self.REQUIRED_STEP_KEYS:
+            if key not in step:
+                errors.append(f"Missing required step key: {key} (in {where})")
+
+        for key, value in step.items():
+            types = self.step_fields.get(key)
+            if types is None:
+                errors.append(f"{where}: unknown key '{key}'")
+            elif not _is_instance(value, types):
+                errors.append(f"{where}.{key} must be {_type_name(types)}")
+
+        if isinstance(step.get("node"), str):
+            self._check_node(step["node"], f"{where}.node", errors)
+
+        args = step.get("args", {})
+        if not isinstance(args, dict):
+            args = {}  # already reported
+
+        # variables used must have been stored by a previous step
+        for name in sorted(self._references(args)):
+            if name not in defined:
+                errors.append(f"{where}: variable '${{{name}}}' is used before being stored")
+
+        action = step.get("action")
+        if self.actions is not None and isinstance(action, str):
+            if action not in self.actions:
+                errors.append(f"{where}: unknown action '{action}'")
+            elif self.actions[action] is not None:
+                self._check_args(args, *self.actions[action], f"{where}.args", errors)
+
+        if step.get("parallel") is True and self.parallel_safe is not None and isinstance(action, str) \
+                and action not in self.parallel_safe and (self.actions is None or action in self.actions):
+            errors.append(f"{where}: action '{action}' can not run in parallel")
+
+        store = args.get("store_result")
+        if isinstance(store, str) and store:
+            stored.add(store)
+
+    @staticmethod
+    def _check_args(
+            args: Dict[str, Any],
+            schema: Dict[str, Tuple[type, ...]],
+            required: Tuple[str, ...],
+            where: str,
+            errors: List[str],
+        ) -> None:
+        for arg in required:
+            if arg not in args:
+                errors.append(f"{where}: missing required argument '{arg}'")
+        for arg, value in args.items():
+            types = schema.get(arg)
+            if types is None:
+                errors.append(f"{where}: unknown argument '{arg}'")
+            elif not _is_instance(value, types):
+                errors.append(f"{where}.{arg} must be {_type_name(types)}")
+
+    @classmethod
+    def _references(cls, value: Any) -> set:
+        """Collect the ${VAR} names used in an argument value."""
+        if isinstance(value, str):
+            return set(VARIABLE_PATTERN.findall(value))
+        if isinstance(value, dict):
+            return set().union(*(cls._references(v) for v in value.values()))
+        if isinstance(value, list):
+            return set().union(*(cls._references(v) for v in value))
+        return set()
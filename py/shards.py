@@ -0,0 +1,111 @@
+# this file runs the shards of a sharded network (see generate_compose.write_sharded)
+#
+# Each shard is its own compose project, with its own bridge network, in
+# docker/shards/shard_<i>/. The shards of this host are run here; the commands of
+# the shards of other hosts are printed, to run there (from a copy of docker/).
+
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from registry import DATA_DIR, read_shards
+
+SHARDS_DIR = "docker/shards"
+COMMANDS = {
+    "up": ["up", "-d"],
+    "down": ["down", "-v", "--remove-orphans"],
+    "ps": ["ps"],
+}
+
+
+def group_shards(shards: Dict[str, Tuple[str, str]]) -> Dict[str, Tuple[str, List[str]]]:
+    """Group the nodes by shard.
+
+    Args:
+        shards (Dict[str, Tuple[str, str]]): {node: (shard, host)}, as read by registry.read_shards.
+
+    Returns:
+        Dict[str, Tuple[str, List[str]]]: {shard: (host, its nodes)}, in node order.
+    """
+    groups = {}
+    for node, (shard, host) in shards.items():
+        groups.setdefault(shard, (host, []))[1].append(node)
+    return groups
+
+
+def compose_command(shard: str, *args: str, shards_dir: str = SHARDS_DIR) -> List[str]:
+    """Get the docker compose command of a shard (one compose project per shard).
+
+    Args:
+        shard (str): Name of the shard (e.g. "shard_1").
+        *args (str): Arguments of docker compose (e.g. "up", "-d").
+        shards_dir (str, optional): Directory of the shards. Defaults to SHARDS_DIR.
+
+    Returns:
+        List[str]: The command.
+    """
+    return ["docker", "compose", "-p", f"bitcoin-{shard}", "-f", f"{shards_dir}/{shard}/docker-compose.yml", *args]
+
+
+def running_shards(shards: Dict[str, Tuple[str, str]], shards_dir: str = SHARDS_DIR) -> List[str]:
+    """Get the shards having containers on this host's docker.
+
+    Args:
+        shards (Dict[str, Tuple[str, str]]): {node: (shard, host)}, as read by registry.read_shards.
+        shards_dir (str, optional): Directory of the shards. Defaults to SHARDS_DIR.
+
+    Returns:
+        List[str]: The shards with containers, in shard order.
+    """
+    running = []
+    for shard in group_shards(shards):
+        try:
+            result = subprocess.run(compose_command(shard, "ps", "-q", shards_dir=shards_dir), capture_output=True, text=True)
+        except OSError:  # docker is not installed
+            break
+        if result.returncode == 0 and result.stdout.strip():
+            running.append(shard)
+    return running
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Start, stop or list the shards of a sharded network (NETWORK_SHARDS)",
+        prog="bitcoin-on-local.sh shards",
+    )
+    parser.add_argument("command", choices=[*COMMANDS, "running"],
+                        help="docker compose command run on each shard ('running': exit status 0 if a shard runs here)")
+    parser.add_argument("--host", default="localhost",
+                        help="This host, as given in SHARD_HOSTS: its shards are run here (default: localhost)")
+    args = parser.parse_args()
+
+    shards = read_shards(DATA_DIR)
+    if args.command == "running":
+        sys.exit(0 if running_shards(shards) else 1)
+
+    groups = group_shards(shards)
+    if not groups:
+        print("[ERROR] The network is not sharded. Set NETWORK_SHARDS and run 'renew' first.")
+        sys.exit(1)
+
+    local = [shard for shard, (host, _) in groups.items() if host == args.host]
+    if not local:
+        print(f"[WARNING] No shard runs on {args.host} (hosts: {', '.join(sorted({h for h, _ in groups.values()}))})")
+    for shard in local:
+        host, nodes = groups[shard]
+        print(f"[INFO ] {shard}: {len(nodes)} nodes ({nodes[0]} to {nodes[-1]})")
+        result = subprocess.run(compose_command(shard, *COMMANDS[args.command]))
+        if result.returncode != 0:
+            print(f"[ERROR] docker compose failed on {shard}")
+            sys.exit(1)
+
+    for shard, (host, nodes) in groups.items():
+        if host != args.host:
+            print(f"[INFO ] On {host}: {' '.join(compose_command(shard, *COMMANDS[args.command]))}")
+    if local:
+        print(f"[DONE ] {args.command} on {len(local)}/{len(groups)} shards")
+
+
+if __name__ == "__main__":
+    main()
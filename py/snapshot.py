@@ -0,0 +1,309 @@
+# this file saves the chain state of the nodes, and seeds new networks with it
+#
+# A scenario usually starts by mining 101+ blocks and creating wallets, and
+# 'start' wipes the nodes (down -v), so every run pays for it again. A snapshot
+# is a tar.gz of the regtest datadir of each node, taken once the network is
+# bootstrapped. With NODE_DATADIRS set, the datadirs are bind mounts, and
+# 'start --snapshot NAME' fills them from the snapshot before starting the
+# containers: the network comes up funded and synced.
+#
+# The archive is extracted once next to it, and the datadirs are copied from
+# there with copy-on-write (cp --reflink=auto) where the filesystem allows it.
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import time
+from typing import Dict, List
+
+from config import NODE_DATADIRS, SNAPSHOT_PATH
+from generate_compose import CONTAINER_DATADIR
+from registry import DATA_DIR, read_compose_services, read_node_names
+
+COMPOSE_FILE = "docker/docker-compose.yml"
+
+# files tied to the network the snapshot was taken on (addresses, locks, logs)
+EXCLUDED = {"peers.dat", "anchors.dat", "banlist.json", "banlist.dat", ".lock", "debug.log", "onion_v3_private_key"}
+
+
+def archive_path(name: str, snapshot_dir: str = SNAPSHOT_PATH) -> str:
+    return os.path.join(snapshot_dir, f"{name}.tar.gz")
+
+
+def list_snapshots(snapshot_dir: str = SNAPSHOT_PATH) -> List[str]:
+    """List the saved snapshots.
+
+    Args:
+        snapshot_dir (str, optional): Directory of the snapshots. Defaults to SNAPSHOT_PATH.
+
+    Returns:
+        List[str]: Names of the snapshots.
+    """
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(f[:-len(".tar.gz")] for f in os.listdir(snapshot_dir) if f.endswith(".tar.gz"))
+
+
+def _excluded(name: str) -> bool:
+    return os.path.basename(name) in EXCLUDED
+
+
+def save_snapshot(
+        name: str,
+        nodes: List[str],
+        snapshot_dir: str = SNAPSHOT_PATH,
+        container_prefix: str = "",
+    ) -> str:
+    """Archive the regtest datadir of each node.
+
+    The datadirs are streamed out of the containers (docker cp), so this works with
+    docker volumes as well as with bind mounts. The nodes should be stopped, so that
+    their chain state is flushed.
+
+    Args:
+        name (str): Name of the snapshot.
+        nodes (List[str]): Nodes to save (a single node saves one canonical datadir).
+        snapshot_dir (str, optional): Directory of the snapshots. Defaults to SNAPSHOT_PATH.
+        container_prefix (str, optional): Prefix of the container names. Defaults to "".
+
+    Raises:
+        RuntimeError: If the datadir of a node cannot be read.
+
+    Returns:
+        str: Path of the archive.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = archive_path(name, snapshot_dir)
+    temporary_file = f"{path}.tmp"
+    try:
+        with tarfile.open(temporary_file, "w:gz", compresslevel=6) as archive:
+            for node in nodes:
+                process = subprocess.Popen(
+                    ["docker", "cp", f"{container_prefix}{node}:{CONTAINER_DATADIR}/regtest", "-"],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+                try:
+                    with tarfile.open(fileobj=process.stdout, mode="r|") as stream:
+                        for member in stream:
+                            if _excluded(member.name):
+                                continue
+                            data = stream.extractfile(member) if member.isfile() else None
+                            member.name = f"{node}/{member.name}"
+                            archive.addfile(member, data)
+                    error = ""
+                except tarfile.ReadError as e:  # nothing was sent (see the error of docker cp)
+                    error = str(e)
+                error = process.stderr.read().decode().strip() or error
+                if process.wait() != 0 or error:
+                    raise RuntimeError(f"Cannot read the datadir of {node}: {error}")
+    except BaseException:
+        os.remove(temporary_file)
+        raise
+    os.replace(temporary_file, path)
+    return path
+
+
+def extract_snapshot(name: str, snapshot_dir: str = SNAPSHOT_PATH) -> str:
+    """Extract a snapshot next to its archive (only once, until the archive changes).
+
+    Args:
+        name (str): Name of the snapshot.
+        snapshot_dir (str, optional): Directory of the snapshots. Defaults to SNAPSHOT_PATH.
+
+    Raises:
+        FileNotFoundError: If the snapshot does not exist.
+
+    Returns:
+        str: Directory holding the datadir of each saved node.
+    """
+    path = archive_path(name, snapshot_dir)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Snapshot {name} not found in {snapshot_dir}")
+    directory = os.path.join(snapshot_dir, name)
+    stamp = os.path.join(directory, ".extracted")
+    if os.path.exists(stamp) and os.path.getmtime(stamp) >= os.path.getmtime(path):
+        return directory
+
+    shutil.rmtree(directory, ignore_errors=True)
+    with tarfile.open(path, "r:gz") as archive:
+        for member in archive:
+            # never write outside of the snapshot directory
+            if member.name.startswith("/") or ".." in member.name.split("/") or not (member.isfile() or member.isdir()):
+                continue
+            archive.extract(member, directory)
+    with open(stamp, "w"):
+        pass
+    return directory
+
+
+def copy_datadir(source: str, destination: str) -> None:
+    """Copy a datadir, sharing the file blocks (copy-on-write) where the filesystem allows it.
+
+    Args:
+        source (str): Directory to copy.
+        destination (str): Directory to create.
+    """
+    if shutil.which("cp") and subprocess.run(
+            ["cp", "-R", "--reflink=auto", source, destination],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        ).returncode == 0:
+        return
+    # cp without --reflink (e.g. BSD): plain copy
+    shutil.rmtree(destination, ignore_errors=True)
+    shutil.copytree(source, destination)
+
+
+def restore_snapshot(
+        name: str,
+        nodes: List[str],
+        datadirs: str,
+        snapshot_dir: str = SNAPSHOT_PATH,
+    ) -> Dict[str, str]:
+    """Fill the datadirs of the nodes from a snapshot (the nodes must be stopped).
+
+    A node saved in the snapshot gets its own datadir back. The other nodes (e.g. a
+    snapshot of one canonical node, or a larger network) get the chain of the first
+    saved node, without its wallets: the same wallet must not be loaded twice.
+
+    Args:
+        name (str): Name of the snapshot.
+        nodes (List[str]): Nodes of the network.
+        datadirs (str): Host directory of the node datadirs.
+        snapshot_dir (str, optional): Directory of the snapshots. Defaults to SNAPSHOT_PATH.
+
+    Raises:
+        FileNotFoundError: If the snapshot does not exist.
+        ValueError: If the snapshot is empty.
+
+    Returns:
+        Dict[str, str]: The saved node each node was restored from.
+    """
+    directory = extract_snapshot(name, snapshot_dir)
+    saved = sorted(d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d, "regtest")))
+    if not saved:
+        raise ValueError(f"Snapshot {name} holds no regtest datadir")
+
+    sources = {}
+    for node in nodes:
+        source = node if node in saved else saved[0]
+        destination = os.path.join(datadirs, node)
+        if os.path.exists(destination):
+            shutil.rmtree(destination)
+        os.makedirs(destination)
+        copy_datadir(os.path.join(directory, source, "regtest"), os.path.join(destination, "regtest"))
+        if source != node:
+            shutil.rmtree(os.path.join(destination, "regtest", "wallets"), ignore_errors=True)
+        sources[node] = source
+    return sources
+
+
+def clear_datadirs(nodes: List[str], datadirs: str) -> None:
+    """Empty the datadirs of the nodes, for a fresh start.
+
+    Args:
+        nodes (List[str]): Nodes of the network.
+        datadirs (str): Host directory of the node datadirs.
+    """
+    for node in nodes:
+        destination = os.path.join(datadirs, node)
+        if os.path.exists(destination):
+            shutil.rmtree(destination)
+        os.makedirs(destination)
+
+
+def has_datadirs(nodes: List[str], compose_file: str = COMPOSE_FILE) -> bool:
+    """Check that the services of the nodes mount their datadir from the host."""
+    services = read_compose_services(compose_file)
+    return all(f":{CONTAINER_DATADIR}" in services.get(node, "") for node in nodes)
+
+
+def _compose(*args: str) -> None:
+    subprocess.run(["docker", "compose", "-f", COMPOSE_FILE, *args], check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Save the chain state of the network, or seed the nodes with it",
+        prog="bitcoin-on-local.sh snapshot",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    save = commands.add_parser("save", help="Archive the datadir of the nodes (they are stopped meanwhile)")
+    save.add_argument("name", help="Name of the snapshot")
+    save.add_argument("--node", help="Only save this node: the others will get its chain (without wallets)")
+    restore = commands.add_parser("restore", help="Fill the datadirs of the stopped nodes from a snapshot")
+    restore.add_argument("name", help="Name of the snapshot")
+    commands.add_parser("clear", help="Empty the datadirs of the nodes (fresh start)")
+    commands.add_parser("list", help="List the snapshots")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for name in list_snapshots():
+            size = os.path.getsize(archive_path(name)) / 1e6
+            print(f"{name} ({size:.1f} MB)")
+        return
+
+    datadirs = os.path.join("docker", NODE_DATADIRS) if NODE_DATADIRS else None
+    if args.command == "clear" and datadirs is None:
+        return  # docker volumes are wiped with the containers
+
+    nodes = read_node_names(DATA_DIR)
+    if not nodes:
+        print("[ERROR] No nodes found. Please generate the network first.")
+        sys.exit(1)
+
+    if args.command == "save":
+        if args.node and args.node not in nodes:
+            print(f"[ERROR] Unknown node: {args.node}")
+            sys.exit(1)
+        start = time.monotonic()
+        print("[INFO ] Stopping the nodes to flush their chain state...")
+        _compose("stop")
+        try:
+            path = save_snapshot(args.name, [args.node] if args.node else nodes)
+        except RuntimeError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+        finally:
+            _compose("start")
+        print(f"[DONE ] Snapshot saved to {path} ({os.path.getsize(path) / 1e6:.1f} MB, "
+              f"{time.monotonic() - start:.1f}s)")
+        return
+
+    if datadirs is None:
+        print("[ERROR] NODE_DATADIRS is not set: the nodes keep their data in docker volumes. "
+              "Set it in .env and run 'renew' first.")
+        sys.exit(1)
+
+    if args.command == "clear":
+        try:
+            clear_datadirs(nodes, datadirs)
+        except PermissionError as e:
+            print(f"[ERROR] Cannot empty the datadirs (files written by the containers): {e}")
+            sys.exit(1)
+        return
+
+    if not has_datadirs(nodes):
+        print("[ERROR] The compose file does not mount NODE_DATADIRS. Please run 'renew' first.")
+        sys.exit(1)
+    start = time.monotonic()
+    try:
+        sources = restore_snapshot(args.name, nodes, datadirs)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    except PermissionError as e:
+        print(f"[ERROR] Cannot replace the datadirs (files written by the containers): {e}")
+        sys.exit(1)
+    shared = [node for node, source in sources.items() if node != source]
+    if shared:
+        print(f"[INFO ] {len(shared)} nodes not in the snapshot get the chain of {sources[shared[0]]}, without wallets")
+    print(f"[DONE ] {len(sources)} datadirs restored from {args.name} in {time.monotonic() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# this file starts the network in waves, each wave waiting for the previous one to be healthy
+#
+# 'docker compose up -d' starts every node at once: hundreds of bitcoind
+# processes load at the same time and dial their -addnode peers before these
+# listen, then only retry later, so large networks are slow to come up and some
+# nodes stay underconnected. Nodes are started here a few at a time, and a wave
+# only starts once the previous one answers its healthcheck (getblockchaininfo,
+# see docker-service.template). The connections to nodes of later waves, which
+# were not up when their node started, are opened at the end (see reconcile).
+
+import argparse
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from config import NODE_BASE_P2P_PORT, START_WAVE_SIZE, START_WAVE_TIMEOUT
+from registry import DATA_DIR, read_compose_services, read_compose_topology, read_node_names, read_topology
+
+COMPOSE_FILE = "docker/docker-compose.yml"
+_SERVICES = set()  # services of the compose file, read by main
+
+
+def split_waves(nodes: List[str], size: int) -> List[List[str]]:
+    """Split the nodes into waves.
+
+    Args:
+        nodes (List[str]): Nodes, in start order.
+        size (int): Number of nodes of each wave (0: a single wave).
+
+    Returns:
+        List[List[str]]: The nodes of each wave.
+    """
+    if size <= 0:
+        return [list(nodes)] if nodes else []
+    return [nodes[i:i + size] for i in range(0, len(nodes), size)]
+
+
+def health_status(containers: List[str]) -> Dict[str, str]:
+    """Get the health of containers (docker inspect).
+
+    Args:
+        containers (List[str]): Container names.
+
+    Returns:
+        Dict[str, str]: "starting", "healthy" or "unhealthy" for each container, "none" if it has no
+            healthcheck, "missing" if it does not exist.
+    """
+    result = subprocess.run(
+        ["docker", "inspect", "--format",
+         "{{.Name}} {{if .State.Health}}{{.State.Health.Status}}{{else}}none{{end}}", *containers],
+        capture_output=True,
+        text=True,
+    )
+    status = dict.fromkeys(containers, "missing")
+    for line in result.stdout.splitlines():
+        name, _, health = line.strip().lstrip("/").partition(" ")
+        if name in status:
+            status[name] = health
+    return status
+
+
+def wait_healthy(
+        containers: List[str],
+        timeout: float,
+        interval: float = 1.0,
+        status: Callable[[List[str]], Dict[str, str]] = health_status,
+    ) -> Dict[str, str]:
+    """Wait until all containers are healthy.
+
+    Containers without healthcheck (compose file generated before healthchecks) count as
+    healthy once they exist.
+
+    Args:
+        containers (List[str]): Container names.
+        timeout (float): Seconds to wait.
+        interval (float, optional): Seconds between two checks. Defaults to 1.
+        status (Callable, optional): Gives the health of containers. Defaults to health_status.
+
+    Returns:
+        Dict[str, str]: The containers that are not healthy, with their last status (empty if all are).
+    """
+    start = time.monotonic()
+    waiting = list(containers)
+    while True:
+        current = status(waiting)
+        waiting = [c for c in waiting if current.get(c) not in ("healthy", "none")]
+        if not waiting or time.monotonic() - start >= timeout:
+            return {c: current.get(c, "missing") for c in waiting}
+        time.sleep(max(0.0, min(interval, timeout - (time.monotonic() - start))))
+
+
+class WaveReport:
+    """Outcome of the start of one wave."""
+
+    def __init__(self, nodes: List[str]):
+        self.nodes = nodes
+        self.unhealthy: Dict[str, str] = {}  # node -> last health status
+        self.elapsed = 0.0  # seconds from the start of the wave until it is ready (or the timeout)
+
+    @property
+    def ready(self) -> bool:
+        return not self.unhealthy
+
+
+def start_waves(
+        nodes: List[str],
+        wave_size: int,
+        timeout: float,
+        up: Callable[[List[str]], None],
+        status: Callable[[List[str]], Dict[str, str]] = health_status,
+        interval: float = 1.0,
+        container_prefix: str = "",
+        on_wave: Optional[Callable[[int, WaveReport], None]] = None,
+    ) -> List[WaveReport]:
+    """Start the nodes wave after wave, each wave waiting for the previous one to be healthy.
+
+    A wave that is not healthy before the timeout does not stop the start: the next
+    wave starts anyway, and the unhealthy nodes are reported.
+
+    Args:
+        nodes (List[str]): Nodes, in start order.
+        wave_size (int): Number of nodes of each wave (0: all at once).
+        timeout (float): Seconds to wait for each wave.
+        up (Callable[[List[str]], None]): Starts the services of some nodes.
+        status (Callable, optional): Gives the health of containers. Defaults to health_status.
+        interval (float, optional): Seconds between two health checks. Defaults to 1.
+        container_prefix (str, optional): Prefix of the container names. Defaults to "".
+        on_wave (Callable[[int, WaveReport], None], optional): Called after each wave. Defaults to None.
+
+    Returns:
+        List[WaveReport]: The report of each wave.
+    """
+    reports = []
+    for i, wave in enumerate(split_waves(nodes, wave_size)):
+        report = WaveReport(wave)
+        start = time.monotonic()
+        up(wave)
+        unhealthy = wait_healthy([f"{container_prefix}{node}" for node in wave], timeout, interval, status)
+        report.elapsed = time.monotonic() - start
+        report.unhealthy = {node: unhealthy[f"{container_prefix}{node}"] for node in wave
+                            if f"{container_prefix}{node}" in unhealthy}
+        reports.append(report)
+        if on_wave:
+            on_wave(i, report)
+    return reports
+
+
+def _compose_up(services: List[str]) -> None:
+    # the traffic shaping sidecars of the nodes (see netem.py) start with them
+    sidecars = [f"netem_{service}" for service in services if f"netem_{service}" in _SERVICES]
+    subprocess.run(["docker", "compose", "-f", COMPOSE_FILE, "up", "-d", "--no-deps", *services, *sidecars],
+                   check=True, capture_output=True, text=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Start the nodes in waves, each wave waiting for the previous one to be healthy",
+        prog="bitcoin-on-local.sh start",
+    )
+    parser.add_argument("--wave-size", type=int, default=START_WAVE_SIZE,
+                        help=f"Nodes started at once, 0 for all (default: START_WAVE_SIZE, {START_WAVE_SIZE})")
+    parser.add_argument("--timeout", type=float, default=START_WAVE_TIMEOUT,
+                        help=f"Seconds to wait for each wave to be healthy (default: {START_WAVE_TIMEOUT:g})")
+    parser.add_argument("--reconcile-timeout", type=float, default=30,
+                        help="Seconds to open the connections to nodes of later waves, 0 to skip (default: 30)")
+    args = parser.parse_args()
+
+    nodes = read_node_names(DATA_DIR)
+    if not nodes:
+        print("[ERROR] No nodes found. Please generate the network first.")
+        sys.exit(1)
+
+    _SERVICES.update(read_compose_services(COMPOSE_FILE))
+
+    def print_wave(i, report):
+        state = "ready" if report.ready else f"{len(report.unhealthy)} nodes not healthy"
+        print(f"[INFO ] Wave {i + 1}: {len(report.nodes)} nodes {state} in {report.elapsed:.1f}s")
+        for node, health in report.unhealthy.items():
+            print(f"[WARNING] {node} is {health}")
+
+    start = time.monotonic()
+    try:
+        reports = start_waves(nodes, args.wave_size, args.timeout, _compose_up, on_wave=print_wave)
+    except subprocess.CalledProcessError as e:
+        print(f"[ERROR] docker compose failed: {e.stderr.strip()}")
+        sys.exit(1)
+    ready = sum(len(r.nodes) - len(r.unhealthy) for r in reports)
+    print(f"[INFO ] {ready}/{len(nodes)} nodes ready in {time.monotonic() - start:.1f}s")
+
+    # nodes only retry their -addnode peers after a while: open the connections to later waves now
+    intended = read_topology(DATA_DIR) or read_compose_topology(COMPOSE_FILE)
+    if len(reports) > 1 and intended and args.reconcile_timeout > 0:
+        from network_info.reconcile import reconcile
+
+        report = reconcile(nodes, intended, base_p2p=NODE_BASE_P2P_PORT, timeout=args.reconcile_timeout, interval=2)
+        if report.converged:
+            print(f"[INFO ] All connections up after {report.elapsed:.1f}s")
+        else:
+            print(f"[WARNING] {len(report.missing)} connections still missing "
+                  "(run './bitcoin-on-local.sh reconcile' to retry)")
+
+    if ready < len(nodes):
+        print(f"[ERROR] {len(nodes) - ready} nodes are not healthy")
+        sys.exit(2)
+    print(f"[DONE ] Network started in {time.monotonic() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+# this file runs a scenario over a grid of network parameters (a "sweep")
+#
+# Each cell of the grid gets its own compose project (own name, network,
+# container names and port range), so several cells can run side by side.
+
+import argparse
+import csv
+import itertools
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List
+
+from config import (
+    NODE_NUMBER,
+    MAX_PEERS,
+    NODE_BASE_RPC_PORT,
+    NODE_BASE_NAME,
+    RPC_USER,
+    RPC_PASSWORD,
+    SCENARIO_PATH,
+    ACTION_PLUGIN_PATH,
+)
+from generate_compose import topology_config, write_compose
+from scenario import ScenarioRunner
+from scenario.actions import add_plugin_path
+from scenario.rpc_caller import BitcoinRPC
+
+# parameters that can be swept, and how to parse their values
+SWEEPABLE = {
+    "NODE_NUMBER": int,
+    "MAX_PEERS": int,
+    "TOPOLOGY_MODEL": str,
+    "TOPOLOGY_DEGREE": int,
+}
+
+RESULT_COLUMNS = ["cell", "status", "scenario_time", "sync_time", "synced_nodes", "error"]
+
+
+class SweepCell:
+    """One point of the parameter grid, with everything needed to run it in isolation."""
+
+    def __init__(self, index: int, params: Dict[str, Any], sweep_name: str, base_rpc: int):
+        self.index = index
+        self.params = params
+        self.name = f"{sweep_name}-c{index}"
+        self.project = self.name
+        self.network = f"{self.name}-net"
+        self.container_prefix = f"{self.name}_"
+        self.base_rpc = base_rpc
+        self.base_p2p = base_rpc + 1
+        self.directory = f"sweeps/{self.name}"  # relative to ./docker
+
+    @property
+    def node_number(self) -> int:
+        return self.params.get("NODE_NUMBER", NODE_NUMBER)
+
+    @property
+    def max_peers(self) -> int:
+        return self.params.get("MAX_PEERS", MAX_PEERS)
+
+    @property
+    def topology(self) -> Dict[str, Any]:
+        """Arguments of generate_topology: the config, with the swept TOPOLOGY_* parameters."""
+        topology = topology_config()
+        for name, value in self.params.items():
+            if name.startswith("TOPOLOGY_"):
+                topology[name[len("TOPOLOGY_"):].lower()] = value
+        return topology
+
+    @property
+    def compose_file(self) -> str:
+        return f"docker/{self.directory}/docker-compose.yml"
+
+    def port_range(self) -> range:
+        """Host ports used by this cell (RPC and P2P ports are interleaved)."""
+        return range(self.base_rpc, self.base_rpc + 2 * self.node_number)
+
+
+def parse_param(text: str) -> tuple:
+    """Parse a `NAME=v1,v2,v3` command line argument.
+
+    Args:
+        text (str): The argument to parse.
+
+    Returns:
+        tuple: (name, list of values)
+    """
+    if "=" not in text:
+        raise ValueError(f"Invalid parameter '{text}', expected NAME=v1,v2,...")
+    name, values = text.split("=", 1)
+    name = name.strip().upper()
+    if name not in SWEEPABLE:
+        raise ValueError(f"Parameter '{name}' can not be swept (supported: {', '.join(SWEEPABLE)})")
+    return name, [SWEEPABLE[name](v.strip()) for v in values.split(",") if v.strip()]
+
+
+def expand_grid(params: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Expand a parameter grid into the list of its cells (cartesian product).
+
+    Args:
+        params (Dict[str, List[Any]]): Values to sweep for each parameter.
+
+    Returns:
+        List[Dict[str, Any]]: One dictionary of parameter values per cell.
+    """
+    names = list(params)
+    return [dict(zip(names, values)) for values in itertools.product(*(params[n] for n in names))]
+
+
+def plan_cells(grid: List[Dict[str, Any]], sweep_name: str, base_rpc: int) -> List[SweepCell]:
+    """Give every cell of the grid its own project name and a distinct port range.
+
+    Args:
+        grid (List[Dict[str, Any]]): Cells as returned by expand_grid.
+        sweep_name (str): Prefix of the compose projects.
+        base_rpc (int): First port available for the sweep.
+
+    Returns:
+        List[SweepCell]: The planned cells.
+    """
+    cells = []
+    next_port = base_rpc
+    for index, params in enumerate(grid):
+        cell = SweepCell(index, params, sweep_name, next_port)
+        next_port = cell.port_range().stop
+        cells.append(cell)
+    return cells
+
+
+def schedule(
+        cells: List[SweepCell],
+        run: Callable[[SweepCell], Dict[str, Any]],
+        max_nodes: int,
+        max_parallel: int,
+    ) -> List[Dict[str, Any]]:
+    """Run cells concurrently without exceeding the host budget.
+
+    A cell is started as soon as enough of the node budget is free. A cell larger
+    than the whole budget is run alone.
+
+    Args:
+        cells (List[SweepCell]): Cells to run.
+        run (Callable[[SweepCell], Dict[str, Any]]): Function running one cell and returning its result.
+        max_nodes (int): Maximum number of nodes running at the same time.
+        max_parallel (int): Maximum number of cells running at the same time.
+
+    Returns:
+        List[Dict[str, Any]]: Results, in the order of the cells.
+    """
+    max_parallel = max(1, max_parallel)
+    pending = list(cells)
+    running = {}
+    results = {}
+    used = 0
+
+    with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+        while pending or running:
+            # start every pending cell that fits in the remaining budget
+            for cell in list(pending):
+                if len(running) >= max_parallel:
+                    break
+                if running and used + cell.node_number > max_nodes:
+                    continue
+                pending.remove(cell)
+                used += cell.node_number
+                running[pool.submit(run, cell)] = cell
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                cell = running.pop(future)
+                used -= cell.node_number
+                try:
+                    results[cell.index] = future.result()
+                except Exception as e:
+                    results[cell.index] = {"status": "failed", "error": str(e)}
+
+    return [dict(cell=cell.name, **cell.params, **results[cell.index]) for cell in cells]
+
+
+# ==== running a cell ====
+
+def _compose(cell: SweepCell, *args: str) -> None:
+    subprocess.run(
+        ["docker", "compose", "-p", cell.project, "-f", cell.compose_file, *args],
+        check=True, capture_output=True, text=True,
+    )
+
+
+def _wait_synced(rpc, nodes: List[str], timeout: float) -> tuple:
+    """Wait until every node has the same best block.
+
+    Returns:
+        tuple: (time taken or None on timeout, number of nodes on the majority tip)
+    """
+    start = time.monotonic()
+    synced = 0
+    while True:
+        tips = {}
+        for node in nodes:
+            try:
+                tip = rpc.call(node, "getbestblockhash")
+            except Exception:
+                continue
+            tips[tip] = tips.get(tip, 0) + 1
+        synced = max(tips.values(), default=0)
+        if synced == len(nodes):
+            return time.monotonic() - start, synced
+        if time.monotonic() - start > timeout:
+            return None, synced
+        time.sleep(0.5)
+
+
+def run_cell(cell: SweepCell, scenario: str, warmup: float, sync_timeout: float, keep: bool = False) -> Dict[str, Any]:
+    """Generate, start, run the scenario on and tear down one cell.
+
+    Args:
+        cell (SweepCell): The cell to run.
+        scenario (str): Name of the scenario to run.
+        warmup (float): Seconds to wait after start, before running the scenario.
+        sync_timeout (float): Maximum time to wait for all nodes to share the same tip.
+        keep (bool, optional): Leave the cell running after the scenario. Defaults to False.
+
+    Returns:
+        Dict[str, Any]: The cell result (see RESULT_COLUMNS).
+    """
+    write_compose(
+        node_number=cell.node_number,
+        max_peers=cell.max_peers,
+        base_rpc=cell.base_rpc,
+        base_p2p=cell.base_p2p,
+        base_name=NODE_BASE_NAME,
+        output_file=cell.compose_file,
+        data_dir=f"{cell.directory}/data",
+        network_name=cell.network,
+        container_prefix=cell.container_prefix,
+        conf_file="../../bitcoin_conf.conf",
+        topology=cell.topology,
+    )
+
+    nodes = [f"{NODE_BASE_NAME}_{i + 1}" for i in range(cell.node_number)]
+    result = {"status": "ok", "scenario_time": None, "sync_time": None, "synced_nodes": None, "error": ""}
+    try:
+        # a partly started cell is torn down too, so that it does not hold its ports and names
+        _compose(cell, "up", "-d")
+        time.sleep(warmup)
+        runner = ScenarioRunner(
+            rpc_user=RPC_USER,
+            rpc_password=RPC_PASSWORD,
+            scenarios_dir=SCENARIO_PATH,
+            base_port=cell.base_rpc,
+            nodes=nodes,
+        )
+        runner.load_scenario(scenario)
+        start = time.monotonic()
+        runner.run_scenario()
+        result["scenario_time"] = round(time.monotonic() - start, 3)
+
+        sync_time, synced = _wait_synced(BitcoinRPC(RPC_USER, RPC_PASSWORD, cell.base_rpc), nodes, sync_timeout)
+        result["sync_time"] = None if sync_time is None else round(sync_time, 3)
+        result["synced_nodes"] = synced
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+    finally:
+        if not keep:
+            _compose(cell, "down", "-v", "--remove-orphans")
+
+    return result
+
+
+# ==== results ====
+
+def write_table(results: List[Dict[str, Any]], params: List[str], output: str) -> None:
+    """Write the aggregated results as CSV and print them as a table.
+
+    Args:
+        results (List[Dict[str, Any]]): Results returned by schedule.
+        params (List[str]): Swept parameter names (table columns after the cell name).
+        output (str): Path of the CSV file.
+    """
+    columns = ["cell", *params, *RESULT_COLUMNS[1:]]
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+    rows = [[("" if r.get(c) is None else str(r.get(c))) for c in columns] for r in results]
+    widths = [max(len(c), *(len(row[i]) for row in rows)) if rows else len(c) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+    print(f"[SWEEP] Results saved to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a scenario on every combination of network parameters",
+        prog="bitcoin-on-local.sh sweep",
+    )
+    parser.add_argument("scenario", help="Scenario name to run in every cell")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=v1,v2",
+                        help=f"Parameter values to sweep ({', '.join(SWEEPABLE)}), can be repeated")
+    parser.add_argument("--name", default="sweep", help="Prefix of the compose projects (default: sweep)")
+    parser.add_argument("--max-nodes", type=int, default=100,
+                        help="Maximum number of nodes running at the same time (default: 100)")
+    parser.add_argument("--max-parallel", type=int, default=4,
+                        help="Maximum number of cells running at the same time (default: 4)")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds to wait after start (default: 5)")
+    parser.add_argument("--sync-timeout", type=float, default=60,
+                        help="Maximum seconds to wait for nodes to sync after the scenario (default: 60)")
+    parser.add_argument("--output", default="sweeps/results.csv", help="CSV output (default: sweeps/results.csv)")
+    args = parser.parse_args()
+
+    try:
+        params = dict(parse_param(p) for p in args.param)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
+    if not params:
+        print("[ERROR] At least one --param is required.")
+        sys.exit(2)
+
+    add_plugin_path(ACTION_PLUGIN_PATH)
+
+    # keep clear of the ports of the main network
+    cells = plan_cells(expand_grid(params), args.name, NODE_BASE_RPC_PORT + 2 * NODE_NUMBER)
+
+    # fail now rather than in every cell (node names are checked against the smallest cell)
+    smallest = min(cell.node_number for cell in cells)
+    checker = ScenarioRunner(
+        rpc_user=RPC_USER,
+        rpc_password=RPC_PASSWORD,
+        scenarios_dir=SCENARIO_PATH,
+        nodes=[f"{NODE_BASE_NAME}_{i + 1}" for i in range(smallest)],
+    )
+    if not checker.check_scenario(args.scenario):
+        sys.exit(1)
+    print(f"[SWEEP] {len(cells)} cells, up to {args.max_parallel} in parallel ({args.max_nodes} nodes max)")
+
+    results = schedule(
+        cells,
+        lambda cell: run_cell(cell, args.scenario, args.warmup, args.sync_timeout),
+        max_nodes=args.max_nodes,
+        max_parallel=args.max_parallel,
+    )
+    write_table(results, list(params), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# this file records the topology of the running network over time (see network_info/timeseries.py)
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from network_info.metrics import recording_metrics
+from network_info.timeseries import TopologyReader, collect
+from network_info.traffic import TrafficReader, collect_traffic
+from registry import read_node_names
+
+
+def print_traffic_report(reader: TrafficReader, top: int) -> None:
+    """Print the bytes sent per message type and the busiest connections of a traffic recording."""
+    n, m = len(reader.nodes), len(reader.message_types)
+    per_type = np.zeros(m)
+    per_link = np.zeros(n * n)
+    duration = 0.0
+    for rates in reader:
+        sent = rates.sent * rates.interval  # bytes
+        per_type += np.bincount(rates.keys % m, sent, minlength=m)
+        per_link += np.bincount(rates.keys // m, sent, minlength=n * n)
+        duration += rates.interval
+
+    print(f"[INFO ] {per_type.sum() / 1e6:.2f} MB sent over {duration:.0f}s")
+    for i in np.argsort(per_type)[::-1]:
+        if per_type[i]:
+            print(f"{reader.message_types[i]:<12} {per_type[i] / 1e3:>12.1f} kB  {100 * per_type[i] / per_type.sum():5.1f}%")
+    print("[INFO ] Busiest connections (bytes sent):")
+    for link in np.argsort(per_link)[::-1][:top]:
+        if per_link[link]:
+            source, target = divmod(int(link), n)
+            print(f"{reader.nodes[source]} -> {reader.nodes[target]}  {per_link[link] / 1e3:.1f} kB")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Record the network topology over time, or read a recording",
+        prog="bitcoin-on-local.sh watch",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record = subparsers.add_parser("record", help="Crawl the network periodically and record its topology")
+    record.add_argument("--interval", type=float, default=5, help="Seconds between two crawls (default: 5)")
+    record.add_argument("--count", type=int, default=None, help="Number of snapshots (default: until interrupted)")
+    record.add_argument("--keyframe-interval", type=int, default=100,
+                        help="Snapshots between two full snapshots (default: 100)")
+    record.add_argument("--output", default="logs/topology.bin", help="Recording file (default: logs/topology.bin)")
+
+    show = subparsers.add_parser("show", help="Print the topology at a time of a recording")
+    show.add_argument("at", type=float, help="Seconds since the first snapshot")
+    show.add_argument("--input", default="logs/topology.bin", help="Recording file (default: logs/topology.bin)")
+
+    metrics = subparsers.add_parser("metrics", help="Compute the metrics of every snapshot of a recording")
+    metrics.add_argument("--input", default="logs/topology.bin", help="Recording file (default: logs/topology.bin)")
+    metrics.add_argument("--output", default="logs/topology_metrics.jsonl",
+                         help="Metrics file, one JSON record per snapshot (default: logs/topology_metrics.jsonl)")
+
+    traffic = subparsers.add_parser("traffic", help="Record the traffic of each connection per message type")
+    traffic.add_argument("--interval", type=float, default=5, help="Seconds between two crawls (default: 5)")
+    traffic.add_argument("--count", type=int, default=None, help="Number of intervals (default: until interrupted)")
+    traffic.add_argument("--output", default="logs/traffic.bin", help="Recording file (default: logs/traffic.bin)")
+
+    report = subparsers.add_parser("traffic-report", help="Summarize a traffic recording")
+    report.add_argument("--input", default="logs/traffic.bin", help="Recording file (default: logs/traffic.bin)")
+    report.add_argument("--top", type=int, default=10, help="Number of busiest connections to show (default: 10)")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        nodes = read_node_names()
+        if not nodes:
+            print("[ERROR] No nodes found. Please generate the network first.")
+            sys.exit(1)
+        print(f"[INFO ] Recording topology of {len(nodes)} nodes every {args.interval}s to {args.output}")
+        try:
+            collect(nodes, args.output, args.interval, args.count, args.keyframe_interval)
+        except KeyboardInterrupt:
+            pass
+        print(f"[DONE ] Topology recorded in {args.output}")
+        return
+
+    if args.command == "traffic":
+        nodes = read_node_names()
+        if not nodes:
+            print("[ERROR] No nodes found. Please generate the network first.")
+            sys.exit(1)
+        print(f"[INFO ] Recording traffic of {len(nodes)} nodes every {args.interval}s to {args.output}")
+        try:
+            collect_traffic(nodes, args.output, args.interval, args.count)
+        except KeyboardInterrupt:
+            pass
+        print(f"[DONE ] Traffic recorded in {args.output}")
+        return
+
+    if args.command == "traffic-report":
+        if not os.path.exists(args.input):
+            print(f"[ERROR] Recording not found: {args.input}")
+            sys.exit(1)
+        print_traffic_report(TrafficReader(args.input), args.top)
+        return
+
+    if not os.path.exists(args.input):
+        print(f"[ERROR] Recording not found: {args.input}")
+        sys.exit(1)
+    reader = TopologyReader(args.input)
+
+    if args.command == "metrics":
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            for record in recording_metrics(reader):
+                f.write(json.dumps(record) + "\n")
+        print(f"[DONE ] Metrics of {len(reader)} snapshots saved to {args.output}")
+    else:
+        if not reader.times:
+            print("[ERROR] The recording is empty.")
+            sys.exit(1)
+        state = reader.state_at(reader.times[0] + args.at)
+        if state is None:
+            print(f"[ERROR] No snapshot at +{args.at}s: the recording starts at +0s.")
+            sys.exit(1)
+        print(f"[INFO ] {len(reader)} snapshots over {reader.times[-1] - reader.times[0]:.1f}s, "
+              f"{os.path.getsize(args.input)} bytes")
+        print(f"[INFO ] At +{args.at}s: {len(state.nodes)} nodes, {len(state.edges)} connections")
+        for (source, target), connection_type in sorted(state.edges.items()):
+            print(f"{source} -> {target} ({connection_type})")
+
+
+if __name__ == "__main__":
+    main()
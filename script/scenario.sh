@@ -11,6 +11,11 @@ ARG1="${1:-}"
 # ==== Functions ====
 
 function is_docker_running() {
+    # a sharded network runs as one compose project per shard
+    if [[ -f ./docker/data/.env.shards ]]; then
+        python3 ./py/shards.py running
+        return
+    fi
     if [[ -n "$(docker compose -f ./docker/docker-compose.yml ps -q)" ]]; then
         return 0
     else
@@ -0,0 +1,158 @@
+import json
+import threading
+import urllib.request
+from unittest.mock import patch
+
+import pytest
+from network_info.dashboard import TopologyFeed, run_crawler, serve_dashboard
+from network_info.get_info import CrawlResult
+
+NODES = ["node_1", "node_2", "node_3"]
+
+
+class TestTopologyFeed:
+    def test_first_update_publishes_everything(self):
+        feed = TopologyFeed()
+        delta = feed.update(NODES, [("node_1", "node_2", "manual")], metrics={"edges": 1})
+        assert delta["version"] == 1
+        assert delta["nodes_added"] == NODES
+        assert delta["edges_added"] == [["node_1", "node_2", "manual"]]
+        assert delta["metrics"] == {"edges": 1}
+
+    def test_only_changes_are_published(self):
+        feed = TopologyFeed()
+        feed.update(NODES, [("node_1", "node_2", "manual"), ("node_2", "node_1", "inbound")])
+        delta = feed.update(NODES, [("node_1", "node_2", "manual"), ("node_1", "node_3", "manual")])
+        assert delta["nodes_added"] == []
+        assert delta["edges_added"] == [["node_1", "node_3", "manual"]]
+        assert delta["edges_removed"] == [["node_2", "node_1"]]
+        assert "metrics" not in delta
+
+    def test_no_change_no_delta(self):
+        feed = TopologyFeed()
+        feed.update(NODES, [("node_1", "node_2", "manual")], metrics={"edges": 1})
+        assert feed.update(NODES, [("node_1", "node_2", "manual")], metrics={"edges": 1}) is None
+        assert feed.version == 1
+
+    def test_unreachable_changes(self):
+        feed = TopologyFeed()
+        feed.update(NODES, [])
+        delta = feed.update(NODES, [], unreachable={"node_2": "Timeout"})
+        assert delta["unreachable"] == {"node_2": "Timeout"}
+
+    def test_nodes_reachable_again(self):
+        feed = TopologyFeed()
+        feed.update(NODES, [], unreachable={"node_2": "Timeout"})
+        delta = feed.update(NODES, [], unreachable={})
+        assert delta["unreachable"] == {}
+        assert feed.unreachable == {}
+        assert feed.version == 2
+
+    def test_snapshot(self):
+        feed = TopologyFeed()
+        feed.update(NODES, [("node_1", "node_2", "manual")], metrics={"edges": 1})
+        assert feed.snapshot() == {
+            "version": 1,
+            "nodes": NODES,
+            "edges": [["node_1", "node_2", "manual"]],
+            "unreachable": {},
+            "metrics": {"edges": 1},
+        }
+
+    def test_wait(self):
+        feed = TopologyFeed()
+        feed.update(NODES, [])
+        feed.update(NODES, [("node_1", "node_2", "manual")])
+        assert [d["version"] for d in feed.wait(0, timeout=0)] == [1, 2]
+        assert [d["version"] for d in feed.wait(1, timeout=0)] == [2]
+        assert feed.wait(2, timeout=0) == []
+
+    def test_wait_lagging_client_resyncs(self):
+        feed = TopologyFeed(history=1)
+        feed.update(NODES, [])
+        feed.update(NODES, [("node_1", "node_2", "manual")])
+        assert feed.wait(0, timeout=0) is None
+
+    def test_wait_wakes_up_on_update(self):
+        feed = TopologyFeed()
+        timer = threading.Timer(0.05, feed.update, args=(NODES, []))
+        timer.start()
+        assert [d["version"] for d in feed.wait(0, timeout=5)] == [1]
+
+
+class TestRunCrawler:
+    @patch("network_info.export.extract_connections")
+    def test_publishes_crawl(self, mock_extract_connections):
+        feed = TopologyFeed()
+        stop = threading.Event()
+        crawl = CrawlResult()
+        crawl.peers = {"node_1": ["peers"]}
+        crawl.unreachable = {"node_2": "Timeout"}
+        mock_extract_connections.return_value = [("node_3", "manual")]
+
+        def fake_crawl(nodes):
+            stop.set()  # a single crawl
+            return crawl
+
+        run_crawler(feed, NODES, 0, stop, crawl=fake_crawl)
+        snapshot = feed.snapshot()
+        assert snapshot["edges"] == [["node_1", "node_3", "manual"]]
+        assert snapshot["unreachable"] == {"node_2": "Timeout"}
+        assert snapshot["metrics"]["edges"] == 1
+        json.dumps(snapshot)  # must be sent as JSON
+
+
+@pytest.fixture
+def server():
+    feed = TopologyFeed()
+    feed.update(NODES, [("node_1", "node_2", "manual")])
+    server = serve_dashboard(feed, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield feed, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _read_event(response):
+    lines = []
+    while True:
+        line = response.readline().decode().rstrip("\n")
+        if not line:
+            if lines:
+                break
+            continue
+        if not line.startswith(":"):
+            lines.append(line)
+    event = lines[0].split(": ", 1)[1]
+    return event, json.loads(lines[1].split(": ", 1)[1])
+
+
+class TestDashboardServer:
+    def test_page(self, server):
+        _, url = server
+        with urllib.request.urlopen(url + "/", timeout=5) as response:
+            assert "EventSource" in response.read().decode()
+
+    def test_snapshot(self, server):
+        feed, url = server
+        with urllib.request.urlopen(url + "/snapshot", timeout=5) as response:
+            assert json.loads(response.read()) == feed.snapshot()
+
+    def test_not_found(self, server):
+        _, url = server
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/missing", timeout=5)
+
+    def test_events_stream_deltas(self, server):
+        feed, url = server
+        with urllib.request.urlopen(url + "/events", timeout=5) as response:
+            event, data = _read_event(response)
+            assert event == "snapshot"
+            assert data["version"] == 1
+
+            feed.update(NODES, [("node_1", "node_2", "manual"), ("node_2", "node_3", "manual")])
+            event, data = _read_event(response)
+            assert event == "delta"
+            assert data["version"] == 2
+            assert data["edges_added"] == [["node_2", "node_3", "manual"]]
@@ -0,0 +1,103 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import networkx as nx
+import pytest
+from network_info.export import export_topology, topology_edges
+from network_info.get_info import CrawlResult
+
+NODES = ["node_1", "node_2", "node_3"]
+EDGES = [("node_1", "node_2", "manual"), ("node_2", "node_1", "inbound")]
+
+
+class TestExportTopology:
+    def test_csv(self, tmp_path):
+        path = tmp_path / "network.csv"
+        export_topology(str(path), NODES, iter(EDGES))
+        with open(path, newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows == [["source", "target", "type"], *map(list, EDGES)]
+
+    def test_json(self, tmp_path):
+        path = tmp_path / "network.json"
+        export_topology(str(path), NODES, iter(EDGES))
+        data = json.loads(path.read_text())
+        assert data["nodes"] == NODES
+        assert data["edges"] == [{"source": u, "target": v, "type": t} for u, v, t in EDGES]
+
+    def test_json_no_edges(self, tmp_path):
+        path = tmp_path / "network.json"
+        export_topology(str(path), NODES, [])
+        assert json.loads(path.read_text()) == {"nodes": NODES, "edges": []}
+
+    def test_graphml(self, tmp_path):
+        path = tmp_path / "network.graphml"
+        export_topology(str(path), NODES + ['a"<b>&'], iter(EDGES))
+        G = nx.read_graphml(path)
+        assert isinstance(G, nx.DiGraph)
+        assert set(G.nodes) == set(NODES) | {'a"<b>&'}
+        assert G["node_1"]["node_2"]["type"] == "manual"
+        assert G["node_2"]["node_1"]["type"] == "inbound"
+
+    def test_dot(self, tmp_path):
+        path = tmp_path / "network.gv"
+        export_topology(str(path), NODES, iter(EDGES))
+        text = path.read_text()
+        assert text.startswith("digraph")
+        assert '"node_1" -> "node_2" [type="manual", color=red];' in text
+        assert '"node_3";' in text
+
+    def test_explicit_format(self, tmp_path):
+        path = tmp_path / "network.txt"
+        export_topology(str(path), NODES, iter(EDGES), fmt="csv")
+        assert path.read_text().startswith("source,target,type")
+
+    def test_failed_crawl_keeps_previous_export(self, tmp_path):
+        path = tmp_path / "network.csv"
+        export_topology(str(path), NODES, iter(EDGES))
+        previous = path.read_text()
+
+        def edges():
+            yield EDGES[0]
+            raise ConnectionError("crawl failed")
+
+        with pytest.raises(ConnectionError):
+            export_topology(str(path), NODES, edges())
+        assert path.read_text() == previous
+        assert os.listdir(tmp_path) == ["network.csv"]
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            export_topology(str(tmp_path / "network.xyz"), NODES, EDGES)
+
+
+class TestTopologyEdges:
+    @patch("network_info.export.extract_connections")
+    def test_edges_between_known_nodes(self, mock_extract_connections):
+        crawl = CrawlResult()
+        crawl.peers = {"node_1": ["peers"], "node_2": []}
+        crawl.unreachable = {"node_3": "Timeout"}
+        mock_extract_connections.return_value = [("node_2", "manual"), ("10.0.0.1", "inbound"), (None, "manual")]
+
+        assert list(topology_edges(NODES, crawl)) == [("node_1", "node_2", "manual")]
+
+    @patch("network_info.export.crawl_peer_info")
+    def test_crawls_when_needed(self, mock_crawl):
+        mock_crawl.return_value = CrawlResult()
+        assert list(topology_edges(NODES)) == []
+        mock_crawl.assert_called_once_with(NODES)
+
+
+def test_import_does_not_load_plotting_stack():
+    py_dir = os.path.join(os.path.dirname(__file__), "..", "..", "..", "py")
+    code = (
+        "import sys, network_info\n"
+        "from network_info import export_topology, crawl_peer_info\n"
+        "print('matplotlib' in sys.modules, 'networkx' in sys.modules)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=py_dir, capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ["False", "False"]
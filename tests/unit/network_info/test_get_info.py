@@ -1,7 +1,10 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import subprocess
-from network_info import get_peer_info
+import threading
+
+import requests
+from network_info import get_peer_info, crawl_peer_info
 
 
 class TestGetPeerInfo(unittest.TestCase):
@@ -77,3 +80,48 @@ class TestGetPeerInfo(unittest.TestCase):
 
 if __name__ == '__main__':
     unittest.main()
+
+
+class TestCrawlPeerInfo(unittest.TestCase):
+
+    def test_crawl_all_nodes(self):
+        """Test that every node is queried with the per-node timeout."""
+        rpc = MagicMock()
+        rpc.call.side_effect = lambda node, method, timeout: [{"id": node}]
+
+        result = crawl_peer_info(["node_1", "node_2"], rpc=rpc, timeout=1.5)
+
+        self.assertEqual(result.peers, {"node_1": [{"id": "node_1"}], "node_2": [{"id": "node_2"}]})
+        self.assertEqual(result.unreachable, {})
+        rpc.call.assert_any_call("node_1", "getpeerinfo", timeout=1.5)
+        rpc.call.assert_any_call("node_2", "getpeerinfo", timeout=1.5)
+
+    def test_crawl_unreachable_nodes(self):
+        """Test that failing nodes are reported separately."""
+        def call(node, method, timeout):
+            if node == "node_2":
+                raise requests.Timeout("Timeout for node_2")
+            return []
+        rpc = MagicMock()
+        rpc.call.side_effect = call
+
+        result = crawl_peer_info(["node_1", "node_2"], rpc=rpc)
+
+        self.assertEqual(result.peers, {"node_1": []})
+        self.assertEqual(result.unreachable, {"node_2": "Timeout for node_2"})
+
+    def test_crawl_is_concurrent(self):
+        """Test that nodes are queried at the same time."""
+        barrier = threading.Barrier(3, timeout=5)
+        rpc = MagicMock()
+        rpc.call.side_effect = lambda node, method, timeout: barrier.wait() and []
+
+        result = crawl_peer_info(["node_1", "node_2", "node_3"], rpc=rpc)
+
+        self.assertEqual(result.unreachable, {})
+
+    def test_crawl_no_nodes(self):
+        rpc = MagicMock()
+        result = crawl_peer_info([], rpc=rpc)
+        self.assertEqual(result.peers, {})
+        rpc.call.assert_not_called()
@@ -2,13 +2,21 @@ from unittest.mock import patch
 
 import networkx as nx
 from network_info import graph
+from network_info.get_info import CrawlResult
+from network_info.layout import load_layout
+
+
+def _crawl(**peers):
+    crawl = CrawlResult()
+    crawl.peers.update(peers)
+    return crawl
 
 
 class TestCreateNetworkGraph:
-    @patch("network_info.graph.get_peer_info")
+    @patch("network_info.graph.crawl_peer_info")
     @patch("network_info.graph.extract_connections")
     def test_create_network_graph_basic(
-        self, mock_extract_connections, mock_get_peer_info
+        self, mock_extract_connections, mock_crawl
     ):
         """
         Test that create_network_graph creates a directed graph with correct nodes and edges,
@@ -16,7 +24,7 @@ class TestCreateNetworkGraph:
         """
         nodes_list = ["node1", "node2", "node3"]
         # Simulate peer info for each node
-        mock_get_peer_info.side_effect = ["peerinfo1", "peerinfo2", "peerinfo3"]
+        mock_crawl.return_value = _crawl(node1="peerinfo1", node2="peerinfo2", node3="peerinfo3")
         # Simulate connections for each node
         mock_extract_connections.side_effect = [
             [("node2", "manual"), ("node3", "inbound")],
@@ -40,46 +48,46 @@ class TestCreateNetworkGraph:
         # node3 has no outgoing edges
         assert list(G.successors("node3")) == []
 
-    @patch("network_info.graph.get_peer_info")
+    @patch("network_info.graph.crawl_peer_info")
     @patch("network_info.graph.extract_connections")
     def test_create_network_graph_ignores_unknown_peers(
-        self, mock_extract_connections, mock_get_peer_info
+        self, mock_extract_connections, mock_crawl
     ):
         """
         Test that create_network_graph ignores peers not present in the nodes_list.
         """
         nodes_list = ["node1", "node2"]
-        mock_get_peer_info.return_value = "peerinfo"
+        mock_crawl.return_value = _crawl(node1="peerinfo", node2="peerinfo")
         # Peer not in nodes_list should not be added as edge
         mock_extract_connections.return_value = [("unknown_node", "manual")]
         G = graph.create_network_graph(nodes_list)
         assert set(G.nodes) == set(nodes_list)
         assert G.number_of_edges() == 0
 
-    @patch("network_info.graph.get_peer_info")
+    @patch("network_info.graph.crawl_peer_info")
     @patch("network_info.graph.extract_connections")
     def test_create_network_graph_skips_empty_peers(
-        self, mock_extract_connections, mock_get_peer_info
+        self, mock_extract_connections, mock_crawl
     ):
         """
         Test that create_network_graph skips nodes with no peer information.
         """
         nodes_list = ["node1"]
-        mock_get_peer_info.return_value = None
+        mock_crawl.return_value = _crawl(node1=None)
         G = graph.create_network_graph(nodes_list)
         assert set(G.nodes) == set(nodes_list)
         assert G.number_of_edges() == 0
 
-    @patch("network_info.graph.get_peer_info")
+    @patch("network_info.graph.crawl_peer_info")
     @patch("network_info.graph.extract_connections")
     def test_create_network_graph_none_peer_name(
-        self, mock_extract_connections, mock_get_peer_info
+        self, mock_extract_connections, mock_crawl
     ):
         """
         Test that create_network_graph does not create edges when peer_name is None.
         """
         nodes_list = ["node1", "node2"]
-        mock_get_peer_info.return_value = "peerinfo"
+        mock_crawl.return_value = _crawl(node1="peerinfo", node2="peerinfo")
         # None peer_name should not create edge
         mock_extract_connections.return_value = [(None, "manual")]
         G = graph.create_network_graph(nodes_list)
@@ -87,12 +95,42 @@ class TestCreateNetworkGraph:
         assert G.number_of_edges() == 0
 
 
+    @patch("network_info.graph.crawl_peer_info")
+    @patch("network_info.graph.extract_connections")
+    def test_create_network_graph_unreachable_nodes(
+        self, mock_extract_connections, mock_crawl
+    ):
+        """
+        Test that unreachable nodes are kept in the graph, without edges.
+        """
+        crawl = _crawl(node1="peerinfo")
+        crawl.unreachable["node2"] = "Timeout for node2"
+        mock_crawl.return_value = crawl
+        mock_extract_connections.return_value = [("node2", "manual")]
+        G = graph.create_network_graph(["node1", "node2"])
+        assert set(G.nodes) == {"node1", "node2"}
+        assert list(G.edges) == [("node1", "node2")]
+        mock_extract_connections.assert_called_once_with("peerinfo", "node1")
+
+    @patch("network_info.graph.crawl_peer_info")
+    @patch("network_info.graph.extract_connections")
+    def test_create_network_graph_uses_given_crawl(
+        self, mock_extract_connections, mock_crawl
+    ):
+        """
+        Test that an existing crawl is used instead of crawling again.
+        """
+        mock_extract_connections.return_value = []
+        graph.create_network_graph(["node1"], crawl=_crawl(node1="peerinfo"))
+        mock_crawl.assert_not_called()
+
+
 class TestVisualizeNetwork:
     @patch("network_info.graph.create_network_graph")
     @patch("network_info.graph.open", create=True)
     @patch("matplotlib.pyplot.savefig")
     def test_visualize_network_runs(
-        self, mock_savefig, mock_open, mock_create_network_graph
+        self, mock_savefig, mock_open, mock_create_network_graph, tmp_path
     ):
         """
         Test that visualize_network runs without errors and saves the image file.
@@ -111,5 +149,61 @@ class TestVisualizeNetwork:
         G.add_edge("node1", "node2", type="manual")
         mock_create_network_graph.return_value = G
         # Should not raise
-        graph.visualize_network("test_img.png")
+        graph.visualize_network("test_img.png", layout_path=str(tmp_path / "layout.json"))
         mock_savefig.assert_called_once()
+
+    @patch("network_info.graph.create_network_graph")
+    @patch("network_info.graph.open", create=True)
+    def test_visualize_network_svg_and_layout_cache(
+        self, mock_open, mock_create_network_graph, tmp_path
+    ):
+        """
+        Test that the drawing is saved as SVG and node positions are kept between runs.
+        """
+        mock_open.return_value.__enter__.return_value = ["node1\n", "node2\n"]
+        G = nx.DiGraph()
+        G.add_edge("node1", "node2", type="manual")
+        G.add_edge("node2", "node1", type="inbound")
+        mock_create_network_graph.return_value = G
+        layout_path = str(tmp_path / "layout.json")
+        img_path = str(tmp_path / "map.svg")
+
+        graph.visualize_network(img_path, layout_path=layout_path)
+        first = load_layout(layout_path)
+        assert set(first) == {"node1", "node2"}
+        with open(img_path) as f:
+            assert "<svg" in f.read(1000)
+
+        G.add_edge("node3", "node1", type="manual")
+        graph.visualize_network(img_path, layout_path=layout_path)
+        second = load_layout(layout_path)
+        assert set(second) == {"node1", "node2", "node3"}
+        assert second["node1"] == first["node1"]
+        assert second["node2"] == first["node2"]
+
+
+class TestMergeEdges:
+    def test_connection_drawn_once_from_opener(self):
+        G = nx.DiGraph()
+        G.add_edge("node1", "node2", type="manual")
+        G.add_edge("node2", "node1", type="inbound")
+        assert graph.merge_edges(G) == [("node1", "node2", "manual")]
+
+    def test_inbound_only(self):
+        G = nx.DiGraph()
+        G.add_edge("node2", "node1", type="inbound")
+        assert graph.merge_edges(G) == [("node1", "node2", "inbound")]
+
+    def test_distinct_connections(self):
+        G = nx.DiGraph()
+        G.add_edge("node1", "node2", type="manual")
+        G.add_edge("node1", "node3", type="manual")
+        G.add_edge("node3", "node1", type="inbound")
+        assert sorted(graph.merge_edges(G)) == [("node1", "node2", "manual"), ("node1", "node3", "manual")]
+
+    def test_connections_in_both_directions(self):
+        # node1 and node2 each opened a connection to the other: two connections
+        G = nx.DiGraph()
+        G.add_edge("node1", "node2", type="manual")
+        G.add_edge("node2", "node1", type="outbound-full-relay")
+        assert sorted(graph.merge_edges(G)) == [("node1", "node2", "manual"), ("node2", "node1", "outbound-full-relay")]
@@ -0,0 +1,74 @@
+import itertools
+
+import networkx as nx
+import numpy as np
+import pytest
+from network_info import layout
+from network_info.layout import _neighbour_pairs, compute_layout, grid_layout, load_layout, save_layout
+
+
+class TestLayoutCache:
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / "layout.json")
+        save_layout(path, {"node_1": (0.5, -1.0), "node_2": (1, 2)})
+        assert load_layout(path) == {"node_1": (0.5, -1.0), "node_2": (1.0, 2.0)}
+
+    def test_load_missing_or_invalid(self, tmp_path):
+        assert load_layout(str(tmp_path / "missing.json")) == {}
+        invalid = tmp_path / "invalid.json"
+        invalid.write_text("not json")
+        assert load_layout(str(invalid)) == {}
+
+
+class TestComputeLayout:
+    def test_all_nodes_placed(self):
+        G = nx.cycle_graph([f"node_{i}" for i in range(10)], create_using=nx.DiGraph)
+        pos = compute_layout(G, seed=1)
+        assert set(pos) == set(G.nodes)
+
+    def test_known_layout_is_reused(self):
+        G = nx.DiGraph([("a", "b"), ("b", "c")])
+        previous = {"a": (0.0, 0.0), "b": (1.0, 0.0), "c": (2.0, 0.0), "gone": (5.0, 5.0)}
+        assert compute_layout(G, previous) == {"a": (0.0, 0.0), "b": (1.0, 0.0), "c": (2.0, 0.0)}
+
+    @pytest.mark.parametrize("threshold", [1000, 0])
+    def test_only_new_nodes_move(self, monkeypatch, threshold):
+        monkeypatch.setattr(layout, "GRID_LAYOUT_THRESHOLD", threshold)
+        G = nx.DiGraph([("a", "b"), ("b", "c"), ("c", "d")])
+        previous = {"a": (0.0, 0.0), "b": (1.0, 0.0), "c": (2.0, 0.0)}
+        pos = compute_layout(G, previous, seed=1)
+        for node, p in previous.items():
+            assert pos[node] == pytest.approx(p)
+        assert "d" in pos
+
+    def test_grid_layout_for_large_graphs(self, monkeypatch):
+        monkeypatch.setattr(layout, "GRID_LAYOUT_THRESHOLD", 10)
+        G = nx.random_regular_graph(4, 60, seed=1)
+        pos = compute_layout(G, seed=1)
+        xy = np.array(list(pos.values()))
+        assert set(pos) == set(G.nodes)
+        assert np.abs(xy).max() == pytest.approx(1.0)
+
+
+class TestGridLayout:
+    def test_neighbour_pairs(self):
+        rng = np.random.default_rng(1)
+        cells = rng.integers(-3, 4, size=(40, 2))
+        i, j = _neighbour_pairs(cells)
+        expected = {
+            (a, b) for a, b in itertools.permutations(range(40), 2)
+            if np.abs(cells[a] - cells[b]).max() <= 1
+        }
+        assert set(zip(i.tolist(), j.tolist())) == expected
+        assert len(i) == len(expected)
+
+    def test_neighbours_are_closer(self):
+        G = nx.grid_2d_graph(10, 10)
+        pos = grid_layout(G, seed=1, iterations=100)
+        xy = {node: np.array(p) for node, p in pos.items()}
+        edge_length = np.mean([np.linalg.norm(xy[u] - xy[v]) for u, v in G.edges])
+        corner_distance = np.linalg.norm(xy[(0, 0)] - xy[(9, 9)])
+        assert edge_length * 4 < corner_distance
+
+    def test_empty_graph(self):
+        assert grid_layout(nx.Graph()) == {}
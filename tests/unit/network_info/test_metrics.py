@@ -0,0 +1,124 @@
+import random
+
+import networkx as nx
+import pytest
+from network_info.metrics import MetricsEngine, graph_metrics, recording_metrics
+from network_info.timeseries import TopologyReader, TopologyState, TopologyWriter
+
+
+def _random_graph(n, p, seed):
+    G = nx.gnp_random_graph(n, p, seed=seed, directed=True)
+    return nx.relabel_nodes(G, {i: f"node_{i + 1}" for i in G.nodes})
+
+
+def _expected(G):
+    U = G.to_undirected()
+    components = list(nx.connected_components(U))
+    largest = U.subgraph(max(components, key=len))
+    return {
+        "nodes": G.number_of_nodes(),
+        "edges": G.number_of_edges(),
+        "in_degree_max": max(d for _, d in G.in_degree()),
+        "out_degree_max": max(d for _, d in G.out_degree()),
+        "asymmetric_edges": sum(1 for u, v in G.edges if not G.has_edge(v, u)),
+        "avg_clustering": nx.average_clustering(U),
+        "components": len(components),
+        "diameter": nx.diameter(largest),
+    }
+
+
+def _check(record, G):
+    expected = _expected(G)
+    assert record["nodes"] == expected["nodes"]
+    assert record["edges"] == expected["edges"]
+    assert record["in_degree"]["max"] == expected["in_degree_max"]
+    assert record["out_degree"]["max"] == expected["out_degree_max"]
+    assert record["asymmetric_edges"] == expected["asymmetric_edges"]
+    assert record["avg_clustering"] == pytest.approx(expected["avg_clustering"])
+    assert record["components"] == expected["components"]
+    assert record["connected"] == (expected["components"] == 1)
+    if expected["components"] == 1:
+        assert record["diameter"] == expected["diameter"]
+        assert record["avg_shortest_path"] == pytest.approx(nx.average_shortest_path_length(G.to_undirected()))
+
+
+class TestMetricsEngine:
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_matches_networkx(self, seed):
+        G = _random_graph(40, 0.08, seed)
+        _check(graph_metrics(G), G)
+
+    def test_several_search_passes(self):
+        # more nodes than breadth-first searches run at once
+        G = _random_graph(150, 0.03, 5)
+        _check(graph_metrics(G), G)
+
+    def test_disconnected(self):
+        G = nx.DiGraph()
+        G.add_edges_from([("a", "b"), ("b", "c"), ("d", "e")])
+        G.add_node("f")
+        record = graph_metrics(G)
+        assert record["components"] == 3
+        assert record["largest_component"] == 3
+        assert not record["connected"]
+        assert record["diameter"] == 2
+        # (a,b,c): 2*(1+1+2) ; (d,e): 2*1
+        assert record["avg_shortest_path"] == pytest.approx(10 / 8)
+
+    def test_asymmetry_and_degrees(self):
+        record = MetricsEngine().update(["a", "b", "c"], [("a", "b"), ("b", "a"), ("a", "c")])
+        assert record["asymmetric_edges"] == 1
+        assert record["asymmetry"] == pytest.approx(1 / 3)
+        assert record["out_degree"] == {"min": 0, "max": 2, "mean": 1.0}
+        assert record["degree_histogram"] == [0, 2, 1]
+
+    def test_empty(self):
+        record = MetricsEngine().update([], [])
+        assert record["nodes"] == 0
+        assert record["edges"] == 0
+
+    def test_incremental_updates_match_rebuild(self):
+        rng = random.Random(4)
+        G = _random_graph(50, 0.06, 4)
+        engine = MetricsEngine(rebuild_ratio=0.5)
+        engine.update_graph(G)
+        nodes = list(G.nodes)
+
+        for _ in range(20):
+            for _ in range(3):
+                u, v = rng.sample(nodes, 2)
+                if G.has_edge(u, v):
+                    G.remove_edge(u, v)
+                else:
+                    G.add_edge(u, v)
+            record = engine.update_graph(G)
+            assert record == graph_metrics(G)
+            _check(record, G)
+
+        assert engine.rebuilds == 1
+
+    def test_large_change_rebuilds(self):
+        engine = MetricsEngine(rebuild_ratio=0.1)
+        engine.update(["a", "b", "c"], [("a", "b")])
+        engine.update(["a", "b", "c"], [("b", "c"), ("c", "a")])
+        assert engine.rebuilds == 2
+
+    def test_new_node_rebuilds(self):
+        engine = MetricsEngine()
+        engine.update(["a", "b"], [("a", "b")])
+        record = engine.update(["a", "b"], [("a", "b"), ("b", "c")])
+        assert engine.rebuilds == 2
+        assert record["nodes"] == 3
+
+
+class TestRecordingMetrics:
+    def test_record_per_snapshot(self, tmp_path):
+        path = str(tmp_path / "topology.bin")
+        with TopologyWriter(path) as writer:
+            writer.append(1.0, TopologyState(["a", "b"], {("a", "b"): "manual"}))
+            writer.append(2.0, TopologyState(["a", "b"], {}))
+
+        records = list(recording_metrics(TopologyReader(path)))
+        assert [r["time"] for r in records] == [1.0, 2.0]
+        assert [r["edges"] for r in records] == [1, 0]
+        assert [r["components"] for r in records] == [1, 2]
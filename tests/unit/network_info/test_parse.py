@@ -1,5 +1,11 @@
-from unittest.mock import patch
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from network_info.parse import ContainerResolver, ShardPeers
 from network_info import extract_connections
+from registry import write_shards, write_topology
 
 
 class TestExtractConnections:
@@ -99,3 +105,150 @@ class TestExtractConnections:
         result = extract_connections(peers_info)
         expected = [(None, "outbound-full-relay")]
         assert result == expected
+
+
+NETWORKS = [
+    {
+        "Name": "docker_bitcoin-net",
+        "IPAM": {"Config": [{"Subnet": "172.20.0.0/16", "Gateway": "172.20.0.1"}]},
+        "Containers": {
+            "abc": {"Name": "node_1", "IPv4Address": "172.20.0.2/16"},
+            "def": {"Name": "node_2", "IPv4Address": "172.20.0.3/16"},
+        },
+    },
+    {
+        "Name": "sweep-c0-net",
+        "IPAM": {"Config": [{"Subnet": "10.5.0.0/24"}, {"Subnet": "fd00::/64"}]},
+        "Containers": {"ghi": {"Name": "sweep-c0_node_1", "IPv4Address": "10.5.0.2/24"}},
+    },
+]
+
+
+def _docker_output(*networks_outputs):
+    """Fake subprocess.run answering `network ls` then `network inspect`, for each refresh."""
+    outputs = []
+    for networks in networks_outputs:
+        outputs.append(MagicMock(stdout="\n".join(n["Name"] for n in networks)))
+        outputs.append(MagicMock(stdout=json.dumps(networks)))
+    return outputs
+
+
+class TestContainerResolver:
+    @patch("network_info.parse.subprocess.run")
+    def test_index_built_once(self, mock_run):
+        mock_run.side_effect = _docker_output(NETWORKS)
+        resolver = ContainerResolver()
+
+        assert resolver.resolve("172.20.0.2") == "node_1"
+        assert resolver.resolve("172.20.0.3") == "node_2"
+        assert resolver.resolve("10.5.0.2") == "sweep-c0_node_1"
+        assert mock_run.call_count == 2  # network ls + network inspect
+
+    @patch("network_info.parse.subprocess.run")
+    def test_subnet_aware(self, mock_run):
+        mock_run.side_effect = _docker_output(NETWORKS)
+        resolver = ContainerResolver()
+
+        assert resolver.in_subnet("172.20.0.99")
+        assert resolver.in_subnet("10.5.0.7")
+        assert not resolver.in_subnet("10.5.1.7")
+        assert not resolver.in_subnet("192.168.1.1")
+        assert not resolver.in_subnet("not-an-ip")
+
+    @patch("network_info.parse.subprocess.run")
+    def test_miss_refreshes_index(self, mock_run):
+        added = [dict(NETWORKS[0], Containers={
+            **NETWORKS[0]["Containers"], "jkl": {"Name": "node_3", "IPv4Address": "172.20.0.4/16"}
+        })]
+        mock_run.side_effect = _docker_output(NETWORKS, added)
+        resolver = ContainerResolver(min_refresh=0)
+
+        assert resolver.resolve("172.20.0.2") == "node_1"
+        assert resolver.resolve("172.20.0.4") == "node_3"
+        assert mock_run.call_count == 4
+
+    @patch("network_info.parse.subprocess.run")
+    def test_miss_refresh_is_rate_limited(self, mock_run):
+        mock_run.side_effect = _docker_output(NETWORKS)
+        resolver = ContainerResolver(min_refresh=60)
+
+        assert resolver.resolve("172.20.0.9") is None
+        assert resolver.resolve("172.20.0.10") is None
+        assert mock_run.call_count == 2
+
+    @patch("network_info.parse.subprocess.run")
+    def test_invalidate(self, mock_run):
+        mock_run.side_effect = _docker_output(NETWORKS, NETWORKS)
+        resolver = ContainerResolver()
+
+        resolver.resolve("172.20.0.2")
+        resolver.invalidate()
+        resolver.resolve("172.20.0.2")
+        assert mock_run.call_count == 4
+
+    @patch("network_info.parse.subprocess.run", side_effect=FileNotFoundError("docker"))
+    def test_docker_unavailable(self, mock_run):
+        resolver = ContainerResolver()
+
+        assert resolver.resolve("172.20.0.2") is None
+        # falls back to docker's default address pool
+        assert resolver.in_subnet("172.20.0.2")
+        assert not resolver.in_subnet("192.168.1.1")
+
+
+@pytest.fixture
+def sharded_registry(tmp_path):
+    # node_1 and node_2 on shard_1, node_3 on shard_2 (same host) and node_4 on shard_3 (other host)
+    write_shards({
+        "node_1": ("shard_1", "localhost"), "node_2": ("shard_1", "localhost"),
+        "node_3": ("shard_2", "localhost"), "node_4": ("shard_3", "10.0.0.2"),
+    }, data_dir=str(tmp_path))
+    write_topology([("node_1", "node_2"), ("node_1", "node_3"), ("node_3", "node_2"), ("node_2", "node_4"),
+                    ("node_4", "node_1")], data_dir=str(tmp_path))
+    return str(tmp_path)
+
+
+class TestShardPeers:
+    def test_from_registry(self, sharded_registry):
+        peers = ShardPeers.from_registry(sharded_registry, base_p2p=18444)
+
+        assert peers.ports == {18444: "node_1", 18446: "node_2", 18448: "node_3", 18450: "node_4"}
+        assert peers.adders == {"node_3": ["node_1"], "node_2": ["node_3"], "node_4": ["node_2"], "node_1": ["node_4"]}
+
+    def test_not_sharded(self, tmp_path):
+        peers = ShardPeers.from_registry(str(tmp_path), base_p2p=18444)
+
+        assert peers.ports == {} and peers.adders == {}
+        assert peers.resolve({"addr": "host.docker.internal:18448", "connection_type": "manual"}) is None
+
+    def test_inbound_with_several_adders_is_unknown(self):
+        peers = ShardPeers({}, {"node_1": ["node_3", "node_4"]})
+
+        assert peers.resolve({"addr": "172.21.0.1:40112", "connection_type": "inbound"}, "node_1") is None
+
+    @patch("network_info.parse.subprocess.run")
+    def test_connections_to_other_shards(self, mock_run, sharded_registry):
+        # shard_1 network: its bridge gateway 172.20.0.1 is not a container
+        mock_run.side_effect = _docker_output(NETWORKS)
+        resolver = ContainerResolver(min_refresh=60)
+        resolver._shard_peers = ShardPeers.from_registry(sharded_registry, base_p2p=18444)
+        node_1_peers = [
+            {"addr": "172.20.0.3:18446", "addrbind": "172.20.0.2:51022", "connection_type": "manual"},
+            {"addr": "host.docker.internal:18448", "addrbind": "172.20.0.2:51310", "connection_type": "manual"},
+            # node_4 dialed this host: seen from the other host, from an ephemeral port
+            {"addr": "10.0.0.2:40112", "addrbind": "172.20.0.2:18444", "connection_type": "inbound"},
+        ]
+        node_2_peers = [
+            {"addr": "172.20.0.2:51022", "addrbind": "172.20.0.3:18446", "connection_type": "inbound"},
+            # node_3 dialed host.docker.internal:18446: NAT'd, seen from the bridge gateway
+            {"addr": "172.20.0.1:39876", "addrbind": "172.20.0.3:18446", "connection_type": "inbound"},
+            {"addr": "10.0.0.2:18450", "addrbind": "172.20.0.3:49822", "connection_type": "manual"},
+        ]
+
+        with patch("network_info.parse.RESOLVER", resolver):
+            assert extract_connections(node_1_peers, "node_1") == [
+                ("node_2", "manual"), ("node_3", "manual"), ("node_4", "inbound"),
+            ]
+            assert extract_connections(node_2_peers, "node_2") == [
+                ("node_1", "inbound"), ("node_3", "inbound"), ("node_4", "manual"),
+            ]
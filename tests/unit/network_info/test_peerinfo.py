@@ -0,0 +1,129 @@
+import sys
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from network_info.get_info import CrawlResult, crawl_peer_info
+from network_info.parse import extract_connections
+from network_info.peerinfo import (
+    TOPOLOGY_FIELDS,
+    TRAFFIC_FIELDS,
+    PeerBatch,
+    PeerInfo,
+    parse_peers,
+    peer_info_class,
+)
+from network_info.traffic import traffic_sample
+
+
+def _peer(i, peer="172.20.0.3", connection_type="outbound-full-relay", **extra):
+    return {
+        "id": i,
+        "addr": f"{peer}:18444",
+        "addrbind": "172.20.0.2:18444",
+        "connection_type": connection_type,
+        "inbound": False,
+        "bytessent": 100 * i,
+        "pingtime": 0.01,
+        "subver": "/Satoshi:27.0.0/",
+        "servicesnames": ["NETWORK", "WITNESS"],
+        **extra,
+    }
+
+
+class TestPeerInfo:
+    def test_keeps_only_requested_fields(self):
+        record = parse_peers([_peer(1)], TOPOLOGY_FIELDS)[0]
+        assert record.to_dict() == {
+            "id": 1,
+            "addr": "172.20.0.3:18444",
+            "addrbind": "172.20.0.2:18444",
+            "connection_type": "outbound-full-relay",
+        }
+        assert not hasattr(record, "__dict__")
+        assert "subver" not in record
+
+    def test_dict_like_access(self):
+        record = parse_peers([_peer(1)], ("id", "addr", "minping"))[0]
+        assert record["id"] == 1
+        assert record.get("addr", "").split(":")[0] == "172.20.0.3"
+        assert record.get("minping", 0.5) == 0.5  # missing in getpeerinfo
+        assert record.get("bytessent") is None  # not kept
+        assert "minping" not in record
+        with pytest.raises(KeyError):
+            record["minping"]
+
+    def test_classes_are_shared(self):
+        assert peer_info_class(TOPOLOGY_FIELDS) is peer_info_class(list(TOPOLOGY_FIELDS))
+        assert issubclass(peer_info_class(TOPOLOGY_FIELDS), PeerInfo)
+        assert parse_peers([_peer(1)], TOPOLOGY_FIELDS) == parse_peers([_peer(1)], TOPOLOGY_FIELDS)
+
+    def test_strings_are_interned(self):
+        first, second = parse_peers([_peer(1), _peer(2)], TOPOLOGY_FIELDS)
+        assert first.addrbind is second.addrbind
+
+    def test_smaller_than_dict(self):
+        peer = _peer(1)
+        record = parse_peers([peer], TOPOLOGY_FIELDS)[0]
+        assert sys.getsizeof(record) < sys.getsizeof(peer)
+
+    def test_empty_result(self):
+        assert parse_peers(None, TOPOLOGY_FIELDS) == []
+
+
+class TestPeerBatch:
+    def _batch(self):
+        crawl = CrawlResult()
+        crawl.peers = {
+            "node_1": [_peer(1), _peer(2, connection_type="manual")],
+            "node_2": parse_peers([_peer(3, minping=0.002)], ("id", "addr", "connection_type", "pingtime", "minping")),
+            "node_3": [],
+        }
+        return PeerBatch.from_crawl(crawl, ("id", "connection_type", "pingtime", "minping", "servicesnames"))
+
+    def test_columns(self):
+        batch = self._batch()
+        assert len(batch) == 3
+        assert batch.column("id").tolist() == [1, 2, 3]
+        assert batch.column("connection_type") == ["outbound-full-relay", "manual", "outbound-full-relay"]
+        assert batch.column("servicesnames")[0] == ["NETWORK", "WITNESS"]
+        assert np.isnan(batch.column("minping")[:2]).all()
+
+    def test_codes(self):
+        codes, categories = self._batch().codes("connection_type")
+        assert categories == ["outbound-full-relay", "manual"]
+        assert codes.tolist() == [0, 1, 0]
+
+    def test_rows_of_nodes(self):
+        batch = self._batch()
+        assert batch.node_index().tolist() == [0, 0, 1]
+        assert batch.peers_of("node_3") == []
+        peer = batch.peers_of("node_2")[0]
+        assert peer["id"] == 3
+        assert peer["minping"] == pytest.approx(0.002)
+        assert "servicesnames" not in peer
+        assert batch.row(0).get("minping") is None
+
+
+class TestRecordsInCollectors:
+    def test_extract_connections(self):
+        records = parse_peers([_peer(1), _peer(2, peer="172.20.0.4", connection_type="manual")], TOPOLOGY_FIELDS)
+        names = {"172.20.0.3": "node_3", "172.20.0.4": "node_4"}
+        with patch("network_info.parse._docker_dns", side_effect=lambda ip: names.get(ip)):
+            assert extract_connections(records) == extract_connections([_peer(1), _peer(2, peer="172.20.0.4", connection_type="manual")])
+
+    def test_traffic_sample(self):
+        crawl = CrawlResult()
+        crawl.peers = {"node_1": parse_peers([_peer(1, peer="node_2", bytessent_per_msg={"inv": 10})], TRAFFIC_FIELDS)}
+        with patch("network_info.traffic.resolve_peer", side_effect=lambda p, node=None: (True, p["addr"].split(":")[0])):
+            sample = traffic_sample(["node_1", "node_2"], crawl, 0.0, ["inv", "*other*"])
+        assert sample.tensor()[0, 1, 0] == 10
+        assert sample.latency_matrix()[0, 1] == pytest.approx(0.01)
+
+    def test_crawl_with_fields(self):
+        rpc = MagicMock()
+        rpc.call.side_effect = lambda node, method, timeout: [_peer(1)]
+        result = crawl_peer_info(["node_1"], rpc=rpc, fields=TOPOLOGY_FIELDS)
+        peer = result.peers["node_1"][0]
+        assert isinstance(peer, PeerInfo)
+        assert peer.fields == TOPOLOGY_FIELDS
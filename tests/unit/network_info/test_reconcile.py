@@ -0,0 +1,189 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+from network_info.get_info import CrawlResult
+from network_info.reconcile import (
+    apply_plan,
+    manual_connections,
+    p2p_address,
+    reconcile,
+    repair_plan,
+    rewire,
+    rewire_plan,
+    topology_diff,
+)
+from scenario.rpc_caller import BitcoinRPCError
+
+NODES = ["node_1", "node_2", "node_3", "node_4"]
+
+
+@pytest.fixture(autouse=True)
+def resolve_names():
+    # peer addresses are node names: no docker lookup
+    with patch("network_info.reconcile.resolve_peer", side_effect=lambda p, node=None: (True, p["addr"].split(":")[0])):
+        yield
+
+
+class FakeNetwork:
+    """Nodes answering getpeerinfo and the batched repairs, connections being made at once."""
+
+    def __init__(self, manual, unreachable=()):
+        self.manual = {edge: i for i, edge in enumerate(manual)}  # (node, peer) manual connection -> peer id
+        self.next_id = len(self.manual)
+        self.lock = threading.Lock()
+        self.unreachable = set(unreachable)
+        self.batches = []
+        self.refuse = set()  # (node, peer) connections that cannot be opened
+        self.added = set()  # (node, address) addnode lists
+
+    def crawl(self, nodes):
+        result = CrawlResult()
+        for node in nodes:
+            if node in self.unreachable:
+                result.unreachable[node] = f"Timeout for {node}"
+                continue
+            result.peers[node] = []
+        for (node, peer), i in self.manual.items():
+            if node in result.peers:
+                result.peers[node].append({"id": i, "addr": f"{peer}:18444", "connection_type": "manual"})
+            if peer in result.peers:
+                result.peers[peer].append({"id": 100 + i, "addr": f"{node}:40000", "connection_type": "inbound"})
+        return result
+
+    def batch(self, node, calls, timeout):
+        with self.lock:
+            return self._batch(node, calls)
+
+    def _batch(self, node, calls):
+        self.batches.append((node, calls))
+        results = []
+        for method, params in calls:
+            if method == "addnode" and params[1] == "onetry":
+                peer = params[0].split(":")[0]
+                if (node, peer) not in self.refuse:
+                    self.manual[(node, peer)] = self.next_id
+                    self.next_id += 1
+                results.append(None)
+            elif method == "addnode" and params[1] == "add":
+                self.added.add((node, params[0]))
+                results.append(None)
+            elif method == "addnode":
+                if (node, params[0]) in self.added:
+                    self.added.remove((node, params[0]))
+                    results.append(None)
+                else:
+                    results.append(BitcoinRPCError("Node could not be removed. It has not been added previously."))
+            else:
+                self.manual = {edge: i for edge, i in self.manual.items() if not (edge[0] == node and i == params[1])}
+                results.append(None)
+        return results
+
+
+class TestDiff:
+    def test_manual_connections(self):
+        network = FakeNetwork([("node_1", "node_2"), ("node_3", "node_1")])
+        assert manual_connections(NODES, network.crawl(NODES)) == {("node_1", "node_2"): [0], ("node_3", "node_1"): [1]}
+
+    def test_connections_in_either_direction_satisfy(self):
+        actual = {("node_2", "node_1"): [0], ("node_3", "node_4"): [1]}
+        missing, extra = topology_diff([("node_1", "node_2"), ("node_2", "node_1"), ("node_1", "node_3")], actual)
+        assert missing == [("node_1", "node_3")]
+        assert extra == {("node_3", "node_4"): [1]}
+
+    def test_unreachable_nodes_are_excluded(self):
+        missing, extra = topology_diff([("node_1", "node_2"), ("node_3", "node_4")], {("node_2", "node_4"): [7]}, exclude=["node_4"])
+        assert missing == [("node_1", "node_2")]
+        assert extra == {}
+
+    def test_repair_plan(self):
+        plan = repair_plan([("node_1", "node_3")], {("node_1", "node_4"): [5, 6]}, lambda node: p2p_address(node, 18444))
+        assert plan == {"node_1": [
+            ("addnode", ["node_3:18448", "onetry"]),
+            ("addnode", ["node_4:18450", "remove"]),
+            ("disconnectnode", ["", 5]),
+            ("disconnectnode", ["", 6]),
+        ]}
+
+
+class TestApplyPlan:
+    def test_one_batch_per_node(self):
+        network = FakeNetwork([])
+        plan = {"node_1": [("addnode", ["node_2:18446", "onetry"]), ("addnode", ["node_3:18448", "remove"])],
+                "node_2": [("addnode", ["node_3:18448", "onetry"])]}
+        errors = apply_plan(network, plan)
+        assert errors == {}  # removing a peer that was never added is fine
+        assert sorted(node for node, _ in network.batches) == ["node_1", "node_2"]
+
+    def test_errors(self):
+        class Failing:
+            def batch(self, node, calls, timeout):
+                if node == "node_1":
+                    raise ConnectionError("Connection failed to node_1")
+                return [BitcoinRPCError("RPC error on node_2: boom")]
+
+        errors = apply_plan(Failing(), {"node_1": [("addnode", ["a", "onetry"])], "node_2": [("disconnectnode", ["", 3])]})
+        assert errors == {"node_1": ["Connection failed to node_1"], "node_2": ["disconnectnode ['', 3]: RPC error on node_2: boom"]}
+
+
+class TestReconcile:
+    def test_converges(self):
+        network = FakeNetwork([("node_1", "node_2"), ("node_4", "node_1")])
+        intended = [("node_1", "node_2"), ("node_2", "node_3"), ("node_3", "node_4")]
+
+        report = reconcile(NODES, intended, rpc=network, crawl=network.crawl, interval=0)
+
+        assert report.converged
+        assert len(report.rounds) == 1
+        assert report.rounds[0]["missing"] == 2 and report.rounds[0]["extra"] == 1
+        assert set(network.manual) == set(intended)
+
+    def test_already_converged(self):
+        network = FakeNetwork([("node_1", "node_2")])
+        report = reconcile(NODES, [("node_2", "node_1")], rpc=network, crawl=network.crawl, interval=0)
+        assert report.converged
+        assert report.rounds == []
+        assert network.batches == []
+
+    def test_gives_up(self):
+        network = FakeNetwork([])
+        network.refuse.add(("node_1", "node_2"))
+        report = reconcile(NODES, [("node_1", "node_2")], rpc=network, crawl=network.crawl, timeout=0.05, interval=0.01)
+        assert not report.converged
+        assert report.missing == [("node_1", "node_2")]
+        assert len(report.rounds) >= 1
+
+    def test_dry_run(self):
+        network = FakeNetwork([("node_3", "node_4")], unreachable=["node_2"])
+        report = reconcile(NODES, [("node_1", "node_3")], rpc=network, crawl=network.crawl, dry_run=True)
+        assert not report.converged
+        assert report.missing == [("node_1", "node_3")]
+        assert report.extra == {("node_3", "node_4"): [0]}
+        assert report.unreachable == {"node_2": "Timeout for node_2"}
+        assert network.batches == []
+
+
+class TestRewire:
+    def test_rewire_plan(self):
+        plan = rewire_plan(
+            [("node_1", "node_2"), ("node_2", "node_3")],
+            [("node_1", "node_2"), ("node_1", "node_3")],
+            lambda node: p2p_address(node, 18444),
+        )
+        assert plan == {
+            "node_1": [("addnode", ["node_3:18448", "add"]), ("addnode", ["node_3:18448", "onetry"])],
+            "node_2": [("addnode", ["node_3:18448", "remove"])],
+        }
+
+    def test_rewire(self):
+        old = [("node_1", "node_2"), ("node_2", "node_3")]
+        network = FakeNetwork(old)
+        network.added = {("node_1", "node_2:18446"), ("node_2", "node_3:18448")}
+        new = [("node_1", "node_2"), ("node_3", "node_4"), ("node_4", "node_1")]
+
+        errors, report = rewire(NODES, old, new, rpc=network, crawl=network.crawl, interval=0)
+
+        assert errors == {}
+        assert report.converged
+        assert set(network.manual) == set(new)
+        assert network.added == {("node_1", "node_2:18446"), ("node_3", "node_4:18450"), ("node_4", "node_1:18444")}
@@ -0,0 +1,124 @@
+from unittest.mock import patch
+
+import networkx as nx
+import pytest
+from network_info.get_info import CrawlResult
+from network_info.timeseries import TopologyReader, TopologyState, TopologyWriter, collect
+
+
+def _state(*edges, nodes=("node_1", "node_2", "node_3")):
+    return TopologyState(nodes, {(u, v): t for u, v, t in edges})
+
+
+SNAPSHOTS = [
+    (10.0, _state(("node_1", "node_2", "manual"), ("node_2", "node_1", "inbound"))),
+    (15.0, _state(("node_1", "node_2", "manual"), ("node_2", "node_1", "inbound"), ("node_1", "node_3", "manual"))),
+    (20.0, _state(("node_1", "node_3", "manual"))),
+    (25.0, _state(("node_1", "node_3", "inbound"), nodes=("node_1", "node_3", "node_4"))),
+    (30.0, _state()),
+]
+
+
+def _write(path, snapshots=SNAPSHOTS, keyframe_interval=2):
+    with TopologyWriter(str(path), keyframe_interval) as writer:
+        for time, state in snapshots:
+            writer.append(time, state)
+
+
+class TestTopologyTimeSeries:
+    @pytest.mark.parametrize("keyframe_interval", [1, 2, 100])
+    def test_state_at_snapshots(self, tmp_path, keyframe_interval):
+        path = tmp_path / "topology.bin"
+        _write(path, keyframe_interval=keyframe_interval)
+
+        reader = TopologyReader(str(path))
+        assert len(reader) == len(SNAPSHOTS)
+        for time, state in SNAPSHOTS:
+            assert reader.state_at(time) == state
+
+    def test_state_between_snapshots(self, tmp_path):
+        path = tmp_path / "topology.bin"
+        _write(path)
+
+        reader = TopologyReader(str(path))
+        assert reader.state_at(5.0) is None
+        assert reader.state_at(17.5) == SNAPSHOTS[1][1]
+        assert reader.state_at(1000.0) == SNAPSHOTS[-1][1]
+
+    def test_iterate(self, tmp_path):
+        path = tmp_path / "topology.bin"
+        _write(path)
+
+        reader = TopologyReader(str(path))
+        assert [(t, TopologyState(s.nodes, s.edges)) for t, s in reader] == SNAPSHOTS
+
+    def test_diffs_are_compact(self, tmp_path):
+        path = tmp_path / "topology.bin"
+        nodes = [f"node_{i}" for i in range(100)]
+        edges = [(nodes[i], nodes[(i + 1) % 100], "manual") for i in range(100)]
+        full = _state(*edges, nodes=nodes)
+        changed = _state(*edges[1:], nodes=nodes)
+        _write(path, [(0.0, full), (1.0, changed)], keyframe_interval=100)
+        size = path.stat().st_size
+
+        _write(tmp_path / "b.bin", [(0.0, full), (1.0, changed), (2.0, full)], keyframe_interval=100)
+        # one edge added back: a small diff, not a new copy of the graph
+        assert (tmp_path / "b.bin").stat().st_size - size < 40
+
+    def test_resume_appending(self, tmp_path):
+        path = tmp_path / "topology.bin"
+        _write(path, SNAPSHOTS[:3])
+        _write(path, SNAPSHOTS[3:])
+
+        reader = TopologyReader(str(path))
+        assert len(reader) == len(SNAPSHOTS)
+        for time, state in SNAPSHOTS:
+            assert reader.state_at(time) == state
+
+    def test_truncated_record_is_ignored(self, tmp_path):
+        path = tmp_path / "topology.bin"
+        _write(path)
+        data = path.read_bytes()
+        path.write_bytes(data[:-3])
+
+        reader = TopologyReader(str(path))
+        assert len(reader) == len(SNAPSHOTS) - 1
+        assert reader.state_at(100.0) == SNAPSHOTS[-2][1]
+
+        # appending again drops the incomplete record
+        _write(path, SNAPSHOTS[-1:])
+        assert TopologyReader(str(path)).state_at(100.0) == SNAPSHOTS[-1][1]
+
+    def test_not_a_timeseries(self, tmp_path):
+        path = tmp_path / "topology.bin"
+        path.write_bytes(b"hello")
+        with pytest.raises(ValueError):
+            TopologyReader(str(path))
+
+    def test_graph_round_trip(self, tmp_path):
+        path = tmp_path / "topology.bin"
+        G = nx.DiGraph()
+        G.add_nodes_from(["node_1", "node_2", "node_3"])
+        G.add_edge("node_1", "node_2", type="manual", color="red")
+        _write(path, [(1.0, TopologyState.from_graph(G))])
+
+        graph = TopologyReader(str(path)).graph_at(1.0)
+        assert set(graph.nodes) == {"node_1", "node_2", "node_3"}
+        assert graph["node_1"]["node_2"] == {"type": "manual", "color": "red"}
+
+
+class TestCollect:
+    @patch("network_info.timeseries._time.sleep")
+    @patch("network_info.graph.extract_connections")
+    def test_collect(self, mock_extract_connections, mock_sleep, tmp_path):
+        path = tmp_path / "topology.bin"
+        crawl = CrawlResult()
+        crawl.peers = {"node_1": ["peer"], "node_2": []}
+        mock_extract_connections.return_value = [("node_2", "manual")]
+
+        collect(["node_1", "node_2"], str(path), interval=1, count=3, crawl=lambda nodes: crawl)
+
+        reader = TopologyReader(str(path))
+        assert len(reader) == 3
+        assert reader.state_at(reader.times[-1]).edges == {("node_1", "node_2"): "manual"}
+        assert mock_sleep.call_count == 2
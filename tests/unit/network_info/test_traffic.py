@@ -0,0 +1,165 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from network_info.get_info import CrawlResult
+from network_info.traffic import (
+    MESSAGE_TYPES,
+    TrafficReader,
+    TrafficWriter,
+    collect_traffic,
+    traffic_rates,
+    traffic_sample,
+)
+
+NODES = ["node_1", "node_2", "node_3"]
+TYPES = ["inv", "tx", "*other*"]
+
+
+def _peer(peer, sent, recv, ping=0.01, minping=0.005):
+    return {
+        "addr": f"{peer}:18444",
+        "addrbind": "172.20.0.2:18444",
+        "bytessent_per_msg": sent,
+        "bytesrecv_per_msg": recv,
+        "pingtime": ping,
+        "minping": minping,
+    }
+
+
+def _crawl(**peers):
+    crawl = CrawlResult()
+    crawl.peers = peers
+    return crawl
+
+
+@pytest.fixture(autouse=True)
+def resolve_names():
+    # peer addresses are node names: no docker lookup
+    with patch("network_info.traffic.resolve_peer", side_effect=lambda p, node=None: (True, p["addr"].split(":")[0])):
+        yield
+
+
+class TestTrafficSample:
+    def test_tensor(self):
+        crawl = _crawl(
+            node_1=[_peer("node_2", {"inv": 100, "tx": 50}, {"inv": 30})],
+            node_2=[_peer("node_1", {"inv": 30}, {"inv": 100, "tx": 50, "sendcmpct": 7})],
+        )
+        sample = traffic_sample(NODES, crawl, 10.0, TYPES)
+        sent = sample.tensor("sent")
+        recv = sample.tensor("recv")
+
+        assert sent.shape == (3, 3, 3)
+        assert sent[0, 1, 0] == 100
+        assert sent[0, 1, 1] == 50
+        assert recv[1, 0, 2] == 7  # unknown message types are counted as *other*
+        assert sent.sum() == 180
+        assert sample.per_type("recv") == {"inv": 130, "tx": 50, "*other*": 7}
+
+    def test_connections_between_same_nodes_are_summed(self):
+        crawl = _crawl(node_1=[_peer("node_2", {"inv": 100}, {}), _peer("node_2", {"inv": 5}, {})])
+        sample = traffic_sample(NODES, crawl, 0.0, TYPES)
+        assert sample.tensor()[0, 1, 0] == 105
+
+    def test_unknown_peers_are_ignored(self):
+        crawl = _crawl(node_1=[_peer("10.0.0.1", {"inv": 100}, {})], node_3=None)
+        sample = traffic_sample(NODES, crawl, 0.0, TYPES)
+        assert sample.keys.size == 0
+        assert sample.tensor().sum() == 0
+
+    def test_latency_matrix(self):
+        crawl = _crawl(node_1=[_peer("node_3", {}, {}, ping=0.2, minping=0.1)])
+        sample = traffic_sample(NODES, crawl, 0.0, TYPES)
+        latency = sample.latency_matrix()
+        assert latency[0, 2] == pytest.approx(0.2)
+        assert sample.latency_matrix(minimum=True)[0, 2] == pytest.approx(0.1)
+        assert np.isnan(latency[2, 0])
+
+
+class TestTrafficRates:
+    def test_rates(self):
+        before = traffic_sample(NODES, _crawl(node_1=[_peer("node_2", {"inv": 100}, {"tx": 10})]), 10.0, TYPES)
+        after = traffic_sample(
+            NODES, _crawl(node_1=[_peer("node_2", {"inv": 300, "tx": 40}, {"tx": 10})]), 12.0, TYPES
+        )
+        rates = traffic_rates(before, after)
+        assert rates.interval == 2.0
+        assert rates.tensor("sent")[0, 1, 0] == 100
+        assert rates.tensor("sent")[0, 1, 1] == 20  # new counter: counted from 0
+        assert rates.tensor("recv")[0, 1, 1] == 0
+
+    def test_reconnection_resets_counters(self):
+        before = traffic_sample(NODES, _crawl(node_1=[_peer("node_2", {"inv": 1000}, {})]), 0.0, TYPES)
+        after = traffic_sample(NODES, _crawl(node_1=[_peer("node_2", {"inv": 40}, {})]), 4.0, TYPES)
+        assert traffic_rates(before, after).tensor()[0, 1, 0] == 10
+
+    def test_from_empty_sample(self):
+        before = traffic_sample(NODES, _crawl(), 0.0, TYPES)
+        after = traffic_sample(NODES, _crawl(node_1=[_peer("node_2", {"inv": 40}, {})]), 4.0, TYPES)
+        assert traffic_rates(before, after).tensor()[0, 1, 0] == 10
+
+    def test_time_must_increase(self):
+        sample = traffic_sample(NODES, _crawl(), 1.0, TYPES)
+        with pytest.raises(ValueError):
+            traffic_rates(sample, sample)
+
+
+class TestTrafficFile:
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / "traffic.bin")
+        samples = [
+            traffic_sample(NODES, _crawl(node_1=[_peer("node_2", {"inv": 100 * t}, {"tx": 7 * t})],
+                                         node_3=[_peer("node_1", {"tx": 3 * t}, {}, ping=0.5)]), float(t), TYPES)
+            for t in range(1, 4)
+        ]
+        rates = [traffic_rates(a, b) for a, b in zip(samples, samples[1:])]
+        with TrafficWriter(path, NODES, TYPES) as writer:
+            for r in rates:
+                writer.append(r)
+
+        reader = TrafficReader(path)
+        assert reader.nodes == NODES
+        assert reader.message_types == TYPES
+        read = list(reader)
+        assert len(read) == 2
+        for original, loaded in zip(rates, read):
+            assert loaded.time == original.time
+            assert loaded.interval == original.interval
+            np.testing.assert_allclose(loaded.tensor("sent"), original.tensor("sent"))
+            np.testing.assert_allclose(loaded.tensor("recv"), original.tensor("recv"))
+            np.testing.assert_allclose(loaded.latency_matrix(), original.latency_matrix())
+
+    def test_incomplete_last_record(self, tmp_path):
+        path = tmp_path / "traffic.bin"
+        peers = [_peer("node_2", {"inv": 100 * t}, {"tx": 7 * t}) for t in range(1, 4)]
+        for peer in peers:
+            del peer["pingtime"], peer["minping"]  # no latency entries
+        samples = [traffic_sample(NODES, _crawl(node_1=[peer]), float(t), TYPES) for t, peer in enumerate(peers, 1)]
+        with TrafficWriter(str(path), NODES, TYPES) as writer:
+            for a, b in zip(samples, samples[1:]):
+                writer.append(traffic_rates(a, b))
+        # the collector died while writing the traffic entries of the last record (no latency entries)
+        path.write_bytes(path.read_bytes()[:-3])
+
+        assert [sample.time for sample in TrafficReader(str(path))] == [2.0]
+
+    def test_not_a_traffic_file(self, tmp_path):
+        path = tmp_path / "traffic.bin"
+        path.write_bytes(b"nope")
+        with pytest.raises(ValueError):
+            TrafficReader(str(path))
+
+
+@patch("network_info.traffic._time.sleep")
+def test_collect_traffic(mock_sleep, tmp_path):
+    path = str(tmp_path / "traffic.bin")
+    crawls = iter([_crawl(node_1=[_peer("node_2", {"inv": v}, {})]) for v in (0, 100, 300)])
+
+    collect_traffic(NODES, path, interval=1, count=2, crawl=lambda nodes: next(crawls))
+
+    read = list(TrafficReader(path))
+    assert len(read) == 2
+    assert read[0].message_types == MESSAGE_TYPES
+    assert read[0].per_type()["inv"] * read[0].interval == pytest.approx(100, rel=1e-5)
+    assert read[1].per_type()["inv"] * read[1].interval == pytest.approx(200, rel=1e-5)
@@ -1,7 +1,8 @@
-from unittest.mock import Mock
+from unittest.mock import Mock, call, patch
 
 import pytest
-from scenario.actions import ActionExecutor
+from scenario import actions
+from scenario.actions import ActionExecutor, add_plugin_path, register_action
 from scenario.rpc_caller import BitcoinRPC
 
 
@@ -253,3 +254,139 @@ class TestActionExecutor:
                 )
 
             self.mock_rpc.call.reset_mock()
+
+
+class TestActionRegistry:
+    @pytest.fixture(autouse=True)
+    def clean_registry(self, monkeypatch):
+        monkeypatch.setattr(actions, "_PLUGINS", {})
+        monkeypatch.setattr(actions, "_PLUGIN_PATHS", [])
+        monkeypatch.setattr(actions, "_IMPORTED_PATHS", set())
+
+    def test_builtin_actions_are_declared(self):
+        assert set(ActionExecutor.BUILTIN_ACTIONS) == {
+            "cmd", "create_wallet", "create_address", "send_to", "mine"
+        }
+        spec = ActionExecutor.spec("mine")
+        assert spec.builtin and spec.batchable and spec.parallel_safe
+        assert spec.schema["address"] == (str, True)
+
+    def test_execute_does_not_reflect(self):
+        rpc = Mock(spec=BitcoinRPC)
+        executor = ActionExecutor(rpc)
+
+        with patch.object(ActionExecutor, "spec") as mock_spec:
+            executor.execute("cmd", "node_1", {"cmd": "getbalance"})
+
+        mock_spec.assert_not_called()
+        rpc.call.assert_called_once_with("node_1", "getbalance", [])
+
+    def test_register_action(self):
+        @register_action("balance", schema={"minconf": (int, False)}, parallel_safe=True)
+        def balance(rpc, node, params):
+            return rpc.call(node, "getbalance", ["*", params.get("minconf", 0)])
+
+        rpc = Mock(spec=BitcoinRPC)
+        rpc.call.return_value = 50
+        executor = ActionExecutor(rpc)
+
+        assert executor.execute("balance", "node_2", {"minconf": 1}) == 50
+        rpc.call.assert_called_once_with("node_2", "getbalance", ["*", 1])
+        assert executor.bind("balance") is executor.bind("balance")
+        assert ActionExecutor.action_schemas()["balance"] == {"minconf": (int, False)}
+        assert ActionExecutor.spec("balance").parallel_safe is True
+
+    def test_plugins_are_discovered_lazily(self, tmp_path):
+        (tmp_path / "ping.py").write_text(
+            "from scenario.actions import register_action\n"
+            "@register_action('ping')\n"
+            "def ping(rpc, node, params):\n"
+            "    return rpc.call(node, 'ping')\n"
+        )
+        add_plugin_path(str(tmp_path))
+        executor = ActionExecutor(Mock(spec=BitcoinRPC))
+
+        # built-in actions never import the plugins
+        executor.execute("create_wallet", "node_1")
+        assert "ping" not in actions._PLUGINS
+
+        executor.execute("ping", "node_1")
+        executor.rpc.call.assert_called_with("node_1", "ping")
+        assert ActionExecutor.spec("ping").schema is None
+
+    def test_execute_batch(self):
+        rpc = Mock(spec=BitcoinRPC)
+        rpc.batch.return_value = ["txid", ["block"]]
+        executor = ActionExecutor(rpc)
+
+        results = executor.execute_batch("node_1", [
+            ("send_to", {"to": "addr", "amount": 1, "wallet": "alice"}),
+            ("cmd", {"cmd": "getbalance", "wallet": "alice"}),
+        ])
+
+        assert results == ["txid", ["block"]]
+        rpc.batch.assert_called_once_with("node_1", [("sendtoaddress", ["addr", 1]), ("getbalance", [])], wallet="alice")
+        rpc.call.assert_not_called()
+
+    def test_execute_batch_needs_single_calls(self):
+        @register_action("twice", batchable=True)
+        def twice(rpc, node, params):
+            rpc.call(node, "ping")
+            return rpc.call(node, "ping")
+
+        @register_action("unbatched")
+        def unbatched(rpc, node, params):
+            return rpc.call(node, "ping")
+
+        rpc = Mock(spec=BitcoinRPC)
+        executor = ActionExecutor(rpc)
+        with pytest.raises(ValueError, match="does not make a single RPC call"):
+            executor.execute_batch("node_1", [("twice", {})])
+        with pytest.raises(ValueError, match="cannot be sent in a batch"):
+            executor.execute_batch("node_1", [("unbatched", {})])
+        rpc.call.assert_not_called()
+        rpc.batch.assert_not_called()
+
+    def test_execute_batch_splits_wallets(self):
+        rpc = Mock(spec=BitcoinRPC)
+        rpc.batch.side_effect = [["addr"], [["block"]], [3]]
+        executor = ActionExecutor(rpc)
+
+        # mine ignores the wallet of its step
+        results = executor.execute_batch("node_1", [
+            ("create_address", {"wallet": "alice"}),
+            ("mine", {"address": "addr", "wallet": "alice"}),
+            ("cmd", {"cmd": "getblockcount", "wallet": "alice"}),
+        ])
+
+        assert results == ["addr", ["block"], 3]
+        assert rpc.batch.call_args_list == [
+            call("node_1", [("getnewaddress", ["", "bech32"])], wallet="alice"),
+            call("node_1", [("generatetoaddress", [1, "addr"])], wallet=None),
+            call("node_1", [("getblockcount", [])], wallet="alice"),
+        ]
+
+    def test_missing_plugin_directory(self, tmp_path):
+        add_plugin_path(str(tmp_path / "missing"))
+        with pytest.raises(ValueError, match="Action 'nope' is not supported."):
+            ActionExecutor(Mock(spec=BitcoinRPC)).bind("nope")
+
+
+class TestWalletRouting:
+    def setup_method(self):
+        self.mock_rpc = Mock(spec=BitcoinRPC)
+        self.executor = ActionExecutor(self.mock_rpc)
+
+    def test_wallet_actions_use_the_wallet(self):
+        self.executor.execute("send_to", "node_1", {"to": "addr", "amount": 1, "wallet": "w1"})
+        self.mock_rpc.call.assert_called_once_with(
+            "node_1", "sendtoaddress", ["addr", 1], wallet="w1"
+        )
+
+    def test_cmd_uses_the_wallet(self):
+        self.executor.execute("cmd", "node_1", {"cmd": "getbalance", "wallet": "w2"})
+        self.mock_rpc.call.assert_called_once_with("node_1", "getbalance", [], wallet="w2")
+
+    def test_create_wallet_is_a_node_call(self):
+        self.executor.execute("create_wallet", "node_1", {"wallet_name": "w3", "wallet": "w1"})
+        self.mock_rpc.call.assert_called_once_with("node_1", "createwallet", ["w3"])
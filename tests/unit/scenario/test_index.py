@@ -0,0 +1,187 @@
+import datetime
+import os
+from unittest.mock import patch
+
+import pytest
+
+from scenario import ScenarioLoader
+from scenario.index import ScenarioIndex
+
+VALID_SCENARIO = """
+[scenario]
+name = "Indexed"
+author = "tester"
+date = 2025-06-10T13:08:00
+
+[config]
+default_node = "node_1"
+default_wait = 1
+timeout = 1
+
+[steps.step1]
+name = "Create wallet"
+action = "create_wallet"
+
+[steps.step2]
+name = "Balance"
+action = "cmd"
+args.cmd = "getbalance"
+"""
+
+INVALID_SCENARIO = """
+[scenario]
+name = "Broken"
+
+[steps.step1]
+name = "Create wallet"
+action = "create_wallet"
+"""
+
+
+class TestScenarioIndex:
+    def test_store_and_lookup(self, tmp_path):
+        path = tmp_path / "a.toml"
+        path.write_text("x")
+        index = ScenarioIndex(tmp_path / "cache")
+
+        assert index.lookup(path) is None
+        entry = index.store(path, b"x", {"name": "a"}, {"plan": 1})
+
+        assert index.lookup(path) is entry
+        assert index.load_plan(entry) == {"plan": 1}
+
+    def test_persisted_between_instances(self, tmp_path):
+        path = tmp_path / "a.toml"
+        path.write_text("x")
+        index = ScenarioIndex(tmp_path / "cache")
+        index.store(path, b"x", {"name": "a"}, {"plan": 1})
+        index.save()
+
+        reloaded = ScenarioIndex(tmp_path / "cache")
+        entry = reloaded.lookup(path)
+        assert entry["metadata"] == {"name": "a"}
+        assert reloaded.load_plan(entry) == {"plan": 1}
+
+    def test_touched_file_with_same_content_is_reused(self, tmp_path):
+        path = tmp_path / "a.toml"
+        path.write_text("x")
+        index = ScenarioIndex(tmp_path / "cache")
+        index.store(path, b"x", {"name": "a"}, {"plan": 1})
+
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        entry = index.lookup(path)
+
+        assert entry is not None
+        assert entry["mtime_ns"] == path.stat().st_mtime_ns
+
+    def test_modified_file_is_invalidated(self, tmp_path):
+        path = tmp_path / "a.toml"
+        path.write_text("x")
+        index = ScenarioIndex(tmp_path / "cache")
+        index.store(path, b"x", {"name": "a"}, {"plan": 1})
+
+        path.write_text("y")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert index.lookup(path) is None
+
+    def test_corrupted_index_is_ignored(self, tmp_path):
+        cache = tmp_path / "cache"
+        cache.mkdir()
+        (cache / "index.json").write_text("{not json")
+
+        assert ScenarioIndex(cache).entries == {}
+
+    def test_prune(self, tmp_path):
+        kept, removed = tmp_path / "a.toml", tmp_path / "b.toml"
+        kept.write_text("a")
+        removed.write_text("b")
+        index = ScenarioIndex(tmp_path / "cache")
+        index.store(kept, b"a", {}, {"plan": "a"})
+        index.store(removed, b"b", {}, {"plan": "b"})
+
+        index.prune([kept])
+
+        assert list(index.entries) == [str(kept)]
+        assert len(list(index.plans_dir.glob("*.json"))) == 1
+
+    def test_plans_are_json(self, tmp_path):
+        path = tmp_path / "a.toml"
+        path.write_text("x")
+        index = ScenarioIndex(tmp_path / "cache")
+        plan = {"scenario": {"date": datetime.datetime(2025, 6, 10, 13, 8), "day": datetime.date(2025, 6, 10),
+                             "at": datetime.time(7, 32)}, "steps": {"s1": {"args": {"amount": 1.5}}}}
+
+        entry = index.store(path, b"x", {}, plan)
+
+        assert (index.plans_dir / f"{entry['sha256']}.json").exists()
+        assert index.load_plan(entry) == plan
+
+    def test_prune_removes_pickled_plans(self, tmp_path):
+        path = tmp_path / "a.toml"
+        path.write_text("a")
+        index = ScenarioIndex(tmp_path / "cache")
+        entry = index.store(path, b"a", {}, {"plan": "a"})
+        (index.plans_dir / f"{entry['sha256']}.pickle").write_bytes(b"old plan")
+
+        index.prune([path])
+
+        assert [p.suffix for p in index.plans_dir.iterdir()] == [".json"]
+
+
+class TestIndexedLoader:
+    def test_describe_scenarios(self, tmp_path):
+        (tmp_path / "good.toml").write_text(VALID_SCENARIO)
+        (tmp_path / "bad.toml").write_text(INVALID_SCENARIO)
+        loader = ScenarioLoader(str(tmp_path), use_index=True)
+
+        with patch("builtins.print"):
+            described = loader.describe_scenarios()
+
+        assert [d["name"] for d in described] == ["bad", "good"]
+        assert described[0]["valid"] is False
+        assert described[1] == {
+            "name": "good",
+            "title": "Indexed",
+            "description": "",
+            "author": "tester",
+            "date": "2025-06-10 13:08:00",
+            "steps": 2,
+            "valid": True,
+        }
+
+    def test_unchanged_scenarios_are_not_parsed_again(self, tmp_path):
+        (tmp_path / "good.toml").write_text(VALID_SCENARIO)
+        ScenarioLoader(str(tmp_path), use_index=True).describe_scenarios()
+
+        loader = ScenarioLoader(str(tmp_path), use_index=True)
+        with patch("tomli.loads") as mock_loads, patch("builtins.print"):
+            described = loader.describe_scenarios()
+            data = loader.load_scenario("good")
+
+        mock_loads.assert_not_called()
+        assert described[0]["steps"] == 2
+        assert data["steps"]["step2"]["args"] == {"cmd": "getbalance"}
+
+    def test_modified_scenario_is_parsed_again(self, tmp_path):
+        path = tmp_path / "good.toml"
+        path.write_text(VALID_SCENARIO)
+        with patch("builtins.print"):
+            ScenarioLoader(str(tmp_path), use_index=True).load_scenario("good")
+
+        path.write_text(VALID_SCENARIO.replace('name = "Indexed"', 'name = "Changed"'))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        with patch("builtins.print"):
+            data = ScenarioLoader(str(tmp_path), use_index=True).load_scenario("good")
+        assert data["scenario"]["name"] == "Changed"
+
+    def test_invalid_scenario_raises(self, tmp_path):
+        (tmp_path / "bad.toml").write_text(INVALID_SCENARIO)
+        loader = ScenarioLoader(str(tmp_path), use_index=True)
+
+        with patch("builtins.print"), pytest.raises(ValueError, match="Invalid scenario data in bad.toml"):
+            loader.load_scenario("bad")
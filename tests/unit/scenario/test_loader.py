@@ -124,7 +124,7 @@ class TestScenarioLoader:
         with patch('builtins.print') as mock_print:
             result = ScenarioLoader._validator(invalid_data)
             assert result is False
-            mock_print.assert_called_with("[Scenario] Missing required step key: action")
+            mock_print.assert_called_with("[Scenario] Missing required step key: action (in steps.step1)")
 
     @patch('pathlib.Path.exists')
     @patch('builtins.open', new_callable=mock_open)
@@ -173,4 +173,41 @@ class TestScenarioLoader:
         loader = ScenarioLoader()
         
         with pytest.raises(ValueError, match="Invalid scenario data in invalid_scenario.toml"):
-            loader.load_scenario("invalid_scenario")
\ No newline at end of file
+            loader.load_scenario("invalid_scenario")
+
+PLUGIN_SCENARIO = """
+[scenario]
+name = "plugins"
+[config]
+default_node = "node_1"
+default_wait = 0
+timeout = 0
+[steps.s1]
+name = "first"
+action = "{action}"
+"""
+
+
+def test_plugins_are_imported_only_for_unknown_actions(tmp_path, monkeypatch):
+    from scenario import actions
+
+    monkeypatch.setattr(actions, "_PLUGINS", {})
+    monkeypatch.setattr(actions, "_PLUGIN_PATHS", [])
+    monkeypatch.setattr(actions, "_IMPORTED_PATHS", set())
+    (tmp_path / "plugins").mkdir()
+    (tmp_path / "plugins" / "ping.py").write_text(
+        "from scenario.actions import register_action\n"
+        "@register_action('ping', parallel_safe=True)\n"
+        "def ping(rpc, node, params):\n"
+        "    return rpc.call(node, 'ping')\n"
+    )
+    actions.add_plugin_path(str(tmp_path / "plugins"))
+    (tmp_path / "builtin.toml").write_text(PLUGIN_SCENARIO.format(action="mine"))
+    (tmp_path / "plugin.toml").write_text(PLUGIN_SCENARIO.format(action="ping"))
+
+    loader = ScenarioLoader(str(tmp_path))
+    assert loader.check_scenario("builtin") == ["steps.s1.args: missing required argument 'address'"]
+    assert "ping" not in actions._PLUGINS
+
+    assert loader.check_scenario("plugin") == []
+    assert "ping" in actions._PLUGINS
@@ -17,7 +17,7 @@ class TestBitcoinRPC:
         rpc = BitcoinRPC("user", "password", 19443)
         assert rpc.base_port == 19443
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_call_successful_request(self, mock_post):
         mock_response = Mock()
         mock_response.json.return_value = {"result": "success", "error": None}
@@ -35,7 +35,18 @@ class TestBitcoinRPC:
         assert call_args[1]["timeout"] == 10
         assert "http://localhost:18443" in call_args[0]
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
+    def test_call_custom_timeout(self, mock_post):
+        mock_response = Mock()
+        mock_response.json.return_value = {"result": [], "error": None}
+        mock_post.return_value = mock_response
+
+        rpc = BitcoinRPC("user", "password")
+        rpc.call("node_1", "getpeerinfo", timeout=2)
+
+        assert mock_post.call_args[1]["timeout"] == 2
+
+    @patch("requests.Session.post")
     def test_call_with_params(self, mock_post):
         mock_response = Mock()
         mock_response.json.return_value = {"result": "success", "error": None}
@@ -55,7 +66,7 @@ class TestBitcoinRPC:
     def test_port_calculation(self):
         rpc = BitcoinRPC("user", "password", 18443)
 
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             mock_response = Mock()
             mock_response.json.return_value = {"result": "success", "error": None}
             mock_post.return_value = mock_response
@@ -70,7 +81,7 @@ class TestBitcoinRPC:
             rpc.call("node_3", "getinfo")
             assert "http://localhost:18447" in mock_post.call_args[0][0]
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_call_rpc_error(self, mock_post):
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -86,7 +97,7 @@ class TestBitcoinRPC:
 
         assert "RPC error on node_1: Invalid method" in str(exc_info.value)
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_call_connection_error(self, mock_post):
         mock_post.side_effect = requests.ConnectionError("Connection refused")
 
@@ -97,7 +108,7 @@ class TestBitcoinRPC:
 
         assert "Connection failed to node_1" in str(exc_info.value)
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_call_timeout_error(self, mock_post):
         mock_post.side_effect = requests.Timeout("Request timeout")
 
@@ -108,7 +119,7 @@ class TestBitcoinRPC:
 
         assert "Timeout for node_1" in str(exc_info.value)
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_call_json_decode_error(self, mock_post):
         mock_response = Mock()
         mock_response.json.side_effect = json.JSONDecodeError("Invalid JSON", "doc", 0)
@@ -121,7 +132,7 @@ class TestBitcoinRPC:
 
         assert "Invalid JSON response from node_1" in str(exc_info.value)
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_call_unexpected_error(self, mock_post):
         mock_post.side_effect = ValueError("Unexpected error")
 
@@ -134,7 +145,7 @@ class TestBitcoinRPC:
             exc_info.value
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_call_no_result_field(self, mock_post):
         mock_response = Mock()
         mock_response.json.return_value = {"error": None}
@@ -145,7 +156,7 @@ class TestBitcoinRPC:
 
         assert result is None
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_call_payload_structure(self, mock_post):
         mock_response = Mock()
         mock_response.json.return_value = {"result": "success", "error": None}
@@ -163,7 +174,7 @@ class TestBitcoinRPC:
         assert payload["params"] == ["param1", "param2"]
         assert payload["id"] == 1
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_call_headers(self, mock_post):
         mock_response = Mock()
         mock_response.json.return_value = {"result": "success", "error": None}
@@ -179,7 +190,7 @@ class TestBitcoinRPC:
     def test_node_name_parsing_edge_cases(self):
         rpc = BitcoinRPC("user", "password")
 
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             mock_response = Mock()
             mock_response.json.return_value = {"result": "success", "error": None}
             mock_post.return_value = mock_response
@@ -188,7 +199,7 @@ class TestBitcoinRPC:
             rpc.call("bitcoin_node_5", "getinfo")
             assert "http://localhost:18451" in mock_post.call_args[0][0]
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_call_empty_params_default(self, mock_post):
         mock_response = Mock()
         mock_response.json.return_value = {"result": "success", "error": None}
@@ -201,3 +212,75 @@ class TestBitcoinRPC:
         call_args = mock_post.call_args
         payload = json.loads(call_args[1]["data"])
         assert payload["params"] == []
+
+    @patch("requests.Session.post")
+    def test_call_wallet_endpoint(self, mock_post):
+        mock_response = Mock()
+        mock_response.json.return_value = {"result": 1.5, "error": None}
+        mock_post.return_value = mock_response
+
+        rpc = BitcoinRPC("user", "password")
+        result = rpc.call("node_2", "getbalance", wallet="alice")
+
+        assert result == 1.5
+        assert mock_post.call_args[0][0] == "http://localhost:18445/wallet/alice"
+
+    def test_wallet_name_is_quoted(self):
+        rpc = BitcoinRPC("user", "password")
+        assert rpc.url("node_1", "my wallet/1") == "http://localhost:18443/wallet/my%20wallet%2F1"
+        assert rpc.url("node_1", "") == "http://localhost:18443/wallet/"
+        assert rpc.url("node_1") == "http://localhost:18443"
+
+    def test_url_of_remote_nodes(self):
+        rpc = BitcoinRPC("user", "password", hosts={"node_2": "10.0.0.2"})
+        assert rpc.url("node_2") == "http://10.0.0.2:18445"
+        assert rpc.url("node_3") == "http://localhost:18447"
+
+    def test_connections_are_pooled(self):
+        rpc = BitcoinRPC("user", "password", pool_size=8)
+        adapter = rpc.session.get_adapter("http://localhost:18443")
+        assert adapter._pool_connections == 8
+        assert adapter._pool_maxsize == 8
+
+    @patch("requests.Session.post")
+    def test_batch(self, mock_post):
+        mock_response = Mock()
+        mock_response.json.return_value = [
+            {"result": None, "error": {"code": -24, "message": "Node has not been added."}, "id": 1},
+            {"result": None, "error": None, "id": 0},
+        ]
+        mock_post.return_value = mock_response
+
+        rpc = BitcoinRPC("user", "password")
+        results = rpc.batch("node_2", [("addnode", ["node_1:18444", "onetry"]), ("addnode", ["node_3:18448", "remove"])])
+
+        payload = json.loads(mock_post.call_args[1]["data"])
+        assert [p["id"] for p in payload] == [0, 1]
+        assert payload[0]["params"] == ["node_1:18444", "onetry"]
+        assert mock_post.call_args[0][0] == "http://localhost:18445"
+        assert mock_post.call_count == 1
+        assert results[0] is None
+        assert isinstance(results[1], BitcoinRPCError)
+
+    @patch("requests.Session.post")
+    def test_batch_wallet(self, mock_post):
+        mock_post.return_value.json.return_value = [{"result": 1.5, "error": None, "id": 0}]
+
+        rpc = BitcoinRPC("user", "password")
+        assert rpc.batch("node_2", [("getbalance", [])], wallet="alice") == [1.5]
+        assert mock_post.call_args[0][0] == "http://localhost:18445/wallet/alice"
+
+    @patch("requests.Session.post")
+    def test_batch_rejected(self, mock_post):
+        mock_response = Mock()
+        mock_response.json.return_value = {"result": None, "error": {"code": -32700, "message": "Parse error"}, "id": None}
+        mock_post.return_value = mock_response
+
+        rpc = BitcoinRPC("user", "password")
+        with pytest.raises(BitcoinRPCError, match="Parse error"):
+            rpc.batch("node_1", [("getpeerinfo", [])])
+
+    @patch("requests.Session.post")
+    def test_batch_empty(self, mock_post):
+        assert BitcoinRPC("user", "password").batch("node_1", []) == []
+        mock_post.assert_not_called()
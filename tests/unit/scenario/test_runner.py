@@ -1,4 +1,5 @@
-from unittest.mock import Mock, patch
+import threading
+from unittest.mock import Mock, call, patch
 
 import pytest
 from scenario.runner import ScenarioNotLoadedError, ScenarioRunner, ScenarioRunnerError
@@ -42,8 +43,8 @@ class TestScenarioRunner:
         assert runner.loader == mock_loader_instance
         assert runner.executor == mock_executor_instance
 
-        mock_loader.assert_called_once_with("./scenarios")
-        mock_rpc.assert_called_once_with("test_user", "test_password", 18443)
+        mock_loader.assert_called_once_with("./scenarios", use_index=False, nodes=None)
+        mock_rpc.assert_called_once_with("test_user", "test_password", 18443, hosts=None)
         mock_executor.assert_called_once_with(mock_rpc_instance)
 
     @patch("scenario.runner.ActionExecutor")
@@ -63,14 +64,18 @@ class TestScenarioRunner:
             "custom_password",
             scenarios_dir="/custom/scenarios",
             base_port=19443,
+            use_index=True,
+            nodes=["node_1"],
         )
 
         assert runner.variables == {}
         assert runner.scenario is None
         assert runner.config is None
 
-        mock_loader.assert_called_once_with("/custom/scenarios")
-        mock_rpc.assert_called_once_with("custom_user", "custom_password", 19443)
+        mock_loader.assert_called_once_with(
+            "/custom/scenarios", use_index=True, nodes=["node_1"]
+        )
+        mock_rpc.assert_called_once_with("custom_user", "custom_password", 19443, hosts=None)
         mock_executor.assert_called_once_with(mock_rpc_instance)
 
     @patch("scenario.runner.ActionExecutor")
@@ -107,15 +112,20 @@ class TestScenarioRunner:
     def test_list_scenarios(self, mock_print, mock_loader, mock_rpc, mock_executor):
         """Test listing available scenarios."""
         mock_loader_instance = Mock()
-        mock_loader_instance.list_scenarios.return_value = ["scenario1", "scenario2"]
+        mock_loader_instance.describe_scenarios.return_value = [
+            {"name": "scenario1", "title": "First", "author": "me", "steps": 3, "valid": True},
+            {"name": "s2", "title": "Second", "author": "", "steps": 0, "valid": False},
+        ]
         mock_loader.return_value = mock_loader_instance
 
         runner = ScenarioRunner("user", "password")
         runner.list_scenarios()
 
-        mock_loader_instance.list_scenarios.assert_called_once()
+        mock_loader_instance.describe_scenarios.assert_called_once()
         mock_print.assert_any_call("Available scenarios:")
-        mock_print.assert_any_call("scenario1\nscenario2")
+        mock_print.assert_any_call(
+            "scenario1  First (me, 3 steps)\ns2         Second (unknown, 0 steps) [invalid]"
+        )
 
     @patch("scenario.runner.ActionExecutor")
     @patch("scenario.runner.BitcoinRPC")
@@ -126,7 +136,7 @@ class TestScenarioRunner:
     ):
         """Test listing scenarios when none are available."""
         mock_loader_instance = Mock()
-        mock_loader_instance.list_scenarios.return_value = []
+        mock_loader_instance.describe_scenarios.return_value = []
         mock_loader.return_value = mock_loader_instance
 
         runner = ScenarioRunner("user", "password")
@@ -492,3 +502,167 @@ class TestScenarioRunner:
         mock_executor_instance.execute.assert_called_once_with(
             "create_wallet", "node_1", {"wallet_name": "my_wallet"}
         )
+
+    @patch("scenario.runner.ActionExecutor")
+    @patch("scenario.runner.BitcoinRPC")
+    @patch("scenario.runner.ScenarioLoader")
+    @patch("builtins.print")
+    @patch("time.sleep")
+    def test_run_scenario_parallel_steps(
+        self, mock_sleep, mock_print, mock_loader, mock_rpc, mock_executor
+    ):
+        """Test that consecutive parallel steps run at the same time."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def execute(action, node, args):
+            if node in ("node_2", "node_3"):
+                barrier.wait()  # deadlocks unless both steps run concurrently
+            return node
+
+        mock_executor_instance = Mock()
+        mock_executor_instance.execute.side_effect = execute
+        mock_executor.return_value = mock_executor_instance
+
+        runner = ScenarioRunner("user", "password")
+        runner.scenario = {
+            "scenario": {"name": "Test Scenario"},
+            "steps": {
+                "s1": {"name": "first", "action": "cmd", "node": "node_1"},
+                "s2": {"name": "a", "action": "cmd", "node": "node_2", "parallel": True},
+                "s3": {"name": "b", "action": "cmd", "node": "node_3", "parallel": True},
+                "s4": {"name": "last", "action": "cmd", "node": "node_4"},
+            },
+        }
+        runner.config = {"default_node": "node_1", "default_wait": 0, "timeout": 0}
+
+        assert runner._step_groups() == [["s1"], ["s2", "s3"], ["s4"]]
+        runner.run_scenario()
+
+        assert mock_executor_instance.execute.call_count == 4
+        mock_print.assert_any_call("\n[SCENARIO] Steps 2-3/4 (in parallel)")
+        mock_print.assert_any_call("\n[SCENARIO] Step 4/4")
+
+    @patch("scenario.runner.ActionExecutor")
+    @patch("scenario.runner.BitcoinRPC")
+    @patch("scenario.runner.ScenarioLoader")
+    @patch("builtins.print")
+    def test_load_scenario_binds_actions(self, mock_print, mock_loader, mock_rpc, mock_executor):
+        """Test that actions are resolved when the scenario is loaded."""
+        mock_loader.return_value.load_scenario.return_value = {
+            "scenario": {"name": "n", "description": "d", "author": "a", "date": "x"},
+            "config": {"default_node": "node_1", "default_wait": 1, "timeout": 1},
+            "steps": {"s1": {"name": "x", "action": "mine"}, "s2": {"name": "y", "action": "cmd"}},
+        }
+
+        runner = ScenarioRunner("user", "password")
+        runner.load_scenario("test")
+
+        mock_executor.return_value.bind.assert_any_call("mine")
+        mock_executor.return_value.bind.assert_any_call("cmd")
+
+    @patch("scenario.runner.ActionExecutor")
+    @patch("scenario.runner.BitcoinRPC")
+    @patch("scenario.runner.ScenarioLoader")
+    @patch("builtins.print")
+    @patch("time.sleep")
+    def test_run_step_with_wallet(
+        self, mock_sleep, mock_print, mock_loader, mock_rpc, mock_executor
+    ):
+        """Test that the wallet of a step is passed to the action."""
+        runner = ScenarioRunner("user", "password")
+        runner.config = {"default_node": "node_1", "default_wait": 1}
+
+        step = {"name": "pay", "action": "send_to", "wallet": "alice",
+                "args": {"to": "addr", "amount": 1}}
+        runner._run_step(step)
+
+        mock_executor.return_value.execute.assert_called_once_with(
+            "send_to", "node_1", {"to": "addr", "amount": 1, "wallet": "alice"}
+        )
+        mock_print.assert_any_call("Running step: pay (on node: node_1, wallet: alice)")
+
+    @patch("scenario.runner.BitcoinRPC")
+    @patch("scenario.runner.ScenarioLoader")
+    @patch("builtins.print")
+    @patch("time.sleep")
+    def test_run_scenario_batches_steps(self, mock_sleep, mock_print, mock_loader, mock_rpc):
+        """Test that consecutive batchable steps on the same node are sent in one request."""
+        rpc = mock_rpc.return_value
+        rpc.batch.return_value = [{"name": "w1"}, "addr1"]
+        rpc.call.return_value = ["block"]
+
+        runner = ScenarioRunner("user", "password")
+        runner.scenario = {
+            "scenario": {"name": "Test Scenario"},
+            "steps": {
+                "s1": {"name": "wallet", "action": "create_wallet", "args": {"wallet_name": "w1"}},
+                "s2": {"name": "address", "action": "create_address", "args": {"store_result": "ADDR"}},
+                # uses a variable stored by the batch: sent after it
+                "s3": {"name": "mine", "action": "mine", "args": {"amount": 101, "address": "${ADDR}"}},
+                "s4": {"name": "other node", "action": "cmd", "node": "node_2", "args": {"cmd": "getblockcount"}},
+            },
+        }
+        runner.config = {"default_node": "node_1", "default_wait": 0, "timeout": 0}
+
+        assert runner._batches(runner._step_groups()) == [["s1", "s2"], ["s3"], ["s4"]]
+        runner.run_scenario()
+
+        rpc.batch.assert_called_once_with(
+            "node_1", [("createwallet", ["w1"]), ("getnewaddress", ["", "bech32"])], wallet=None
+        )
+        rpc.call.assert_any_call("node_1", "generatetoaddress", [101, "addr1"])
+        mock_print.assert_any_call("\n[SCENARIO] Steps 1-2/4 (in one batch)")
+
+        # a wait between steps keeps them apart
+        runner.config["default_wait"] = 1
+        assert runner._batches(runner._step_groups()) == [["s1"], ["s2"], ["s3"], ["s4"]]
+
+    @patch("scenario.runner.BitcoinRPC")
+    @patch("scenario.runner.ScenarioLoader")
+    @patch("builtins.print")
+    @patch("time.sleep")
+    def test_run_batch_with_actions_ignoring_the_wallet(self, mock_sleep, mock_print, mock_loader, mock_rpc):
+        """Test that a batch of steps on a wallet runs when some of its actions do not use the wallet."""
+        rpc = mock_rpc.return_value
+        rpc.batch.side_effect = [["addr1"], [["block"]]]
+
+        runner = ScenarioRunner("user", "password")
+        runner.scenario = {
+            "scenario": {"name": "Test Scenario"},
+            "steps": {
+                "s1": {"name": "address", "action": "create_address", "wallet": "alice", "args": {}},
+                "s2": {"name": "mine", "action": "mine", "wallet": "alice", "args": {"address": "x"}},
+            },
+        }
+        runner.config = {"default_node": "node_1", "default_wait": 0, "timeout": 0}
+
+        assert runner._batches(runner._step_groups()) == [["s1", "s2"]]
+        runner.run_scenario()
+
+        assert rpc.batch.call_args_list == [
+            call("node_1", [("getnewaddress", ["", "bech32"])], wallet="alice"),
+            call("node_1", [("generatetoaddress", [1, "x"])], wallet=None),
+        ]
+
+    @patch("scenario.runner.BitcoinRPC")
+    @patch("scenario.runner.ScenarioLoader")
+    @patch("builtins.print")
+    @patch("time.sleep")
+    def test_run_batch_reports_failed_step(self, mock_sleep, mock_print, mock_loader, mock_rpc):
+        """Test that a failed call of a batch fails its step."""
+        from scenario.rpc_caller import BitcoinRPCError
+
+        mock_rpc.return_value.batch.return_value = [1, BitcoinRPCError("RPC error on node_1: boom")]
+        runner = ScenarioRunner("user", "password")
+        runner.scenario = {
+            "scenario": {"name": "Test Scenario"},
+            "steps": {
+                "s1": {"name": "a", "action": "cmd", "args": {"cmd": "getblockcount"}},
+                "s2": {"name": "b", "action": "cmd", "args": {"cmd": "getbestblockhash"}},
+            },
+        }
+        runner.config = {"default_node": "node_1", "default_wait": 0, "timeout": 0}
+
+        with pytest.raises(BitcoinRPCError, match="boom"):
+            runner.run_scenario()
+        mock_print.assert_any_call("[ERROR] An error occurred while running step 's2': RPC error on node_1: boom")
@@ -0,0 +1,118 @@
+from scenario.actions import ActionExecutor
+from scenario.validator import ScenarioValidator
+
+
+def make_scenario(steps):
+    return {
+        "scenario": {"name": "test"},
+        "config": {"default_node": "node_1", "default_wait": 1, "timeout": 2},
+        "steps": steps,
+    }
+
+
+class TestScenarioValidator:
+    def setup_method(self):
+        self.validator = ScenarioValidator(
+            actions=ActionExecutor.action_schemas(), nodes=["node_1", "node_2"]
+        )
+
+    def test_valid_scenario(self):
+        data = make_scenario({
+            "s1": {"name": "addr", "action": "create_address", "args": {"store_result": "ADDR"}},
+            "s2": {"name": "mine", "action": "mine", "node": "node_2",
+                   "args": {"amount": 101, "address": "${ADDR}"}},
+            "s3": {"name": "send", "action": "send_to", "args": {"to": "${ADDR}", "amount": "10"},
+                   "wait_after": 0.5, "print": True},
+        })
+        assert self.validator.validate(data) == []
+
+    def test_reports_every_problem_at_once(self):
+        data = {
+            "config": {"default_node": "node_9", "default_wait": "1"},
+            "steps": {
+                "s1": {"name": "no action"},
+                "s2": {"name": "typo", "action": "mines"},
+                "s3": {"name": "bad args", "action": "mine", "node": "node_3",
+                       "args": {"amount": True, "adress": "x"}},
+                "s4": {"name": "late var", "action": "send_to",
+                       "args": {"to": "${LATER}", "amount": 1}},
+                "s5": {"name": "store", "action": "create_address", "args": {"store_result": "LATER"}},
+            },
+        }
+
+        errors = self.validator.validate(data)
+
+        assert errors == [
+            "Missing required key: scenario",
+            "config.default_wait must be int or float",
+            "Missing required config key: timeout",
+            "config.default_node: unknown node 'node_9'",
+            "Missing required step key: action (in steps.s1)",
+            "steps.s2: unknown action 'mines'",
+            "steps.s3.node: unknown node 'node_3'",
+            "steps.s3.args: missing required argument 'address'",
+            "steps.s3.args.amount must be int or str",
+            "steps.s3.args: unknown argument 'adress'",
+            "steps.s4: variable '${LATER}' is used before being stored",
+        ]
+
+    def test_step_field_types(self):
+        data = make_scenario({
+            "s1": {"name": "x", "action": "cmd", "args": {"cmd": "getbalance"},
+                   "wait_after": "2", "print": "yes", "retries": 3},
+        })
+        assert self.validator.validate(data) == [
+            "steps.s1.wait_after must be int or float",
+            "steps.s1.print must be bool",
+            "steps.s1: unknown key 'retries'",
+        ]
+
+    def test_nested_variable_references(self):
+        data = make_scenario({
+            "s1": {"name": "x", "action": "cmd", "args": {"cmd": "getblock ${HASH} ${HASH}"}},
+        })
+        assert self.validator.validate(data) == [
+            "steps.s1: variable '${HASH}' is used before being stored"
+        ]
+
+    def test_structure_only_without_actions_and_nodes(self):
+        validator = ScenarioValidator()
+        data = make_scenario({"s1": {"name": "x", "action": "anything", "node": "whatever"}})
+        assert validator.validate(data) == []
+
+    def test_action_without_schema_accepts_any_argument(self):
+        validator = ScenarioValidator(actions={"custom": None})
+        data = make_scenario({"s1": {"name": "x", "action": "custom", "args": {"a": 1}}})
+        assert validator.validate(data) == []
+
+    def test_invalid_tables(self):
+        data = {"scenario": {}, "config": [], "steps": {"s1": "not a table"}}
+        assert self.validator.validate(data) == [
+            "config must be a table",
+            "steps.s1 must be a table",
+        ]
+
+    def test_large_scenario(self):
+        steps = {"s0": {"name": "addr", "action": "create_address", "args": {"store_result": "A"}}}
+        for i in range(1, 5000):
+            steps[f"s{i}"] = {"name": "mine", "action": "mine", "args": {"address": "${A}"}}
+        steps["s4000"]["args"]["address"] = "${B}"
+
+        errors = self.validator.validate(make_scenario(steps))
+
+        assert errors == ["steps.s4000: variable '${B}' is used before being stored"]
+
+    def test_parallel_groups(self):
+        validator = ScenarioValidator(
+            actions={"safe": None, "unsafe": None}, parallel_safe=["safe"]
+        )
+        data = make_scenario({
+            "s1": {"name": "a", "action": "safe", "parallel": True, "args": {"store_result": "A"}},
+            "s2": {"name": "b", "action": "safe", "parallel": True, "args": {"x": "${A}"}},
+            "s3": {"name": "c", "action": "unsafe", "parallel": True},
+            "s4": {"name": "d", "action": "safe", "args": {"x": "${A}"}},
+        })
+        assert validator.validate(data) == [
+            "steps.s2: variable '${A}' is used before being stored",
+            "steps.s3: action 'unsafe' can not run in parallel",
+        ]
@@ -1,8 +1,8 @@
 import pytest
-import random
 import builtins
 import sys
 import pathlib
+import shutil
 
 # Patch sys.path so we can import the module directly from py/
 import importlib.util
@@ -13,6 +13,8 @@ generate_compose = importlib.util.module_from_spec(spec)
 sys.modules["generate_compose"] = generate_compose
 spec.loader.exec_module(generate_compose)
 
+from registry import read_node_names, read_shards
+
 def test_generate_names_basic():
     assert generate_compose.generate_names(3, "node") == ["node_1", "node_2", "node_3"]
     assert generate_compose.generate_names(0, "n") == []
@@ -24,25 +26,70 @@ def test_compute_ports_basic():
     ports = generate_compose.compute_ports(0, 100, 200, "x")
     assert ports == {}
 
-def test_generate_peers_deterministic(monkeypatch):
-    # Patch random to make the test deterministic
-    monkeypatch.setattr(random, "randint", lambda a, b: 1)
-    monkeypatch.setattr(random, "sample", lambda le, n: le[:n])
-    names = ["n1", "n2", "n3"]
-    peers = generate_compose.generate_peers(names, 2)
-    for k, v in peers.items():
-        assert len(v) == 1
-        assert k not in v
-        assert set(v).issubset(set(names) - {k})
-
-def test_generate_peers_max_peers(monkeypatch):
-    # If max_peers > available, should not exceed available
-    monkeypatch.setattr(random, "randint", lambda a, b: b)
-    monkeypatch.setattr(random, "sample", lambda le, n: le[:n])
-    names = ["a", "b", "c", "d"]
-    peers = generate_compose.generate_peers(names, 10)
-    for _, v in peers.items():
-        assert len(v) == len(names) - 1
+MODELS = ["uniform", "random_regular", "erdos_renyi", "barabasi_albert", "watts_strogatz", "geographic"]
+
+def _degrees(peers):
+    inbound = dict.fromkeys(peers, 0)
+    for selected in peers.values():
+        for peer in selected:
+            inbound[peer] += 1
+    return {name: len(selected) for name, selected in peers.items()}, inbound
+
+@pytest.mark.parametrize("model", MODELS)
+def test_topology_models_respect_caps(model):
+    names = generate_compose.generate_names(300, "n")
+    peers = generate_compose.generate_topology(names, model, max_peers=16, seed=3, max_outbound=6, degree=8)
+    outbound, inbound = _degrees(peers)
+    assert max(outbound.values()) <= 6
+    assert max(inbound.values()) <= 16 - generate_compose.RESERVED_OUTBOUND_SLOTS
+    pairs = [frozenset((name, peer)) for name, selected in peers.items() for peer in selected]
+    assert len(pairs) == len(set(pairs))  # no self connection, at most one per pair
+    assert all(len(pair) == 2 for pair in pairs)
+    assert sum(outbound.values()) > len(names)
+    assert peers == generate_compose.generate_topology(names, model, max_peers=16, seed=3, max_outbound=6, degree=8)
+
+def test_random_regular_degree():
+    names = generate_compose.generate_names(200, "n")
+    peers = generate_compose.generate_topology(names, "random_regular", seed=0, degree=6)
+    outbound, inbound = _degrees(peers)
+    degrees = [outbound[name] + inbound[name] for name in names]
+    assert max(degrees) <= 6
+    assert sum(degrees) / len(degrees) > 5.5  # only self and repeated pairs are dropped
+
+def test_barabasi_albert_hubs_are_capped():
+    names = generate_compose.generate_names(2000, "n")
+    peers = generate_compose.generate_topology(names, "barabasi_albert", max_peers=40, seed=0, degree=4)
+    _, inbound = _degrees(peers)
+    assert max(inbound.values()) == 40 - generate_compose.RESERVED_OUTBOUND_SLOTS
+
+def test_no_inbound_slot(capsys):
+    names = generate_compose.generate_names(10, "n")
+    peers = generate_compose.generate_topology(names, "uniform", max_peers=8, seed=0)
+    assert all(selected == [] for selected in peers.values())
+    assert "no inbound slot" in capsys.readouterr().out
+
+def test_file_model(tmp_path):
+    path = tmp_path / "edges.txt"
+    path.write_text("n_1 n_2\nn_2 n_1\nn_3 n_1\n")
+    peers = generate_compose.generate_topology(["n_1", "n_2", "n_3"], "file", file=str(path))
+    assert peers == {"n_1": ["n_2"], "n_2": [], "n_3": ["n_1"]}
+    path.write_text("n_1 n_9\n")
+    with pytest.raises(ValueError):
+        generate_compose.generate_topology(["n_1", "n_2"], "file", file=str(path))
+
+def test_unknown_model():
+    with pytest.raises(ValueError):
+        generate_compose.generate_topology(["n_1", "n_2"], "lattice")
+
+def test_register_topology():
+    @generate_compose.register_topology("line")
+    def line(names, rng, caps, params):
+        for i in range(len(names) - 1):
+            caps.add(i, i + 1)
+    try:
+        assert generate_compose.generate_topology(["a_1", "a_2", "a_3"], "line") == {"a_1": ["a_2"], "a_2": ["a_3"], "a_3": []}
+    finally:
+        del generate_compose.TOPOLOGY_MODELS["line"]
 
 def test_generate_command_addnode_and_logging(tmp_path, monkeypatch):
     # Prepare a fake template file
@@ -131,4 +178,237 @@ def test_export_data_prints(monkeypatch, tmp_path):
     node_names = ["n1"]
     generate_compose.export_data(all_ports, node_names, output_dir="data")
     assert any("Node names exported" in s for s in printed)
-    assert any("RPC ports exported" in s for s in printed)
\ No newline at end of file
+    assert any("RPC ports exported" in s for s in printed)
+def test_export_data_topology(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from registry import read_compose_topology, read_topology
+    all_ports = {"n_1": (1001, 2001), "n_2": (1003, 2003), "n_3": (1005, 2005)}
+    peers = {"n_1": ["n_2", "n_3"], "n_2": ["n_1"], "n_3": []}
+    generate_compose.export_data(all_ports, list(all_ports), output_dir="data", peers=peers)
+    edges = [("n_1", "n_2"), ("n_1", "n_3"), ("n_2", "n_1")]
+    assert read_topology("docker/data") == edges
+
+    # networks generated without the topology file: read back from the -addnode options
+    compose = tmp_path / "docker-compose.yml"
+    compose.write_text(
+        "services:\n\n"
+        "  n_1:\n    command:\n    - -addnode=n_2:2003 \n    - -addnode=n_3:2005 \n    - -debug=net \n"
+        "  n_2:\n    command:\n    - -addnode=n_1:2001 \n"
+        "  n_3:\n    command:\n    - -listen=1\n"
+        "networks:\n  bitcoin-net:\n    driver: bridge\n"
+    )
+    assert read_compose_topology(str(compose)) == edges
+    assert read_compose_topology(str(tmp_path / "missing.yml")) == []
+
+def test_template_compiled_once(tmp_path):
+    path = tmp_path / "t.template"
+    path.write_text("a={A} {{literal}} b={B}")
+    template = generate_compose.load_template(str(path))
+    assert template(A=1, B="x") == "a=1 {literal} b=x"
+    assert generate_compose.load_template(str(path)) is template
+    with pytest.raises(ValueError):
+        generate_compose.load_template(str(tmp_path / "t.txt"))
+
+@pytest.fixture
+def templates(tmp_path, monkeypatch):
+    root = pathlib.Path(__file__).parent.parent.parent
+    (tmp_path / "docker").mkdir()
+    shutil.copytree(root / "docker" / "templates", tmp_path / "docker" / "templates")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_write_compose_streams_services(templates, workers):
+    peers = generate_compose.write_compose(
+        node_number=20, max_peers=16, base_rpc=18443, base_p2p=18444, base_name="node",
+        output_file="out/docker-compose.yml", seed=7, workers=workers,
+    )
+    content = (templates / "out" / "docker-compose.yml").read_text()
+    assert content.startswith("services:")
+    assert content.count("container_name:") == 20
+    assert content.index("  node_2:") < content.index("  node_10:")  # services keep the node order
+    assert "bitcoin-net:" in content.split("networks:")[-1]
+    assert f"-addnode={peers['node_1'][0]}:" in content
+    assert not (templates / "out" / "docker-compose.yml.tmp").exists()
+
+def test_write_compose_failure_leaves_no_temporary_file(templates, monkeypatch):
+    generate_compose.write_compose(node_number=3, max_peers=16, base_rpc=18443, base_p2p=18444, base_name="node",
+                                   output_file="out/docker-compose.yml", seed=0)
+    previous = (templates / "out" / "docker-compose.yml").read_text()
+
+    def render(renderer, items, workers):
+        yield renderer(next(items))
+        raise ValueError("render failed")
+
+    monkeypatch.setattr(generate_compose, "render_services", render)
+    with pytest.raises(ValueError, match="render failed"):
+        generate_compose.write_compose(node_number=3, max_peers=16, base_rpc=18443, base_p2p=18444, base_name="node",
+                                       output_file="out/docker-compose.yml", seed=0)
+    assert (templates / "out" / "docker-compose.yml").read_text() == previous
+    assert not (templates / "out" / "docker-compose.yml.tmp").exists()
+
+def test_write_compose_is_reproducible(templates):
+    args = dict(node_number=30, max_peers=16, base_rpc=18443, base_p2p=18444, base_name="node", seed=1)
+    generate_compose.write_compose(output_file="a.yml", workers=1, **args)
+    generate_compose.write_compose(output_file="b.yml", workers=2, **args)
+    assert (templates / "a.yml").read_text() == (templates / "b.yml").read_text()
+
+def test_incremental_regeneration(templates, capsys):
+    args = dict(max_peers=32, base_rpc=18443, base_p2p=18444, base_name="node", output_file="docker/docker-compose.yml")
+    first = generate_compose.write_compose(node_number=10, **args)
+    old_services = generate_compose.read_compose_services("docker/docker-compose.yml")
+
+    # two more nodes: the existing ones keep their peers and their services do not change
+    second = generate_compose.write_compose(node_number=12, incremental=True, **args)
+    assert all(second[name] == first[name] for name in first)
+    changes = generate_compose.diff_services(old_services, generate_compose.read_compose_services("docker/docker-compose.yml"))
+    assert changes["added"] == ["node_11", "node_12"]
+    assert changes["changed"] == [] and changes["removed"] == []
+    assert len(changes["unchanged"]) == 10
+    assert "2 added, 0 removed, 0 changed, 10 unchanged" in capsys.readouterr().out
+
+    # fewer nodes: only the nodes that added a removed node change
+    third = generate_compose.write_compose(node_number=9, incremental=True, **args)
+    expected = {name for name in third if set(second[name]) & {"node_10", "node_11", "node_12"}}
+    out = capsys.readouterr().out
+    assert f"0 added, 3 removed, {len(expected)} changed, {9 - len(expected)} unchanged" in out
+    assert all(third[name] == [p for p in second[name] if p in third] for name in third)
+
+def test_locked_nodes_keep_their_peers():
+    names = generate_compose.generate_names(6, "n")
+    previous = {"n_1": ["n_2"], "n_2": [], "n_3": ["n_1", "n_9"]}
+    peers = generate_compose.generate_topology(names, "random_regular", max_peers=32, seed=0, degree=3, previous=previous)
+    assert peers["n_1"] == ["n_2"] and peers["n_2"] == [] and peers["n_3"] == ["n_1"]
+    assert any(peers[name] for name in ("n_4", "n_5", "n_6"))
+
+def test_write_compose_datadirs(templates):
+    args = dict(node_number=3, max_peers=16, base_rpc=18443, base_p2p=18444, base_name="node", seed=0)
+    generate_compose.write_compose(output_file="volumes.yml", **args)
+    assert "volumes:" not in (templates / "volumes.yml").read_text()
+
+    generate_compose.write_compose(output_file="binds.yml", datadirs="./nodes/", **args)
+    services = generate_compose.read_compose_services("binds.yml")
+    assert all(f"    - ./nodes/{name}:/home/bitcoin/.bitcoin" in services[name] for name in ("node_1", "node_2", "node_3"))
+
+def test_services_have_healthcheck(templates):
+    generate_compose.write_compose(output_file="health.yml", node_number=2, max_peers=16, base_rpc=18443,
+                                   base_p2p=18444, base_name="node", seed=0)
+    services = generate_compose.read_compose_services("health.yml")
+    assert '"-rpcport=18445", "-rpcuser=user", "-rpcpassword=password", "getblockchaininfo"]' in services["node_2"]
+    assert "      interval: 5s" in services["node_2"]
+
+def test_assign_profiles():
+    names = generate_compose.generate_names(10, "node")
+    profiles = generate_compose.assign_profiles(names, ratios={"miner": 1, "tiny": 2}, nodes={"node_10": "relay", "other": "miner"})
+    assert [profiles[name] for name in names] == ["miner"] * 3 + ["tiny"] * 6 + ["relay"]
+    assert generate_compose.assign_profiles(names) == {}
+    with pytest.raises(ValueError, match="Unknown resource profile"):
+        generate_compose.assign_profiles(names, ratios={"huge": 1})
+
+def test_parse_config_values():
+    assert generate_compose.parse_pairs(" miner:0.1, tiny:0.9 ,") == {"miner": "0.1", "tiny": "0.9"}
+    with pytest.raises(ValueError):
+        generate_compose.parse_pairs("miner")
+    assert generate_compose.parse_cpuset("0-2,8") == ["0", "1", "2", "8"]
+    assert generate_compose.parse_cpuset(None) == []
+    with pytest.raises(ValueError):
+        generate_compose.parse_cpuset("a-b")
+
+def test_estimate_memory():
+    names = generate_compose.generate_names(500, "node")
+    estimate = generate_compose.estimate_memory(names, generate_compose.assign_profiles(names, ratios={"miner": 0.02, "tiny": 0.98}))
+    assert estimate["miner"]["nodes"] == 10 and estimate["tiny"]["nodes"] == 490
+    assert all(values["expected"] <= values["limit"] + generate_compose.CONTAINER_OVERHEAD_MEMORY for values in estimate.values())
+    # the target: 500 nodes on a 64 GB host
+    assert sum(v["nodes"] * (v["limit"] + generate_compose.CONTAINER_OVERHEAD_MEMORY) for v in estimate.values()) < 64 * 1024
+    assert generate_compose.estimate_memory(names[:2], {})[None]["limit"] is None
+
+def test_write_compose_profiles(templates):
+    generate_compose.write_compose(output_file="profiles.yml", node_number=3, max_peers=16, base_rpc=18443,
+                                   base_p2p=18444, base_name="node", seed=0,
+                                   profiles={"nodes": {"node_1": "miner", "node_2": "tiny"}}, cpuset="4-5")
+    services = generate_compose.read_compose_services("profiles.yml")
+    assert "    - -dbcache=64\n    - -maxmempool=50\n    - -par=2\n    - -rpcthreads=4\n    - -rpcworkqueue=64" in services["node_1"]
+    assert "    cpus: 1.0\n    mem_limit: 384m\n    cpuset: \"4\"" in services["node_1"]
+    assert "    cpus: 0.1\n    mem_limit: 96m\n    cpuset: \"5\"" in services["node_2"]
+    assert "dbcache" not in services["node_3"] and "mem_limit" not in services["node_3"]
+    assert "    cpuset: \"4\"" in services["node_3"]
+
+def test_write_compose_netem(templates):
+    (templates / "netem.toml").write_text("[regions]\neu = 1\nus = 1\n[nodes]\nnode_4 = \"eu\"\n[latency]\neu.us = 40\n")
+    generate_compose.write_compose(output_file="netem.yml", node_number=4, max_peers=16, base_rpc=18443,
+                                   base_p2p=18444, base_name="node", seed=0, netem="netem.toml", subnet="10.9.0.0/24")
+    content = (templates / "netem.yml").read_text()
+    assert "    ipam:\n      config:\n      - subnet: 10.9.0.0/24\n" in content
+    services = generate_compose.read_compose_services("netem.yml")
+    assert list(services) == ["node_1", "netem_node_1", "node_2", "netem_node_2", "node_3", "netem_node_3",
+                              "node_4", "netem_node_4"]
+    # 3 nodes in eu (node_4 set in [nodes]): blocks of 8 addresses, after the block of the gateway
+    assert "      bitcoin-net:\n        ipv4_address: 10.9.0.9" in services["node_1"]
+    assert "      bitcoin-net:\n        ipv4_address: 10.9.0.11" in services["node_4"]
+    assert "      bitcoin-net:\n        ipv4_address: 10.9.0.17" in services["node_3"]
+    assert '    network_mode: "service:node_3"' in services["netem_node_3"]
+    assert "netem delay 40ms" in services["netem_node_3"]
+    # without netem file: no static IPs
+    generate_compose.write_compose(output_file="plain.yml", node_number=2, max_peers=16, base_rpc=18443,
+                                   base_p2p=18444, base_name="node", seed=0)
+    plain = (templates / "plain.yml").read_text()
+    assert "ipam" not in plain and "    networks:\n    - bitcoin-net\n" in plain
+
+def test_assign_regions():
+    from netem import NetemConfig
+
+    config = NetemConfig({}, {"node_1": "eu"}, {}, {})
+    with pytest.raises(ValueError, match="no region"):
+        generate_compose.assign_regions(["node_1", "node_2"], config)
+    assert generate_compose.assign_regions(["node_1"], config) == {"node_1": "eu"}
+
+def test_split_shards():
+    names = generate_compose.generate_names(7, "node")
+    assert generate_compose.split_shards(names, 3) == [names[:3], names[3:5], names[5:]]
+    with pytest.raises(ValueError):
+        generate_compose.split_shards(names[:2], 3)
+
+def test_write_sharded(templates):
+    peers = generate_compose.write_sharded(node_number=6, max_peers=16, base_rpc=18443, base_p2p=18444, base_name="node",
+                                           shards=3, hosts=["10.0.0.1", "10.0.0.2"], seed=3)
+    services = {}
+    for i in (1, 2, 3):
+        content = (templates / f"docker/shards/shard_{i}/docker-compose.yml").read_text()
+        assert f"bitcoin-net-{i}:" in content.split("networks:")[-1]
+        assert "file: ../../bitcoin_conf.conf" in content
+        services.update(generate_compose.read_compose_services(f"docker/shards/shard_{i}/docker-compose.yml"))
+    assert list(services) == generate_compose.generate_names(6, "node")  # ports and names of a single network
+    assert '    - "18445:18445"' in services["node_2"]
+
+    shard = {name: (int(name[5:]) + 1) // 2 for name in services}
+    for name, node_peers in peers.items():
+        for peer in node_peers:
+            port = 18444 + (int(peer[5:]) - 1) * 2
+            if shard[peer] == shard[name]:
+                assert f"-addnode={peer}:{port}" in services[name]
+            elif shard[peer] % 2 == shard[name] % 2:  # shards 1 and 3 on this host
+                assert f"-addnode=host.docker.internal:{port}" in services[name]
+                assert '"host.docker.internal:host-gateway"' in services[name]
+            else:
+                assert f"-addnode=10.0.0.{2 - shard[peer] % 2}:{port}" in services[name]
+    # only the nodes added from another shard publish their P2P port
+    targets = {peer for name in peers for peer in peers[name] if shard[peer] != shard[name]}
+    for name in services:
+        port = 18444 + (int(name[5:]) - 1) * 2
+        assert (f'"{port}:{port}"' in services[name]) == (name in targets)
+
+    assert read_node_names("docker/data") == list(services)
+    assert read_shards("docker/data")["node_3"] == ("shard_2", "10.0.0.2")
+    # fewer shards: the compose files of the others are removed
+    generate_compose.write_sharded(node_number=6, max_peers=16, base_rpc=18443, base_p2p=18444, base_name="node",
+                                   shards=2, seed=3)
+    assert not (templates / "docker/shards/shard_3").exists()
+    assert set(read_shards("docker/data").values()) == {("shard_1", "localhost"), ("shard_2", "localhost")}
+    # a single network again: the nodes all run here
+    generate_compose.write_compose(output_file="docker/docker-compose.yml", node_number=6, max_peers=16,
+                                   base_rpc=18443, base_p2p=18444, base_name="node", seed=3)
+    assert read_shards("docker/data") == {}
+    with pytest.raises(ValueError, match="not localhost"):
+        generate_compose.write_sharded(node_number=6, max_peers=16, base_rpc=18443, base_p2p=18444, base_name="node",
+                                       shards=2, hosts=["localhost", "10.0.0.2"])
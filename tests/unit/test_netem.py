@@ -0,0 +1,80 @@
+import ipaddress
+
+import pytest
+from netem import NetemPlan, allocate_blocks, load_netem
+
+NETEM = """
+[regions]
+eu = 0.5
+us = 0.5
+
+[nodes]
+node_1 = "asia"
+
+[latency]
+eu.eu = 5
+eu.us = 45
+us.asia = 150
+
+[jitter]
+eu.us = 4
+
+[loss]
+us.eu = 0.5
+
+[rate]
+asia = "20mbit"
+"""
+
+
+@pytest.fixture
+def netem_file(tmp_path):
+    path = tmp_path / "netem.toml"
+    path.write_text(NETEM)
+    return str(path)
+
+
+def test_load_netem(netem_file):
+    config = load_netem(netem_file)
+    assert config.regions == ["eu", "us", "asia"]
+    # a missing pair uses its reverse
+    assert config.link("us", "eu") == {"latency": 45, "jitter": 4, "loss": 0.5}
+    assert config.link("asia", "us") == {"latency": 150, "jitter": 0, "loss": 0}
+    assert config.link("asia", "asia") == {"latency": 0, "jitter": 0, "loss": 0}
+
+
+@pytest.mark.parametrize("content, message", [
+    ("[regions]\neu = 1\n[latency]\neu.mars = 3\n", "Unknown region"),
+    ("[regions]\neu = 1\n[latency]\neu = 3\n", "source.destination"),
+    ("[regions]\neu = 1\n[loss]\neu.eu = -1\n", "positive"),
+    ("[regions]\neu = 1\n[rate]\nus = '1mbit'\n", "Unknown region"),
+    ("[latency]\n", "No regions"),
+    ("[regions\n", "Invalid netem file"),
+])
+def test_invalid_netem(tmp_path, content, message):
+    path = tmp_path / "netem.toml"
+    path.write_text(content)
+    with pytest.raises(ValueError, match=message):
+        load_netem(str(path))
+
+
+def test_allocate_blocks():
+    blocks = allocate_blocks({"eu": 250, "us": 3}, "172.28.0.0/16")
+    assert blocks == {"eu": ipaddress.ip_network("172.28.1.0/24"), "us": ipaddress.ip_network("172.28.2.0/24")}
+    with pytest.raises(ValueError, match="do not fit"):
+        allocate_blocks({"eu": 250, "us": 3}, "172.28.0.0/24")
+
+
+def test_netem_plan(netem_file):
+    regions = {"node_1": "asia", "node_2": "eu", "node_3": "us", "node_4": "eu"}
+    plan = NetemPlan(load_netem(netem_file), regions, "10.5.0.0/24")
+
+    # one block per region, after the block of the gateway
+    assert [plan.ip(node) for node in regions] == ["10.5.0.13", "10.5.0.5", "10.5.0.9", "10.5.0.6"]
+    commands = plan.commands("asia")
+    assert commands[0] == "tc qdisc replace dev eth0 root handle 1: htb default 2"
+    assert "tc class add dev eth0 parent 1: classid 1:1 htb rate 20mbit" in commands
+    assert "tc qdisc add dev eth0 parent 1:11 handle 11: netem delay 150ms" in commands
+    assert "tc filter add dev eth0 parent 1: protocol ip prio 1 u32 match ip dst 10.5.0.8/30 flowid 1:11" in commands
+    assert "tc qdisc add dev eth0 parent 1:10 handle 10: netem delay 45ms 4ms distribution normal loss 0.5%" in plan.commands("us")
+    assert plan.script("node_2") == plan.script("node_4") == " && ".join(plan.commands("eu"))
@@ -0,0 +1,51 @@
+from registry import (
+    read_compose_services,
+    read_edge_list,
+    read_hosts,
+    read_node_names,
+    read_shards,
+    read_topology,
+    write_shards,
+    write_topology,
+)
+
+
+def test_read_node_names(tmp_path):
+    assert read_node_names(str(tmp_path)) == []
+    (tmp_path / ".env.node_names").write_text("# Node names\nnode_1\nnode_2\n\n")
+    assert read_node_names(str(tmp_path)) == ["node_1", "node_2"]
+
+
+def test_topology_round_trip(tmp_path):
+    assert read_topology(str(tmp_path)) == []
+    edges = [("node_1", "node_2"), ("node_2", "node_3")]
+    write_topology(edges, str(tmp_path))
+    assert read_topology(str(tmp_path)) == edges
+
+
+def test_shards_round_trip(tmp_path):
+    assert read_shards(str(tmp_path)) == {} and read_hosts(str(tmp_path)) == {}
+    shards = {"node_1": ("shard_1", "localhost"), "node_2": ("shard_2", "10.0.0.2")}
+    write_shards(shards, str(tmp_path))
+    assert read_shards(str(tmp_path)) == shards
+    assert read_hosts(str(tmp_path)) == {"node_2": "10.0.0.2"}
+
+
+def test_read_edge_list_csv(tmp_path):
+    path = tmp_path / "network.csv"
+    path.write_text("source,target,type\nnode_1,node_2,manual\nnode_3,node_1,outbound-full-relay\n")
+    assert read_edge_list(str(path)) == [("node_1", "node_2"), ("node_3", "node_1")]
+
+
+def test_read_compose_services(tmp_path):
+    compose = tmp_path / "docker-compose.yml"
+    compose.write_text(
+        "services:\n\n"
+        "  node_1:\n    image: bitcoin\n    command:\n    - -addnode=node_2:18446 \n\n"
+        "  node_2:\n    image: bitcoin\n\n"
+        "networks:\n  bitcoin-net:\n    driver: bridge\n"
+    )
+    services = read_compose_services(str(compose))
+    assert list(services) == ["node_1", "node_2"]
+    assert services["node_1"] == "  node_1:\n    image: bitcoin\n    command:\n    - -addnode=node_2:18446 \n"
+    assert read_compose_services(str(tmp_path / "missing.yml")) == {}
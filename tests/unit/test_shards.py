@@ -0,0 +1,24 @@
+from unittest.mock import MagicMock, patch
+
+from shards import compose_command, group_shards, running_shards
+
+
+def test_group_shards():
+    shards = {"node_1": ("shard_1", "10.0.0.1"), "node_2": ("shard_2", "10.0.0.2"), "node_3": ("shard_1", "10.0.0.1")}
+    assert group_shards(shards) == {"shard_1": ("10.0.0.1", ["node_1", "node_3"]), "shard_2": ("10.0.0.2", ["node_2"])}
+
+
+def test_compose_command():
+    assert compose_command("shard_2", "up", "-d") == [
+        "docker", "compose", "-p", "bitcoin-shard_2", "-f", "docker/shards/shard_2/docker-compose.yml", "up", "-d",
+    ]
+
+
+@patch("shards.subprocess.run")
+def test_running_shards(mock_run):
+    # shard_1 runs here, shard_2 runs on another host
+    mock_run.side_effect = [MagicMock(returncode=0, stdout="3f2a\n9c1e\n"), MagicMock(returncode=0, stdout="")]
+    shards = {"node_1": ("shard_1", "10.0.0.1"), "node_2": ("shard_2", "10.0.0.2")}
+
+    assert running_shards(shards) == ["shard_1"]
+    assert mock_run.call_args_list[1].args[0] == compose_command("shard_2", "ps", "-q")
@@ -0,0 +1,139 @@
+import io
+import os
+import tarfile
+from unittest.mock import patch
+
+import pytest
+import snapshot
+
+
+def _tar(files):
+    """A tar stream holding {path: content} (directories are created for each file)."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as archive:
+        directories = set()
+        for path, content in files.items():
+            parts = path.split("/")
+            for i in range(1, len(parts)):
+                directory = "/".join(parts[:i])
+                if directory not in directories:
+                    directories.add(directory)
+                    info = tarfile.TarInfo(directory)
+                    info.type = tarfile.DIRTYPE
+                    archive.addfile(info)
+            info = tarfile.TarInfo(path)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    buffer.seek(0)
+    return buffer
+
+
+class FakeDockerCp:
+    """Stands for 'docker cp container:path -', with the datadir of each container."""
+
+    def __init__(self, datadirs):
+        self.datadirs = datadirs
+        self.returncode = 0
+
+    def __call__(self, command, stdout, stderr):
+        container = command[2].split(":")[0]
+        self.stdout = _tar(self.datadirs[container]) if container in self.datadirs else io.BytesIO()
+        self.stderr = io.BytesIO(b"" if container in self.datadirs else f"No such container: {container}".encode())
+        self.returncode = 0 if container in self.datadirs else 1
+        return self
+
+    def wait(self):
+        return self.returncode
+
+
+@pytest.fixture
+def saved(tmp_path):
+    datadirs = {
+        node: {
+            "regtest/blocks/blk00000.dat": f"blocks of {node}".encode(),
+            "regtest/wallets/default/wallet.dat": f"wallet of {node}".encode(),
+            "regtest/peers.dat": b"addresses",
+            "regtest/debug.log": b"log",
+        }
+        for node in ("node_1", "node_2")
+    }
+    with patch("snapshot.subprocess.Popen", FakeDockerCp(datadirs)):
+        snapshot.save_snapshot("funded", ["node_1", "node_2"], snapshot_dir=str(tmp_path / "snapshots"))
+    return tmp_path
+
+
+def test_save_snapshot(saved):
+    assert snapshot.list_snapshots(str(saved / "snapshots")) == ["funded"]
+    with tarfile.open(snapshot.archive_path("funded", str(saved / "snapshots"))) as archive:
+        names = archive.getnames()
+    assert "node_1/regtest/blocks/blk00000.dat" in names
+    assert "node_2/regtest/wallets/default/wallet.dat" in names
+    assert not any(name.endswith(("peers.dat", "debug.log")) for name in names)
+
+
+def test_save_snapshot_error(tmp_path):
+    with patch("snapshot.subprocess.Popen", FakeDockerCp({})):
+        with pytest.raises(RuntimeError, match="node_1"):
+            snapshot.save_snapshot("broken", ["node_1"], snapshot_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_restore_snapshot(saved):
+    datadirs = saved / "nodes"
+    (datadirs / "node_1" / "regtest").mkdir(parents=True)
+    (datadirs / "node_1" / "regtest" / "stale.dat").write_text("old chain")
+
+    sources = snapshot.restore_snapshot("funded", ["node_1", "node_2", "node_3"], str(datadirs), str(saved / "snapshots"))
+
+    assert sources == {"node_1": "node_1", "node_2": "node_2", "node_3": "node_1"}
+    assert not (datadirs / "node_1" / "regtest" / "stale.dat").exists()
+    assert (datadirs / "node_2" / "regtest" / "wallets" / "default" / "wallet.dat").read_text() == "wallet of node_2"
+    # a node missing from the snapshot gets the chain, not the wallet of another node
+    assert (datadirs / "node_3" / "regtest" / "blocks" / "blk00000.dat").read_text() == "blocks of node_1"
+    assert not (datadirs / "node_3" / "regtest" / "wallets").exists()
+
+
+def test_snapshot_extracted_once(saved):
+    snapshots = str(saved / "snapshots")
+    directory = snapshot.extract_snapshot("funded", snapshots)
+    marker = os.path.join(directory, "node_1", "marker")
+    open(marker, "w").close()
+    assert snapshot.extract_snapshot("funded", snapshots) == directory
+    assert os.path.exists(marker)
+
+
+def test_restore_missing_snapshot(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        snapshot.restore_snapshot("missing", ["node_1"], str(tmp_path / "nodes"), str(tmp_path))
+
+
+def test_copy_datadir_without_cp(tmp_path):
+    (tmp_path / "source" / "blocks").mkdir(parents=True)
+    (tmp_path / "source" / "blocks" / "blk00000.dat").write_text("blocks")
+    with patch("snapshot.shutil.which", return_value=None):
+        snapshot.copy_datadir(str(tmp_path / "source"), str(tmp_path / "copy"))
+    assert (tmp_path / "copy" / "blocks" / "blk00000.dat").read_text() == "blocks"
+
+
+def test_clear_datadirs(tmp_path):
+    (tmp_path / "node_1" / "regtest").mkdir(parents=True)
+    snapshot.clear_datadirs(["node_1", "node_2"], str(tmp_path))
+    assert os.listdir(tmp_path / "node_1") == [] and os.listdir(tmp_path / "node_2") == []
+
+
+def test_has_datadirs(tmp_path):
+    compose = tmp_path / "docker-compose.yml"
+    compose.write_text("services:\n\n  node_1:\n    image: bitcoin\n\nnetworks:\n")
+    assert not snapshot.has_datadirs(["node_1"], str(compose))
+    compose.write_text("services:\n\n  node_1:\n    volumes:\n    - ./nodes/node_1:/home/bitcoin/.bitcoin\n"
+                       "  netem_node_1:\n    image: netshoot\n\nnetworks:\n")
+    assert snapshot.has_datadirs(["node_1"], str(compose))
+    assert not snapshot.has_datadirs(["node_1", "node_2"], str(compose))
+
+
+def test_clear_without_datadirs_or_registry(tmp_path, monkeypatch):
+    # default docker volumes: 'start' clears nothing, even before the network is generated
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(snapshot, "NODE_DATADIRS", None)
+    monkeypatch.setattr("sys.argv", ["snapshot.py", "clear"])
+    snapshot.main()
@@ -0,0 +1,81 @@
+import subprocess
+from unittest.mock import patch
+
+from staged_start import health_status, split_waves, start_waves, wait_healthy
+
+NODES = [f"node_{i}" for i in range(1, 8)]
+
+
+class FakeDocker:
+    """Containers becoming healthy after a number of health checks."""
+
+    def __init__(self, checks=1, never=(), prefix=""):
+        self.checks = checks
+        self.prefix = prefix
+        self.never = set(never)
+        self.started = []  # waves, in start order
+        self.seen = {}
+
+    def up(self, services):
+        self.started.append(list(services))
+
+    def status(self, containers):
+        result = {}
+        for container in containers:
+            running = any(container[len(self.prefix):] in wave for wave in self.started)
+            if not running:
+                result[container] = "missing"
+                continue
+            self.seen[container] = self.seen.get(container, 0) + 1
+            healthy = container not in self.never and self.seen[container] > self.checks
+            result[container] = "healthy" if healthy else "starting"
+        return result
+
+
+def test_split_waves():
+    assert split_waves(NODES, 3) == [NODES[:3], NODES[3:6], NODES[6:]]
+    assert split_waves(NODES, 0) == [NODES]
+    assert split_waves([], 0) == []
+
+
+def test_wait_healthy():
+    docker = FakeDocker(checks=2)
+    docker.up(["node_1", "node_2"])
+    assert wait_healthy(["node_1", "node_2"], timeout=5, interval=0, status=docker.status) == {}
+    assert docker.seen == {"node_1": 3, "node_2": 3}
+
+
+def test_wait_healthy_without_healthcheck():
+    assert wait_healthy(["node_1"], timeout=5, interval=0, status=lambda c: dict.fromkeys(c, "none")) == {}
+
+
+def test_waves_wait_for_the_previous_one():
+    docker = FakeDocker()
+    waves = []
+
+    def status(containers):
+        # a wave is only started once every node started before it is healthy
+        assert all(docker.seen.get(node, 0) > docker.checks for wave in docker.started[:-1] for node in wave)
+        return docker.status(containers)
+
+    reports = start_waves(NODES, 3, timeout=5, up=docker.up, status=status, interval=0,
+                          on_wave=lambda i, report: waves.append(i))
+    assert docker.started == [NODES[:3], NODES[3:6], NODES[6:]]
+    assert waves == [0, 1, 2]
+    assert all(report.ready for report in reports)
+
+
+def test_unhealthy_wave_is_reported():
+    docker = FakeDocker(never=["sweep_node_2"], prefix="sweep_")
+    reports = start_waves(NODES[:4], 2, timeout=0.05, up=docker.up, status=docker.status, interval=0.01,
+                          container_prefix="sweep_")
+    assert not reports[0].ready and reports[0].unhealthy == {"node_2": "starting"}
+    assert reports[1].ready
+    assert len(docker.started) == 2  # the next wave starts anyway
+
+
+def test_health_status():
+    output = "/node_1 healthy\n/node_2 none\n"
+    with patch("staged_start.subprocess.run", return_value=subprocess.CompletedProcess([], 1, output, "")) as run:
+        assert health_status(["node_1", "node_2", "node_3"]) == {"node_1": "healthy", "node_2": "none", "node_3": "missing"}
+    assert run.call_args[0][0][-3:] == ["node_1", "node_2", "node_3"]
@@ -0,0 +1,112 @@
+import subprocess
+import threading
+import time
+
+import pytest
+import sweep
+
+
+def test_parse_param():
+    assert sweep.parse_param("max_peers=8,16,32") == ("MAX_PEERS", [8, 16, 32])
+
+
+def test_parse_param_invalid():
+    with pytest.raises(ValueError):
+        sweep.parse_param("MAX_PEERS")
+    with pytest.raises(ValueError):
+        sweep.parse_param("RPC_USER=a,b")
+
+
+def test_cell_topology():
+    name, models = sweep.parse_param("topology_model=geographic, watts_strogatz")
+    assert models == ["geographic", "watts_strogatz"]
+    cell = sweep.plan_cells(sweep.expand_grid({name: models, "TOPOLOGY_DEGREE": [4]}), "test", 20000)[1]
+    assert cell.topology["model"] == "watts_strogatz"
+    assert cell.topology["degree"] == 4
+    assert "max_outbound" in cell.topology  # the rest comes from the config
+
+
+def test_expand_grid():
+    grid = sweep.expand_grid({"MAX_PEERS": [8, 16], "NODE_NUMBER": [20, 50, 100]})
+    assert len(grid) == 6
+    assert {"MAX_PEERS": 8, "NODE_NUMBER": 100} in grid
+    assert {"MAX_PEERS": 16, "NODE_NUMBER": 20} in grid
+
+
+def test_plan_cells_are_isolated():
+    grid = sweep.expand_grid({"NODE_NUMBER": [3, 5, 2]})
+    cells = sweep.plan_cells(grid, "test", 20000)
+
+    assert [c.project for c in cells] == ["test-c0", "test-c1", "test-c2"]
+    assert len({c.network for c in cells}) == 3
+    assert len({c.container_prefix for c in cells}) == 3
+    # port ranges are contiguous and never overlap
+    assert cells[0].port_range() == range(20000, 20006)
+    assert cells[1].port_range() == range(20006, 20016)
+    assert cells[2].port_range() == range(20016, 20020)
+    assert cells[1].base_p2p == 20007
+
+
+def test_run_cell_tears_down_failed_start(monkeypatch):
+    cell = sweep.plan_cells(sweep.expand_grid({"NODE_NUMBER": [3]}), "t", 20000)[0]
+    calls = []
+
+    def compose(cell, *args):
+        calls.append(args)
+        if args[0] == "up":
+            raise subprocess.CalledProcessError(1, "docker compose up", stderr="port is already allocated")
+
+    monkeypatch.setattr(sweep, "write_compose", lambda **kwargs: {})
+    monkeypatch.setattr(sweep, "_compose", compose)
+    result = sweep.run_cell(cell, "scenario", warmup=0, sync_timeout=1)
+
+    assert result["status"] == "failed"
+    assert calls == [("up", "-d"), ("down", "-v", "--remove-orphans")]
+
+
+def test_schedule_respects_node_budget():
+    cells = sweep.plan_cells(sweep.expand_grid({"NODE_NUMBER": [10, 10, 10, 10]}), "t", 20000)
+    lock = threading.Lock()
+    state = {"nodes": 0, "peak": 0}
+
+    def run(cell):
+        with lock:
+            state["nodes"] += cell.node_number
+            state["peak"] = max(state["peak"], state["nodes"])
+        time.sleep(0.05)
+        with lock:
+            state["nodes"] -= cell.node_number
+        return {"status": "ok"}
+
+    results = sweep.schedule(cells, run, max_nodes=20, max_parallel=4)
+
+    assert state["peak"] == 20
+    assert [r["cell"] for r in results] == ["t-c0", "t-c1", "t-c2", "t-c3"]
+    assert all(r["status"] == "ok" and r["NODE_NUMBER"] == 10 for r in results)
+
+
+def test_schedule_oversized_cell_and_failure():
+    cells = sweep.plan_cells(sweep.expand_grid({"NODE_NUMBER": [50, 5]}), "t", 20000)
+
+    def run(cell):
+        if cell.node_number == 5:
+            raise RuntimeError("boom")
+        return {"status": "ok"}
+
+    results = sweep.schedule(cells, run, max_nodes=10, max_parallel=2)
+
+    assert results[0]["status"] == "ok"
+    assert results[1] == {"cell": "t-c1", "NODE_NUMBER": 5, "status": "failed", "error": "boom"}
+
+
+def test_write_table(tmp_path, capsys):
+    output = tmp_path / "out" / "results.csv"
+    results = [{"cell": "t-c0", "MAX_PEERS": 8, "status": "ok", "scenario_time": 1.5,
+                "sync_time": 0.2, "synced_nodes": 5, "error": ""}]
+
+    sweep.write_table(results, ["MAX_PEERS"], str(output))
+
+    lines = output.read_text().splitlines()
+    assert lines[0] == "cell,MAX_PEERS,status,scenario_time,sync_time,synced_nodes,error"
+    assert lines[1] == "t-c0,8,ok,1.5,0.2,5,"
+    assert "t-c0" in capsys.readouterr().out